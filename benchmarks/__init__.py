@@ -0,0 +1,3 @@
+"""
+Benchmarks hors ligne de YouTube Segment Downloader (voir benchmarks.run)
+"""
@@ -0,0 +1,145 @@
+"""
+Latence de la boucle Tk de la GUI sous un flot de logs
+
+Des clips factices tournent dans la file de la GUI : chacun émet des
+lignes de log yt-dlp et des progressions aussi vite que possible. Pendant
+ce temps, un battement `after` mesure le retard de la boucle principale
+(une boucle réactive le rappelle à l'heure). Demande un affichage
+(DISPLAY, ou xvfb-run sous Linux).
+
+Usage:
+    python -m benchmarks.gui_log
+    python -m benchmarks.gui_log --lines 200000 --clips 4 --log-lines 500
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from youtube_segment_downloader import SegmentResult
+
+
+# Période du battement qui mesure la boucle principale (secondes)
+HEARTBEAT = 0.01
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def _flood(lines):
+    """Téléchargement factice : `lines` lignes de log et autant de progressions"""
+    def download(url, start_time, end_time, output_file=None, logger=None, progress_hook=None, **kwargs):
+        for i in range(lines):
+            logger.debug(f"[youtube] ligne de diagnostic {i} du segment {start_time}-{end_time}")
+            progress_hook({'status': 'downloading', 'downloaded_bytes': i + 1, 'total_bytes': lines,
+                           'speed': 1e6})
+        progress_hook({'status': 'finished', 'downloaded_bytes': lines, 'total_bytes': lines})
+        return SegmentResult(True, output_file or "flood.mp4")
+    return download
+
+
+def measure(lines=100000, clips=4, log_lines=None):
+    """
+    Inonde la GUI et mesure le retard de sa boucle principale
+
+    Args:
+        lines: Lignes de log émises au total
+        clips: Clips simultanés qui se partagent ces lignes
+        log_lines: Taille du journal (défaut de la GUI si None)
+
+    Returns:
+        dict: Retards du battement (ms), débit de lignes et état du journal
+    """
+    import tkinter as tk
+    from youtube_segment_downloader_gui import DEFAULT_LOG_LINES, YouTubeSegmentDownloaderGUI
+
+    root = tk.Tk()
+    with tempfile.TemporaryDirectory() as tmp:
+        gui = YouTubeSegmentDownloaderGUI(root, log_lines=log_lines or DEFAULT_LOG_LINES,
+                                          log_file=Path(tmp) / "gui.log")
+        gui.downloads.download = _flood(lines // clips)
+        gui.downloads.set_concurrency(clips)
+        delays = []
+        state = {"expected": None, "started": None, "elapsed": None}
+
+        def beat():
+            now = time.monotonic()
+            if state["expected"] is not None:
+                delays.append(now - state["expected"])
+            counts = gui.downloads.totals()["counts"]
+            if state["started"] is not None and counts["done"] == clips and gui.msg_queue.empty():
+                state["elapsed"] = now - state["started"]
+                root.quit()
+                return
+            state["expected"] = now + HEARTBEAT
+            root.after(int(HEARTBEAT * 1000), beat)
+
+        def start():
+            state["started"] = time.monotonic()
+            for i in range(clips):
+                gui.downloads.add("https://youtu.be/dQw4w9WgXcQ", "0:00", f"0:{10 + i}")
+
+        root.after(200, start)
+        root.after(200, beat)
+        # Garde-fou : une file qui ne se termine pas n'occupe pas le benchmark indéfiniment
+        root.after(600000, root.quit)
+        root.mainloop()
+        shown = int(gui.log_text.index('end-1c').split('.')[0]) - 1
+        spilled = gui.log.spilled
+        gui.log.close()
+    root.destroy()
+    if state["elapsed"] is None:
+        raise RuntimeError("la file ne s'est pas terminée dans le délai imparti")
+    late = [delay * 1000 for delay in delays]
+    return {
+        "lines": lines,
+        "clips": clips,
+        "seconds": round(state["elapsed"], 3),
+        "lines_per_second": round(lines / state["elapsed"]),
+        "delay_ms": {
+            "median": round(statistics.median(late), 2),
+            "p95": round(_percentile(late, 0.95), 2),
+            "p99": round(_percentile(late, 0.99), 2),
+            "max": round(max(late), 2),
+        },
+        "log_lines_shown": shown,
+        "log_lines_spilled": spilled,
+    }
+
+
+def main(argv=None):
+    """Point d'entrée : python -m benchmarks.gui_log"""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.gui_log",
+                                     description="Latence de la boucle Tk sous un flot de logs")
+    parser.add_argument("--lines", type=int, default=100000, help="Lignes de log émises (défaut: 100000)")
+    parser.add_argument("--clips", type=int, default=4, help="Clips simultanés (défaut: 4)")
+    parser.add_argument("--log-lines", type=int, help="Taille du journal de la GUI")
+    parser.add_argument("-o", "--output", help="Fichier JSON de résultats")
+    args = parser.parse_args(argv)
+
+    try:
+        import tkinter
+    except ImportError as e:
+        print(f"❌ Erreur: tkinter indisponible ({e})")
+        sys.exit(1)
+    try:
+        report = measure(args.lines, args.clips, args.log_lines)
+    except (tkinter.TclError, RuntimeError) as e:
+        # TclError : pas d'affichage
+        print(f"❌ Erreur: {e}")
+        sys.exit(1)
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        Path(args.output).write_text(text)
+        print(f"📄 Résultats écrits dans {args.output}")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
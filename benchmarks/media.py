@@ -0,0 +1,102 @@
+"""
+Génération des médias synthétiques servis par le serveur de substitution
+
+Une mire (testsrc2) et une sinusoïde sont encodées une fois en flux
+séparés vidéo seule / audio seul, comme les formats adaptatifs de
+YouTube, puis déclinées en :
+    manifest.mpd      DASH, une représentation par fichier (comme YouTube)
+    hls/index.m3u8    HLS en segments fMP4
+    muxed.mp4         MP4 progressif vidéo + audio (comme le format 18)
+"""
+
+import json
+import subprocess
+from pathlib import Path
+
+
+DEFAULT_DURATION = 180
+
+# Chemins relatifs au répertoire des médias, par format servi
+ENTRY_POINTS = {
+    "dash": "manifest.mpd",
+    "hls": "hls/index.m3u8",
+    "progressive": "muxed.mp4",
+}
+
+_MPD_TEMPLATE = """<?xml version="1.0" encoding="UTF-8"?>
+<MPD xmlns="urn:mpeg:dash:schema:mpd:2011" profiles="urn:mpeg:dash:profile:isoff-on-demand:2011"
+     type="static" minBufferTime="PT1.5S" mediaPresentationDuration="PT{duration}S">
+  <Period>
+    <AdaptationSet mimeType="video/mp4" contentType="video" subsegmentAlignment="true">
+      <Representation id="video" codecs="avc1.64001f" width="{width}" height="{height}"
+                      frameRate="{fps}" bandwidth="{video_bandwidth}">
+        <BaseURL>video.mp4</BaseURL>
+      </Representation>
+    </AdaptationSet>
+    <AdaptationSet mimeType="audio/mp4" contentType="audio" subsegmentAlignment="true">
+      <Representation id="audio" codecs="mp4a.40.2" audioSamplingRate="44100" bandwidth="{audio_bandwidth}">
+        <BaseURL>audio.m4a</BaseURL>
+      </Representation>
+    </AdaptationSet>
+  </Period>
+</MPD>
+"""
+
+
+def _ffmpeg(ffmpeg_path, *args):
+    subprocess.run([ffmpeg_path, "-hide_banner", "-loglevel", "error", "-y", *args], check=True)
+
+
+def generate_media(directory, ffmpeg_path="ffmpeg", duration=DEFAULT_DURATION, size="1280x720", fps=25,
+                   gop_seconds=2, video_bitrate="2M"):
+    """
+    Génère les médias de test, ou réutilise ceux déjà générés avec les
+    mêmes paramètres
+
+    Args:
+        directory: Répertoire de destination (créé si besoin)
+        ffmpeg_path: Exécutable ffmpeg
+        duration: Durée en secondes
+        size: Résolution de la vidéo (LARGEURxHAUTEUR)
+        fps: Images par seconde
+        gop_seconds: Intervalle entre images clés (secondes)
+        video_bitrate: Débit vidéo cible (syntaxe ffmpeg)
+
+    Returns:
+        dict: Paramètres des médias générés (durée, résolution...)
+
+    Raises:
+        subprocess.CalledProcessError: Si ffmpeg échoue
+    """
+    directory = Path(directory)
+    params = {"duration": duration, "size": size, "fps": fps, "gop_seconds": gop_seconds,
+              "video_bitrate": video_bitrate}
+    stamp = directory / "media.json"
+    if stamp.exists() and json.loads(stamp.read_text()) == params:
+        return params
+    (directory / "hls").mkdir(parents=True, exist_ok=True)
+    video, audio = directory / "video.mp4", directory / "audio.m4a"
+    gop = str(fps * gop_seconds)
+
+    _ffmpeg(ffmpeg_path, "-f", "lavfi", "-i", f"testsrc2=size={size}:rate={fps}:duration={duration}",
+            "-c:v", "libx264", "-preset", "veryfast", "-pix_fmt", "yuv420p",
+            "-b:v", video_bitrate, "-maxrate", video_bitrate, "-bufsize", video_bitrate,
+            "-g", gop, "-keyint_min", gop, "-sc_threshold", "0",
+            "-movflags", "+faststart", str(video))
+    _ffmpeg(ffmpeg_path, "-f", "lavfi", "-i", f"sine=frequency=440:sample_rate=44100:duration={duration}",
+            "-c:a", "aac", "-b:a", "128k", "-movflags", "+faststart", str(audio))
+    _ffmpeg(ffmpeg_path, "-i", str(video), "-i", str(audio), "-map", "0:v", "-map", "1:a", "-c", "copy",
+            "-movflags", "+faststart", str(directory / "muxed.mp4"))
+    _ffmpeg(ffmpeg_path, "-i", str(video), "-i", str(audio), "-map", "0:v", "-map", "1:a", "-c", "copy",
+            "-f", "hls", "-hls_time", str(gop_seconds), "-hls_segment_type", "fmp4",
+            "-hls_playlist_type", "vod", "-hls_segment_filename", str(directory / "hls" / "seg%04d.m4s"),
+            str(directory / "hls" / "index.m3u8"))
+
+    width, height = size.split("x")
+    (directory / "manifest.mpd").write_text(_MPD_TEMPLATE.format(
+        duration=duration, width=width, height=height, fps=fps,
+        video_bandwidth=video.stat().st_size * 8 // duration,
+        audio_bandwidth=audio.stat().st_size * 8 // duration,
+    ))
+    stamp.write_text(json.dumps(params))
+    return params
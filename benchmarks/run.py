@@ -0,0 +1,339 @@
+"""
+Benchmark hors ligne du chemin de téléchargement
+
+Génère des médias synthétiques, les sert via StandInServer et lance
+download_segment pour chaque combinaison format / mode de découpage /
+longueur de segment / connexions / moteur. Chaque mesure tourne dans un processus
+neuf : temps CPU et pic de mémoire ne concernent que ce téléchargement
+(ffmpeg compris).
+
+Usage:
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --bandwidth 4M --latency 0.05 --baseline old.json
+    python -m benchmarks.run --engines ytdlp direct --cut-modes precise keyframe
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from youtube_segment_downloader.throttle import parse_rate
+
+from .media import DEFAULT_DURATION, ENTRY_POINTS, generate_media
+from .standin import StandInServer
+
+
+SCHEMA_VERSION = 1
+ROOT = Path(__file__).resolve().parents[1]
+
+# Métriques comparées à la référence (les plus basses sont les meilleures)
+COMPARED_METRICS = ("wall_seconds", "cpu_seconds", "peak_rss_kib", "bytes_transferred")
+# En dessous de ces écarts absolus, une variation relative est du bruit
+NOISE_FLOOR = {"wall_seconds": 0.1, "cpu_seconds": 0.1, "peak_rss_kib": 4096, "bytes_transferred": 65536}
+
+
+def _timestamp(seconds):
+    return f"{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+def _maxrss_kib(usage):
+    # ru_maxrss est en octets sous macOS, en Kio ailleurs
+    return usage.ru_maxrss // 1024 if sys.platform == "darwin" else usage.ru_maxrss
+
+
+def _probe_duration(ffmpeg_path, path):
+    from youtube_segment_downloader.cutting import get_ffprobe_path
+
+    proc = subprocess.run([get_ffprobe_path(ffmpeg_path), "-v", "error", "-show_entries", "format=duration",
+                           "-of", "csv=p=0", path], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    try:
+        return round(float(proc.stdout.strip()), 3)
+    except ValueError:
+        return None
+
+
+def run_case(case):
+    """
+    Exécute un téléchargement dans le processus courant (processus fils)
+
+    Args:
+        case: dict avec url, start, length, cut_mode, parallel_ranges,
+            engine, ffmpeg et output
+
+    Returns:
+        dict: Mesures du téléchargement
+    """
+    from youtube_segment_downloader import downloader
+
+    # Le serveur de substitution n'est pas une URL YouTube
+    downloader.validate_url = lambda url: url
+    downloader.extract_video_id = lambda url: "benchmark"
+
+    session = downloader.SegmentDownloader(ffmpeg_path=case["ffmpeg"], cache=False, clip_cache=False)
+    started = time.monotonic()
+    result = session.download(case["url"], _timestamp(case["start"]), _timestamp(case["start"] + case["length"]),
+                              case["output"], verbose=False, cut_mode=case["cut_mode"],
+                              parallel_ranges=case["parallel_ranges"], engine=case.get("engine", "ytdlp"))
+    wall = time.monotonic() - started
+    session.close()
+
+    duration = _probe_duration(case["ffmpeg"], case["output"]) if result else None
+    error = result.error
+    if result and not duration:
+        # Un fichier sans image (seek impossible...) n'est pas un succès
+        error = "Fichier produit vide"
+    measures = {
+        "success": error is None,
+        "error": error,
+        "wall_seconds": round(wall, 3),
+        "output_bytes": os.path.getsize(case["output"]) if result else 0,
+        "output_duration": duration,
+        "phases": {p["phase"]: p["elapsed"] for p in (result.stats or {}).get("phases", [])},
+    }
+    if resource is not None:
+        own = resource.getrusage(resource.RUSAGE_SELF)
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        measures.update({
+            "cpu_seconds": round(own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime, 3),
+            "peak_rss_kib": _maxrss_kib(own),
+            "peak_child_rss_kib": _maxrss_kib(children),
+        })
+    else:
+        measures.update({"cpu_seconds": round(time.process_time(), 3), "peak_rss_kib": None,
+                         "peak_child_rss_kib": None})
+    return measures
+
+
+def _spawn_case(case, cache_dir):
+    """Lance run_case dans un processus neuf et retourne ses mesures"""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ROOT), env.get("PYTHONPATH")]))
+    # Caches isolés : chaque mesure part à froid
+    env["YT_SEGMENT_CACHE_DIR"] = str(cache_dir)
+    started = time.monotonic()
+    proc = subprocess.run([sys.executable, "-m", "benchmarks.run", "--case", json.dumps(case)],
+                          env=env, cwd=str(ROOT), stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    elapsed = time.monotonic() - started
+    if proc.returncode != 0:
+        return {"success": False, "error": (proc.stderr.strip().splitlines() or ["?"])[-1]}
+    measures = json.loads(proc.stdout.strip().splitlines()[-1])
+    # Durée du processus complet, imports compris
+    measures["process_seconds"] = round(elapsed, 3)
+    return measures
+
+
+def _median(runs, key):
+    values = [run[key] for run in runs if run.get(key) is not None]
+    return statistics.median(values) if values else None
+
+
+def _environment(ffmpeg_path):
+    try:
+        ffmpeg_version = subprocess.run([ffmpeg_path, "-version"], stdout=subprocess.PIPE,
+                                        text=True).stdout.splitlines()[0]
+    except (OSError, IndexError):
+        ffmpeg_version = None
+    try:
+        from yt_dlp.version import __version__ as yt_dlp_version
+    except ImportError:
+        yt_dlp_version = None
+    from youtube_segment_downloader import __version__
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "package": __version__,
+        "yt_dlp": yt_dlp_version,
+        "ffmpeg": ffmpeg_version,
+    }
+
+
+def run_benchmarks(formats, cut_modes, lengths, parallel_ranges, repeat=3, start=30, latency=0.0,
+                   bandwidth=None, media_dir=None, ffmpeg_path=None, duration=DEFAULT_DURATION, log=print,
+                   engines=("ytdlp",)):
+    """
+    Exécute la matrice de benchmarks
+
+    Args:
+        formats: Formats servis ("dash", "hls", "progressive")
+        cut_modes: Modes de découpage
+        lengths: Longueurs de segment (secondes)
+        parallel_ranges: Valeurs de parallel_ranges à mesurer
+        repeat: Nombre de mesures par combinaison
+        start: Début des segments (secondes)
+        latency: Latence ajoutée par le serveur (secondes)
+        bandwidth: Débit maximal par connexion (octets/s, None : illimité)
+        media_dir: Répertoire des médias générés (réutilisés d'une exécution à l'autre)
+        ffmpeg_path: Exécutable ffmpeg (détecté comme par download_segment sinon)
+        duration: Durée des médias générés (secondes)
+        log: Fonction d'affichage de la progression
+        engines: Moteurs de téléchargement à mesurer (voir downloader.ENGINES)
+
+    Returns:
+        dict: Rapport sérialisable en JSON
+
+    Raises:
+        ValueError: Si un segment dépasse la durée des médias
+    """
+    if ffmpeg_path is None:
+        from youtube_segment_downloader.downloader import get_ffmpeg_path
+        ffmpeg_path = get_ffmpeg_path()
+    # yt-dlp attend un chemin (ffmpeg_location), pas un nom à chercher dans le PATH
+    ffmpeg_path = shutil.which(ffmpeg_path) or ffmpeg_path
+    if start + max(lengths) > duration:
+        raise ValueError(f"Les segments doivent tenir dans les {duration}s de média")
+    media_dir = Path(media_dir or Path(tempfile.gettempdir()) / "yt-segment-benchmark-media")
+
+    log(f"🎞️ Médias synthétiques dans {media_dir}")
+    media = generate_media(media_dir, ffmpeg_path, duration=duration)
+    config = {"formats": list(formats), "cut_modes": list(cut_modes), "lengths": list(lengths),
+              "parallel_ranges": list(parallel_ranges), "engines": list(engines), "repeat": repeat,
+              "start": start, "latency": latency, "bandwidth": bandwidth, "media": media}
+    results = []
+    with StandInServer(media_dir, latency=latency, bandwidth=bandwidth) as server, \
+            tempfile.TemporaryDirectory(prefix="yt-segment-benchmark-") as workdir:
+        for fmt in formats:
+            for cut_mode in cut_modes:
+                for length in lengths:
+                    for connections, engine in ((c, e) for c in parallel_ranges for e in engines):
+                        # Le moteur par défaut garde les noms de cas des rapports existants
+                        suffix = "" if engine == "ytdlp" else f"/{engine}"
+                        name = f"{fmt}/{cut_mode}/{length}s/j{connections}{suffix}"
+                        runs = []
+                        for i in range(repeat):
+                            output = Path(workdir) / f"{i}.mp4"
+                            case = {"url": server.url(ENTRY_POINTS[fmt]), "start": start, "length": length,
+                                    "cut_mode": cut_mode, "parallel_ranges": connections,
+                                    "engine": engine, "ffmpeg": ffmpeg_path, "output": str(output)}
+                            before = server.bytes_sent
+                            run = _spawn_case(case, Path(workdir) / f"cache-{name.replace('/', '-')}-{i}")
+                            run["bytes_transferred"] = server.bytes_sent - before
+                            runs.append(run)
+                            if output.exists():
+                                output.unlink()
+                        entry = {"case": name, "format": fmt, "cut_mode": cut_mode, "length": length,
+                                 "parallel_ranges": connections, "engine": engine, "runs": runs,
+                                 "success": all(run["success"] for run in runs),
+                                 "median": {key: _median(runs, key) for key in COMPARED_METRICS}}
+                        results.append(entry)
+                        median = entry["median"]
+                        if entry["success"]:
+                            log(f"   {name:<36} {median['wall_seconds']:>7.2f}s  CPU {median['cpu_seconds']:>6.2f}s  "
+                                f"{(median['bytes_transferred'] or 0) / 1e6:>7.2f} Mo")
+                        else:
+                            errors = {run.get("error") for run in runs if not run["success"]}
+                            log(f"   {name:<36} ❌ {'; '.join(str(e) for e in errors)}")
+    return {
+        "schema": SCHEMA_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "environment": _environment(ffmpeg_path),
+        "config": config,
+        "results": results,
+    }
+
+
+def compare(baseline, report, tolerance=0.15):
+    """
+    Compare un rapport à une référence, cas par cas (médianes)
+
+    Args:
+        baseline: Rapport de référence
+        report: Nouveau rapport
+        tolerance: Hausse relative tolérée (0.15 : +15 %)
+
+    Returns:
+        list[str]: Régressions détectées (vide si aucune)
+    """
+    previous = {entry["case"]: entry for entry in baseline.get("results", [])}
+    regressions = []
+    for entry in report["results"]:
+        old = previous.get(entry["case"])
+        if old is None:
+            continue
+        if old["success"] and not entry["success"]:
+            regressions.append(f"{entry['case']} : échec (réussissait dans la référence)")
+            continue
+        for key in COMPARED_METRICS:
+            before, after = old["median"].get(key), entry["median"].get(key)
+            if not before or after is None:
+                continue
+            if after > before * (1 + tolerance) and after - before > NOISE_FLOOR[key]:
+                regressions.append(f"{entry['case']} : {key} {before} -> {after} (+{(after / before - 1) * 100:.0f} %)")
+    return regressions
+
+
+def main(argv=None):
+    """Point d'entrée : python -m benchmarks.run"""
+    from youtube_segment_downloader.downloader import CUT_MODES, ENGINES
+
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run",
+                                     description="Benchmark hors ligne de download_segment")
+    parser.add_argument("-o", "--output", default="benchmark-results.json",
+                        help="Fichier JSON de résultats (défaut: benchmark-results.json)")
+    parser.add_argument("--formats", nargs="+", choices=sorted(ENTRY_POINTS), default=["dash", "progressive"],
+                        help="Formats servis (défaut: dash progressive ; hls demande un ffmpeg "
+                             "capable de chercher dans un flux HLS)")
+    parser.add_argument("--cut-modes", nargs="+", choices=CUT_MODES, default=list(CUT_MODES))
+    parser.add_argument("--lengths", nargs="+", type=int, default=[10, 60],
+                        help="Longueurs de segment en secondes (défaut: 10 60)")
+    parser.add_argument("-j", "--parallel-ranges", nargs="+", type=int, default=[1],
+                        help="Valeurs de parallel_ranges à mesurer (défaut: 1)")
+    parser.add_argument("--engines", nargs="+", choices=ENGINES, default=["ytdlp"],
+                        help="Moteurs de téléchargement à comparer (défaut: ytdlp)")
+    parser.add_argument("--repeat", type=int, default=3, help="Mesures par combinaison (défaut: 3)")
+    parser.add_argument("--start", type=int, default=30, help="Début des segments en secondes (défaut: 30)")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="Latence ajoutée à chaque réponse, en secondes (défaut: 0)")
+    parser.add_argument("--bandwidth", type=parse_rate, default=None,
+                        help="Débit maximal par connexion, ex. 2M (défaut: illimité)")
+    parser.add_argument("--duration", type=int, default=DEFAULT_DURATION,
+                        help=f"Durée des médias générés en secondes (défaut: {DEFAULT_DURATION})")
+    parser.add_argument("--media-dir", help="Répertoire des médias générés (réutilisés entre exécutions)")
+    parser.add_argument("--ffmpeg", help="Exécutable ffmpeg à utiliser")
+    parser.add_argument("--baseline", help="Rapport de référence : code de sortie 1 en cas de régression")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="Hausse relative tolérée par rapport à la référence (défaut: 0.15)")
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.case:
+        print(json.dumps(run_case(json.loads(args.case))))
+        return
+
+    try:
+        report = run_benchmarks(args.formats, args.cut_modes, args.lengths, args.parallel_ranges,
+                                repeat=args.repeat, start=args.start, latency=args.latency,
+                                bandwidth=args.bandwidth, media_dir=args.media_dir, ffmpeg_path=args.ffmpeg,
+                                duration=args.duration, engines=args.engines)
+    except (ValueError, RuntimeError, subprocess.CalledProcessError) as e:
+        print(f"❌ Erreur: {e}")
+        sys.exit(1)
+    Path(args.output).write_text(json.dumps(report, indent=2, ensure_ascii=False))
+    print(f"📄 Résultats écrits dans {args.output}")
+
+    failed = [entry["case"] for entry in report["results"] if not entry["success"]]
+    regressions = []
+    if args.baseline:
+        regressions = compare(json.loads(Path(args.baseline).read_text()), report, args.tolerance)
+        for line in regressions:
+            print(f"📉 {line}")
+        if not regressions:
+            print("✅ Aucune régression par rapport à la référence")
+    sys.exit(1 if failed or regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
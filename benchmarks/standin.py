@@ -0,0 +1,215 @@
+"""
+Serveur HTTP local qui remplace YouTube pendant les benchmarks
+
+Sert un répertoire de médias avec prise en charge des requêtes Range,
+une latence ajoutée avant chaque réponse et un débit plafonné par
+connexion (YouTube bride chaque connexion, pas l'hôte). Au-delà d'un
+nombre de requêtes par seconde, il répond 429 avec un en-tête Retry-After,
+comme YouTube lorsqu'un client l'interroge trop souvent.
+"""
+
+import mimetypes
+import re
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+
+
+BLOCK_SIZE = 16 * 1024
+
+_RANGE_RE = re.compile(r"bytes=(\d*)-(\d*)$")
+_CONTENT_TYPES = {
+    ".mpd": "application/dash+xml",
+    ".m3u8": "application/vnd.apple.mpegurl",
+    ".m4s": "video/iso.segment",
+    ".m4a": "audio/mp4",
+    ".mp4": "video/mp4",
+}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def handle(self):
+        try:
+            super().handle()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def do_HEAD(self):
+        self._respond(send_body=False)
+
+    def do_GET(self):
+        self._respond(send_body=True)
+
+    def log_message(self, format, *args):
+        pass
+
+    def _respond(self, send_body):
+        server = self.server.standin
+        if not server._count_request():
+            self.send_response(429)
+            self.send_header("Retry-After", str(server.retry_after))
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if server.latency:
+            time.sleep(server.latency)
+
+        path = server._resolve(urlsplit(self.path).path)
+        if path is None:
+            self.send_error(404)
+            return
+        size = path.stat().st_size
+        start, end = 0, size - 1
+        match = _RANGE_RE.match(self.headers.get("Range") or "")
+        if match and (match.group(1) or match.group(2)):
+            if match.group(1):
+                start = int(match.group(1))
+                if match.group(2):
+                    end = min(int(match.group(2)), size - 1)
+            else:
+                start = max(size - int(match.group(2)), 0)
+            if start >= size or start > end:
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        else:
+            self.send_response(200)
+        content_type = _CONTENT_TYPES.get(path.suffix) or mimetypes.guess_type(path.name)[0]
+        self.send_header("Content-Type", content_type or "application/octet-stream")
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Length", str(end - start + 1))
+        self.end_headers()
+        if send_body:
+            try:
+                self._send_file(path, start, end, server.bandwidth)
+            except (BrokenPipeError, ConnectionResetError):
+                # Le client a fermé la connexion (seek, fin du segment)
+                self.close_connection = True
+
+    def _send_file(self, path, start, end, bandwidth):
+        server = self.server.standin
+        began = time.monotonic()
+        sent = 0
+        with open(path, "rb") as f:
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                block = f.read(min(BLOCK_SIZE, remaining))
+                if not block:
+                    break
+                if bandwidth:
+                    delay = (sent + len(block)) / bandwidth - (time.monotonic() - began)
+                    if delay > 0:
+                        time.sleep(delay)
+                self.wfile.write(block)
+                sent += len(block)
+                remaining -= len(block)
+                server._count_bytes(len(block))
+
+
+class StandInServer:
+    """
+    Serveur HTTP de substitution, démarré dans un thread en arrière-plan.
+
+    Exemple:
+        with StandInServer("media", latency=0.05, bandwidth=parse_rate("2M")) as server:
+            download_segment(server.url("manifest.mpd"), ...)
+            print(server.bytes_sent)
+    """
+
+    def __init__(self, directory, latency=0.0, bandwidth=None, max_request_rate=None, retry_after=1,
+                 host="127.0.0.1", port=0):
+        """
+        Args:
+            directory: Répertoire servi
+            latency: Délai ajouté avant chaque réponse (secondes)
+            bandwidth: Débit maximal par connexion (octets/s, None : illimité)
+            max_request_rate: Requêtes acceptées par seconde glissante ; les
+                suivantes reçoivent un 429 (None : illimité)
+            retry_after: Valeur de l'en-tête Retry-After des 429 (secondes)
+            host: Adresse d'écoute
+            port: Port d'écoute (0 : choisi par le système)
+        """
+        self.directory = Path(directory).resolve()
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.max_request_rate = max_request_rate
+        self.retry_after = retry_after
+        self._lock = threading.Lock()
+        self._bytes_sent = 0
+        self._requests = 0
+        self._throttled = 0
+        self._accepted = deque()
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.standin = self
+        self._thread = threading.Thread(target=self._server.serve_forever, name="standin", daemon=True)
+        self._thread.start()
+
+    @property
+    def bytes_sent(self):
+        """Octets de corps de réponse envoyés depuis le démarrage"""
+        with self._lock:
+            return self._bytes_sent
+
+    @property
+    def requests(self):
+        """Nombre de requêtes reçues depuis le démarrage"""
+        with self._lock:
+            return self._requests
+
+    @property
+    def throttled(self):
+        """Nombre de requêtes refusées par un 429 depuis le démarrage"""
+        with self._lock:
+            return self._throttled
+
+    def url(self, path=""):
+        """URL locale d'un fichier du répertoire servi"""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/{path.lstrip('/')}"
+
+    def _resolve(self, url_path):
+        path = (self.directory / unquote(url_path).lstrip("/")).resolve()
+        if self.directory not in path.parents or not path.is_file():
+            return None
+        return path
+
+    def _count_request(self):
+        """Compte une requête ; False si elle dépasse max_request_rate"""
+        with self._lock:
+            self._requests += 1
+            if self.max_request_rate is None:
+                return True
+            now = time.monotonic()
+            while self._accepted and now - self._accepted[0] >= 1.0:
+                self._accepted.popleft()
+            if len(self._accepted) >= self.max_request_rate:
+                self._throttled += 1
+                return False
+            self._accepted.append(now)
+            return True
+
+    def _count_bytes(self, count):
+        with self._lock:
+            self._bytes_sent += count
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
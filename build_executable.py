@@ -45,6 +45,10 @@ def build_executable():
         '--hidden-import=youtube_segment_downloader',
         '--hidden-import=youtube_segment_downloader.downloader',
         '--hidden-import=youtube_segment_downloader.cli',
+        '--hidden-import=youtube_segment_downloader.aio',
+        '--hidden-import=youtube_segment_downloader.ranges',
+        # yt-dlp est importé à la demande (importlib) : invisible pour l'analyse
+        '--collect-submodules=yt_dlp',
         # Fichier source
         'youtube_segment_downloader_gui.py'
     ]
@@ -0,0 +1,85 @@
+"""
+Doublures partagées par les tests : yt-dlp et ffmpeg sans réseau ni binaire
+"""
+
+import time
+
+import pytest
+from youtube_segment_downloader import downloader
+from youtube_segment_downloader.ffmpeg import FFmpegInfo
+
+
+FAKE_FFMPEG = FFmpegInfo("ffmpeg", "ffprobe", "6.0", {"libx264": "h264", "aac": "aac"}, ["mp4", "segment"],
+                         ["file", "http", "https"])
+
+
+class FakeCookieJar:
+    def get_cookies_for_url(self, url):
+        return []
+
+
+class FakeExtractor:
+    def suitable(self, url):
+        return True
+
+
+class FakeYoutubeDL:
+    """Remplace yt_dlp.YoutubeDL : écrit le fichier de sortie sans réseau"""
+    created = 0
+    extractions = 0
+
+    def __init__(self, params, auto_init=True):
+        FakeYoutubeDL.created += 1
+        self.params = dict(params)
+        self.params['outtmpl'] = {'default': params['outtmpl']}
+        self.hooks = []
+        self.processed = []
+        self.cookiejar = FakeCookieJar()
+
+    def add_progress_hook(self, hook):
+        self.hooks.append(hook)
+
+    def get_info_extractor(self, ie_key):
+        return FakeExtractor()
+
+    def extract_info(self, url, download=True, ie_key=None):
+        FakeYoutubeDL.extractions += 1
+        return {'id': url[-11:], 'formats': [{'url': 'https://example.com/v?expire=%d' % (time.time() + 7200),
+                                              'protocol': 'https'}]}
+
+    @staticmethod
+    def sanitize_info(info, remove_private_keys=False):
+        return dict(info)
+
+    def process_ie_result(self, info, download=True):
+        self.processed.append(info)
+        if not download:
+            video = {'url': 'https://example.com/video.mp4', 'protocol': 'https', 'vcodec': 'avc1'}
+            audio = {'url': 'https://example.com/a.m4a', 'protocol': 'https', 'vcodec': 'none'}
+            return dict(info, requested_formats=[audio, video])
+        self.download([info['id']])
+
+    def download(self, urls):
+        time.sleep(0.01)
+        for hook in self.hooks:
+            hook({'status': 'finished'})
+        with open(self.params['outtmpl']['default'], 'wb') as f:
+            f.write(b'fake')
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def fake_ydl(monkeypatch):
+    FakeYoutubeDL.created = 0
+    FakeYoutubeDL.extractions = 0
+    calls = []
+
+    def fake_probe(path=None):
+        calls.append(path)
+        return FAKE_FFMPEG._replace(path=path)
+
+    monkeypatch.setattr(downloader._load_yt_dlp(), "YoutubeDL", FakeYoutubeDL)
+    monkeypatch.setattr(downloader, "probe_ffmpeg", fake_probe)
+    return calls
@@ -0,0 +1,156 @@
+"""
+Tests unitaires pour l'API asyncio et l'annulation
+"""
+
+import asyncio
+import io
+import sys
+import threading
+import time
+
+import pytest
+from youtube_segment_downloader import CancelToken, SegmentDownloader, download_segment_async, gather_segments
+from youtube_segment_downloader import downloader
+from youtube_segment_downloader.cancel import DownloadCancelled, cancel_scope, run_process, stream_process
+
+from .conftest import FakeYoutubeDL
+
+
+URL = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+
+
+class SlowYoutubeDL(FakeYoutubeDL):
+    """Téléchargement de 5 s qui écrit un .part et appelle les hooks régulièrement"""
+
+    def download(self, urls):
+        target = self.params['outtmpl']['default']
+        with open(target + '.part', 'wb') as f:
+            f.write(b'partial')
+        for _ in range(500):
+            for hook in self.hooks:
+                hook({'status': 'downloading'})
+            time.sleep(0.01)
+        with open(target, 'wb') as f:
+            f.write(b'fake')
+
+
+@pytest.fixture
+def slow_session(fake_ydl, monkeypatch):
+    monkeypatch.setattr(downloader._load_yt_dlp(), "YoutubeDL", SlowYoutubeDL)
+    session = SegmentDownloader(ffmpeg_path="ffmpeg", cache=False, clip_cache=False)
+    yield session
+    session.close()
+
+
+class TestCancelToken:
+    """Tests pour le jeton d'annulation"""
+
+    def test_kills_running_process(self):
+        """Annuler tue le processus en cours au lieu d'attendre sa fin"""
+        token = CancelToken()
+        outcome = {}
+
+        def worker():
+            with cancel_scope(token):
+                started = time.monotonic()
+                try:
+                    run_process([sys.executable, "-c", "import time; time.sleep(30)"])
+                except DownloadCancelled:
+                    outcome["elapsed"] = time.monotonic() - started
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        time.sleep(0.3)
+        token.cancel()
+        thread.join(10)
+        assert outcome["elapsed"] < 5
+
+    def test_stream_process(self):
+        """La sortie est recopiée par blocs ; un destinataire fermé arrête le processus"""
+        sink = io.BytesIO()
+        sizes = []
+        result = stream_process([sys.executable, "-c", "import sys; sys.stdout.write('x' * 200000)"], sink,
+                                sizes.append, chunk_size=65536)
+        assert result.returncode == 0 and result.stdout == 200000 == len(sink.getvalue())
+        assert sizes[-1] == 200000 and all(b - a <= 65536 for a, b in zip([0] + sizes, sizes))
+
+        class Closed:
+            def write(self, chunk):
+                raise BrokenPipeError(32, "Broken pipe")
+
+        started = time.monotonic()
+        with pytest.raises(BrokenPipeError):
+            stream_process([sys.executable, "-c", "import sys, time; print('x', flush=True); time.sleep(30)"], Closed())
+        assert time.monotonic() - started < 5
+
+    def test_callbacks(self):
+        """Les callbacks sont appelés une fois, immédiatement si déjà annulé"""
+        token = CancelToken()
+        calls = []
+        remove = token.register(lambda: calls.append("a"))
+        token.register(lambda: calls.append("b"))
+        remove()
+        token.cancel()
+        token.cancel()
+        token.register(lambda: calls.append("c"))
+        assert calls == ["b", "c"]
+        with pytest.raises(DownloadCancelled):
+            token.raise_if_cancelled()
+
+    def test_sync_cancel(self, slow_session, tmp_path):
+        """Un téléchargement synchrone annulé renvoie cancelled=True et ne laisse rien"""
+        token = CancelToken()
+        threading.Timer(0.2, token.cancel).start()
+        result = slow_session.download(URL, "0:10", "0:20", str(tmp_path / "a.mp4"), verbose=False, cancel=token)
+        assert not result and result.cancelled
+        assert list(tmp_path.iterdir()) == []
+
+
+class TestAsyncApi:
+    """Tests pour download_segment_async et gather_segments"""
+
+    def test_download(self, fake_ydl, tmp_path):
+        """Le téléchargement aboutit sans bloquer la boucle"""
+        session = SegmentDownloader(ffmpeg_path="ffmpeg", cache=False, clip_cache=False)
+        result = asyncio.run(download_segment_async(URL, "0:10", "0:20", str(tmp_path / "a.mp4"),
+                                                    session=session, verbose=False))
+        assert result and (tmp_path / "a.mp4").exists()
+        session.close()
+
+    def test_task_cancellation(self, slow_session, tmp_path):
+        """Annuler la tâche arrête le téléchargement et supprime les fichiers partiels"""
+        output = tmp_path / "a.mp4"
+
+        async def scenario():
+            task = asyncio.ensure_future(download_segment_async(URL, "0:10", "0:20", str(output),
+                                                                session=slow_session, verbose=False))
+            await asyncio.sleep(0.2)
+            assert (tmp_path / "a.mp4.part").exists()
+            started = time.monotonic()
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            return time.monotonic() - started
+
+        assert asyncio.run(scenario()) < 1
+        assert list(tmp_path.iterdir()) == []
+
+    def test_gather_is_bounded(self):
+        """gather_segments respecte la limite et l'ordre des segments"""
+        lock = threading.Lock()
+        state = {"active": 0, "peak": 0}
+
+        class Session:
+            def download(self, url, start, end, output, cancel=None, **options):
+                with lock:
+                    state["active"] += 1
+                    state["peak"] = max(state["peak"], state["active"])
+                time.sleep(0.05)
+                with lock:
+                    state["active"] -= 1
+                return output
+
+        segments = [(URL, "0:00", "0:10", f"{i}.mp4") for i in range(8)]
+        results = asyncio.run(gather_segments(segments, limit=3, session=Session()))
+        assert results == [f"{i}.mp4" for i in range(8)]
+        assert 1 < state["peak"] <= 3
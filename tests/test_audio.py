@@ -0,0 +1,175 @@
+"""
+Tests unitaires pour l'extraction audio seule
+"""
+
+import shutil
+import subprocess
+
+import pytest
+from benchmarks.standin import StandInServer
+from youtube_segment_downloader import SegmentResult, cli, downloader
+from youtube_segment_downloader.audio import AudioFormat
+from youtube_segment_downloader.cutting import fetch_audio
+from youtube_segment_downloader.downloader import SegmentDownloader
+from youtube_segment_downloader.jobs import JobStore
+from youtube_segment_downloader.quality import QualityPolicy
+
+from .conftest import FAKE_FFMPEG, FakeYoutubeDL
+from .test_quality import FORMATS
+
+
+FFMPEG = shutil.which("ffmpeg")
+FFPROBE = shutil.which("ffprobe")
+needs_ffmpeg = pytest.mark.skipif(not (FFMPEG and FFPROBE), reason="ffmpeg/ffprobe non installés")
+
+
+class TestAudioFormat:
+    """Tests pour le choix du flux audio"""
+
+    def test_select(self):
+        """Flux audio seul uniquement : du codec copié, sinon le meilleur débit"""
+        assert AudioFormat("m4a").select(FORMATS, 10).format_id == "140"
+        assert AudioFormat("opus").select(FORMATS, 10).format_id == "251"
+        selection = AudioFormat("wav").select(FORMATS, 10)
+        assert selection.format_id == "251" and selection.estimated_bytes == 130 * 125 * 10
+        # Les plafonds de débit et de taille s'appliquent au seul flux audio
+        assert AudioFormat("flac").select(FORMATS, 10, quality=QualityPolicy(max_bitrate=64)).format_id == "139"
+        with pytest.raises(ValueError, match="OPUS"):
+            AudioFormat("opus").select(FORMATS, 10, quality=QualityPolicy(target_size=1000))
+        with pytest.raises(ValueError, match="audio seul"):
+            AudioFormat("wav").select([f for f in FORMATS if f['vcodec'] != 'none'], 10)
+
+    def test_validation(self):
+        """Rééchantillonnage réservé aux sorties décodées, options ffmpeg et clé stables"""
+        audio = AudioFormat("wav", 16000, 1)
+        assert audio.key == "audio:wav,16000,1" and audio.extension == "wav"
+        assert audio.output_args() == ["-map", "0:a:0", "-c:a", "pcm_s16le", "-ar", "16000", "-ac", "1", "-f", "wav"]
+        assert AudioFormat("opus").output_args() == ["-map", "0:a:0", "-c:a", "copy", "-f", "ogg"]
+        with pytest.raises(ValueError):
+            AudioFormat("m4a", sample_rate=16000)
+        with pytest.raises(ValueError):
+            AudioFormat("mp3")
+        with pytest.raises(ValueError):
+            AudioFormat("flac", channels=0)
+
+
+@needs_ffmpeg
+class TestFetchAudio:
+    """Tests d'intégration avec ffmpeg"""
+
+    def probe(self, path):
+        out = subprocess.run([FFPROBE, "-v", "error", "-show_entries", "stream=codec_type,sample_rate,duration_ts",
+                              "-of", "csv=p=0", str(path)], capture_output=True, text=True, check=True).stdout
+        return out.split()
+
+    def test_many_outputs_from_one_stream(self, tmp_path):
+        """Un seul ffmpeg écrit plusieurs extraits, décodés à l'échantillon près ou copiés"""
+        subprocess.run([FFMPEG, "-v", "error", "-f", "lavfi", "-i", "testsrc2=size=160x120:rate=25",
+                        "-f", "lavfi", "-i", "sine=frequency=440:sample_rate=48000", "-t", "12",
+                        "-c:v", "libx264", "-c:a", "aac", "-shortest", str(tmp_path / "source.mp4")], check=True)
+        wav = AudioFormat("wav", 16000, 1)
+        with StandInServer(tmp_path) as server:
+            fetch_audio(FFMPEG, (server.url("source.mp4"), None),
+                        [(tmp_path / "a.wav", 2.0, 3.5), (tmp_path / "b.wav", 4.25, 6.0)], 2.0, 6.0,
+                        wav.output_args())
+            fetch_audio(FFMPEG, (server.url("source.mp4"), {"User-Agent": "test"}), [(tmp_path / "c.m4a", 1.0, 9.0)],
+                        1.0, 9.0, AudioFormat("m4a").output_args())
+        assert self.probe(tmp_path / "a.wav") == ["audio,16000,24000"]
+        assert self.probe(tmp_path / "b.wav") == ["audio,16000,28000"]
+        # Copie : une trame AAC (1024 échantillons) près, sans piste vidéo
+        (c,) = self.probe(tmp_path / "c.m4a")
+        assert c.startswith("audio,48000,") and abs(int(c.split(",")[2]) - 8 * 48000) <= 1024
+
+
+class TestDownloadAudio:
+    """Tests pour l'extraction audio seule dans une session"""
+
+    URL = "https://youtu.be/dQw4w9WgXcQ"
+
+    @pytest.fixture
+    def fetches(self, monkeypatch):
+        class AudioYoutubeDL(FakeYoutubeDL):
+            def extract_info(self, url, download=True, ie_key=None):
+                return dict(super().extract_info(url, download, ie_key), formats=FORMATS, duration=100)
+
+        calls = []
+
+        def fake_fetch_audio(ffmpeg_path, stream, outputs, start, end, output_args):
+            calls.append((stream[0], [(str(path), s, e) for path, s, e in outputs], start, end, output_args))
+            for path, _, _ in outputs:
+                with open(path, 'wb') as f:
+                    f.write(b'audio')
+
+        ffmpeg = FAKE_FFMPEG._replace(encoders=dict(FAKE_FFMPEG.encoders, flac="flac", pcm_s16le="pcm_s16le"),
+                                      muxers=FAKE_FFMPEG.muxers + ["ogg", "wav", "flac"])
+        monkeypatch.setattr(downloader._load_yt_dlp(), "YoutubeDL", AudioYoutubeDL)
+        monkeypatch.setattr(downloader, "probe_ffmpeg", lambda path=None: ffmpeg._replace(path=path))
+        monkeypatch.setattr(downloader, "fetch_audio", fake_fetch_audio)
+        return calls
+
+    def test_single_segment(self, fetches, tmp_path, monkeypatch):
+        """Seul le flux audio est lu ; nom de sortie par défaut selon le conteneur"""
+        monkeypatch.chdir(tmp_path)
+        session = SegmentDownloader(ffmpeg_path="ffmpeg", max_instances=1, cache=False, clip_cache=False)
+        result = session.download(self.URL, "0:10", "0:20", verbose=False, audio=AudioFormat("flac"))
+        assert result and result.output_file == "segment_0-10_0-20.flac"
+        assert result.format_id == "251" and (result.reencoded_seconds, result.copied_seconds) == (10, 0)
+        assert fetches == [("https://example.com/251", [("segment_0-10_0-20.flac", 10, 20)], 10, 20,
+                            AudioFormat("flac").output_args())]
+        download = next(p for p in result.stats["phases"] if p["phase"] == "download")
+        assert download["engine"] == "direct" and download["bytes"] == 5
+
+        copied = session.download(self.URL, "0:10", "0:20", "a.m4a", verbose=False, audio=AudioFormat("m4a"))
+        assert copied and copied.format_id == "140" and copied.copied_seconds == 10
+        streamed = session.download(self.URL, "0:10", "0:20", verbose=False, write_to=object(),
+                                    audio=AudioFormat("m4a"))
+        assert not streamed and "flux" in streamed.error
+        session.close()
+
+    def test_segments_share_one_stream(self, fetches, tmp_path):
+        """Segments proches : un seul ffmpeg pour toutes leurs sorties"""
+        session = SegmentDownloader(ffmpeg_path="ffmpeg", max_instances=1, cache=False, clip_cache=False)
+        segments = [("0:10", "0:12", str(tmp_path / "a.wav")), ("0:40", "0:41", str(tmp_path / "c.wav")),
+                    ("0:15", "0:18", str(tmp_path / "b.wav"))]
+        results = session.download_segments(self.URL, segments, verbose=False, audio=AudioFormat("wav", 16000, 1))
+        assert all(results) and [r.reencoded_seconds for r in results] == [2, 1, 3]
+        assert [call[1:4] for call in fetches] == [
+            ([(str(tmp_path / "a.wav"), 10, 12), (str(tmp_path / "b.wav"), 15, 18)], 10, 18),
+            ([(str(tmp_path / "c.wav"), 40, 41)], 40, 41),
+        ]
+        assert [p["phase"] for p in results[0].stats["phases"]].count("extract") == 1
+        session.close()
+
+    def test_cli_and_jobs(self, monkeypatch, tmp_path):
+        """--audio-only forme la sortie audio, enregistrée telle quelle par les jobs"""
+        received = {}
+
+        def fake_download(url, start, end, output, **kwargs):
+            received.update(kwargs)
+            return SegmentResult(True, output)
+
+        monkeypatch.setattr(cli, "download_segment", fake_download)
+        with pytest.raises(SystemExit) as exc:
+            cli.main([self.URL, "0:10", "0:20", "a.wav", "--audio-only", "wav", "--sample-rate", "16000",
+                      "--channels", "1"])
+        assert exc.value.code == 0 and received["audio"] == AudioFormat("wav", 16000, 1)
+        with pytest.raises(SystemExit) as exc:
+            cli.main([self.URL, "0:10", "0:20", "a.m4a", "--audio-only"])
+        assert exc.value.code == 0 and received["audio"] == AudioFormat("m4a")
+        for argv in (["--sample-rate", "16000"], ["--audio-only", "opus", "--channels", "1"]):
+            with pytest.raises(SystemExit) as exc:
+                cli.main([self.URL, "0:10", "0:20", "a.opus"] + argv)
+            assert exc.value.code == 2
+
+        class Session:
+            def download(self, url, start_time, end_time, output_file=None, **kwargs):
+                received.update(kwargs, output_file=output_file)
+                return SegmentResult(True, output_file)
+
+        store = JobStore(tmp_path / "jobs")
+        job_id = store.submit(self.URL, "0:10", "0:20", audio=AudioFormat("flac", channels=1))
+        assert store.get(job_id).options["audio"] == {"container": "flac", "sample_rate": None, "channels": 1}
+        assert store.run(job_id, session=Session())
+        assert received["audio"] == AudioFormat("flac", channels=1)
+        assert received["output_file"].endswith("segment_0-10_0-20.flac")
+        store.close()
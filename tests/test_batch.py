@@ -0,0 +1,107 @@
+"""
+Tests unitaires pour le mode batch
+"""
+
+import threading
+import time
+
+import pytest
+from youtube_segment_downloader import cli
+from youtube_segment_downloader.batch import load_manifest, run_batch, BatchJob
+
+
+URL = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+
+
+class TestLoadManifest:
+    """Tests pour la lecture des manifestes"""
+
+    def test_csv_with_header(self, tmp_path):
+        """Test d'un CSV avec en-tête et sortie optionnelle"""
+        manifest = tmp_path / "jobs.csv"
+        manifest.write_text(f"url,start,end,output\n{URL},0:10,0:20,a.mp4\n{URL},1:00,1:30,\n")
+        jobs = load_manifest(manifest)
+        assert len(jobs) == 2
+        assert jobs[0] == BatchJob(1, URL, "0:10", "0:20", "a.mp4")
+        assert jobs[1].output_file == "segment_0002_1-00_1-30.mp4"
+
+    def test_csv_without_header(self, tmp_path):
+        """Test d'un CSV sans en-tête"""
+        manifest = tmp_path / "jobs.csv"
+        manifest.write_text(f"# commentaire\n{URL},0:10,0:20\n")
+        jobs = load_manifest(manifest)
+        assert [(j.url, j.start_time, j.end_time) for j in jobs] == [(URL, "0:10", "0:20")]
+
+    def test_jsonl(self, tmp_path):
+        """Test d'un manifeste JSONL"""
+        manifest = tmp_path / "jobs.jsonl"
+        manifest.write_text(
+            f'{{"url": "{URL}", "start": "0:10", "end": "0:20", "output": "x.mp4"}}\n\n'
+            f'{{"url": "{URL}", "start_time": "1:00", "end_time": "2:00"}}\n'
+        )
+        jobs = load_manifest(manifest)
+        assert jobs[0].output_file == "x.mp4"
+        assert (jobs[1].start_time, jobs[1].end_time) == ("1:00", "2:00")
+
+    def test_invalid_manifests(self, tmp_path):
+        """Test des manifestes invalides"""
+        missing = tmp_path / "jobs.jsonl"
+        missing.write_text(f'{{"url": "{URL}", "start": "0:10"}}\n')
+        with pytest.raises(ValueError):
+            load_manifest(missing)
+        unknown = tmp_path / "jobs.txt"
+        unknown.write_text("")
+        with pytest.raises(ValueError):
+            load_manifest(unknown)
+
+
+class TestRunBatch:
+    """Tests pour l'exécution concurrente"""
+
+    def test_pool_is_bounded_and_ordered(self):
+        """Les jobs tournent en parallèle sans dépasser le nombre de workers"""
+        lock = threading.Lock()
+        state = {"active": 0, "peak": 0}
+
+        def fake_download(url, start, end, output, **kwargs):
+            with lock:
+                state["active"] += 1
+                state["peak"] = max(state["peak"], state["active"])
+            time.sleep(0.02)
+            with lock:
+                state["active"] -= 1
+            return not output.startswith("fail")
+
+        jobs = [BatchJob(i, URL, "0:00", "0:10", f"{'fail' if i == 3 else 'ok'}{i}.mp4")
+                for i in range(1, 9)]
+        results = run_batch(jobs, workers=3, download=fake_download)
+
+        assert [r.job.index for r in results] == list(range(1, 9))
+        assert [r.job.index for r in results if not r.success] == [3]
+        assert 1 < state["peak"] <= 3
+
+    def test_exceptions_are_reported(self):
+        """Une exception dans un job n'interrompt pas les autres"""
+        def fake_download(url, start, end, output, **kwargs):
+            if output == "boom.mp4":
+                raise RuntimeError("boom")
+            return True
+
+        jobs = [BatchJob(1, URL, "0:00", "0:10", "boom.mp4"), BatchJob(2, URL, "0:00", "0:10", "ok.mp4")]
+        results = run_batch(jobs, workers=2, download=fake_download)
+        assert results[0].error == "boom"
+        assert results[1].success
+
+    def test_cli_exit_code(self, tmp_path, monkeypatch, capsys):
+        """Le code de sortie n'est non nul que si un job a échoué"""
+        manifest = tmp_path / "jobs.csv"
+        manifest.write_text(f"{URL},0:00,0:10,ok.mp4\n{URL},0:00,0:10,fail.mp4\n")
+        monkeypatch.setattr(
+            "youtube_segment_downloader.batch.download_segment",
+            lambda url, start, end, output, **kwargs: output == "ok.mp4"
+        )
+        with pytest.raises(SystemExit) as exc:
+            cli.main(["batch", str(manifest), "--workers", "2"])
+        assert exc.value.code == 1
+        out = capsys.readouterr().out
+        assert "1 réussi(s), 1 échec(s)" in out
@@ -0,0 +1,89 @@
+"""
+Tests unitaires pour la suite de benchmarks hors ligne
+"""
+
+import shutil
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+from benchmarks.run import compare, run_benchmarks
+from benchmarks.standin import StandInServer
+from youtube_segment_downloader.throttle import parse_rate
+
+
+FFMPEG = shutil.which("ffmpeg")
+FFPROBE = shutil.which("ffprobe")
+
+
+def _get(url, headers=None):
+    with urllib.request.urlopen(urllib.request.Request(url, headers=headers or {})) as response:
+        return response.status, response.headers, response.read()
+
+
+class TestStandInServer:
+    """Tests pour le serveur de substitution"""
+
+    def test_ranges(self, tmp_path):
+        """Les requêtes Range sont servies en 206 et les octets comptés"""
+        (tmp_path / "video.mp4").write_bytes(bytes(range(256)) * 4)
+        with StandInServer(tmp_path) as server:
+            status, headers, body = _get(server.url("video.mp4"), {"Range": "bytes=10-19"})
+            assert status == 206 and body == bytes(range(10, 20))
+            assert headers["Content-Range"] == "bytes 10-19/1024"
+            assert headers["Content-Type"] == "video/mp4"
+            status, _, body = _get(server.url("video.mp4"), {"Range": "bytes=-4"})
+            assert body == bytes(range(252, 256))
+            with pytest.raises(urllib.error.HTTPError) as exc:
+                _get(server.url("video.mp4"), {"Range": "bytes=5000-"})
+            assert exc.value.code == 416
+            with pytest.raises(urllib.error.HTTPError):
+                _get(server.url("../etc/passwd"))
+            assert server.bytes_sent == 14
+
+    def test_bandwidth_and_latency(self, tmp_path):
+        """Le débit par connexion et la latence sont respectés"""
+        (tmp_path / "a.m4a").write_bytes(b"x" * 200 * 1024)
+        with StandInServer(tmp_path, latency=0.1, bandwidth=parse_rate("500K")) as server:
+            started = time.monotonic()
+            _get(server.url("a.m4a"))
+            assert time.monotonic() - started >= 0.45
+
+    def test_parse_rate(self):
+        """Les suffixes K, M et G sont des multiples de 1024"""
+        assert parse_rate("2M") == 2 * 1024 * 1024
+        assert parse_rate("0") is None
+        with pytest.raises(ValueError):
+            parse_rate("vite")
+
+
+class TestCompare:
+    """Tests pour la comparaison avec une référence"""
+
+    @staticmethod
+    def report(wall, success=True):
+        return {"results": [{"case": "dash/smart/10s/j1", "success": success,
+                             "median": {"wall_seconds": wall, "cpu_seconds": 1.0, "peak_rss_kib": 50000,
+                                        "bytes_transferred": 1000000}}]}
+
+    def test_regressions(self):
+        """Seules les hausses au-delà de la tolérance et du bruit sont signalées"""
+        assert compare(self.report(2.0), self.report(2.2)) == []
+        assert compare(self.report(0.1), self.report(0.15)) == []
+        regressions = compare(self.report(2.0), self.report(3.0))
+        assert len(regressions) == 1 and "wall_seconds" in regressions[0]
+        assert "échec" in compare(self.report(2.0), self.report(2.0, success=False))[0]
+
+
+@pytest.mark.skipif(not (FFMPEG and FFPROBE), reason="ffmpeg/ffprobe non installés")
+def test_offline_run(tmp_path):
+    """Un benchmark complet tourne hors ligne et produit un rapport exploitable"""
+    report = run_benchmarks(["dash"], ["keyframe"], [4], [1], repeat=1, start=2, duration=10,
+                            media_dir=tmp_path / "media", ffmpeg_path=FFMPEG, log=lambda message: None)
+    entry = report["results"][0]
+    assert entry["case"] == "dash/keyframe/4s/j1" and entry["success"]
+    run = entry["runs"][0]
+    assert run["output_duration"] >= 4 and run["bytes_transferred"] > 0
+    assert run["cpu_seconds"] > 0 and "download" in run["phases"]
+    assert compare(report, report) == []
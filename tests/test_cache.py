@@ -0,0 +1,150 @@
+"""
+Tests unitaires pour les caches (métadonnées et extraits)
+"""
+
+import os
+import time
+
+from youtube_segment_downloader.cache import ClipCache, InfoCache, info_expiry, EXPIRY_MARGIN, DEFAULT_TTL
+
+
+def make_info(video_id, expire=None, padding=0):
+    url = "https://rr1---sn.googlevideo.com/videoplayback?itag=137"
+    if expire:
+        url += f"&expire={int(expire)}"
+    return {"id": video_id, "formats": [{"format_id": "137", "url": url}], "description": "x" * padding}
+
+
+class TestInfoExpiry:
+    """Tests pour le calcul de la durée de vie"""
+
+    def test_expiry_follows_signed_urls(self):
+        """L'entrée expire avant l'URL signée la plus proche"""
+        now = 1_700_000_000
+        info = make_info("a", expire=now + 3000)
+        info["formats"].append({"url": f"https://x/videoplayback/expire/{now + 1200}/sig/abc"})
+        assert info_expiry(info, now) == now + 1200 - EXPIRY_MARGIN
+
+    def test_default_ttl(self):
+        """Sans paramètre expire, une durée par défaut est appliquée"""
+        assert info_expiry(make_info("a"), 100) == 100 + DEFAULT_TTL
+
+
+class TestInfoCache:
+    """Tests pour le cache SQLite"""
+
+    def test_roundtrip(self, tmp_path):
+        """Une entrée enregistrée est relue à l'identique"""
+        cache = InfoCache(tmp_path / "info.sqlite3")
+        info = make_info("dQw4w9WgXcQ", expire=time.time() + 7200)
+        cache.put("dQw4w9WgXcQ", info)
+        assert cache.get("dQw4w9WgXcQ") == info
+        assert cache.get("inconnu") is None
+
+    def test_expired_entries_are_ignored(self, tmp_path):
+        """Les URLs déjà expirées ne sont pas mises en cache"""
+        cache = InfoCache(tmp_path / "info.sqlite3")
+        cache.put("old", make_info("old", expire=time.time() + 60))
+        assert cache.get("old") is None
+
+    def test_lru_eviction(self, tmp_path):
+        """Au-delà de la taille maximale, l'entrée la moins utilisée est évincée"""
+        expire = time.time() + 7200
+        cache = InfoCache(tmp_path / "info.sqlite3", max_bytes=2500)
+        cache.put("a", make_info("a", expire, padding=1000))
+        cache.put("b", make_info("b", expire, padding=1000))
+        assert cache.get("a") is not None  # "b" devient la moins récente
+        cache.put("c", make_info("c", expire, padding=1000))
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.get("c") is not None
+
+    def test_persistence(self, tmp_path):
+        """Le cache survit à la fermeture de la connexion"""
+        path = tmp_path / "info.sqlite3"
+        cache = InfoCache(path)
+        cache.put("a", make_info("a", time.time() + 7200))
+        cache.close()
+        assert InfoCache(path).get("a")["id"] == "a"
+
+
+class TestClipCache:
+    """Tests pour le cache des extraits"""
+
+    FORMAT = "bestvideo+bestaudio"
+
+    def make_clip(self, tmp_path, name, size=100):
+        path = tmp_path / name
+        path.write_bytes(b"x" * size)
+        return path
+
+    def test_hit_partial_miss(self, tmp_path):
+        """Extrait identique, extrait couvrant, ou rien"""
+        cache = ClipCache(tmp_path / "clips")
+        cache.put("vid", self.FORMAT, 300, 1200, "precise", self.make_clip(tmp_path, "a.mp4"))
+        clip, status = cache.find("vid", self.FORMAT, 300, 1200, "precise")
+        assert status == "hit" and clip.path.read_bytes() == b"x" * 100
+        clip, status = cache.find("vid", self.FORMAT, 600, 720, "smart")
+        assert status == "partial" and (clip.actual_start, clip.actual_end) == (300, 1200)
+        assert cache.find("vid", self.FORMAT, 200, 720, "precise") == (None, "miss")
+        assert cache.find("vid", "worst", 600, 720, "precise") == (None, "miss")
+        assert cache.find("autre", self.FORMAT, 600, 720, "precise") == (None, "miss")
+        cache.close()
+
+    def test_smallest_covering_clip(self, tmp_path):
+        """Parmi les extraits couvrants, on préfère le même mode puis le plus court"""
+        cache = ClipCache(tmp_path / "clips")
+        cache.put("vid", self.FORMAT, 0, 3600, "precise", self.make_clip(tmp_path, "a.mp4"))
+        cache.put("vid", self.FORMAT, 9, 31, "keyframe", self.make_clip(tmp_path, "b.mp4"), 8.0, 32.0)
+        clip, status = cache.find("vid", self.FORMAT, 10, 20, "smart")
+        assert status == "partial" and clip.cut_mode == "keyframe"
+        clip, status = cache.find("vid", self.FORMAT, 10, 20, "precise")
+        assert status == "partial" and clip.cut_mode == "precise"
+        cache.close()
+
+    def test_lru_eviction_removes_files(self, tmp_path):
+        """Les extraits les moins récemment utilisés sont supprimés du disque"""
+        cache = ClipCache(tmp_path / "clips", max_bytes=250)
+        for i in range(3):
+            cache.put("vid", self.FORMAT, i * 10, i * 10 + 5, "precise", self.make_clip(tmp_path, f"{i}.mp4"))
+            time.sleep(0.01)
+            if i == 1:
+                cache.find("vid", self.FORMAT, 0, 5, "precise")
+        assert cache.find("vid", self.FORMAT, 10, 15, "precise") == (None, "miss")
+        assert cache.find("vid", self.FORMAT, 0, 5, "precise")[1] == "hit"
+        assert len(list((tmp_path / "clips").glob("*.mp4"))) == 2
+        cache.close()
+
+    def test_missing_file_is_a_miss(self, tmp_path):
+        """Un fichier supprimé à la main n'est plus servi"""
+        cache = ClipCache(tmp_path / "clips")
+        cache.put("vid", self.FORMAT, 0, 5, "precise", self.make_clip(tmp_path, "a.mp4"))
+        for path in (tmp_path / "clips").glob("*.mp4"):
+            path.unlink()
+        assert cache.find("vid", self.FORMAT, 0, 5, "precise") == (None, "miss")
+        cache.close()
+
+    def test_pinned_clip_survives_eviction(self, tmp_path):
+        """Un extrait trouvé reste lisible jusqu'à release, même évincé entre-temps"""
+        cache = ClipCache(tmp_path / "clips", max_bytes=150)
+        cache.put("vid", self.FORMAT, 0, 5, "precise", self.make_clip(tmp_path, "a.mp4"))
+        clip, status = cache.find("vid", self.FORMAT, 0, 5, "precise")
+        assert status == "hit"
+        # Un autre extrait évince le premier pendant qu'il attend sa découpe
+        cache.put("vid", self.FORMAT, 10, 15, "precise", self.make_clip(tmp_path, "b.mp4"))
+        assert cache.find("vid", self.FORMAT, 0, 5, "precise") == (None, "miss")
+        assert clip.path.read_bytes() == b"x" * 100
+        cache.release(clip)
+        assert not clip.path.exists()
+        cache.close()
+
+    def test_stale_pins_are_removed(self, tmp_path):
+        """Les épingles d'un processus arrêté sont supprimées à l'ouverture suivante"""
+        pins = tmp_path / "clips" / "pins"
+        pins.mkdir(parents=True)
+        (pins / "abc.999999999.0.mp4").write_bytes(b"x")
+        (pins / f"abc.{os.getpid()}.0.mp4").write_bytes(b"x")
+        cache = ClipCache(tmp_path / "clips")
+        assert cache.find("vid", self.FORMAT, 0, 5, "precise") == (None, "miss")
+        assert [pin.name for pin in pins.iterdir()] == [f"abc.{os.getpid()}.0.mp4"]
+        cache.close()
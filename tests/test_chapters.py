@@ -0,0 +1,131 @@
+"""
+Tests unitaires pour les chapitres et le plan de découpe
+"""
+
+import json
+import shutil
+import subprocess
+
+import pytest
+from youtube_segment_downloader.chapters import (Chapter, chapter_filename, chapters_from_info, load_cues,
+                                                 plan_split, resolve_chapters)
+from youtube_segment_downloader.cutting import split_segments
+
+
+FFMPEG = shutil.which("ffmpeg")
+FFPROBE = shutil.which("ffprobe")
+needs_ffmpeg = pytest.mark.skipif(not (FFMPEG and FFPROBE), reason="ffmpeg/ffprobe non installés")
+
+
+class TestCues:
+    """Tests pour le chargement des listes de repères"""
+
+    def test_json(self, tmp_path):
+        """Liste d'objets ou objet {"chapters": [...]}"""
+        path = tmp_path / "cues.json"
+        path.write_text(json.dumps({"chapters": [{"start": "0:00", "title": "Intro"},
+                                                 {"debut": 30, "fin": 45, "titre": "Suite"}]}))
+        assert load_cues(path) == [Chapter("0:00", None, "Intro"), Chapter(30, 45, "Suite")]
+        path.write_text(json.dumps([{"title": "Sans début"}]))
+        with pytest.raises(ValueError, match="début"):
+            load_cues(path)
+
+    def test_csv(self, tmp_path):
+        """Avec ou sans ligne d'en-tête, fin facultative"""
+        path = tmp_path / "cues.csv"
+        path.write_text("start,end,title\n0:00,,Intro\n0:30,0:45,Suite\n")
+        assert load_cues(path) == [Chapter("0:00", None, "Intro"), Chapter("0:30", "0:45", "Suite")]
+        path.write_text("# commentaire\n0:00,,Intro\n0:30\n")
+        assert load_cues(path) == [Chapter("0:00", None, "Intro"), Chapter("0:30", None, None)]
+
+    def test_vtt(self, tmp_path):
+        """Un repère WebVTT par chapitre, le texte sert de titre"""
+        path = tmp_path / "cues.vtt"
+        path.write_text("WEBVTT\n\nNOTE chapitres\n\nch1\n00:00.000 --> 00:12.500\n<b>Intro</b>\n\n"
+                        "00:12.500 --> 00:30.000 align:start\nPartie\nun\n")
+        assert load_cues(path) == [Chapter("00:00.000", "00:12.500", "Intro"),
+                                   Chapter("00:12.500", "00:30.000", "Partie un")]
+
+    def test_unsupported(self, tmp_path):
+        """Un format inconnu est refusé"""
+        with pytest.raises(ValueError, match="non supporté"):
+            load_cues(tmp_path / "cues.txt")
+
+
+class TestResolve:
+    """Tests pour la résolution des chapitres"""
+
+    def test_ends_and_titles(self):
+        """Tri, fins déduites du chapitre suivant ou de la durée, titres par défaut"""
+        info = {"chapters": [{"start_time": 0, "end_time": 10, "title": "Intro"}]}
+        assert chapters_from_info(info) == [Chapter(0, 10, "Intro")]
+        assert chapters_from_info({}) == []
+        chapters = resolve_chapters([("1:00", None, None), ("0:00", "", "Intro"), (90, None, "Fin")], duration=120)
+        assert chapters == [Chapter(0.0, 60.0, "Intro"), Chapter(60.0, 90.0, "Chapitre 2"),
+                            Chapter(90.0, 120, "Fin")]
+
+    def test_errors(self):
+        """Chevauchement, chapitre vide ou fin inconnue"""
+        with pytest.raises(ValueError, match="chevauchent"):
+            resolve_chapters([(0, 20, "A"), (10, 30, "B")])
+        with pytest.raises(ValueError, match="vide"):
+            resolve_chapters([(10, 5, "A")])
+        with pytest.raises(ValueError, match="inconnue"):
+            resolve_chapters([(0, None, "A")])
+
+    def test_filename(self):
+        """Les caractères interdits dans un nom de fichier sont remplacés"""
+        assert chapter_filename(2, Chapter(0, 1, 'Partie: 1/2 "live"')) == '02 - Partie_ 1_2 _live_.mp4'
+        assert chapter_filename(10, Chapter(0, 1, " ... ")) == "10 - Chapitre.mp4"
+
+
+class TestPlanSplit:
+    """Tests pour le calcul des coupures"""
+
+    CHAPTERS = [Chapter(0.0, 12.5, "A"), Chapter(12.5, 30.0, "B"), Chapter(47.0, 55.0, "C")]
+
+    def test_exact(self):
+        """Coupures aux bornes exactes, l'intervalle entre chapitres est ignoré"""
+        cuts, plan = plan_split(self.CHAPTERS, 0.0, 60.0)
+        assert cuts == [12.5, 30.0, 47.0, 55.0]
+        assert plan == [(0.0, 12.5, 0), (12.5, 30.0, 1), (47.0, 55.0, 3)]
+
+    def test_keyframes(self):
+        """Débuts et bornes partagées reculent à l'image clé, une fin isolée avance"""
+        keyframes = [0.0, 4.0, 8.0, 12.0, 16.0, 20.0, 24.0, 28.0, 32.0, 36.0, 40.0, 44.0, 48.0, 52.0, 56.0]
+        cuts, plan = plan_split(self.CHAPTERS, 0.0, 60.0, keyframes)
+        assert cuts == [12.0, 32.0, 44.0, 56.0]
+        assert plan == [(0.0, 12.0, 0), (12.0, 32.0, 1), (44.0, 56.0, 3)]
+
+    def test_chapter_shorter_than_gop(self):
+        """Un chapitre sans image clé propre n'a pas de morceau"""
+        chapters = [Chapter(0.0, 10.0, "A"), Chapter(10.0, 11.0, "B"), Chapter(11.0, 20.0, "C")]
+        cuts, plan = plan_split(chapters, 0.0, 20.0, [0.0, 8.0, 16.0])
+        assert cuts == [8.0]
+        assert plan == [(0.0, 8.0, 0), (8.0, 8.0, None), (8.0, 20.0, 1)]
+
+
+@needs_ffmpeg
+class TestSplitSegments:
+    """Tests d'intégration avec ffmpeg"""
+
+    @pytest.fixture
+    def source(self, tmp_path):
+        path = tmp_path / "source.mp4"
+        subprocess.run([FFMPEG, "-v", "error", "-f", "lavfi", "-i", "testsrc2=size=160x120:rate=25",
+                        "-f", "lavfi", "-i", "sine=frequency=440", "-t", "12",
+                        "-c:v", "libx264", "-g", "50", "-c:a", "aac", "-shortest", str(path)], check=True)
+        return path
+
+    def count_frames(self, path):
+        out = subprocess.run([FFPROBE, "-v", "error", "-select_streams", "v:0", "-count_packets",
+                              "-show_entries", "stream=nb_read_packets", "-of", "csv=p=0", str(path)],
+                             capture_output=True, text=True, check=True).stdout
+        return int(out.strip())
+
+    def test_one_pass(self, source, tmp_path):
+        """Une seule passe produit un morceau par intervalle"""
+        copied = split_segments(FFMPEG, str(source), [4.0, 8.0], tmp_path / "copy")
+        assert [self.count_frames(p) for p in copied] == [100, 100, 100]
+        precise = split_segments(FFMPEG, str(source), [3.0, 7.0], tmp_path / "precise", reencode=True)
+        assert [self.count_frames(p) for p in precise] == [75, 100, 125]
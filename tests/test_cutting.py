@@ -0,0 +1,132 @@
+"""
+Tests unitaires pour le découpage local (smart cut)
+"""
+
+import io
+import shutil
+import subprocess
+
+import pytest
+from benchmarks.standin import StandInServer
+from youtube_segment_downloader.cutting import (EPSILON, cut_copy, cut_precise, fetch_remote, merge_ranges,
+                                                plan_smart_cut, probe_keyframes, smart_cut, snap_range,
+                                                stream_remote)
+
+
+FFMPEG = shutil.which("ffmpeg")
+FFPROBE = shutil.which("ffprobe")
+needs_ffmpeg = pytest.mark.skipif(not (FFMPEG and FFPROBE), reason="ffmpeg/ffprobe non installés")
+
+
+class TestPlanSmartCut:
+    """Tests pour le découpage en morceaux copiés / ré-encodés"""
+
+    KEYFRAMES = [0.0, 2.0, 4.0, 6.0, 8.0, 10.0]
+
+    def test_boundaries_are_reencoded(self):
+        """Seuls les GOP partiels aux bords sont ré-encodés"""
+        assert plan_smart_cut(self.KEYFRAMES, 1.5, 7.0) == [
+            ("encode", 1.5, 2.0), ("copy", 2.0, 6.0), ("encode", 6.0, 7.0)
+        ]
+
+    def test_aligned_cut_is_pure_copy(self):
+        """Un segment aligné sur les images clés est entièrement copié"""
+        assert plan_smart_cut(self.KEYFRAMES, 2.0, 8.0) == [("copy", 2.0, 8.0)]
+
+    def test_inside_single_gop(self):
+        """Sans image clé dans le segment, tout est ré-encodé"""
+        assert plan_smart_cut(self.KEYFRAMES, 2.5, 3.5) == [("encode", 2.5, 3.5)]
+        assert plan_smart_cut(self.KEYFRAMES, 3.5, 4.5) == [("encode", 3.5, 4.0), ("encode", 4.0, 4.5)]
+
+
+class TestSnapRange:
+    """Tests pour l'alignement des bornes sur les images clés"""
+
+    KEYFRAMES = [0.0, 2.0, 4.0, 6.0, 8.0, 10.0]
+
+    def test_snaps_outward(self):
+        """Le début recule et la fin avance jusqu'aux images clés voisines"""
+        assert snap_range(self.KEYFRAMES, 3.2, 6.5) == (2.0, 8.0)
+
+    def test_aligned_bounds_are_kept(self):
+        """Des bornes déjà sur des images clés ne bougent pas"""
+        assert snap_range(self.KEYFRAMES, 4.0, 8.0) == (4.0, 8.0)
+
+    def test_no_keyframe_after_end(self):
+        """Sans image clé après la fin, on va jusqu'au bout de la vidéo"""
+        assert snap_range(self.KEYFRAMES, 3.0, 11.0, duration=12.5) == (2.0, 12.5)
+        assert snap_range([], 3.0, 11.0) == (3.0, 11.0)
+
+
+class TestMergeRanges:
+    """Tests pour le regroupement des segments d'une même vidéo"""
+
+    def test_overlapping_and_close_ranges(self):
+        """Les plages qui se chevauchent ou sont proches forment un seul groupe"""
+        ranges = [(300, 310), (10, 20), (15, 30), (35, 40), (12, 14)]
+        assert merge_ranges(ranges, gap=5) == [(10, 40, [1, 4, 2, 3]), (300, 310, [0])]
+
+    def test_distant_ranges(self):
+        """Sans écart toléré, seules les plages qui se touchent sont regroupées"""
+        assert merge_ranges([(0, 10), (10, 20), (21, 30)]) == [(0, 20, [0, 1]), (21, 30, [2])]
+        assert merge_ranges([]) == []
+
+
+@needs_ffmpeg
+class TestSmartCut:
+    """Tests d'intégration avec ffmpeg"""
+
+    @pytest.fixture
+    def source(self, tmp_path):
+        path = tmp_path / "source.mp4"
+        subprocess.run([FFMPEG, "-v", "error", "-f", "lavfi", "-i", "testsrc2=size=160x120:rate=25",
+                        "-f", "lavfi", "-i", "sine=frequency=440", "-t", "12",
+                        "-c:v", "libx264", "-g", "50", "-c:a", "aac", "-shortest", str(path)], check=True)
+        return path
+
+    def count_frames(self, path):
+        out = subprocess.run([FFPROBE, "-v", "error", "-select_streams", "v:0", "-count_packets",
+                              "-show_entries", "stream=nb_read_packets", "-of", "csv=p=0", str(path)],
+                             capture_output=True, text=True, check=True).stdout
+        return int(out.strip())
+
+    def test_frame_accurate_output(self, source, tmp_path):
+        """La sortie contient exactement les images du segment"""
+        assert probe_keyframes(FFPROBE, str(source))[:3] == [0.0, 2.0, 4.0]
+        output = tmp_path / "cut.mp4"
+        stats = smart_cut(FFMPEG, FFPROBE, str(source), str(output), 1.0, 9.0)
+        assert (stats.reencoded_seconds, stats.copied_seconds) == (2.0, 6.0)
+        assert self.count_frames(output) == 200
+
+    def test_local_cuts(self, source, tmp_path):
+        """Découpes locales d'un extrait : copie aux images clés ou ré-encodage"""
+        copied = tmp_path / "copy.mp4"
+        cut_copy(FFMPEG, str(source), copied, 2.0, 6.0)
+        assert 100 <= self.count_frames(copied) <= 105
+        precise = tmp_path / "precise.mp4"
+        cut_precise(FFMPEG, str(source), precise, 1.0, 3.0)
+        assert self.count_frames(precise) == 50
+
+    def test_fetch_remote(self, source, tmp_path):
+        """Vidéo et audio distants lus par plages et multiplexés en un seul passage"""
+        with StandInServer(tmp_path) as server:
+            url = server.url("source.mp4")
+            precise = tmp_path / "precise.mp4"
+            fetch_remote(FFMPEG, [(url, {"User-Agent": "test"}), (url, None)], precise, 1.0, 9.0, reencode=True)
+            assert self.count_frames(precise) == 200
+            copied = tmp_path / "copy.mp4"
+            fetch_remote(FFMPEG, [(url, None)], copied, 4.0 + EPSILON, 8.0)
+            assert 100 <= self.count_frames(copied) <= 105
+        streams = subprocess.run([FFPROBE, "-v", "error", "-show_entries", "stream=codec_type", "-of", "csv=p=0",
+                                  str(precise)], capture_output=True, text=True, check=True).stdout.split()
+        assert streams == ["video", "audio"]
+
+    def test_stream_remote(self, source, tmp_path):
+        """MP4 fragmenté écrit dans un objet fichier, lisible tel quel"""
+        sink = io.BytesIO()
+        with StandInServer(tmp_path) as server:
+            written = stream_remote(FFMPEG, [(server.url("source.mp4"), None)], sink, 1.0, 9.0, reencode=True)
+        assert written == len(sink.getvalue()) > 0
+        streamed = tmp_path / "streamed.mp4"
+        streamed.write_bytes(sink.getvalue())
+        assert self.count_frames(streamed) == 200
@@ -2,8 +2,20 @@
 Tests unitaires pour YouTube Segment Downloader
 """
 
+import io
+import sys
+import threading
+import time
+from pathlib import Path
+
 import pytest
-from youtube_segment_downloader import time_to_seconds, validate_url
+from youtube_segment_downloader import SegmentDownloader, time_to_seconds, validate_url
+from youtube_segment_downloader import cli, downloader
+from youtube_segment_downloader.cache import ClipCache, InfoCache
+from youtube_segment_downloader.cutting import CutStats
+from youtube_segment_downloader.downloader import SegmentResult
+
+from .conftest import FakeYoutubeDL
 
 
 class TestTimeConversion:
@@ -51,6 +63,441 @@ class TestURLValidation:
             validate_url("not a url")
         with pytest.raises(ValueError):
             validate_url("")
+        with pytest.raises(ValueError):
+            validate_url("https://youtube.com.example.org/watch?v=dQw4w9WgXcQ")
+
+    def test_video_id_normalisation(self):
+        """Toutes les formes d'URL d'une vidéo donnent le même ID"""
+        urls = [
+            "https://youtu.be/dQw4w9WgXcQ?t=42",
+            "youtube.com/watch?feature=share&v=dQw4w9WgXcQ",
+            "https://m.youtube.com/watch?v=dQw4w9WgXcQ&list=PL1",
+            "https://www.youtube.com/shorts/dQw4w9WgXcQ",
+            "https://www.youtube-nocookie.com/embed/dQw4w9WgXcQ",
+        ]
+        assert {downloader.extract_video_id(url) for url in urls} == {"dQw4w9WgXcQ"}
+        with pytest.raises(ValueError):
+            downloader.extract_video_id("https://youtu.be/court")
+
+
+class TestSegmentDownloader:
+    """Tests pour la session de téléchargement réutilisable"""
+
+    URL = "https://youtu.be/dQw4w9WgXcQ"
+
+    def test_resources_are_reused(self, fake_ydl, tmp_path):
+        """ffmpeg n'est vérifié qu'une fois et l'instance yt-dlp est réutilisée"""
+        session = SegmentDownloader(ffmpeg_path="ffmpeg", cache=False, clip_cache=False)
+        events = []
+        for i in range(3):
+            assert session.download(self.URL, "0:10", "0:20", str(tmp_path / f"{i}.mp4"),
+                                    verbose=False, progress_hook=events.append)
+        assert len(fake_ydl) == 1
+        assert FakeYoutubeDL.created == 1
+        assert len(events) == 3
+        session.close()
+
+    def test_concurrent_downloads_are_bounded(self, fake_ydl, tmp_path):
+        """Les appels concurrents se partagent au plus max_instances instances"""
+        session = SegmentDownloader(ffmpeg_path="ffmpeg", max_instances=2, cache=False, clip_cache=False)
+        results = []
+        # Bornes distinctes : des demandes identiques seraient regroupées
+        threads = [
+            threading.Thread(target=lambda i=i: results.append(
+                session.download(self.URL, "0:10", f"0:2{i}", str(tmp_path / f"{i}.mp4"), verbose=False)))
+            for i in range(6)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert [bool(r) for r in results] == [True] * 6
+        assert FakeYoutubeDL.created == 2
+        session.close()
+
+    def test_invalid_range(self, fake_ydl):
+        """Un segment vide est refusé sans créer d'instance"""
+        session = SegmentDownloader(ffmpeg_path="ffmpeg", cache=False, clip_cache=False)
+        result = session.download(self.URL, "0:20", "0:10", verbose=False)
+        assert not result
+        assert "fin" in result.error
+        assert FakeYoutubeDL.created == 0
+
+    def test_info_cache_skips_extraction(self, fake_ydl, tmp_path):
+        """Les segments d'une même vidéo ne ré-extraient pas les métadonnées"""
+        cache = InfoCache(tmp_path / "info.sqlite3")
+        session = SegmentDownloader(ffmpeg_path="ffmpeg", cache=cache, clip_cache=False)
+        for i in range(3):
+            assert session.download(self.URL, "0:10", "0:20", str(tmp_path / f"{i}.mp4"), verbose=False)
+        assert FakeYoutubeDL.extractions == 1
+        assert session.download(self.URL, "0:10", "0:20", str(tmp_path / "x.mp4"), verbose=False,
+                                use_cache=False)
+        assert FakeYoutubeDL.extractions == 2
+        session.close()
+
+    def test_smart_cut_mode(self, fake_ydl, tmp_path, monkeypatch):
+        """Le mode smart découpe localement et rapporte les secondes ré-encodées"""
+        calls = []
+
+        def fake_smart_cut(ffmpeg, ffprobe, source, output, start, end, workdir=None):
+            calls.append((start, end))
+            with open(output, 'wb') as f:
+                f.write(b'cut')
+            return CutStats(2.5, 7.5)
+
+        monkeypatch.setattr(downloader, "smart_cut", fake_smart_cut)
+        session = SegmentDownloader(ffmpeg_path="ffmpeg", cache=False, clip_cache=False)
+        result = session.download(self.URL, "0:10", "0:20", str(tmp_path / "s.mp4"),
+                                  verbose=False, cut_mode="smart")
+        assert result and result.cut_mode == "smart"
+        assert (result.reencoded_seconds, result.copied_seconds) == (2.5, 7.5)
+        assert calls == [(0, 10)]
+        # Les fichiers intermédiaires sont supprimés
+        assert [p.name for p in tmp_path.iterdir()] == ["s.mp4"]
+        assert not session.download(self.URL, "0:10", "0:20", verbose=False, cut_mode="inconnu")
+
+    def test_keyframe_mode(self, fake_ydl, tmp_path, monkeypatch):
+        """Le mode keyframe copie sans ré-encoder et rapporte les bornes réelles"""
+        probed = []
+
+        def fake_snap(ffprobe, source, start, end, duration=None, headers=None):
+            probed.append((source, start, end))
+            return 8.0, 22.0
+
+        monkeypatch.setattr(downloader, "snap_to_keyframes", fake_snap)
+        session = SegmentDownloader(ffmpeg_path="ffmpeg", cache=False, clip_cache=False)
+        result = session.download(self.URL, "0:10", "0:20", str(tmp_path / "k.mp4"),
+                                  verbose=False, cut_mode="keyframe")
+        assert result and (result.actual_start, result.actual_end) == (8.0, 22.0)
+        assert (result.reencoded_seconds, result.copied_seconds) == (0, 14.0)
+        assert probed == [("https://example.com/video.mp4", 10, 20)]
+        ydl = session._idle[0].ydl
+        assert ydl.params['force_keyframes_at_cuts'] is False
+
+    def test_clip_cache(self, fake_ydl, tmp_path, monkeypatch):
+        """Un extrait déjà téléchargé est resservi ou redécoupé sans réseau"""
+        cuts = []
+
+        def fake_cut(ffmpeg, source, output, start, end):
+            cuts.append((start, end))
+            with open(output, 'wb') as f:
+                f.write(b'cut')
+
+        monkeypatch.setattr(downloader, "cut_precise", fake_cut)
+        monkeypatch.setattr(downloader, "probe_keyframes", lambda ffprobe, source: [0.0, 2.0])
+        # Désactivé par défaut : rien n'est copié dans le cache
+        session = SegmentDownloader(ffmpeg_path="ffmpeg", cache=False)
+        assert session.clip_cache is None
+        off = session.download(self.URL, "5:00", "20:00", str(tmp_path / "off.mp4"), verbose=False)
+        assert off and off.cache is None
+        session.set_clip_cache(ClipCache(tmp_path / "clips"))
+        first = session.download(self.URL, "5:00", "20:00", str(tmp_path / "a.mp4"), verbose=False)
+        assert first and first.cache == "miss"
+        again = session.download(self.URL, "5:00", "20:00", str(tmp_path / "b.mp4"), verbose=False)
+        assert again and again.cache == "hit" and (tmp_path / "b.mp4").read_bytes() == b'fake'
+        inner = session.download(self.URL, "10:00", "12:00", str(tmp_path / "c.mp4"), verbose=False)
+        assert inner and inner.cache == "partial"
+        assert cuts == [(300, 420)]
+        assert FakeYoutubeDL.extractions == 2
+        fresh = session.download(self.URL, "10:00", "12:00", str(tmp_path / "d.mp4"), verbose=False,
+                                 use_cache=False)
+        assert fresh and fresh.cache is None and FakeYoutubeDL.extractions == 3
+        # Les extraits servis par le cache ont été rendus après leur découpe
+        assert not list((tmp_path / "clips" / "pins").iterdir())
+        session.set_clip_cache(False)
+        assert session.clip_cache is None
+        session.close()
+
+    def test_cache_arguments(self, tmp_path, monkeypatch):
+        """True, False ou un objet pour les deux caches ; None : la valeur par défaut de chacun"""
+        monkeypatch.setenv("YT_SEGMENT_CACHE_DIR", str(tmp_path))
+        session = SegmentDownloader(ffmpeg_path="ffmpeg")
+        assert isinstance(session.cache, InfoCache) and session.clip_cache is None
+        session.close()
+        session = SegmentDownloader(ffmpeg_path="ffmpeg", cache=None, clip_cache=None)
+        assert isinstance(session.cache, InfoCache) and session.clip_cache is None
+        session.close()
+        session = SegmentDownloader(ffmpeg_path="ffmpeg", cache=False, clip_cache=True)
+        assert session.cache is None and session.clip_cache.directory == tmp_path / "clips"
+        session.close()
+
+    def test_cli_clip_cache_flag(self, monkeypatch):
+        """--clip-cache active le cache d'extraits de la session partagée"""
+        calls = []
+
+        class Session:
+            def set_clip_cache(self, clip_cache=True):
+                calls.append(clip_cache)
+
+        monkeypatch.setattr(cli, "download_segment", lambda *args, **kwargs: SegmentResult(True, "a.mp4"))
+        monkeypatch.setattr(cli, "get_default_session", Session)
+        for argv, expected in (([], []), (["--clip-cache"], [True])):
+            with pytest.raises(SystemExit) as exc:
+                cli.main([self.URL, "0:10", "0:20", "a.mp4"] + argv)
+            assert exc.value.code == 0 and calls == expected
+
+    def test_parallel_ranges_use_proxy(self, fake_ydl, tmp_path):
+        """Avec parallel_ranges, les formats HTTP passent par le proxy local"""
+        session = SegmentDownloader(ffmpeg_path="ffmpeg", cache=False, clip_cache=False)
+        assert session.download(self.URL, "0:10", "0:20", str(tmp_path / "p.mp4"),
+                                verbose=False, parallel_ranges=4)
+        fmt = session._idle[0].ydl.processed[-1]['formats'][0]
+        assert fmt['url'].startswith("http://127.0.0.1:")
+        assert session.range_proxy._sources == {}
+        assert not session.download(self.URL, "0:10", "0:20", verbose=False, parallel_ranges=0)
+        session.close()
+
+    def test_identical_requests_share_one_download(self, fake_ydl, tmp_path, monkeypatch):
+        """Des demandes identiques simultanées se rattachent au téléchargement en cours"""
+        gate = threading.Event()
+        download = FakeYoutubeDL.download
+        monkeypatch.setattr(FakeYoutubeDL, "download", lambda self, urls: gate.wait(5) and download(self, urls))
+        session = SegmentDownloader(ffmpeg_path="ffmpeg", cache=False, clip_cache=False)
+        results, hooks = {}, {}
+
+        def run(name, url, end="0:20"):
+            hooks[name] = []
+            results[name] = session.download(url, "0:10", end, str(tmp_path / f"{name}.mp4"), verbose=False,
+                                             progress_hook=hooks[name].append)
+
+        leader = threading.Thread(target=run, args=("a", self.URL))
+        leader.start()
+        while not session._flights._flights:
+            time.sleep(0.005)
+        flight = next(iter(session._flights._flights.values()))
+        threads = [threading.Thread(target=run, args=("b", "https://www.youtube.com/watch?v=dQw4w9WgXcQ")),
+                   threading.Thread(target=run, args=("c", self.URL + "?t=3")),
+                   threading.Thread(target=run, args=("d", self.URL, "0:30"))]
+        for t in threads:
+            t.start()
+        while flight.waiters < 2:
+            time.sleep(0.005)
+        gate.set()
+        for t in [leader] + threads:
+            t.join()
+        assert all(results.values())
+        assert not results["a"].shared and results["b"].shared and results["c"].shared
+        assert not results["d"].shared
+        # Une extraction pour le segment partagé, une pour le segment différent
+        assert FakeYoutubeDL.extractions == 2
+        for name in "abc":
+            assert (tmp_path / f"{name}.mp4").read_bytes() == b'fake'
+            assert [e['status'] for e in hooks[name]] == ['finished']
+        assert results["b"].output_file == str(tmp_path / "b.mp4")
+        # Chaque sortie est un fichier distinct : réécrire l'une sur place (ffmpeg -y) ne touche pas les autres
+        with open(tmp_path / "a.mp4", "r+b") as f:
+            f.write(b'FAKE')
+        assert (tmp_path / "b.mp4").read_bytes() == b'fake' and (tmp_path / "c.mp4").read_bytes() == b'fake'
+        assert len(session._flights) == 0
+        session.close()
+
+    def test_direct_engine(self, fake_ydl, tmp_path, monkeypatch):
+        """Le moteur direct lit vidéo et audio distants en un seul ffmpeg, sans yt-dlp"""
+        calls = []
+        failures = []
+
+        def fake_fetch_remote(ffmpeg, streams, output, start, end, reencode=False):
+            calls.append((streams, start, end, reencode))
+            if failures:
+                raise RuntimeError(failures.pop())
+            with open(output, 'wb') as f:
+                f.write(b'direct')
+
+        monkeypatch.setattr(downloader, "fetch_remote", fake_fetch_remote)
+        session = SegmentDownloader(ffmpeg_path="ffmpeg", cache=InfoCache(tmp_path / "info.sqlite3"),
+                                    clip_cache=False)
+        events = []
+        result = session.download(self.URL, "0:10", "0:20", str(tmp_path / "d.mp4"), verbose=False,
+                                  progress_hook=events.append, engine="direct")
+        assert result and (tmp_path / "d.mp4").read_bytes() == b'direct'
+        # Vidéo en premier, quel que soit l'ordre de yt-dlp, qui n'écrit rien (b'fake')
+        assert calls == [([("https://example.com/video.mp4", {}), ("https://example.com/a.m4a", {})], 10, 20, True)]
+        assert [e['status'] for e in events] == ['finished']
+        download = next(p for p in result.stats["phases"] if p["phase"] == "download")
+        assert download["engine"] == "direct" and download["bytes"] == 6
+
+        # URL signée révoquée : l'info en cache est ré-extraite une fois
+        failures.append("Server returned 403 Forbidden")
+        result = session.download(self.URL, "0:10", "0:20", str(tmp_path / "e.mp4"), verbose=False,
+                                  engine="direct")
+        assert result and FakeYoutubeDL.extractions == 2 and len(calls) == 3
+        assert not session.download(self.URL, "0:10", "0:20", verbose=False, engine="inconnu")
+        session.close()
+
+    def test_stream_to_file_object(self, fake_ydl, tmp_path, monkeypatch):
+        """write_to reçoit le segment au fil de l'eau, sans fichier sur le disque"""
+        calls = []
+
+        def fake_stream_remote(ffmpeg, streams, sink, start, end, reencode=False, container="mp4",
+                               on_progress=None):
+            calls.append((start, end, reencode, container))
+            for written, chunk in ((4, b'abcd'), (6, b'ef')):
+                sink.write(chunk)
+                on_progress(written)
+            return 6
+
+        monkeypatch.setattr(downloader, "stream_remote", fake_stream_remote)
+        monkeypatch.chdir(tmp_path)
+        session = SegmentDownloader(ffmpeg_path="ffmpeg", cache=False, clip_cache=False)
+        sink = io.BytesIO()
+        events = []
+        result = session.download(self.URL, "0:10", "0:20", verbose=False, progress_hook=events.append,
+                                  write_to=sink)
+        assert result and result.output_file is None and sink.getvalue() == b'abcdef'
+        assert calls == [(10, 20, True, "mp4")]
+        assert [e['status'] for e in events] == ['downloading', 'downloading', 'finished']
+        assert list(tmp_path.iterdir()) == []
+        download = next(p for p in result.stats["phases"] if p["phase"] == "download")
+        assert download["engine"] == "direct" and download["bytes"] == 6
+
+        for kwargs in ({"cut_mode": "smart"}, {"output_file": "a.mp4"}, {"stream_format": "avi"}):
+            kwargs.setdefault("output_file", None)
+            assert not session.download(self.URL, "0:10", "0:20", verbose=False, write_to=sink, **kwargs)
+        assert len(calls) == 1
+        session.close()
+
+    def test_cli_stdout(self, monkeypatch, capsys):
+        """Sortie "-" : le segment va sur la sortie standard, les messages sur stderr"""
+        received = {}
+
+        def fake_download(url, start, end, output, verbose=True, **kwargs):
+            received.update(kwargs, output=output, verbose=verbose)
+            return SegmentResult(True, None, cut_mode="precise")
+
+        monkeypatch.setattr(cli, "download_segment", fake_download)
+        with pytest.raises(SystemExit) as exc:
+            cli.main([self.URL, "0:10", "0:20", "-", "--stream-format", "mpegts"])
+        assert exc.value.code == 0
+        assert received["output"] is None and received["verbose"] is False
+        assert received["write_to"] is sys.stdout.buffer and received["stream_format"] == "mpegts"
+        assert capsys.readouterr().out == ""
+        with pytest.raises(SystemExit) as exc:
+            cli.main([self.URL, "0:10", "0:20", "-", "--mode", "smart"])
+        assert exc.value.code == 2
+
+
+class TestDownloadSegments:
+    """Tests pour le téléchargement de plusieurs segments d'une même vidéo"""
+
+    URL = "https://youtu.be/dQw4w9WgXcQ"
+
+    @pytest.fixture
+    def cuts(self, fake_ydl, monkeypatch):
+        cuts = []
+
+        def fake_cut(ffmpeg, source, output, start, end):
+            cuts.append((start, end))
+            with open(output, 'wb') as f:
+                f.write(b'cut')
+
+        monkeypatch.setattr(downloader, "cut_precise", fake_cut)
+        monkeypatch.setattr(downloader, "probe_keyframes", lambda ffprobe, source: [0.0])
+        monkeypatch.setattr(downloader, "snap_to_keyframes",
+                            lambda ffprobe, source, start, end, duration=None, headers=None: (start - 1, end + 1))
+        return cuts
+
+    def test_ranges_are_fetched_once(self, cuts, tmp_path):
+        """Une seule extraction, un téléchargement par groupe de segments proches"""
+        session = SegmentDownloader(ffmpeg_path="ffmpeg", cache=False, clip_cache=False)
+        events = []
+        results = session.download_segments(self.URL, [
+            ("0:10", "0:20", str(tmp_path / "a.mp4")),
+            ("0:15", "0:30", str(tmp_path / "b.mp4")),
+            ("5:00", "5:10", str(tmp_path / "c.mp4")),
+            ("0:20", "0:10"),
+        ], verbose=False, progress_hook=events.append)
+        assert [bool(r) for r in results] == [True, True, True, False]
+        assert "fin" in results[3].error
+        assert FakeYoutubeDL.extractions == 1
+        assert len(events) == 2
+        # Plages [9, 31] et [299, 311] : les découpes sont relatives à leur début
+        assert cuts == [(1, 11), (6, 21), (1, 11)]
+        assert (results[1].actual_start, results[1].actual_end) == (15, 30)
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["a.mp4", "b.mp4", "c.mp4"]
+        phases = [p["phase"] for p in results[0].stats["phases"]]
+        assert phases.count("extract") == 1 and phases.count("download") == 2
+        session.close()
+
+    def test_cached_segments_skip_download(self, cuts, tmp_path):
+        """Les segments couverts par un extrait en cache ne déclenchent ni extraction ni téléchargement"""
+        session = SegmentDownloader(ffmpeg_path="ffmpeg", cache=False, clip_cache=ClipCache(tmp_path / "clips"))
+        first = session.download_segments(self.URL, [("1:00", "1:10", str(tmp_path / "a.mp4"))],
+                                          verbose=False, cut_mode="keyframe")
+        assert first[0] and first[0].cache == "miss"
+        assert (first[0].actual_start, first[0].actual_end) == (59, 71)
+        again = session.download_segments(self.URL, [("1:02", "1:08", str(tmp_path / "b.mp4"))], verbose=False)
+        assert again[0] and again[0].cache == "partial"
+        assert FakeYoutubeDL.extractions == 1
+        session.close()
+
+    def test_cli_segment_flag(self, monkeypatch, capsys):
+        """--segment peut être répété et exclut <début> <fin>"""
+        calls = []
+
+        def fake_download_segments(url, segments, **kwargs):
+            calls.append(segments)
+            return [downloader.SegmentResult(True, s[2] if len(s) > 2 else "x.mp4") for s in segments]
+
+        monkeypatch.setattr(cli, "download_segments", fake_download_segments)
+        with pytest.raises(SystemExit) as exc:
+            cli.main([self.URL, "--segment", "0:10", "0:20", "a.mp4", "--segment", "1:00", "1:10"])
+        assert exc.value.code == 0
+        assert calls == [[("0:10", "0:20", "a.mp4"), ("1:00", "1:10")]]
+        assert "a.mp4" in capsys.readouterr().out
+        with pytest.raises(SystemExit) as exc:
+            cli.main([self.URL, "0:10", "0:20", "--segment", "1:00", "1:10"])
+        assert exc.value.code == 2
+
+
+class TestSplitByChapters:
+    """Tests pour le découpage d'une vidéo par chapitres"""
+
+    URL = "https://youtu.be/dQw4w9WgXcQ"
+
+    @pytest.fixture
+    def splits(self, fake_ydl, monkeypatch):
+        splits = []
+
+        def fake_split(ffmpeg, source, boundaries, directory, reencode=False):
+            splits.append((boundaries, reencode))
+            directory.mkdir()
+            parts = [directory / f"part{i:04d}.mp4" for i in range(len(boundaries) + 1)]
+            for i, part in enumerate(parts):
+                part.write_text(f"morceau {i}")
+            return parts
+
+        monkeypatch.setattr(downloader, "split_segments", fake_split)
+        monkeypatch.setattr(downloader, "probe_keyframes", lambda ffprobe, source: [0.0])
+        monkeypatch.setattr(downloader, "snap_to_keyframes",
+                            lambda ffprobe, source, start, end, duration=None, headers=None: (start - 1, end + 1))
+        return splits
+
+    def test_one_fetch_one_split(self, splits, tmp_path):
+        """Une extraction, un téléchargement et une passe ffmpeg pour tous les chapitres"""
+        session = SegmentDownloader(ffmpeg_path="ffmpeg", cache=False, clip_cache=False)
+        cues = [("0:05", "0:10", "Intro"), ("0:10", None, "Partie 1/2"), ("0:30", "0:40", None)]
+        results = session.split_by_chapters(self.URL, tmp_path / "out", cues=cues, verbose=False)
+        assert all(results)
+        assert FakeYoutubeDL.extractions == 1
+        # Extrait [4, 41] : coupures relatives à son début, les morceaux 0 et 4 débordent et sont ignorés
+        assert splits == [([1, 6, 26, 36], True)]
+        names = [Path(r.output_file).name for r in results]
+        assert names == ["01 - Intro.mp4", "02 - Partie 1_2.mp4", "03 - Chapitre 3.mp4"]
+        assert [Path(r.output_file).read_text() for r in results] == ["morceau 1", "morceau 2", "morceau 3"]
+        assert (results[1].actual_start, results[1].actual_end) == (10, 30)
+        assert sorted(p.name for p in (tmp_path / "out").iterdir()) == names
+        session.close()
+
+    def test_errors(self, splits, tmp_path):
+        """Sans chapitres ni repères, ou en mode smart, aucun téléchargement n'a lieu"""
+        session = SegmentDownloader(ffmpeg_path="ffmpeg", cache=False, clip_cache=False)
+        results = session.split_by_chapters(self.URL, tmp_path, verbose=False)
+        assert not results[0] and "chapitres" in results[0].error
+        results = session.split_by_chapters(self.URL, tmp_path, cues=[(0, 10, "A")], cut_mode="smart",
+                                            verbose=False)
+        assert not results[0] and "smart" in results[0].error
+        assert splits == [] and list(tmp_path.iterdir()) == []
+        session.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,95 @@
+"""
+Tests unitaires pour l'instrumentation par phases
+"""
+
+import json
+import os
+import sys
+
+import pytest
+from youtube_segment_downloader import SegmentDownloader, cli
+from youtube_segment_downloader.cancel import run_process
+from youtube_segment_downloader.downloader import SegmentResult
+from youtube_segment_downloader.events import PhaseFinished, PhaseStarted, Progress, Recorder, recording
+
+
+URL = "https://youtu.be/dQw4w9WgXcQ"
+
+
+class TestRecorder:
+    """Tests pour le Recorder"""
+
+    def test_phases_and_summary(self):
+        """Les phases émettent début/fin et le résumé calcule le débit"""
+        events = []
+        recorder = Recorder(events.append)
+        with recorder.phase("validate"):
+            pass
+        with recorder.phase("download") as phase:
+            recorder.progress({'downloaded_bytes': 10, 'total_bytes': 20, 'speed': 5.0})
+            recorder.annotate(cached=True)
+            phase.bytes = 1000
+        recorder.finish()
+        assert [type(e) for e in events] == [PhaseStarted, PhaseFinished, PhaseStarted, Progress, PhaseFinished]
+        assert events[3].phase == "download" and events[3].total_bytes == 20
+        summary = recorder.summary()
+        assert [p["phase"] for p in summary["phases"]] == ["validate", "download"]
+        assert summary["downloaded_bytes"] == 1000
+        assert summary["phases"][1]["cached"] is True
+        assert summary["phases"][1]["start"] >= summary["phases"][0]["start"]
+        json.dumps(summary)
+
+    @pytest.mark.skipif(not hasattr(os, "wait4"), reason="os.wait4 indisponible")
+    def test_child_cpu_time(self):
+        """Le temps CPU des processus fils est imputé à la phase en cours"""
+        recorder = Recorder()
+        with recording(recorder), recorder.phase("cut"):
+            run_process([sys.executable, "-c", "sum(i * i for i in range(3000000))"])
+        assert recorder.phases[0].cpu_seconds > 0
+        assert recorder.summary()["cpu_seconds"] > 0
+
+
+class TestDownloadEvents:
+    """Tests pour les événements d'un téléchargement complet"""
+
+    def test_session_phases(self, fake_ydl, tmp_path):
+        """Un téléchargement émet ses phases dans l'ordre et les résume dans stats"""
+        session = SegmentDownloader(ffmpeg_path="ffmpeg", cache=False, clip_cache=False)
+        events = []
+        result = session.download(URL, "0:10", "0:20", str(tmp_path / "a.mp4"), verbose=False,
+                                  on_event=events.append, parallel_ranges=2)
+        assert result
+        finished = [e.phase for e in events if isinstance(e, PhaseFinished)]
+        assert finished == ["validate", "ffmpeg_probe", "extract", "download", "finalize"]
+        assert any(isinstance(e, Progress) and e.phase == "download" for e in events)
+        download = result.stats["phases"][3]
+        assert download["bytes"] == 4 and download["streams"] == {None: 0}
+        assert result.stats["downloaded_bytes"] == 4
+        session.close()
+
+    def test_stats_on_error(self, fake_ydl):
+        """Un échec garde les phases parcourues"""
+        session = SegmentDownloader(ffmpeg_path="ffmpeg", cache=False, clip_cache=False)
+        result = session.download(URL, "0:20", "0:10", verbose=False)
+        assert not result
+        assert [p["phase"] for p in result.stats["phases"]] == ["validate"]
+        session.close()
+
+    def test_cli_stats_json(self, monkeypatch, capsys):
+        """--stats json n'écrit que le résultat JSON sur la sortie standard"""
+        recorder = Recorder()
+        with recorder.phase("download"):
+            pass
+        recorder.finish()
+
+        def fake_download(url, start, end, output, verbose=True, **kwargs):
+            assert verbose is False
+            return SegmentResult(True, "a.mp4", cut_mode="precise", stats=recorder.summary())
+
+        monkeypatch.setattr(cli, "download_segment", fake_download)
+        with pytest.raises(SystemExit) as exc:
+            cli.main([URL, "0:10", "0:20", "--stats", "json"])
+        assert exc.value.code == 0
+        data = json.loads(capsys.readouterr().out)
+        assert data["success"] and data["stats"]["phases"][0]["phase"] == "download"
+
@@ -0,0 +1,133 @@
+"""
+Tests unitaires pour la découverte de ffmpeg et de ses capacités
+"""
+
+import os
+import sys
+
+import pytest
+from youtube_segment_downloader import ffmpeg
+from youtube_segment_downloader.ffmpeg import (find_ffmpeg, parse_encoders, parse_muxers, parse_protocols,
+                                               probe_ffmpeg)
+
+
+ENCODERS = """Encoders:
+ V..... = Video
+ ------
+ V....D libx264              libx264 H.264 / AVC / MPEG-4 AVC / MPEG-4 part 10 (codec h264)
+ V....D h264_nvenc           NVIDIA NVENC H.264 encoder (codec h264)
+ V....D h264_vaapi           H.264/AVC (VAAPI) (codec h264)
+ A....D aac                  AAC (Advanced Audio Coding)
+"""
+
+MUXERS = """File formats:
+ D. = Demuxing supported
+ .E = Muxing supported
+ --
+  E mp4             MP4 (MPEG-4 Part 14)
+  E matroska,webm   Matroska
+ D  mov,mp4,m4a     QuickTime / MOV
+"""
+
+PROTOCOLS = """Supported file protocols:
+Input:
+  file
+  http
+  https
+Output:
+  file
+  rtmp
+"""
+
+FAKE_FFMPEG = f"""#!/bin/sh
+echo "$1 $2" >> "$(dirname "$0")/calls.log"
+case "$2" in
+  -encoders) cat <<'EOF'
+{ENCODERS}EOF
+  ;;
+  -muxers) cat <<'EOF'
+{MUXERS}EOF
+  ;;
+  -protocols) cat <<'EOF'
+{PROTOCOLS}EOF
+  ;;
+  *) echo "ffmpeg version 6.1-test Copyright (c) 2000-2023" ;;
+esac
+"""
+
+posix_only = pytest.mark.skipif(sys.platform == "win32", reason="script shell de substitution")
+
+
+@pytest.fixture
+def fake_ffmpeg(tmp_path, monkeypatch):
+    """Faux binaire ffmpeg qui journalise ses appels, en tête du PATH"""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    binary = bin_dir / "ffmpeg"
+    binary.write_text(FAKE_FFMPEG)
+    binary.chmod(0o755)
+    monkeypatch.setenv("PATH", str(bin_dir) + os.pathsep + os.defpath)
+    monkeypatch.delenv(ffmpeg.FFMPEG_ENV, raising=False)
+    monkeypatch.setattr(ffmpeg, "COMMON_PATHS", [])
+    monkeypatch.setattr(ffmpeg, "_probed", {})
+    return binary
+
+
+def _calls(binary):
+    log = binary.parent / "calls.log"
+    return log.read_text().splitlines() if log.exists() else []
+
+
+class TestParsing:
+    """Tests pour l'analyse des listes de ffmpeg"""
+
+    def test_encoders(self):
+        """Les encodeurs matériels sont écartés, le codec est extrait"""
+        assert parse_encoders(ENCODERS) == {"libx264": "h264", "aac": "aac"}
+
+    def test_muxers_and_protocols(self):
+        """Seuls les muxeurs et les protocoles en lecture sont retenus"""
+        assert parse_muxers(MUXERS) == ["mp4", "matroska", "webm"]
+        assert parse_protocols(PROTOCOLS) == ["file", "http", "https"]
+
+
+@posix_only
+class TestDiscovery:
+    """Tests pour la recherche de ffmpeg et le cache des capacités"""
+
+    def test_path_and_env(self, fake_ffmpeg, tmp_path, monkeypatch):
+        """ffmpeg est cherché dans le PATH, FFMPEG_BINARY a la priorité"""
+        assert find_ffmpeg() == str(fake_ffmpeg)
+        monkeypatch.setenv(ffmpeg.FFMPEG_ENV, str(tmp_path / "absent"))
+        with pytest.raises(RuntimeError):
+            find_ffmpeg()
+        monkeypatch.setenv("PATH", "")
+        monkeypatch.setenv(ffmpeg.FFMPEG_ENV, str(fake_ffmpeg))
+        assert find_ffmpeg() == str(fake_ffmpeg)
+
+    def test_capabilities_are_cached(self, fake_ffmpeg, tmp_path, monkeypatch):
+        """ffmpeg n'est interrogé qu'une fois par binaire, même d'un processus à l'autre"""
+        cache_file = tmp_path / "ffmpeg.json"
+        info = probe_ffmpeg(cache_file=cache_file)
+        assert info.version == "6.1-test" and info.has_encoder("libx264")
+        assert info.can_copy_to("mp4") and not info.can_copy_to("avi")
+        assert info.can_read("https://example.com/v.mp4") and not info.can_read("rtmp://example.com/live")
+        assert len(_calls(fake_ffmpeg)) == 4
+
+        assert probe_ffmpeg(cache_file=cache_file) == info
+        # Nouveau processus : mémoire vide, cache disque valide
+        monkeypatch.setattr(ffmpeg, "_probed", {})
+        assert probe_ffmpeg(cache_file=cache_file) == info
+        assert len(_calls(fake_ffmpeg)) == 4
+
+        # Binaire remplacé : nouvelle détection
+        stat = fake_ffmpeg.stat()
+        os.utime(fake_ffmpeg, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        probe_ffmpeg(cache_file=cache_file)
+        assert len(_calls(fake_ffmpeg)) == 8
+
+    def test_missing(self, fake_ffmpeg, monkeypatch):
+        """Un ffmpeg absent produit une erreur explicite"""
+        monkeypatch.setenv("PATH", "")
+        with pytest.raises(RuntimeError, match="introuvable"):
+            probe_ffmpeg(cache_file=False)
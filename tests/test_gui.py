@@ -0,0 +1,155 @@
+"""
+Tests unitaires pour la file de téléchargements de l'interface graphique (sans affichage)
+"""
+
+import threading
+import time
+
+import pytest
+from youtube_segment_downloader import SegmentResult
+
+# Sans tkinter, l'interface graphique n'est pas importable
+gui = pytest.importorskip("youtube_segment_downloader_gui")
+
+
+class FakeDownloads:
+    """Téléchargements factices : chacun attend sa libération ou son annulation"""
+
+    def __init__(self):
+        self.started = []
+        self.release = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, url, start_time, end_time, output_file=None, progress_hook=None, cancel=None, **kwargs):
+        with self._lock:
+            self.started.append(end_time)
+            release = self.release.setdefault(end_time, threading.Event())
+        progress_hook({'status': 'downloading', 'downloaded_bytes': 500, 'total_bytes': 1000, 'speed': 100})
+        while not release.wait(0.01):
+            if cancel.cancelled:
+                return SegmentResult(False, output_file, error="Téléchargement annulé", cancelled=True)
+        progress_hook({'status': 'finished', 'downloaded_bytes': 1000, 'total_bytes': 1000})
+        return SegmentResult(True, output_file or f"{end_time}.mp4")
+
+    def finish(self, end_time):
+        with self._lock:
+            self.release.setdefault(end_time, threading.Event()).set()
+
+
+def _wait(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "délai dépassé"
+        time.sleep(0.01)
+
+
+class TestDownloadQueue:
+    """Tests pour l'ordonnancement des clips"""
+
+    def test_concurrency_order_and_cancel(self):
+        """Au plus N clips en cours, démarrés dans l'ordre de la file ; annulation individuelle"""
+        messages = []
+        downloads = FakeDownloads()
+        clips = gui.DownloadQueue(messages.append, max_concurrent=2, download=downloads)
+        jobs = [clips.add("https://youtu.be/dQw4w9WgXcQ", "0:00", f"0:1{i}") for i in range(5)]
+        _wait(lambda: len(downloads.started) == 2)
+        assert [job.state for job in jobs] == ["running"] * 2 + ["queued"] * 3
+        # Le dernier clip passe devant, le troisième est annulé avant d'avoir démarré
+        assert clips.move(jobs[4].id, -2) == 2
+        clips.cancel(jobs[2].id)
+        assert jobs[2].state == "cancelled"
+        clips.cancel(jobs[0].id)
+        _wait(lambda: len(downloads.started) == 3)
+        assert downloads.started[2] == "0:14"
+        assert jobs[0].state == "cancelled"
+
+        totals = clips.totals()
+        assert totals["counts"]["running"] == 2 and totals["counts"]["queued"] == 1
+        assert totals["bandwidth"] == 200
+        # 2 × 500 octets restants + 1 clip en attente estimé à 1000 octets, à 200 o/s
+        assert totals["eta"] == pytest.approx(10)
+
+        for end in ("0:11", "0:14", "0:13"):
+            downloads.finish(end)
+        _wait(lambda: messages[-1] == ("idle",))
+        assert [job.state for job in jobs] == ["cancelled", "done", "cancelled", "done", "done"]
+        assert jobs[1].percent == 100 and jobs[1].output_file == "segment_0002_0-00_0-11.mp4"
+        assert clips.remove(jobs[0].id) and len(clips.jobs) == 4
+        assert ("job", jobs[4].id) in messages
+
+    def test_default_outputs_are_unique(self):
+        """Deux vidéos coupées aux mêmes temps reçoivent des sorties différentes"""
+        downloads = FakeDownloads()
+        clips = gui.DownloadQueue(lambda message: None, download=downloads)
+        first = clips.add("https://youtu.be/dQw4w9WgXcQ", "0:10", "0:20")
+        second = clips.add("https://youtu.be/9bZkp7q19f0", "0:10", "0:20")
+        named = clips.add("https://youtu.be/9bZkp7q19f0", "0:10", "0:20", "mon_clip.mp4")
+        assert first.output_file == "segment_0001_0-10_0-20.mp4"
+        assert second.output_file == "segment_0002_0-10_0-20.mp4"
+        assert named.output_file == "mon_clip.mp4"
+        downloads.finish("0:20")
+        _wait(lambda: all(job.state == "done" for job in clips.jobs))
+        assert [job.output_file for job in clips.jobs] == [first.output_file, second.output_file, "mon_clip.mp4"]
+
+    def test_formatting(self):
+        """Tailles et durées lisibles"""
+        assert gui.format_bytes(512) == "512 o" and gui.format_bytes(3 * 1024 * 1024) == "3.0 Mo"
+        assert gui.format_duration(42) == "42 s" and gui.format_duration(185) == "3 min 05 s"
+        assert gui.format_duration(3720) == "1 h 02 min"
+
+    def test_progress_is_coalesced(self):
+        """Un clip n'est redéposé qu'une fois lu : seule sa dernière progression compte"""
+        messages = []
+        downloads = FakeDownloads()
+        clips = gui.DownloadQueue(messages.append, max_concurrent=1, download=downloads)
+        job = clips.add("https://youtu.be/dQw4w9WgXcQ", "0:00", "0:10")
+        _wait(lambda: downloads.started)
+        for _ in range(9):
+            clips._notify(job.id)
+        assert messages.count(("job", job.id)) == 1
+        clips.acknowledge(job.id)
+        downloads.finish("0:10")
+        _wait(lambda: messages[-1] == ("idle",))
+        assert messages.count(("job", job.id)) == 2 and job.state == "done"
+
+
+class TestLogBuffer:
+    """Tests pour le journal borné du terminal de contrôle"""
+
+    def test_ring_and_spill(self, tmp_path):
+        """Au-delà de max_lines, les plus anciennes lignes quittent le widget pour le fichier"""
+        log = gui.LogBuffer(max_lines=3, spill_path=tmp_path / "gui.log")
+        for i in range(2):
+            log.append(f"ligne {i}")
+        trim, lines = log.flush()
+        assert trim == 0 and [level for _, level in lines] == ["info", "info"]
+        assert log.flush() == (0, [])
+
+        log.append("ligne 2", "error")
+        log.append("ligne 3")
+        trim, lines = log.flush()
+        assert trim == 1 and lines[0][0].endswith("] ligne 2\n") and lines[0][1] == "error"
+
+        # Une rafale plus longue que le journal : seules les 3 dernières lignes sont rendues
+        for i in range(4, 10):
+            log.append(f"ligne {i}")
+        trim, lines = log.flush()
+        assert trim == 3 and [text[-8:] for text, _ in lines] == ["ligne 7\n", "ligne 8\n", "ligne 9\n"]
+        log.close()
+        spilled = (tmp_path / "gui.log").read_text(encoding="utf-8").splitlines()
+        assert [line[-7:] for line in spilled] == [f"ligne {i}" for i in range(7)]
+        assert log.spilled == 7 and len(log.lines) == 3
+
+    def test_multiline_messages(self):
+        """Un message de plusieurs lignes compte pour autant de lignes du widget"""
+        log = gui.LogBuffer(max_lines=3)
+        log.append("ERROR: échec\n  détail 1\n  détail 2", "error")
+        trim, lines = log.flush()
+        assert trim == 0 and len(lines) == 3 and lines[0][0].endswith("] ERROR: échec\n")
+        assert lines[1][0].endswith("  détail 1\n") and all(level == "error" for _, level in lines)
+        for i in range(3):
+            log.append(f"ligne {i}")
+        trim, lines = log.flush()
+        # Le widget garde exactement les 3 dernières lignes, sans fragment du premier message
+        assert trim == 3 and len(lines) == 3 and len(log.lines) == 3
+        assert all("\n" not in text[:-1] for text, _ in log.lines)
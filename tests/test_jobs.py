@@ -0,0 +1,133 @@
+"""
+Tests unitaires pour la file de jobs persistante
+"""
+
+import subprocess
+import sys
+
+import pytest
+from youtube_segment_downloader import SegmentResult, cli
+from youtube_segment_downloader.jobs import _HOST, JobStore, current_job
+
+
+PAYLOAD = bytes(range(256)) * 16
+
+
+class FakeSession:
+    """Remplace SegmentDownloader : reçoit le flux par morceaux via le Spool du job"""
+
+    def __init__(self, crash_after=None):
+        self.crash_after = crash_after
+        self.fetched = 0
+        self.calls = []
+
+    def download(self, url, start_time, end_time, output_file=None, **kwargs):
+        job = current_job()
+        self.calls.append(dict(kwargs, output_file=output_file, job=job))
+        spool = job.spool("137")
+        for first, last, present in spool.plan(0, len(PAYLOAD) - 1):
+            for offset in range(first, last + 1, 1024):
+                if present:
+                    continue
+                if self.crash_after is not None and self.fetched >= self.crash_after:
+                    raise KeyboardInterrupt
+                spool.write(offset, PAYLOAD[offset:offset + 1024], len(PAYLOAD))
+                self.fetched += 1024
+        assert spool.read(0, len(PAYLOAD) - 1) == PAYLOAD
+        with open(output_file, "wb") as f:
+            f.write(b"fake")
+        return SegmentResult(True, output_file)
+
+
+@pytest.fixture
+def store(tmp_path):
+    jobs = JobStore(tmp_path / "jobs")
+    yield jobs
+    jobs.close()
+
+
+class TestJobStore:
+    """Tests pour l'enregistrement et la reprise des jobs"""
+
+    URL = "https://youtu.be/dQw4w9WgXcQ"
+
+    def test_resume_after_crash(self, store, tmp_path):
+        """Un job interrompu reprend avec les octets déjà reçus, puis sa copie est supprimée"""
+        output = tmp_path / "out.mp4"
+        job_id = store.submit(self.URL, "0:10", "0:20", str(output), cut_mode="keyframe")
+        crashing = FakeSession(crash_after=2048)
+        with pytest.raises(KeyboardInterrupt):
+            store.run(job_id, session=crashing)
+        job = store.get(job_id)
+        assert job.state == "interrupted" and job.attempts == 1
+        assert job.streams[0].format_id == "137" and job.streams[0].bytes == 2048
+        assert store.spool_dir(job_id).is_dir()
+
+        session = FakeSession()
+        ((resumed, result),) = JobStore(store.directory).resume(session=session)
+        assert resumed.id == job_id and result
+        assert session.fetched == len(PAYLOAD) - 2048
+        assert session.calls[0]["cut_mode"] == "keyframe" and session.calls[0]["output_file"] == str(output)
+        job = store.get(job_id)
+        assert job.state == "done" and job.streams == [] and job.attempts == 2
+        assert not store.spool_dir(job_id).exists()
+        assert current_job() is None
+        with pytest.raises(ValueError):
+            store.run(job_id, session=session)
+
+    def test_dead_process_is_interrupted(self, store, tmp_path):
+        """Un job "running" dont le processus a disparu devient "interrupted" """
+        job_id = store.submit(self.URL, "0:10", "0:20", str(tmp_path / "out.mp4"))
+        child = subprocess.Popen([sys.executable, "-c", "pass"])
+        child.wait()
+        with store._lock:
+            store._connect().execute("UPDATE jobs SET state = 'running', host = ?, pid = ? WHERE id = ?",
+                                     (_HOST, child.pid, job_id))
+            store._conn.commit()
+        assert [job.id for job in store.jobs(("interrupted",))] == [job_id]
+
+    def test_unknown_option(self, store):
+        """Seules les options de download enregistrables sont acceptées"""
+        with pytest.raises(ValueError):
+            store.submit(self.URL, "0:10", "0:20", write_to=sys.stdout)
+
+    def test_gc(self, store, tmp_path):
+        """gc supprime les copies et les fichiers .part des jobs arrêtés depuis longtemps"""
+        output = tmp_path / "out.mp4"
+        job_id = store.submit(self.URL, "0:10", "0:20", str(output))
+        with pytest.raises(KeyboardInterrupt):
+            store.run(job_id, session=FakeSession(crash_after=1024))
+        part = tmp_path / "out.mp4.part"
+        part.write_bytes(b"x" * 100)
+        orphan = store.directory / "999"
+        orphan.mkdir()
+        assert store.gc().files == 1 and not orphan.exists()
+        assert part.exists()
+        stats = store.gc(max_age=-1)
+        assert stats.jobs == 1 and stats.bytes >= 1124
+        assert not part.exists() and not store.spool_dir(job_id).exists()
+        job = store.get(job_id)
+        assert job.state == "interrupted" and job.streams == []
+
+    def test_cli(self, store, monkeypatch, capsys, tmp_path):
+        """yt-segment resume liste et reprend les jobs ; --resumable enregistre le téléchargement"""
+        monkeypatch.setattr(cli, "_job_store", lambda: store)
+        job_id = store.submit(self.URL, "0:10", "0:20", str(tmp_path / "out.mp4"))
+        with pytest.raises(SystemExit) as exc:
+            cli.main(["resume", "--list"])
+        assert exc.value.code == 0 and f"#{job_id} pending" in capsys.readouterr().out
+        with pytest.raises(SystemExit) as exc:
+            cli.main(["resume", "42"])
+        assert exc.value.code == 1
+
+        received = {}
+
+        def fake_download(url, start, end, output, **kwargs):
+            received.update(kwargs, output=output)
+            return SegmentResult(True, output)
+
+        monkeypatch.setattr(store, "download", fake_download)
+        with pytest.raises(SystemExit) as exc:
+            cli.main([self.URL, "0:10", "0:20", "a.mp4", "--resumable", "--fast"])
+        assert exc.value.code == 0
+        assert received["output"] == "a.mp4" and received["cut_mode"] == "keyframe"
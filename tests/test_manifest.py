@@ -0,0 +1,44 @@
+"""
+Tests unitaires pour la lecture des manifestes
+"""
+
+import pytest
+from youtube_segment_downloader.manifest import parse_timestamp, pick_field, read_csv_rows
+
+
+class TestTimestamps:
+    """Tests pour la lecture des horodatages"""
+
+    def test_formats(self):
+        """Secondes, MM:SS et HH:MM:SS, avec ou sans décimales"""
+        assert parse_timestamp(12) == 12.0
+        assert parse_timestamp("12.5") == 12.5
+        assert parse_timestamp("01:30") == 90.0
+        assert parse_timestamp("1:02:03,250") == 3723.25
+
+    def test_invalid(self):
+        """Un horodatage mal formé est refusé"""
+        for value in ("", "1::2", "a:10", "1:2:3:4"):
+            with pytest.raises(ValueError, match="Horodatage invalide"):
+                parse_timestamp(value)
+
+
+class TestFields:
+    """Tests pour les noms de champs et les lignes CSV"""
+
+    def test_pick_field(self):
+        """Premier nom accepté non vide ; chaînes sans leurs espaces, nombres tels quels"""
+        assert pick_field({"debut": " 1:00 ", "start": ""}, "start") == "1:00"
+        assert pick_field({"start_time": 12.5}, "start") == 12.5
+        assert pick_field({"sortie": "a.mp4"}, "output") == "a.mp4"
+        assert pick_field({"titre": None}, "title") is None
+
+    def test_read_csv_rows(self, tmp_path):
+        """En-tête reconnu par la première colonne attendue, sinon colonnes dans l'ordre"""
+        with_header = tmp_path / "a.csv"
+        with_header.write_text("# commentaire\nFin,Début\n0:20,0:10\n\n", encoding="utf-8")
+        assert read_csv_rows(with_header, ("start", "end")) == [{"fin": "0:20", "début": "0:10"}]
+        plain = tmp_path / "b.csv"
+        plain.write_text("0:10,0:20,Intro\n", encoding="utf-8")
+        assert read_csv_rows(plain, ("start", "end", "title")) == [{"start": "0:10", "end": "0:20",
+                                                                     "title": "Intro"}]
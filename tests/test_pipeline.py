@@ -0,0 +1,108 @@
+"""
+Tests unitaires pour le pipeline à deux étages
+"""
+
+import threading
+import time
+
+import pytest
+from youtube_segment_downloader import SegmentDownloader, downloader
+from youtube_segment_downloader.batch import BatchJob, run_batch
+from youtube_segment_downloader.pipeline import Pipeline, physical_cores
+
+
+URL = "https://youtu.be/dQw4w9WgXcQ"
+
+
+@pytest.fixture
+def stages(fake_ydl, monkeypatch):
+    """Découpes factices qui notent leur thread et le nombre de segments en cours"""
+    lock = threading.Lock()
+    state = {"cut_threads": set(), "active": 0, "peak": 0}
+
+    def fake_cut(ffmpeg, source, output, start, end):
+        state["cut_threads"].add(threading.current_thread().name)
+        time.sleep(0.02)
+        with open(output, 'wb') as f:
+            f.write(b'cut')
+
+    def fake_snap(ffprobe, source, start, end, duration=None, headers=None):
+        with lock:
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+        return start - 1, end + 1
+
+    original_cut_stage = SegmentDownloader._cut_stage
+
+    def cut_stage(self, *args):
+        try:
+            return original_cut_stage(self, *args)
+        finally:
+            with lock:
+                state["active"] -= 1
+
+    monkeypatch.setattr(downloader, "cut_precise", fake_cut)
+    monkeypatch.setattr(downloader, "probe_keyframes", lambda ffprobe, source: [0.0])
+    monkeypatch.setattr(downloader, "snap_to_keyframes", fake_snap)
+    monkeypatch.setattr(SegmentDownloader, "_cut_stage", cut_stage)
+    return state
+
+
+class TestPipeline:
+    """Tests pour les deux étages et la file qui les relie"""
+
+    def test_stages_and_stats(self, stages, tmp_path):
+        """Téléchargement sur les workers réseau, découpe sur les workers CPU"""
+        session = SegmentDownloader(ffmpeg_path="ffmpeg", cache=False, clip_cache=False)
+        with Pipeline(session, network_workers=2, cpu_workers=1) as pipeline:
+            futures = [pipeline.submit(URL, f"0:{10 + i}", f"0:{20 + i}", str(tmp_path / f"{i}.mp4"))
+                       for i in range(4)]
+            futures.append(pipeline.submit(URL, "0:10", "0:20", str(tmp_path / "k.mp4"), cut_mode="keyframe"))
+            futures.append(pipeline.submit(URL, "0:20", "0:10", str(tmp_path / "bad.mp4")))
+            results = [f.result() for f in futures]
+            stats = pipeline.stats()
+        session.close()
+
+        assert [bool(r) for r in results] == [True] * 5 + [False]
+        assert all((tmp_path / f"{i}.mp4").read_bytes() == b'cut' for i in range(4))
+        assert (results[0].reencoded_seconds, results[0].copied_seconds) == (10, 0)
+        # Mode keyframe : la copie téléchargée est déplacée telle quelle
+        assert (tmp_path / "k.mp4").read_bytes() == b'fake' and results[4].actual_start == 9
+        assert stages["cut_threads"] == {"yt-segment-cpu_0"}
+        assert [p["phase"] for p in results[0].stats["phases"]][-3:] == ["download", "cut", "finalize"]
+        # Répertoires de travail supprimés
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["0.mp4", "1.mp4", "2.mp4", "3.mp4", "k.mp4"]
+
+        assert stats["network"]["jobs"] == 6 and stats["cpu"]["jobs"] == 5
+        assert stats["network"]["workers"] == 2 and 0 < stats["cpu"]["utilisation"] <= 1
+        assert stats["queue"]["peak_pending"] <= stats["queue"]["max_pending"] == 3
+
+    def test_back_pressure(self, stages, tmp_path):
+        """Aucun téléchargement ne démarre tant que la file est pleine"""
+        session = SegmentDownloader(ffmpeg_path="ffmpeg", cache=False, clip_cache=False)
+        with Pipeline(session, network_workers=3, cpu_workers=1, max_pending=2) as pipeline:
+            futures = [pipeline.submit(URL, "0:10", "0:20", str(tmp_path / f"{i}.mp4")) for i in range(6)]
+            assert all(f.result() for f in futures)
+        session.close()
+        assert stages["peak"] <= 2
+
+        with pytest.raises(ValueError):
+            Pipeline(session, cpu_workers=0)
+        with pytest.raises(RuntimeError, match="fermé"):
+            pipeline.submit(URL, "0:10", "0:20")
+
+    def test_batch(self, stages, tmp_path):
+        """run_batch soumet le manifeste au pipeline et rapporte chaque résultat"""
+        session = SegmentDownloader(ffmpeg_path="ffmpeg", cache=False, clip_cache=False)
+        jobs = [BatchJob(1, URL, "0:10", "0:20", str(tmp_path / "a.mp4")),
+                BatchJob(2, URL, "0:20", "0:10", str(tmp_path / "b.mp4"))]
+        reported = []
+        with Pipeline(session, network_workers=2, cpu_workers=1) as pipeline:
+            results = run_batch(jobs, on_result=reported.append, pipeline=pipeline, cut_mode="precise")
+        session.close()
+        assert [r.success for r in results] == [True, False]
+        assert "fin" in results[1].error and len(reported) == 2
+
+    def test_physical_cores(self):
+        """Au moins un cœur"""
+        assert physical_cores() >= 1
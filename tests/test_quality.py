@@ -0,0 +1,144 @@
+"""
+Tests unitaires pour la politique de qualité (choix des formats)
+"""
+
+import pytest
+from youtube_segment_downloader import SegmentResult, cli, downloader
+from youtube_segment_downloader.downloader import SegmentDownloader
+from youtube_segment_downloader.jobs import JobStore
+from youtube_segment_downloader.quality import QualityPolicy, codec_family
+
+from .conftest import FakeYoutubeDL
+
+
+def _format(format_id, height=None, vcodec='none', acodec='none', tbr=None, protocol='https'):
+    return {'format_id': format_id, 'height': height, 'vcodec': vcodec, 'acodec': acodec, 'tbr': tbr,
+            'protocol': protocol, 'url': f'https://example.com/{format_id}'}
+
+
+# Formats d'une vidéo YouTube typique
+FORMATS = [
+    _format('sb0', height=90),  # planche d'aperçu
+    _format('18', 360, 'avc1.42001E', 'mp4a.40.2', 500),
+    _format('133', 240, 'avc1.4d4015', tbr=250),
+    _format('134', 360, 'avc1.4d401e', tbr=400),
+    _format('135', 480, 'avc1.4d401f', tbr=800),
+    _format('244', 480, 'vp09.00.30.08', tbr=600),
+    _format('137', 1080, 'avc1.640028', tbr=4000),
+    _format('399', 1080, 'av01.0.08M.08', tbr=2000),
+    _format('313', 2160, 'vp9', tbr=18000),
+    _format('96', 1080, 'avc1.640028', 'mp4a.40.2', 3000, protocol='m3u8_native'),
+    _format('139', acodec='mp4a.40.5', tbr=48),
+    _format('140', acodec='mp4a.40.2', tbr=128),
+    _format('251', acodec='opus', tbr=130),
+]
+
+
+class TestQualityPolicy:
+    """Tests pour le choix des formats"""
+
+    def test_max_height(self):
+        """Meilleure définition sous le plafond, copiable en MP4, puis la moins chère"""
+        selection = QualityPolicy(max_height=480).select(FORMATS, 10)
+        assert selection.format_id == "135+139" and selection.height == 480
+        assert selection.estimated_bytes == (800 + 48) * 125 * 10
+
+    def test_prefer_codec(self):
+        """Le codec préféré passe avant la copie MP4 à définition égale"""
+        assert QualityPolicy(max_height=480, prefer_codec="vp9").select(FORMATS, 10).format_id == "244+139"
+
+    def test_target_size_and_bitrate(self):
+        """Taille et débit plafonnés : flux HLS et formats trop lourds écartés"""
+        selection = QualityPolicy(target_size=2600000).select(FORMATS, 10)
+        assert selection.format_id == "399+139" and selection.estimated_bytes == 2560000
+        assert QualityPolicy(max_bitrate=600).select(FORMATS, 10).format_id == "134+139"
+        # Sans débit annoncé, la taille totale rapportée à la durée de la vidéo
+        sized = [dict(f, tbr=None, filesize=f['tbr'] * 125 * 100) if f['tbr'] else f for f in FORMATS]
+        assert QualityPolicy(target_size=2600000).select(sized, 10, duration=100).format_id == "399+139"
+
+    def test_nothing_fits(self):
+        """Aucun format sous les plafonds : ValueError (la planche d'aperçu n'est pas une vidéo)"""
+        with pytest.raises(ValueError, match="max_height=100"):
+            QualityPolicy(max_height=100).select(FORMATS, 10)
+
+    def test_validation(self):
+        """Codecs normalisés, valeurs négatives refusées, clé stable"""
+        assert codec_family("avc1.640028") == "h264" and codec_family("none") is None
+        policy = QualityPolicy(max_height=720, prefer_codec="av01")
+        assert policy.prefer_codec == "av1"
+        assert policy.key == "quality:max_height=720,prefer_codec=av1"
+        with pytest.raises(ValueError):
+            QualityPolicy(prefer_codec="theora")
+        with pytest.raises(ValueError):
+            QualityPolicy(target_size=0)
+
+
+class QualityYoutubeDL(FakeYoutubeDL):
+    """FakeYoutubeDL qui expose une liste de formats et note les sélecteurs construits"""
+    selectors = []
+
+    def __init__(self, params, auto_init=True):
+        super().__init__(params, auto_init)
+        self.format_selector = "session"
+
+    def extract_info(self, url, download=True, ie_key=None):
+        return dict(super().extract_info(url, download, ie_key), formats=FORMATS, duration=100)
+
+    def build_format_selector(self, spec):
+        QualityYoutubeDL.selectors.append(spec)
+        return spec
+
+
+class TestDownloadWithQuality:
+    """Tests pour la politique de qualité dans une session"""
+
+    URL = "https://youtu.be/dQw4w9WgXcQ"
+
+    def test_selection_in_result(self, fake_ydl, tmp_path, monkeypatch):
+        """Les formats choisis et l'estimation figurent dans le résultat ; le sélecteur est rendu au pool"""
+        monkeypatch.setattr(downloader._load_yt_dlp(), "YoutubeDL", QualityYoutubeDL)
+        QualityYoutubeDL.selectors = []
+        session = SegmentDownloader(ffmpeg_path="ffmpeg", max_instances=1, cache=False, clip_cache=False)
+        result = session.download(self.URL, "0:10", "0:20", str(tmp_path / "a.mp4"), verbose=False,
+                                  quality=QualityPolicy(max_height=480))
+        assert result and result.format_id == "135+139" and result.estimated_bytes == 1060000
+        assert QualityYoutubeDL.selectors == ["135+139"]
+        assert [p["format_id"] for p in result.stats["phases"] if p["phase"] == "format"] == ["135+139"]
+        assert session._idle[0].ydl.format_selector == "session"
+
+        result = session.download(self.URL, "0:10", "0:20", str(tmp_path / "b.mp4"), verbose=False,
+                                  quality=QualityPolicy(max_height=100))
+        assert not result and "max_height=100" in result.error
+        plain = session.download(self.URL, "0:10", "0:20", str(tmp_path / "c.mp4"), verbose=False)
+        assert plain and plain.format_id is None
+        session.close()
+
+    def test_cli_and_jobs(self, monkeypatch, tmp_path):
+        """Les options de la CLI forment la politique, enregistrée telle quelle par les jobs"""
+        received = {}
+
+        def fake_download(url, start, end, output, **kwargs):
+            received.update(kwargs)
+            return SegmentResult(True, output)
+
+        monkeypatch.setattr(cli, "download_segment", fake_download)
+        with pytest.raises(SystemExit) as exc:
+            cli.main([self.URL, "0:10", "0:20", "a.mp4", "--max-height", "480", "--prefer-codec", "vp9",
+                      "--target-size", "5"])
+        assert exc.value.code == 0
+        assert received["quality"] == QualityPolicy(480, None, "vp9", 5 * 2 ** 20)
+        with pytest.raises(SystemExit) as exc:
+            cli.main([self.URL, "0:10", "0:20", "--max-height", "0"])
+        assert exc.value.code == 2
+
+        class Session:
+            def download(self, url, start_time, end_time, output_file=None, **kwargs):
+                received.update(kwargs)
+                return SegmentResult(True, output_file)
+
+        store = JobStore(tmp_path / "jobs")
+        job_id = store.submit(self.URL, "0:10", "0:20", quality=QualityPolicy(max_bitrate=600))
+        assert store.get(job_id).options["quality"]["max_bitrate"] == 600
+        assert store.run(job_id, session=Session())
+        assert received["quality"] == QualityPolicy(max_bitrate=600)
+        store.close()
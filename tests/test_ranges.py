@@ -0,0 +1,261 @@
+"""
+Tests unitaires pour le téléchargement parallèle par plages d'octets
+"""
+
+import http.client
+import os
+import re
+import shutil
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from youtube_segment_downloader.ranges import RangeProxy, Spool, fetch_range, merge_intervals
+
+
+# Débit maximal de chaque connexion du serveur de test (octets/s)
+CONNECTION_RATE = 2 * 1024 * 1024
+
+
+class ThrottledServer:
+    """Serveur HTTP local qui gère Range et limite le débit de chaque connexion"""
+
+    def __init__(self, payload, rate=CONNECTION_RATE):
+        self.payload = payload
+        self.rate = rate
+        self.active = 0
+        self.peak = 0
+        self.requests = 0
+        # Nombre de réponses à couper en plein milieu (pour tester les reprises)
+        self.failures = 0
+        # Premier octet à partir duquel l'origine refuse les requêtes (403)
+        self.forbidden_from = None
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server._handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        self.url = "http://127.0.0.1:%d/media" % self.httpd.server_address[1]
+
+    def _handle(self, handler):
+        size = len(self.payload)
+        match = re.match(r"bytes=(\d+)-(\d*)", handler.headers.get("Range") or "")
+        start = int(match.group(1)) if match else 0
+        end = min(int(match.group(2)), size - 1) if match and match.group(2) else size - 1
+        if start >= size:
+            handler.send_error(416)
+            return
+        if self.forbidden_from is not None and start >= self.forbidden_from:
+            handler.send_error(403)
+            return
+        with self._lock:
+            self.requests += 1
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            fail = self.failures > 0
+            if fail:
+                self.failures -= 1
+        try:
+            handler.send_response(206 if match else 200)
+            handler.send_header("Content-Length", str(end - start + 1))
+            if match:
+                handler.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+            handler.end_headers()
+            body = self.payload[start:end + 1]
+            if fail:
+                body = body[:len(body) // 2]
+            block = 32 * 1024
+            for i in range(0, len(body), block):
+                time.sleep(block / self.rate)
+                handler.wfile.write(body[i:i + block])
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            with self._lock:
+                self.active -= 1
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def server():
+    srv = ThrottledServer(os.urandom(3 * 1024 * 1024 + 12345))
+    yield srv
+    srv.close()
+
+
+@pytest.fixture
+def proxy():
+    prx = RangeProxy(chunk_size=256 * 1024, retries=3)
+    yield prx
+    prx.close()
+
+
+def _read(url, start=None):
+    request = urllib.request.Request(url)
+    if start is not None:
+        request.add_header("Range", f"bytes={start}-")
+    with urllib.request.urlopen(request) as response:
+        return response.status, response.read()
+
+
+class TestFetchRange:
+    """Tests pour la lecture d'un morceau"""
+
+    def test_exact_range(self, server):
+        """Les octets demandés sont renvoyés, tronqués à la fin de la ressource"""
+        data, total = fetch_range(server.url, 100, 199)
+        assert data == server.payload[100:200] and total == len(server.payload)
+        data, _ = fetch_range(server.url, len(server.payload) - 10, len(server.payload) + 100)
+        assert data == server.payload[-10:]
+
+    def test_resumes_after_cut(self, server):
+        """Une connexion coupée est reprise là où elle s'est arrêtée"""
+        server.failures = 1
+        data, _ = fetch_range(server.url, 0, 99999, retries=2)
+        assert data == server.payload[:100000]
+        assert server.requests == 2
+
+
+class TestRangeProxy:
+    """Tests pour le proxy local multi-connexions"""
+
+    def test_reassembles_in_order(self, server, proxy):
+        """Les morceaux parallèles sont renvoyés dans l'ordre, depuis n'importe quel offset"""
+        local = proxy.register(server.url, connections=4)
+        status, body = _read(local)
+        assert status == 200 and body == server.payload
+        status, body = _read(local, start=1000000)
+        assert status == 206 and body == server.payload[1000000:]
+        assert 1 < server.peak <= 4
+
+    def test_faster_than_single_connection(self, server, proxy):
+        """Plusieurs connexions contournent la limite de débit par connexion"""
+        started = time.monotonic()
+        _read(proxy.register(server.url, connections=1))
+        single = time.monotonic() - started
+        started = time.monotonic()
+        _read(proxy.register(server.url, connections=6))
+        parallel = time.monotonic() - started
+        assert parallel < single * 0.6
+
+    def test_chunk_retries(self, server, proxy):
+        """Un morceau interrompu est retéléchargé sans corrompre le flux"""
+        server.failures = 2
+        status, body = _read(proxy.register(server.url, connections=4))
+        assert body == server.payload
+
+    def test_unregister_cuts_stream(self, server, proxy):
+        """Retirer une URL coupe la lecture en cours au lieu de la laisser finir"""
+        local = proxy.register(server.url, connections=1)
+        threading.Timer(0.3, proxy.unregister, args=(local,)).start()
+        started = time.monotonic()
+        with pytest.raises(http.client.IncompleteRead):
+            _read(local)
+        assert time.monotonic() - started < 1.2
+
+    def test_origin_fails_mid_stream(self, server, proxy, capfd):
+        """Un morceau perdu en cours de flux tronque la réponse, sans trace sur stderr"""
+        server.forbidden_from = 512 * 1024
+        local = proxy.register(server.url, connections=2)
+        with pytest.raises(http.client.IncompleteRead) as exc:
+            _read(local)
+        assert 0 < len(exc.value.partial) <= 512 * 1024
+        assert exc.value.partial == server.payload[:len(exc.value.partial)]
+        assert "Traceback" not in capfd.readouterr().err
+
+    def test_unknown_source(self, proxy):
+        """Une URL locale inconnue renvoie 404"""
+        local = proxy.register("http://127.0.0.1:9/x")
+        proxy.unregister(local)
+        with pytest.raises(urllib.error.HTTPError) as exc:
+            _read(local)
+        assert exc.value.code == 404
+
+    def test_spool_serves_received_bytes(self, server, proxy, tmp_path):
+        """Avec une copie locale, seuls les octets absents sont demandés à l'origine"""
+        spool = Spool(tmp_path / "media.spool")
+        status, body = _read(proxy.register(server.url, connections=2, spool=spool))
+        assert body == server.payload and spool.bytes == len(server.payload)
+        requests = server.requests
+        reloaded = Spool(spool.path, [[0, 1000000]], spool.total)
+        status, body = _read(proxy.register(server.url, connections=2, spool=reloaded), start=500000)
+        assert status == 206 and body == server.payload[500000:]
+        # 1 000 001 octets relus localement : moins de morceaux demandés qu'à la première lecture
+        assert 0 < server.requests - requests < requests
+
+    def test_spool_gaps_fill_in_parallel(self, server, proxy, tmp_path):
+        """Deux lectures de trous disjoints d'une même copie se téléchargent en même temps"""
+        local = proxy.register(server.url, connections=1, spool=Spool(tmp_path / "media.spool"))
+        spans = {}
+
+        def read(start, end):
+            request = urllib.request.Request(local, headers={"Range": f"bytes={start}-{end}"})
+            began = time.monotonic()
+            with urllib.request.urlopen(request) as response:
+                assert response.read() == server.payload[start:end + 1]
+            spans[start] = (began, time.monotonic())
+
+        readers = [threading.Thread(target=read, args=(start, start + 256 * 1024 - 1)) for start in (0, 2000000)]
+        for reader in readers:
+            reader.start()
+        for reader in readers:
+            reader.join()
+        assert max(began for began, _ in spans.values()) < min(ended for _, ended in spans.values())
+        assert server.peak == 2 and server.requests == 2
+
+
+class TestSpool:
+    """Tests pour la copie locale des octets reçus"""
+
+    def test_intervals(self):
+        """Les intervalles adjacents ou chevauchants sont fusionnés"""
+        assert merge_intervals([[10, 19], [0, 4], [5, 9], [30, 40], [35, 50]]) == [[0, 19], [30, 50]]
+        assert merge_intervals([]) == []
+
+    def test_write_plan_read(self, tmp_path):
+        """Les morceaux écrits sont relus ; plan sépare présent et absent"""
+        saved = []
+        spool = Spool(tmp_path / "s", on_write=lambda s: saved.append([list(i) for i in s.intervals]))
+        spool.write(100, b"b" * 100, 1000)
+        spool.write(0, b"a" * 50, 1000)
+        assert spool.plan(0, 2000) == [(0, 49, True), (50, 99, False), (100, 199, True), (200, 999, False)]
+        assert spool.read(100, 149) == b"b" * 50
+        assert spool.read(40, 60) is None
+        assert saved[-1] == [[0, 49], [100, 199]] and spool.bytes == 150
+        # Une taille différente : la ressource a changé, la copie repart de zéro
+        spool.write(0, b"c" * 10, 2000)
+        assert spool.intervals == [[0, 9]] and spool.total == 2000
+
+
+@pytest.mark.skipif(not shutil.which("ffmpeg"), reason="ffmpeg non installé")
+def test_ffmpeg_seeks_through_proxy(tmp_path, proxy):
+    """ffmpeg lit et cherche dans un MP4 servi par le proxy"""
+    source = tmp_path / "src.mp4"
+    subprocess.run(["ffmpeg", "-v", "error", "-f", "lavfi", "-i", "testsrc=duration=10:size=320x240:rate=25",
+                    "-c:v", "libx264", "-g", "25", str(source)], check=True)
+    srv = ThrottledServer(source.read_bytes(), rate=8 * 1024 * 1024)
+    try:
+        output = tmp_path / "out.mp4"
+        subprocess.run(["ffmpeg", "-v", "error", "-ss", "4", "-i", proxy.register(srv.url),
+                        "-t", "2", "-c", "copy", str(output)], check=True)
+        packets = subprocess.run(["ffprobe", "-v", "error", "-count_packets", "-select_streams", "v:0",
+                                  "-show_entries", "stream=nb_read_packets", "-of", "csv=p=0", str(output)],
+                                 capture_output=True, text=True, check=True).stdout
+        assert int(packets) >= 50
+    finally:
+        srv.close()
@@ -0,0 +1,204 @@
+"""
+Tests unitaires pour le mode service (API HTTP, SSE et métriques)
+"""
+
+import json
+import shutil
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+from benchmarks.media import generate_media
+from benchmarks.standin import StandInServer
+from youtube_segment_downloader import SegmentResult, cli, downloader, service
+from youtube_segment_downloader.events import PhaseFinished, PhaseStarted, Progress
+from youtube_segment_downloader.service import JobService, ServiceMetrics, ServiceServer
+
+
+FFMPEG = shutil.which("ffmpeg")
+FFPROBE = shutil.which("ffprobe")
+URL = "https://youtu.be/dQw4w9WgXcQ"
+
+
+class FakeSession:
+    """Remplace SegmentDownloader : émet des événements et attend `release` avant de finir"""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.calls = []
+
+    def download(self, url, start_time, end_time, output_file=None, on_event=None, cancel=None, **kwargs):
+        self.calls.append(dict(kwargs, output_file=output_file))
+        on_event(PhaseStarted("download", time.monotonic()))
+        for done in (1000, 3000):
+            on_event(Progress("download", time.monotonic(), done, 3000, None))
+        while not self.release.wait(0.01):
+            if cancel.cancelled:
+                return SegmentResult(False, output_file, error="Téléchargement annulé", cancelled=True)
+        on_event(PhaseFinished("download", time.monotonic(), 0.3, 3500, 0.0, {}))
+        with open(output_file, "wb") as f:
+            f.write(b"fake")
+        return SegmentResult(True, output_file, cut_mode=kwargs.get("cut_mode"))
+
+
+def _request(url, method="GET", payload=None):
+    data = json.dumps(payload).encode() if payload is not None else None
+    request = urllib.request.Request(url, data=data, method=method, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status, response.headers, response.read().decode()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, e.read().decode()
+
+
+def _events(url):
+    """Lit un flux SSE jusqu'à l'événement result"""
+    events = []
+    with urllib.request.urlopen(url, timeout=10) as response:
+        assert response.headers["Content-Type"].startswith("text/event-stream")
+        name = None
+        for line in response:
+            line = line.decode().rstrip("\n")
+            if line.startswith("event: "):
+                name = line[7:]
+            elif line.startswith("data: "):
+                events.append((name, json.loads(line[6:])))
+                if name == "result":
+                    break
+    return events
+
+
+@pytest.fixture
+def api(tmp_path):
+    session = FakeSession()
+    jobs = JobService(session=session, workers=1, output_dir=tmp_path)
+    server = ServiceServer(jobs, port=0, keepalive=0.1)
+    yield server, session
+    session.release.set()
+    server.close()
+    jobs.close()
+
+
+class TestServiceMetrics:
+    """Tests pour le rendu OpenMetrics"""
+
+    def test_render(self):
+        """Jauges, compteurs, débit sur la fenêtre et histogrammes cumulés"""
+        now = [100.0]
+        metrics = ServiceMetrics(buckets=(1, 10), window=10, clock=lambda: now[0])
+        metrics.submitted()
+        metrics.add_bytes(5000)
+        metrics.observe_phase("download", 0.5)
+        metrics.observe_phase("download", 5)
+        metrics.observe_job("done", 20)
+        text = metrics.render(3, 2, 4)
+        assert text.endswith("# EOF\n")
+        assert "yt_segment_queue_depth 3" in text and "yt_segment_active_jobs 2" in text
+        assert "yt_segment_jobs_submitted_total 1" in text
+        assert 'yt_segment_jobs_finished_total{state="done"} 1' in text
+        assert "yt_segment_downloaded_bytes_total 5000" in text
+        assert "yt_segment_download_throughput_bytes_per_second 500.0" in text
+        assert 'yt_segment_phase_duration_seconds_bucket{phase="download",le="1.0"} 1' in text
+        assert 'yt_segment_phase_duration_seconds_bucket{phase="download",le="+Inf"} 2' in text
+        assert 'yt_segment_phase_duration_seconds_sum{phase="download"} 5.5' in text
+        assert 'yt_segment_job_duration_seconds_bucket{le="10.0"} 0' in text
+        now[0] += 11
+        assert metrics.throughput() == 0
+
+
+class TestJobService:
+    """Tests pour l'API HTTP du service"""
+
+    def test_job_lifecycle(self, api, tmp_path):
+        """Un job soumis est suivi en SSE jusqu'à son résultat, puis compté dans /metrics"""
+        server, session = api
+        status, headers, body = _request(server.url + "/jobs", "POST",
+                                         {"url": URL, "start": "0:10", "end": "0:20", "output": "a.mp4",
+                                          "cut_mode": "keyframe"})
+        assert status == 202 and headers["Location"] == "/jobs/1"
+        job = json.loads(body)
+        assert job["state"] in ("queued", "running") and job["output_file"] == str(tmp_path / "a.mp4")
+        threading.Timer(0.3, session.release.set).start()
+        events = _events(server.url + "/jobs/1/events")
+        names = [name for name, _ in events]
+        assert names[0] == "state" and names[-1] == "result"
+        assert "phase_started" in names and "phase_finished" in names and "progress" in names
+        # Les progressions successives sont fusionnées : seule la dernière est rejouée
+        assert [data["downloaded_bytes"] for name, data in events if name == "progress"] == [3000]
+        result = events[-1][1]
+        assert result["state"] == "done" and result["result"]["success"]
+        assert session.calls[0]["cut_mode"] == "keyframe" and (tmp_path / "a.mp4").exists()
+
+        status, headers, text = _request(server.url + "/metrics")
+        assert headers["Content-Type"].startswith("application/openmetrics-text")
+        assert 'yt_segment_jobs_finished_total{state="done"} 1' in text
+        assert "yt_segment_downloaded_bytes_total 3500" in text
+        assert 'yt_segment_phase_duration_seconds_count{phase="download"} 1' in text
+        status, _, body = _request(server.url + "/jobs")
+        assert [job["state"] for job in json.loads(body)["jobs"]] == ["done"]
+
+    def test_cancel_and_queue(self, api):
+        """Un job en attente ou en cours s'annule ; la profondeur de file est exposée"""
+        server, session = api
+        for end in ("0:20", "0:30"):
+            _request(server.url + "/jobs", "POST", {"url": URL, "start": "0:10", "end": end})
+        deadline = time.monotonic() + 5
+        while not session.calls and time.monotonic() < deadline:
+            time.sleep(0.01)
+        status, _, body = _request(server.url + "/health")
+        assert json.loads(body) == {"status": "ok", "queued": 1, "active": 1, "workers": 1}
+        assert "yt_segment_queue_depth 1" in _request(server.url + "/metrics")[2]
+        status, _, body = _request(server.url + "/jobs/2", "DELETE")
+        assert status == 200 and json.loads(body)["state"] == "cancelled"
+        _request(server.url + "/jobs/1", "DELETE")
+        assert _events(server.url + "/jobs/1/events")[-1][1]["state"] == "cancelled"
+        assert len(session.calls) == 1
+
+    def test_invalid_requests(self, api):
+        """Demandes invalides refusées avec 400, jobs et routes inconnus en 404"""
+        server, _ = api
+        for payload in ({"url": URL, "start": "0:10"},
+                        {"url": "https://example.com/x", "start": "0:10", "end": "0:20"},
+                        {"url": URL, "start": "0:20", "end": "0:10"},
+                        {"url": URL, "start": "0:10", "end": "0:20", "cut_mode": "rapide"},
+                        {"url": URL, "start": "0:10", "end": "0:20", "output": "../hors.mp4"},
+                        {"url": URL, "start": "0:10", "end": "0:20", "quality": {"max_height": "480p"}},
+                        [1, 2]):
+            status, _, body = _request(server.url + "/jobs", "POST", payload)
+            assert status == 400 and json.loads(body)["error"]
+        assert _request(server.url + "/jobs/42")[0] == 404
+        assert _request(server.url + "/inconnu")[0] == 404
+
+    def test_cli(self):
+        """yt-segment serve vérifie ses arguments"""
+        with pytest.raises(SystemExit) as exc:
+            cli.main(["serve", "--workers", "0"])
+        assert exc.value.code != 0
+
+
+@pytest.mark.skipif(not (FFMPEG and FFPROBE), reason="ffmpeg/ffprobe non installés")
+def test_end_to_end(tmp_path, monkeypatch):
+    """Le service télécharge un segment depuis le serveur de substitution"""
+    # Le serveur de substitution n'est pas une URL YouTube
+    monkeypatch.setattr(service, "validate_url", lambda url: url)
+    monkeypatch.setattr(downloader, "extract_video_id", lambda url: "standin")
+    generate_media(tmp_path / "media", FFMPEG, duration=10, size="320x240")
+    session = downloader.SegmentDownloader(ffmpeg_path=FFMPEG, cache=False, clip_cache=False)
+    with StandInServer(tmp_path / "media") as origin, \
+            JobService(session=session, workers=2, output_dir=tmp_path / "out") as jobs, \
+            ServiceServer(jobs, port=0) as server:
+        jobs.warm()
+        for name in ("a.mp4", "b.mp4"):
+            status, _, _ = _request(server.url + "/jobs", "POST",
+                                    {"url": origin.url("muxed.mp4"), "start": "0:02", "end": "0:05",
+                                     "output": name, "cut_mode": "keyframe", "engine": "direct"})
+            assert status == 202
+        results = [_events(f"{server.url}/jobs/{job_id}/events")[-1][1] for job_id in (1, 2)]
+        assert [r["state"] for r in results] == ["done", "done"], results
+        assert (tmp_path / "out" / "a.mp4").stat().st_size > 0
+        text = _request(server.url + "/metrics")[2]
+        assert 'yt_segment_jobs_finished_total{state="done"} 2' in text
+        assert 'yt_segment_phase_duration_seconds_count{phase="extract"}' in text
+    session.close()
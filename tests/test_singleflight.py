@@ -0,0 +1,53 @@
+"""
+Tests unitaires pour le regroupement des demandes identiques
+"""
+
+import threading
+
+from youtube_segment_downloader import CancelToken
+from youtube_segment_downloader.singleflight import SingleFlight
+
+
+class TestSingleFlight:
+    """Tests pour la table des travaux en cours"""
+
+    def test_followers_share_events_and_result(self):
+        """Les appelants rattachés reçoivent les événements puis leur propre résultat"""
+        flights = SingleFlight()
+        events = {"meneur": [], "b": []}
+        flight, leader = flights.join("k", "a.mp4", events["meneur"].append)
+        assert leader is None
+        same, waiter = flights.join("k", "b.mp4", events["b"].append)
+        assert same is flight and waiter is not None and flight.waiters == 1
+        other, other_waiter = flights.join("autre")
+        assert other is not flight and other_waiter is None
+        flight.emit("progression")
+        flights.complete(flight, lambda w: f"résultat pour {w.output_file}")
+        assert flights.wait(flight, waiter) == "résultat pour b.mp4"
+        assert events == {"meneur": ["progression"], "b": ["progression"]}
+        # Le travail terminé n'accueille plus personne
+        again, again_waiter = flights.join("k")
+        assert again is not flight and again_waiter is None
+
+    def test_cancelled_follower_leaves(self):
+        """Un appelant annulé se détache, le travail continue pour les autres"""
+        flights = SingleFlight()
+        flight, _ = flights.join("k")
+        _, cancelled = flights.join("k", "b.mp4")
+        _, kept = flights.join("k", "c.mp4")
+        token = CancelToken()
+        threading.Timer(0.05, token.cancel).start()
+        assert flights.wait(flight, cancelled, token) is None
+        assert flight.waiters == 1
+        shared = []
+        flights.complete(flight, lambda w: shared.append(w.output_file) or w.output_file)
+        assert shared == ["c.mp4"] and flights.wait(flight, kept) == "c.mp4"
+
+    def test_failed_share_means_retry(self):
+        """Sans résultat partageable (meneur annulé, erreur), l'appelant recommence"""
+        flights = SingleFlight()
+        flight, _ = flights.join("k")
+        _, waiter = flights.join("k")
+        flights.complete(flight, lambda w: 1 / 0)
+        assert flights.wait(flight, waiter) is None
+        assert len(flights) == 0
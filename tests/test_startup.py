@@ -0,0 +1,54 @@
+"""
+Tests du temps de démarrage : la CLI et les fonctions utilitaires ne
+doivent pas importer yt-dlp
+"""
+
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+
+ROOT = Path(__file__).resolve().parents[1]
+# Surcoût maximal d'un `python -m youtube_segment_downloader` par rapport à
+# un interpréteur vide (yt-dlp à lui seul coûte plusieurs centaines de ms).
+# Mesure de temps réel, instable sur une machine chargée : le test ne tourne
+# que si la variable est définie (ex: YT_SEGMENT_STARTUP_BUDGET=0.15)
+STARTUP_BUDGET = os.environ.get("YT_SEGMENT_STARTUP_BUDGET")
+
+
+def _best_of(args, runs=5):
+    """Meilleur temps de `runs` exécutions à froid (le minimum écarte le bruit)"""
+    best = None
+    for _ in range(runs):
+        started = time.perf_counter()
+        proc = subprocess.run([sys.executable, *args], cwd=str(ROOT),
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, proc.returncode
+
+
+class TestStartup:
+    """Tests pour le chargement paresseux de yt-dlp"""
+
+    def test_yt_dlp_not_imported(self):
+        """Importer le package, la CLI ou les utilitaires ne charge ni yt-dlp ni asyncio"""
+        code = ("import sys, youtube_segment_downloader.cli\n"
+                "from youtube_segment_downloader import time_to_seconds, validate_url\n"
+                "print('yt_dlp' in sys.modules, 'asyncio' in sys.modules)")
+        out = subprocess.run([sys.executable, "-c", code], cwd=str(ROOT), stdout=subprocess.PIPE,
+                             text=True, check=True).stdout
+        assert out.split() == ["False", "False"]
+
+    @pytest.mark.skipif(not STARTUP_BUDGET, reason="benchmark : définir YT_SEGMENT_STARTUP_BUDGET (secondes)")
+    def test_cli_startup_budget(self):
+        """Une CLI appelée avec de mauvais arguments répond dans le budget"""
+        baseline, _ = _best_of(["-c", "pass"])
+        elapsed, returncode = _best_of(["-m", "youtube_segment_downloader", "--inconnu"])
+        assert returncode == 1
+        assert elapsed - baseline < float(STARTUP_BUDGET), \
+            f"Démarrage de la CLI : {elapsed - baseline:.3f}s de plus que Python seul"
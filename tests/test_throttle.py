@@ -0,0 +1,163 @@
+"""
+Tests unitaires pour la limitation adaptative des requêtes
+"""
+
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from benchmarks.standin import StandInServer
+from youtube_segment_downloader.ranges import fetch_range
+from youtube_segment_downloader.throttle import (DECREASE_COOLDOWN, Backoff, RateLimiter, TokenBucket,
+                                                 parse_retry_after)
+
+
+class FakeClock:
+    """Horloge manuelle : sleep() avance le temps au lieu d'attendre"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.slept = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+        self.slept += seconds
+
+
+class TestTokenBucket:
+    """Tests pour le seau à jetons"""
+
+    def test_rate(self):
+        """La réserve est servie sans attente, puis un jeton par 1/rate seconde"""
+        clock = FakeClock()
+        bucket = TokenBucket(10, burst=5, clock=clock, sleep=clock.sleep)
+        assert [bucket.acquire() for _ in range(5)] == [0.0] * 5
+        for _ in range(10):
+            bucket.acquire()
+        assert clock.slept == pytest.approx(1.0)
+
+    def test_debt(self):
+        """Une demande plus grosse que la réserve fait attendre les suivantes"""
+        clock = FakeClock()
+        bucket = TokenBucket(100, clock=clock, sleep=clock.sleep)
+        assert bucket.reserve(300) == pytest.approx(2.0)
+        assert bucket.reserve(100) == pytest.approx(3.0)
+        clock.now += 3.0
+        assert bucket.reserve(50) == pytest.approx(0.5)
+
+    def test_invalid(self):
+        """Un débit nul est refusé"""
+        with pytest.raises(ValueError):
+            TokenBucket(0)
+
+
+class TestBackoff:
+    """Tests pour les délais de nouvelle tentative"""
+
+    def test_bounds(self):
+        """Délais tirés entre 0 et min(cap, base × 2^n), Retry-After respecté"""
+        backoff = Backoff(base=0.5, cap=4.0, rng=random.Random(1))
+        delays = [backoff.delay(attempt) for attempt in range(8) for _ in range(50)]
+        assert all(0 <= d <= 4.0 for d in delays)
+        assert max(delays[:50]) <= 0.5 and max(delays[-50:]) > 2.0
+        assert backoff.delay(0, retry_after=3) >= 3
+        assert 0 <= backoff(2) <= 2.0
+
+    def test_retry_after(self):
+        """Secondes ou date HTTP"""
+        assert parse_retry_after("120") == 120.0
+        assert parse_retry_after("Thu, 01 Jan 1970 00:01:00 GMT", now=30) == 30.0
+        assert parse_retry_after("bientôt") is None
+        assert parse_retry_after(None) is None
+
+
+class TestRateLimiter:
+    """Tests pour l'ajustement AIMD des limites d'un hôte"""
+
+    URL = "https://media.example/videoplayback?id=1"
+
+    def request(self, limiter, status, nbytes=0, retry_after=None):
+        with limiter.request(self.URL) as attempt:
+            attempt.status = status
+            attempt.retry_after = retry_after
+            attempt.nbytes = nbytes
+
+    def test_increase_and_decrease(self):
+        """Hausse additive sur succès, division par deux sur 429 (une fois par rafale)"""
+        clock = FakeClock()
+        limiter = RateLimiter(requests_per_second=1000, concurrency=2, max_concurrency=4, clock=clock)
+        for _ in range(20):
+            self.request(limiter, 200)
+        assert limiter.stats()["media.example"]["concurrency"] == 4
+        self.request(limiter, 429)
+        self.request(limiter, 503)
+        stats = limiter.stats()["media.example"]
+        assert stats["concurrency"] == 2 and stats["requests_per_second"] == 500
+        assert stats["throttled"] == 2 and stats["requests"] == 22
+        clock.now += DECREASE_COOLDOWN
+        self.request(limiter, 429)
+        assert limiter.stats()["media.example"]["concurrency"] == 1
+
+    def test_retry_after_blocks_host(self):
+        """Après un 429 avec Retry-After, l'hôte n'est plus contacté avant l'échéance"""
+        limiter = RateLimiter()
+        self.request(limiter, 429, retry_after=0.3)
+        entered = threading.Event()
+
+        def wait():
+            with limiter.request(self.URL):
+                entered.set()
+
+        thread = threading.Thread(target=wait)
+        thread.start()
+        assert not entered.wait(0.15)
+        assert entered.wait(2)
+        thread.join()
+
+    def test_slow_responses(self):
+        """Une réponse bien plus lente que la moyenne réduit la fenêtre, pas le débit"""
+        clock = FakeClock()
+        limiter = RateLimiter(requests_per_second=1000, concurrency=4, clock=clock)
+        for _ in range(4):
+            with limiter.request(self.URL) as attempt:
+                attempt.status = 206
+                attempt.nbytes = 1024 * 1024
+                clock.now += 0.1
+        with limiter.request(self.URL) as attempt:
+            attempt.status = 206
+            attempt.nbytes = 1024 * 1024
+            clock.now += 5
+        stats = limiter.stats()["media.example"]
+        assert stats["slow"] == 1 and stats["concurrency"] < 4 and stats["requests_per_second"] == 1000
+
+    def test_bandwidth_cap(self):
+        """Le plafond global est consommé par les octets reçus"""
+        limiter = RateLimiter(max_bandwidth=1024 * 1024)
+        assert limiter.max_bandwidth == 1024 * 1024
+        with limiter.request(self.URL) as attempt:
+            attempt.status = 206
+            attempt.received(1024 * 1024)
+        assert attempt.throttled_seconds > 0.5
+        limiter.set_max_bandwidth(None)
+        assert limiter.max_bandwidth is None
+
+    def test_against_throttling_server(self, tmp_path):
+        """Contre un serveur qui répond 429 au-delà de 5 requêtes/s, tous les morceaux arrivent"""
+        payload = bytes(range(256)) * 64
+        (tmp_path / "video.mp4").write_bytes(payload)
+        limiter = RateLimiter(requests_per_second=20, concurrency=4)
+        with StandInServer(tmp_path, max_request_rate=5, retry_after=1) as server:
+            url = server.url("video.mp4")
+            with ThreadPoolExecutor(4) as pool:
+                chunks = list(pool.map(lambda start: fetch_range(url, start, start + 1023, retries=10,
+                                                                 limiter=limiter)[0],
+                                       range(0, 12 * 1024, 1024)))
+            assert b"".join(chunks) == payload[:12 * 1024]
+            assert server.throttled > 0
+        stats = limiter.stats()["127.0.0.1"]
+        assert stats["throttled"] == server.throttled
+        assert stats["requests_per_second"] < 20
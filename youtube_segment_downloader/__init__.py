@@ -6,6 +6,22 @@ __version__ = "1.2.1"
 __author__ = "Daniel"
 __license__ = "MIT"
 
-from .downloader import download_segment, time_to_seconds, validate_url
+from .downloader import (SegmentDownloader, SegmentResult, download_segment, download_segments, split_by_chapters,
+                         time_to_seconds, validate_url)
+from .cancel import CancelToken
+from .events import PhaseFinished, PhaseStarted, Progress
 
-__all__ = ["download_segment", "time_to_seconds", "validate_url"]
+__all__ = ["SegmentDownloader", "SegmentResult", "download_segment", "download_segments", "split_by_chapters",
+           "time_to_seconds", "validate_url", "CancelToken", "download_segment_async", "gather_segments",
+           "Pipeline", "PhaseStarted", "PhaseFinished", "Progress"]
+
+
+def __getattr__(name):
+    # L'API asyncio (et l'import d'asyncio) et le pipeline ne sont chargés qu'à la demande
+    if name in ("download_segment_async", "gather_segments"):
+        from . import aio
+        return getattr(aio, name)
+    if name == "Pipeline":
+        from .pipeline import Pipeline
+        return Pipeline
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,73 @@
+"""
+API asyncio : les téléchargements tournent hors de la boucle d'événements
+et s'annulent avec la tâche qui les attend
+"""
+
+import asyncio
+import functools
+
+from .cancel import CancelToken
+from .downloader import get_default_session
+
+
+async def download_segment_async(url, start_time, end_time, output_file=None, session=None, executor=None,
+                                 **options):
+    """
+    Version asynchrone de download_segment
+
+    Le téléchargement s'exécute dans un thread. Si la tâche est annulée,
+    ffmpeg est arrêté et les fichiers partiels supprimés avant que
+    l'annulation ne se propage.
+
+    Args:
+        url: URL de la vidéo YouTube
+        start_time: Temps de début ("MM:SS" ou "HH:MM:SS")
+        end_time: Temps de fin ("MM:SS" ou "HH:MM:SS")
+        output_file: Nom du fichier de sortie
+        session: SegmentDownloader à utiliser (session partagée par défaut)
+        executor: Exécuteur concurrent.futures (celui de la boucle par défaut)
+        **options: Options de download_segment (verbose, cut_mode...)
+
+    Returns:
+        SegmentResult: Résultat, évalué à True en cas de succès
+
+    Raises:
+        asyncio.CancelledError: Si la tâche est annulée
+    """
+    session = session or get_default_session()
+    token = CancelToken()
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(executor, functools.partial(
+        session.download, url, start_time, end_time, output_file, cancel=token, **options
+    ))
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        token.cancel()
+        # Attend l'arrêt effectif de ffmpeg et le nettoyage des fichiers
+        await asyncio.wait([future])
+        raise
+
+
+async def gather_segments(segments, limit=4, session=None, **options):
+    """
+    Télécharge plusieurs segments, au plus `limit` à la fois
+
+    Args:
+        segments: Itérable de (url, début, fin) ou (url, début, fin, sortie)
+        limit: Nombre maximal de téléchargements simultanés
+        session: SegmentDownloader à utiliser (session partagée par défaut)
+        **options: Options transmises à chaque download_segment_async
+
+    Returns:
+        list[SegmentResult]: Résultats dans l'ordre de `segments`
+    """
+    if limit < 1:
+        raise ValueError("limit doit être au moins 1")
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(segment):
+        async with semaphore:
+            return await download_segment_async(*segment, session=session, **options)
+
+    return await asyncio.gather(*(run(segment) for segment in segments))
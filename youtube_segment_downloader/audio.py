@@ -0,0 +1,139 @@
+"""
+Extraction audio seule : le flux vidéo n'est ni choisi ni lu
+
+Pour un podcast ou une transcription, seul le flux audio de la vidéo est
+utile. Un AudioFormat choisit le conteneur de sortie :
+
+- m4a et opus copient tels quels les paquets AAC ou Opus du flux source
+  (coupe à la trame près, soit ~20 ms) ;
+- wav et flac décodent l'audio (coupe à l'échantillon près), avec
+  rééchantillonnage et mixage facultatifs pour la reconnaissance vocale
+  (16 kHz mono, par exemple).
+
+Seuls les formats audio sans vidéo sont retenus, et seule la plage du
+segment est lue, par requêtes HTTP Range (voir cutting.fetch_audio).
+"""
+
+from collections import namedtuple
+
+from .quality import Selection, _bitrate, _has_audio, _has_video, codec_family
+
+
+# Conteneur de sortie : codec source copié (None si l'audio est décodé),
+# encodeur ffmpeg, muxeur et extension des fichiers
+_Container = namedtuple("_Container", ["copy", "encoder", "muxer", "extension"])
+
+AUDIO_CONTAINERS = {
+    "m4a": _Container("aac", None, "mp4", "m4a"),
+    "opus": _Container("opus", None, "ogg", "opus"),
+    "wav": _Container(None, "pcm_s16le", "wav", "wav"),
+    "flac": _Container(None, "flac", "flac", "flac"),
+}
+
+
+class AudioFormat(namedtuple("AudioFormat", ["container", "sample_rate", "channels"])):
+    """
+    Sortie d'une extraction audio seule
+
+    Attributs:
+        container: Conteneur de sortie (voir AUDIO_CONTAINERS)
+        sample_rate: Fréquence d'échantillonnage en Hz (wav et flac ; None :
+            celle du flux source)
+        channels: Nombre de canaux (wav et flac ; None : ceux du flux source)
+    """
+    __slots__ = ()
+
+    def __new__(cls, container="m4a", sample_rate=None, channels=None):
+        if container not in AUDIO_CONTAINERS:
+            raise ValueError(f"Conteneur audio inconnu : {container} (choix : {', '.join(AUDIO_CONTAINERS)})")
+        for name, value in (("sample_rate", sample_rate), ("channels", channels)):
+            if value is None:
+                continue
+            if value <= 0:
+                raise ValueError(f"{name} doit être positif")
+            if AUDIO_CONTAINERS[container].copy:
+                raise ValueError(f"{name} demande de décoder l'audio (wav ou flac), pas de le copier en {container}")
+        return super().__new__(cls, container, sample_rate, channels)
+
+    def __str__(self):
+        return ",".join(str(value) for value in self if value is not None)
+
+    @property
+    def copy(self):
+        """Famille du codec source copié tel quel (None si l'audio est décodé)"""
+        return AUDIO_CONTAINERS[self.container].copy
+
+    @property
+    def muxer(self):
+        return AUDIO_CONTAINERS[self.container].muxer
+
+    @property
+    def encoder(self):
+        return AUDIO_CONTAINERS[self.container].encoder
+
+    @property
+    def extension(self):
+        return AUDIO_CONTAINERS[self.container].extension
+
+    @property
+    def key(self):
+        """Identifiant stable de la sortie (clé des demandes identiques)"""
+        return f"audio:{self}"
+
+    def output_args(self):
+        """Options ffmpeg de codec et de conteneur d'une sortie (premier flux audio de l'entrée 0)"""
+        args = ["-map", "0:a:0"]
+        if self.copy:
+            args += ["-c:a", "copy"]
+        else:
+            args += ["-c:a", self.encoder]
+            if self.sample_rate:
+                args += ["-ar", str(self.sample_rate)]
+            if self.channels:
+                args += ["-ac", str(self.channels)]
+        return args + ["-f", self.muxer]
+
+    def select(self, formats, seconds, duration=None, quality=None):
+        """
+        Choisit le flux audio d'un segment
+
+        Parmi les formats audio sans vidéo (du codec copié, le cas échéant),
+        on retient d'abord ceux lisibles par requêtes HTTP Range, puis le
+        meilleur débit. Le débit et la taille plafonds d'une politique de
+        qualité s'appliquent au seul flux audio.
+
+        Args:
+            formats: Formats de l'info dict yt-dlp (info['formats'])
+            seconds: Durée totale à lire
+            duration: Durée de la vidéo (pour les formats sans débit annoncé)
+            quality: quality.QualityPolicy (max_bitrate et target_size ;
+                optionnelle)
+
+        Returns:
+            quality.Selection: Flux retenu et estimation des octets lus
+
+        Raises:
+            ValueError: Si aucun flux audio seul ne convient
+        """
+        best = None
+        for fmt in formats:
+            if _has_video(fmt) or not _has_audio(fmt) or not fmt.get('format_id'):
+                continue
+            if self.copy and codec_family(fmt.get('acodec')) != self.copy:
+                continue
+            bitrate = _bitrate(fmt, duration)
+            estimated = bitrate * 125 * seconds if bitrate is not None else None
+            if quality is not None:
+                if quality.max_bitrate and (bitrate is None or bitrate > quality.max_bitrate):
+                    continue
+                if quality.target_size and (estimated is None or estimated > quality.target_size):
+                    continue
+            rank = (fmt.get('protocol') not in ('http', 'https'), -(bitrate or 0))
+            if best is None or rank < best[0]:
+                best = (rank, Selection(fmt['format_id'], [fmt], None, bitrate,
+                                        round(estimated) if estimated is not None else None))
+        if best is None:
+            codec = f" {self.copy.upper()}" if self.copy else ""
+            limits = f" respectant la politique de qualité ({quality})" if quality is not None else ""
+            raise ValueError(f"Aucun flux audio seul{codec}{limits} pour une sortie {self.container}")
+        return best[1]
@@ -0,0 +1,170 @@
+"""
+Mode batch : exécution d'un manifeste de segments sur un pool de workers
+"""
+
+import json
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from .downloader import download_segment
+from .manifest import pick_field, read_csv_rows
+
+
+BatchJob = namedtuple("BatchJob", ["index", "url", "start_time", "end_time", "output_file"])
+BatchResult = namedtuple("BatchResult", ["job", "success", "error", "elapsed"])
+
+def _pick(row, field):
+    value = pick_field(row, field)
+    return None if value is None else str(value)
+
+
+def _make_job(index, row, where):
+    url = _pick(row, "url")
+    start_time = _pick(row, "start")
+    end_time = _pick(row, "end")
+    if not url or not start_time or not end_time:
+        raise ValueError(f"{where} : les champs url, start et end sont obligatoires")
+    output_file = _pick(row, "output")
+    if output_file is None:
+        # Préfixe par l'index : deux vidéos peuvent partager les mêmes temps
+        output_file = f"segment_{index:04d}_{start_time.replace(':', '-')}_{end_time.replace(':', '-')}.mp4"
+    return BatchJob(index, url, start_time, end_time, output_file)
+
+
+def load_manifest(path):
+    """
+    Charge un manifeste de segments au format CSV ou JSONL
+
+    Le CSV peut avoir une ligne d'en-tête (url,start,end,output) ou
+    simplement les colonnes dans cet ordre. Le JSONL contient un objet
+    par ligne avec les mêmes clés.
+
+    Args:
+        path: Chemin du manifeste (.csv, .jsonl ou .ndjson)
+
+    Returns:
+        list[BatchJob]: Jobs numérotés à partir de 1
+
+    Raises:
+        ValueError: Si le format ou une ligne du manifeste est invalide
+    """
+    path = Path(path)
+    suffix = path.suffix.lower()
+    jobs = []
+
+    if suffix in (".jsonl", ".ndjson"):
+        with open(path, encoding="utf-8") as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"{path.name}:{line_no} : JSON invalide ({e})")
+                if not isinstance(row, dict):
+                    raise ValueError(f"{path.name}:{line_no} : un objet JSON est attendu")
+                jobs.append(_make_job(len(jobs) + 1, row, f"{path.name}:{line_no}"))
+
+    elif suffix == ".csv":
+        rows = read_csv_rows(path, ("url", "start", "end", "output"))
+        for row_no, row in enumerate(rows, 1):
+            jobs.append(_make_job(len(jobs) + 1, row, f"{path.name} ligne {row_no}"))
+
+    else:
+        raise ValueError(f"Format de manifeste non supporté : {path.suffix} (attendu .csv ou .jsonl)")
+
+    return jobs
+
+
+class _ErrorCollector:
+    """Logger yt-dlp silencieux qui ne garde que le dernier message d'erreur"""
+    def __init__(self):
+        self.last_error = None
+
+    def debug(self, msg):
+        pass
+
+    def info(self, msg):
+        pass
+
+    def warning(self, msg):
+        pass
+
+    def error(self, msg):
+        self.last_error = msg
+
+
+def _run_job(job, download, options):
+    collector = _ErrorCollector()
+    started = time.monotonic()
+    try:
+        success = bool(download(
+            job.url, job.start_time, job.end_time, job.output_file,
+            verbose=False, logger=collector, **options
+        ))
+        error = None if success else (collector.last_error or "échec du téléchargement")
+    except Exception as e:
+        success, error = False, str(e)
+    return BatchResult(job, success, error, time.monotonic() - started)
+
+
+def _run_pipeline(jobs, pipeline, on_result, options):
+    futures = {}
+    for job in jobs:
+        collector = _ErrorCollector()
+        future = pipeline.submit(job.url, job.start_time, job.end_time, job.output_file,
+                                 verbose=False, logger=collector, **options)
+        futures[future] = (job, collector)
+
+    results = {}
+    for future in as_completed(futures):
+        job, collector = futures[future]
+        try:
+            segment = future.result()
+            success, elapsed = bool(segment), segment.stats["total_seconds"]
+            error = None if success else (collector.last_error or segment.error or "échec du téléchargement")
+        except Exception as e:
+            success, error, elapsed = False, str(e), 0.0
+        results[job.index] = BatchResult(job, success, error, elapsed)
+        if on_result:
+            on_result(results[job.index])
+    return [results[job.index] for job in jobs]
+
+
+def run_batch(jobs, workers=4, on_result=None, download=None, pipeline=None, **options):
+    """
+    Exécute une liste de jobs sur un pool borné de threads
+
+    Args:
+        jobs: Liste de BatchJob (voir load_manifest)
+        workers: Nombre de téléchargements simultanés
+        on_result: Fonction appelée avec chaque BatchResult dès qu'il est prêt
+        download: Fonction de téléchargement (download_segment par défaut)
+        pipeline: pipeline.Pipeline qui télécharge et découpe sur deux pools
+            séparés, à la place du pool de `workers` threads (`download` est
+            alors ignoré ; voir Pipeline.stats pour l'utilisation des étages)
+        **options: Options supplémentaires transmises à chaque téléchargement
+
+    Returns:
+        list[BatchResult]: Résultats dans l'ordre du manifeste
+    """
+    if pipeline is not None:
+        return _run_pipeline(jobs, pipeline, on_result, options)
+    if workers < 1:
+        raise ValueError("Le nombre de workers doit être au moins 1")
+    if download is None:
+        download = download_segment
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_run_job, job, download, options) for job in jobs]
+        for future in as_completed(futures):
+            result = future.result()
+            results[result.job.index] = result
+            if on_result:
+                on_result(result)
+
+    return [results[job.index] for job in jobs]
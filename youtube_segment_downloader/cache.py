@@ -0,0 +1,408 @@
+"""
+Caches persistants : métadonnées yt-dlp (info dict et liste des formats)
+et extraits déjà téléchargés
+"""
+
+import hashlib
+import itertools
+import json
+import os
+import re
+import shutil
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from pathlib import Path
+
+
+# Marge de sécurité avant l'expiration des URLs signées de YouTube
+EXPIRY_MARGIN = 600
+# Durée de vie quand aucune date d'expiration n'est trouvée dans les URLs
+DEFAULT_TTL = 3600
+MAX_TTL = 6 * 3600
+
+# Champs volumineux inutiles pour découper un segment
+_DROPPED_KEYS = ("automatic_captions", "heatmap", "thumbnails")
+
+_EXPIRE_RE = re.compile(r"[?&/]expire[=/](\d{9,})")
+
+
+def default_cache_dir():
+    """
+    Retourne le répertoire du cache : $YT_SEGMENT_CACHE_DIR, sinon
+    $XDG_CACHE_HOME/youtube-segment-downloader, sinon ~/.cache/...
+    """
+    if os.environ.get("YT_SEGMENT_CACHE_DIR"):
+        return Path(os.environ["YT_SEGMENT_CACHE_DIR"])
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return Path(base) / "youtube-segment-downloader"
+
+
+def info_expiry(info, now=None):
+    """
+    Calcule la date d'expiration d'un info dict
+
+    Les URLs de flux YouTube sont signées et portent un paramètre `expire`
+    (timestamp Unix). Le cache expire avant la première URL périmée.
+
+    Args:
+        info: Info dict yt-dlp
+        now: Horodatage de référence (time.time() par défaut)
+
+    Returns:
+        float: Timestamp Unix au-delà duquel l'entrée n'est plus utilisable
+    """
+    now = time.time() if now is None else now
+    expiries = []
+    for fmt in info.get("formats") or [info]:
+        for key in ("url", "manifest_url", "fragment_base_url"):
+            match = _EXPIRE_RE.search(fmt.get(key) or "")
+            if match:
+                expiries.append(int(match.group(1)))
+    if not expiries:
+        return now + DEFAULT_TTL
+    return min(min(expiries) - EXPIRY_MARGIN, now + MAX_TTL)
+
+
+class InfoCache:
+    """
+    Cache SQLite des info dicts, indexé par ID de vidéo.
+
+    Les entrées expirent avec les URLs signées qu'elles contiennent et les
+    moins récemment utilisées sont évincées au-delà de `max_bytes`.
+    L'objet peut être partagé entre threads.
+    """
+
+    def __init__(self, path=None, max_bytes=64 * 1024 * 1024):
+        """
+        Args:
+            path: Fichier SQLite (default_cache_dir()/info.sqlite3 par défaut)
+            max_bytes: Taille maximale cumulée des entrées
+        """
+        self.path = Path(path) if path else default_cache_dir() / "info.sqlite3"
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS info ("
+                " video_id TEXT PRIMARY KEY,"
+                " data TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " expires_at REAL NOT NULL,"
+                " last_used REAL NOT NULL)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, video_id):
+        """
+        Retourne l'info dict en cache pour cette vidéo, ou None
+
+        Args:
+            video_id: ID de la vidéo YouTube
+
+        Returns:
+            dict | None: Info dict, ou None si absent ou expiré
+        """
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT data, expires_at FROM info WHERE video_id = ?", (video_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                conn.execute("DELETE FROM info WHERE video_id = ?", (video_id,))
+                conn.commit()
+                return None
+            conn.execute("UPDATE info SET last_used = ? WHERE video_id = ?", (now, video_id))
+            conn.commit()
+        return json.loads(row[0])
+
+    def put(self, video_id, info):
+        """
+        Enregistre un info dict (déjà passé par YoutubeDL.sanitize_info)
+
+        Args:
+            video_id: ID de la vidéo YouTube
+            info: Info dict sérialisable en JSON
+        """
+        now = time.time()
+        expires_at = info_expiry(info, now)
+        if expires_at <= now:
+            return
+        info = {k: v for k, v in info.items() if k not in _DROPPED_KEYS}
+        data = json.dumps(info, ensure_ascii=False)
+        size = len(data.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO info (video_id, data, size, expires_at, last_used)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (video_id, data, size, expires_at, now)
+            )
+            conn.execute("DELETE FROM info WHERE expires_at <= ?", (now,))
+            self._evict(conn)
+            conn.commit()
+
+    def _evict(self, conn):
+        """Supprime les entrées les moins récemment utilisées au-delà de max_bytes"""
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM info").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for video_id, size in conn.execute(
+                "SELECT video_id, size FROM info ORDER BY last_used ASC").fetchall():
+            conn.execute("DELETE FROM info WHERE video_id = ?", (video_id,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def invalidate(self, video_id):
+        """Supprime l'entrée d'une vidéo (par exemple après un HTTP 403)"""
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM info WHERE video_id = ?", (video_id,))
+            conn.commit()
+
+    def clear(self):
+        """Vide entièrement le cache"""
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM info")
+            conn.commit()
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# Extrait en cache. `actual_start` / `actual_end` sont les bornes réellement
+# couvertes dans la vidéo d'origine ; la timeline du fichier commence à 0.
+Clip = namedtuple("Clip", ["path", "cut_mode", "start", "end", "actual_start", "actual_end"])
+
+# Tolérance sur les bornes (secondes)
+_TIME_TOLERANCE = 0.001
+
+
+def clip_key(video_id, format_spec, start, end, cut_mode):
+    """
+    Clé d'un extrait, qui donne aussi le nom de son fichier
+
+    Returns:
+        str: Empreinte SHA-256 de (vidéo, format, début, fin, mode)
+    """
+    data = json.dumps([video_id, format_spec, round(start, 3), round(end, 3), cut_mode])
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+class ClipCache:
+    """
+    Cache disque des extraits déjà produits.
+
+    Un extrait identique (même vidéo, format, bornes et mode) est servi tel
+    quel ; un extrait plus large du même format peut être redécoupé
+    localement sans accès réseau. Les moins récemment utilisés sont
+    supprimés au-delà de `max_bytes`. L'objet peut être partagé entre threads.
+
+    Un extrait trouvé est épinglé (lien physique privé dans `pins/`) jusqu'à
+    release : une éviction, de ce processus ou d'un autre partageant le
+    répertoire, n'en retire que le nom en cache, pas les octets en cours de
+    lecture. Les entrées ne sont jamais réécrites sur place (put remplace le
+    fichier d'un bloc) : le contenu d'une épingle ne change pas.
+    """
+
+    def __init__(self, directory=None, max_bytes=2 * 1024 * 1024 * 1024):
+        """
+        Args:
+            directory: Répertoire des extraits (default_cache_dir()/clips par défaut)
+            max_bytes: Taille maximale cumulée des extraits
+        """
+        self.directory = Path(directory) if directory else default_cache_dir() / "clips"
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pins = self.directory / "pins"
+        self._pin_ids = itertools.count()
+
+    def _connect(self):
+        if self._conn is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.directory / "clips.sqlite3"), timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS clips ("
+                " key TEXT PRIMARY KEY,"
+                " video_id TEXT NOT NULL,"
+                " format TEXT NOT NULL,"
+                " cut_mode TEXT NOT NULL,"
+                " start_time REAL NOT NULL,"
+                " end_time REAL NOT NULL,"
+                " actual_start REAL NOT NULL,"
+                " actual_end REAL NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " last_used REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS clips_video ON clips (video_id, format)")
+            conn.commit()
+            self._conn = conn
+            self._remove_stale_pins()
+        return self._conn
+
+    def _remove_stale_pins(self):
+        """Supprime les épingles laissées par des processus arrêtés avant release"""
+        from .jobs import _pid_alive
+
+        for pin in self._pins.glob("*.mp4") if self._pins.is_dir() else ():
+            try:
+                pid = int(pin.name.split(".")[1])
+            except (IndexError, ValueError):
+                continue
+            if pid != os.getpid() and not _pid_alive(pid):
+                _unlink(pin)
+
+    def _path(self, key):
+        return self.directory / f"{key}.mp4"
+
+    def find(self, video_id, format_spec, start, end, cut_mode):
+        """
+        Cherche un extrait qui couvre [start, end]
+
+        Args:
+            video_id: ID de la vidéo YouTube
+            format_spec: Sélecteur de format yt-dlp utilisé pour le téléchargement
+            start: Début demandé (secondes)
+            end: Fin demandée (secondes)
+            cut_mode: Mode de découpage demandé
+
+        Returns:
+            tuple: (Clip ou None, "hit" | "partial" | "miss"). "hit" : extrait
+            identique ; "partial" : extrait plus large à redécouper (de
+            préférence découpé dans le même mode, puis le plus court). Le
+            Clip est épinglé : le rendre avec release une fois lu
+        """
+        key = clip_key(video_id, format_spec, start, end, cut_mode)
+        with self._lock:
+            conn = self._connect()
+            rows = conn.execute(
+                "SELECT key, cut_mode, start_time, end_time, actual_start, actual_end FROM clips"
+                " WHERE video_id = ? AND format = ? AND actual_start <= ? AND actual_end >= ?"
+                " ORDER BY key != ?, cut_mode != ?, actual_end - actual_start",
+                (video_id, format_spec, start + _TIME_TOLERANCE, end - _TIME_TOLERANCE, key, cut_mode)
+            ).fetchall()
+            for row in rows:
+                try:
+                    path = self._pin(row[0])
+                except FileNotFoundError:
+                    # Évincé entre-temps, éventuellement par un autre processus
+                    conn.execute("DELETE FROM clips WHERE key = ?", (row[0],))
+                    continue
+                conn.execute("UPDATE clips SET last_used = ? WHERE key = ?", (time.time(), row[0]))
+                conn.commit()
+                return Clip(path, *row[1:]), "hit" if row[0] == key else "partial"
+            conn.commit()
+        return None, "miss"
+
+    def _pin(self, key):
+        """
+        Lien physique privé vers un extrait (son nom en cache si les liens sont impossibles)
+
+        Raises:
+            FileNotFoundError: Si l'extrait n'existe plus
+        """
+        path = self._path(key)
+        self._pins.mkdir(exist_ok=True)
+        pin = self._pins / f"{key}.{os.getpid()}.{next(self._pin_ids)}.mp4"
+        try:
+            os.link(path, pin)
+        except OSError:
+            if not path.exists():
+                raise FileNotFoundError(path)
+            return path
+        return pin
+
+    def release(self, clip):
+        """Retire l'épingle d'un Clip rendu par find"""
+        if clip is not None and Path(clip.path).parent == self._pins:
+            _unlink(Path(clip.path))
+
+    def put(self, video_id, format_spec, start, end, cut_mode, source, actual_start=None, actual_end=None):
+        """
+        Copie un extrait produit dans le cache
+
+        Args:
+            video_id: ID de la vidéo YouTube
+            format_spec: Sélecteur de format yt-dlp utilisé pour le téléchargement
+            start: Début demandé (secondes)
+            end: Fin demandée (secondes)
+            cut_mode: Mode de découpage utilisé
+            source: Fichier de l'extrait
+            actual_start: Début réellement couvert (start si None)
+            actual_end: Fin réellement couverte (end si None)
+        """
+        size = os.path.getsize(source)
+        if size > self.max_bytes:
+            return
+        key = clip_key(video_id, format_spec, start, end, cut_mode)
+        with self._lock:
+            conn = self._connect()
+            path = self._path(key)
+            tmp = path.with_name(f"{key}.{threading.get_ident()}.tmp")
+            shutil.copyfile(source, tmp)
+            os.replace(tmp, path)
+            conn.execute(
+                "INSERT OR REPLACE INTO clips (key, video_id, format, cut_mode, start_time, end_time,"
+                " actual_start, actual_end, size, last_used) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, video_id, format_spec, cut_mode, start, end,
+                 start if actual_start is None else actual_start,
+                 end if actual_end is None else actual_end, size, time.time())
+            )
+            self._evict(conn)
+            conn.commit()
+
+    def _evict(self, conn):
+        """Supprime les extraits les moins récemment utilisés au-delà de max_bytes"""
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM clips").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in conn.execute("SELECT key, size FROM clips ORDER BY last_used ASC").fetchall():
+            conn.execute("DELETE FROM clips WHERE key = ?", (key,))
+            _unlink(self._path(key))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def clear(self):
+        """Supprime tous les extraits"""
+        with self._lock:
+            conn = self._connect()
+            for (key,) in conn.execute("SELECT key FROM clips").fetchall():
+                _unlink(self._path(key))
+            conn.execute("DELETE FROM clips")
+            conn.commit()
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def _unlink(path):
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,181 @@
+"""
+Annulation des téléchargements
+
+Un CancelToken est partagé entre l'appelant (interface graphique, tâche
+asyncio...) et le thread qui télécharge. L'annuler arrête les processus
+ffmpeg lancés pour ce téléchargement au lieu d'attendre leur fin.
+"""
+
+import subprocess
+import threading
+from contextlib import contextmanager
+
+from .events import ChildCpuMixin
+
+
+class DownloadCancelled(Exception):
+    """Levée dans le thread de téléchargement quand son CancelToken est annulé"""
+
+
+class CancelToken:
+    """
+    Jeton d'annulation thread-safe.
+
+    Exemple:
+        token = CancelToken()
+        threading.Thread(target=download_segment, args=(url, "1:00", "2:00"),
+                         kwargs={"cancel": token}).start()
+        ...
+        token.cancel()
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cancelled = False
+        self._callbacks = []
+
+    @property
+    def cancelled(self):
+        return self._cancelled
+
+    def cancel(self):
+        """Annule le téléchargement (sans effet s'il l'est déjà)"""
+        with self._lock:
+            if self._cancelled:
+                return
+            self._cancelled = True
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
+
+    def register(self, callback):
+        """
+        Appelle `callback` lors de l'annulation (immédiatement si déjà annulé)
+
+        Returns:
+            callable: Fonction qui retire le callback
+        """
+        with self._lock:
+            if not self._cancelled:
+                self._callbacks.append(callback)
+                return lambda: self._unregister(callback)
+        callback()
+        return lambda: None
+
+    def _unregister(self, callback):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def raise_if_cancelled(self):
+        if self._cancelled:
+            raise DownloadCancelled("Téléchargement annulé")
+
+
+_local = threading.local()
+
+
+def current_token():
+    """Retourne le CancelToken actif dans ce thread (None hors de cancel_scope)"""
+    return getattr(_local, "token", None)
+
+
+@contextmanager
+def cancel_scope(token):
+    """Rend `token` actif dans le thread courant pendant le bloc"""
+    previous = current_token()
+    _local.token = token
+    try:
+        yield token
+    finally:
+        _local.token = previous
+
+
+class _ChildProcess(ChildCpuMixin, subprocess.Popen):
+    pass
+
+
+def run_process(cmd):
+    """
+    Équivalent de subprocess.run(cmd, capture_output=True, text=True) qui
+    tue le processus si le CancelToken actif est annulé et impute son
+    temps CPU au Recorder actif
+
+    Raises:
+        DownloadCancelled: Si le jeton actif a été annulé
+    """
+    token = current_token()
+    if token is not None:
+        token.raise_if_cancelled()
+    proc = _ChildProcess(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    unregister = token.register(proc.kill) if token is not None else None
+    try:
+        stdout, stderr = proc.communicate()
+    finally:
+        if unregister:
+            unregister()
+    if token is not None:
+        token.raise_if_cancelled()
+    return subprocess.CompletedProcess(cmd, proc.returncode, stdout, stderr)
+
+
+# Taille maximale des blocs recopiés par stream_process
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def stream_process(cmd, sink, on_progress=None, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Comme run_process, mais recopie la sortie standard de `cmd` dans `sink`
+    au fil de l'eau, sans l'accumuler en mémoire ni sur disque
+
+    Args:
+        cmd: Commande dont la sortie standard est binaire
+        sink: Objet fichier binaire (seule sa méthode write est utilisée)
+        on_progress: Fonction appelée avec le nombre d'octets écrits après
+            chaque bloc
+        chunk_size: Taille maximale d'un bloc
+
+    Returns:
+        subprocess.CompletedProcess: stdout = nombre d'octets écrits, stderr
+        = erreurs du processus (texte)
+
+    Raises:
+        DownloadCancelled: Si le jeton actif a été annulé
+    """
+    token = current_token()
+    if token is not None:
+        token.raise_if_cancelled()
+    proc = _ChildProcess(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    unregister = token.register(proc.kill) if token is not None else None
+    # stderr est lu à part : un tampon plein bloquerait ffmpeg
+    errors = []
+    reader = threading.Thread(target=lambda: errors.append(proc.stderr.read()), daemon=True)
+    reader.start()
+    written = 0
+    try:
+        while True:
+            chunk = proc.stdout.read1(chunk_size)
+            if not chunk:
+                break
+            sink.write(chunk)
+            written += len(chunk)
+            if on_progress:
+                on_progress(written)
+    except BaseException:
+        # Destinataire fermé, annulation via on_progress... : ffmpeg est arrêté
+        proc.kill()
+        raise
+    finally:
+        proc.stdout.close()
+        proc.wait()
+        reader.join()
+        proc.stderr.close()
+        if unregister:
+            unregister()
+    if token is not None:
+        token.raise_if_cancelled()
+    stderr = errors[0].decode("utf-8", "replace") if errors else ""
+    return subprocess.CompletedProcess(cmd, proc.returncode, written, stderr)
@@ -0,0 +1,187 @@
+"""
+Chapitres : lecture des repères (YouTube, JSON, CSV, WebVTT) et plan de
+découpe d'une vidéo en un fichier par chapitre
+"""
+
+import json
+import re
+from bisect import bisect_right
+from collections import namedtuple
+from pathlib import Path
+
+from .cutting import EPSILON
+from .manifest import parse_timestamp, pick_field, read_csv_rows
+
+
+# `end` peut valoir None avant résolution : fin au chapitre suivant
+Chapter = namedtuple("Chapter", ["start", "end", "title"])
+
+_VTT_TIMING_RE = re.compile(r"^\s*(\S+)\s+-->\s+(\S+)")
+_VTT_TAG_RE = re.compile(r"<[^>]*>")
+_UNSAFE_FILENAME_RE = re.compile(r'[<>:"/\\|?*\x00-\x1f]')
+
+
+def chapters_from_info(info):
+    """
+    Chapitres d'un info dict yt-dlp
+
+    Returns:
+        list[Chapter]: Chapitres de la vidéo (liste vide s'il n'y en a pas)
+    """
+    return [Chapter(c.get("start_time"), c.get("end_time"), c.get("title"))
+            for c in info.get("chapters") or []]
+
+
+def _make_chapter(row, where):
+    start = pick_field(row, "start")
+    if start is None:
+        raise ValueError(f"{where} : le début du chapitre est obligatoire")
+    return Chapter(start, pick_field(row, "end"), pick_field(row, "title"))
+
+
+def _parse_vtt(text, name):
+    chapters = []
+    for block_no, block in enumerate(re.split(r"\n\s*\n", text.replace("\r\n", "\n")), 1):
+        lines = [line for line in block.split("\n") if line.strip()]
+        if not lines or lines[0].startswith(("WEBVTT", "NOTE", "STYLE", "REGION")):
+            continue
+        for i, line in enumerate(lines):
+            match = _VTT_TIMING_RE.match(line)
+            if match:
+                title = " ".join(_VTT_TAG_RE.sub("", l).strip() for l in lines[i + 1:]).strip()
+                chapters.append(Chapter(match.group(1), match.group(2), title or None))
+                break
+        else:
+            raise ValueError(f"{name} bloc {block_no} : repère WebVTT sans horodatage")
+    return chapters
+
+
+def load_cues(path):
+    """
+    Charge une liste de repères à utiliser à la place des chapitres YouTube
+
+    JSON : liste d'objets {start, end, title} (ou {"chapters": [...]}).
+    CSV : colonnes start,end,title, avec ou sans ligne d'en-tête (end peut
+    être vide). WebVTT : un repère par chapitre, le texte sert de titre.
+    Sans fin, un chapitre s'arrête au début du suivant.
+
+    Args:
+        path: Chemin du fichier (.json, .csv ou .vtt)
+
+    Returns:
+        list[Chapter]: Repères, dans l'ordre du fichier
+
+    Raises:
+        ValueError: Si le format ou un repère est invalide
+    """
+    path = Path(path)
+    suffix = path.suffix.lower()
+
+    if suffix == ".json":
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except json.JSONDecodeError as e:
+            raise ValueError(f"{path.name} : JSON invalide ({e})")
+        if isinstance(data, dict):
+            data = data.get("chapters")
+        if not isinstance(data, list) or not all(isinstance(row, dict) for row in data):
+            raise ValueError(f"{path.name} : une liste d'objets {{start, end, title}} est attendue")
+        return [_make_chapter(row, f"{path.name} repère {i}") for i, row in enumerate(data, 1)]
+
+    if suffix == ".csv":
+        rows = read_csv_rows(path, ("start", "end", "title"))
+        return [_make_chapter(row, f"{path.name} ligne {i}") for i, row in enumerate(rows, 1)]
+
+    if suffix == ".vtt":
+        return _parse_vtt(path.read_text(encoding="utf-8-sig"), path.name)
+
+    raise ValueError(f"Format de repères non supporté : {path.suffix} (attendu .json, .csv ou .vtt)")
+
+
+def resolve_chapters(chapters, duration=None):
+    """
+    Trie les chapitres, complète les fins et les titres manquants et vérifie
+    qu'ils ne se chevauchent pas
+
+    Args:
+        chapters: Chapitres ou tuples (début, fin, titre) ; horodatages en
+            secondes ou au format accepté par parse_timestamp
+        duration: Durée de la vidéo (fin du dernier chapitre si inconnue)
+
+    Returns:
+        list[Chapter]: Chapitres triés, horodatages en secondes
+
+    Raises:
+        ValueError: Si un chapitre est vide, en chevauche un autre ou n'a pas de fin
+    """
+    parsed = []
+    for chapter in chapters:
+        start, end, title = Chapter(*chapter)
+        parsed.append(Chapter(parse_timestamp(start), None if end in (None, "") else parse_timestamp(end), title))
+    parsed.sort(key=lambda c: c.start)
+
+    resolved = []
+    for i, (start, end, title) in enumerate(parsed):
+        if end is None:
+            end = parsed[i + 1].start if i + 1 < len(parsed) else duration
+        if end is None:
+            raise ValueError(f"Fin du chapitre inconnue (début {start}s) : durée de la vidéo indisponible")
+        if end - start <= EPSILON:
+            raise ValueError(f"Chapitre vide ou inversé : {start}s -> {end}s")
+        if resolved and start < resolved[-1].end - EPSILON:
+            raise ValueError(f"Les chapitres se chevauchent : {resolved[-1].title} et {title or start}")
+        resolved.append(Chapter(start, end, title or f"Chapitre {i + 1}"))
+    return resolved
+
+
+def chapter_filename(index, chapter):
+    """Nom de fichier d'un chapitre : "01 - Titre.mp4" (caractères interdits remplacés)"""
+    title = _UNSAFE_FILENAME_RE.sub("_", str(chapter.title)).strip(" .")[:120]
+    return f"{index:02d} - {title or 'Chapitre'}.mp4"
+
+
+def plan_split(chapters, start, end, keyframes=None):
+    """
+    Calcule les coupures qui produisent un morceau par chapitre
+
+    Les morceaux sont ceux de cutting.split_segments : le morceau 0 va de
+    `start` à la première coupure, le morceau k de la coupure k-1 à la
+    coupure k. Les intervalles entre chapitres forment des morceaux ignorés.
+
+    Args:
+        chapters: Chapitres résolus (voir resolve_chapters)
+        start: Début réellement couvert par la source (secondes)
+        end: Fin réellement couverte par la source (secondes)
+        keyframes: Images clés de la source (timeline de la vidéo) : les
+            coupures y sont alignées pour une copie sans ré-encodage. None
+            pour couper aux bornes exactes des chapitres.
+
+    Returns:
+        tuple: (coupures triées, [(début, fin, index du morceau) par
+        chapitre]) ; l'index vaut None si le chapitre est vide une fois
+        aligné sur les images clés
+    """
+    def before(t):
+        candidates = [k for k in keyframes if k <= t + EPSILON]
+        return candidates[-1] if candidates else start
+
+    def after(t):
+        candidates = [k for k in keyframes if k >= t - EPSILON]
+        return candidates[0] if candidates else end
+
+    spans = []
+    for i, chapter in enumerate(chapters):
+        chapter_start, chapter_end = max(chapter.start, start), min(chapter.end, end)
+        if keyframes is not None:
+            contiguous = i + 1 < len(chapters) and chapters[i + 1].start - chapter.end <= EPSILON
+            # Une borne partagée avec le chapitre suivant recule, comme son début
+            chapter_start = before(chapter_start)
+            chapter_end = before(chapter_end) if contiguous else after(chapter_end)
+        spans.append((chapter_start, chapter_end))
+
+    cuts = sorted({round(t, 6) for span in spans for t in span if start + EPSILON < t < end - EPSILON})
+    plan = []
+    for chapter_start, chapter_end in spans:
+        piece = bisect_right(cuts, chapter_start + EPSILON) if chapter_end - chapter_start > EPSILON else None
+        plan.append((chapter_start, chapter_end, piece))
+    return cuts, plan
@@ -2,31 +2,480 @@
 Interface en ligne de commande pour YouTube Segment Downloader
 """
 
+import argparse
+import json
+import signal
 import sys
-from .downloader import download_segment
+import threading
+import time
+from .audio import AUDIO_CONTAINERS, AudioFormat
+from .cutting import STREAM_CONTAINERS
+from .downloader import (CUT_MODES, ENGINES, download_segment, download_segments, get_default_session,
+                         split_by_chapters)
+from .quality import VIDEO_CODECS, QualityPolicy
+from .throttle import default_limiter, parse_rate
 
 
-def main():
-    """Fonction principale pour l'interface CLI"""
-    if len(sys.argv) < 4:
-        print("Usage: yt-segment <URL> <début> <fin> [fichier_sortie]")
-        print("\nExemples:")
-        print('  yt-segment "https://www.youtube.com/watch?v=..." "15:21" "30:21"')
-        print('  yt-segment "https://www.youtube.com/watch?v=..." "1:15:30" "1:45:00" "mon_segment.mp4"')
-        print("\nFormats de temps acceptés: MM:SS ou HH:MM:SS")
+def _print_usage():
+    print("Usage: yt-segment <URL> <début> <fin> [fichier_sortie] [--fast | --cut-mode MODE] [-j N] [--engine ytdlp|direct] [--no-cache] [--stats text|json]")
+    print("       yt-segment <URL> <début> <fin> [fichier_sortie] [--max-height N] [--max-bitrate KBITS] "
+          "[--prefer-codec CODEC] [--target-size Mo]")
+    print("       yt-segment <URL> <début> <fin> [fichier_sortie] --audio-only [m4a|opus|wav|flac] "
+          "[--sample-rate HZ] [--channels N]")
+    print("       yt-segment <URL> --segment <début> <fin> [fichier_sortie] [--segment ...] [options]")
+    print("       yt-segment batch <manifeste.csv|manifeste.jsonl> [--workers N] [--pipeline] [options]")
+    print("       yt-segment chapters <URL> [-o répertoire] [--cues repères.json|.csv|.vtt] [options]")
+    print("       yt-segment resume [ID ...] [--list] [--gc [--older-than HEURES]]")
+    print("       yt-segment serve [--host ADRESSE] [--port PORT] [--workers N] [-o répertoire]")
+    print("\nExemples:")
+    print('  yt-segment "https://www.youtube.com/watch?v=..." "15:21" "30:21"')
+    print('  yt-segment "https://www.youtube.com/watch?v=..." "1:15:30" "1:45:00" "mon_segment.mp4"')
+    print('  yt-segment "https://www.youtube.com/watch?v=..." --segment 1:00 1:30 a.mp4 --segment 5:00 5:20 b.mp4')
+    print('  yt-segment "https://www.youtube.com/watch?v=..." "1:00" "1:30" - | aws s3 cp - s3://bucket/clip.mp4')
+    print('  yt-segment "https://www.youtube.com/watch?v=..." "1:00" "1:30" apercu.mp4 --max-height 480')
+    print('  yt-segment "https://www.youtube.com/watch?v=..." "1:00" "1:30" extrait.m4a --audio-only')
+    print('  yt-segment "https://www.youtube.com/watch?v=..." --segment 1:00 1:30 a.wav --segment 5:00 5:20 b.wav '
+          '--audio-only wav --sample-rate 16000 --channels 1')
+    print('  yt-segment batch segments.csv --workers 8')
+    print('  yt-segment batch segments.csv --workers 8 --pipeline --cpu-workers 4')
+    print('  yt-segment chapters "https://www.youtube.com/watch?v=..." -o chapitres/ --fast')
+    print('  yt-segment "https://www.youtube.com/watch?v=..." "0:00" "3:00:00" long.mp4 --resumable')
+    print('  yt-segment resume')
+    print('  yt-segment serve --port 8787 --workers 8 -o clips/')
+    print("\nFormats de temps acceptés: MM:SS ou HH:MM:SS")
+
+
+def batch_main(argv):
+    """Sous-commande `batch` : exécute un manifeste CSV/JSONL en parallèle"""
+    from .batch import load_manifest, run_batch
+    from .pipeline import DEFAULT_MAX_PENDING_BYTES, Pipeline
+
+    parser = argparse.ArgumentParser(
+        prog="yt-segment batch",
+        description="Télécharge tous les segments d'un manifeste CSV ou JSONL"
+    )
+    parser.add_argument("manifest", help="Fichier .csv (url,start,end[,output]) ou .jsonl")
+    parser.add_argument("-w", "--workers", type=int, default=4,
+                        help="Nombre de téléchargements simultanés (défaut: 4)")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="Télécharger (--workers) et découper (--cpu-workers) sur deux pools séparés : "
+                             "les ré-encodages n'occupent plus les téléchargements")
+    parser.add_argument("--cpu-workers", type=int, default=None, metavar="N",
+                        help="Découpes simultanées avec --pipeline (défaut: nombre de cœurs physiques)")
+    parser.add_argument("--max-pending-mb", type=int, default=DEFAULT_MAX_PENDING_BYTES // 2 ** 20, metavar="Mo",
+                        help="Avec --pipeline, taille des extraits en attente de découpe au-delà de laquelle "
+                             "les téléchargements attendent (défaut: %(default)s)")
+    parser.add_argument("--resumable", action="store_true",
+                        help="Enregistrer chaque segment comme job reprenable (voir yt-segment resume)")
+    _add_common_options(parser)
+    args = parser.parse_args(argv)
+    if args.resumable and args.pipeline:
+        parser.error("--resumable ne s'utilise pas avec --pipeline")
+
+    try:
+        jobs = load_manifest(args.manifest)
+    except (OSError, ValueError) as e:
+        print(f"❌ Erreur: {e}")
         sys.exit(1)
-    
-    url = sys.argv[1]
-    start_time = sys.argv[2]
-    end_time = sys.argv[3]
-    output_file = sys.argv[4] if len(sys.argv) > 4 else None
-    
+    if not jobs:
+        print("⚠️ Manifeste vide, rien à faire.")
+        sys.exit(0)
+
+    total = len(jobs)
+    pipeline = None
+    if args.pipeline:
+        try:
+            pipeline = Pipeline(network_workers=args.workers, cpu_workers=args.cpu_workers,
+                                max_pending_bytes=args.max_pending_mb * 2 ** 20)
+            if args.clip_cache:
+                pipeline.session.set_clip_cache()
+        except ValueError as e:
+            print(f"❌ Erreur: {e}")
+            sys.exit(1)
+        print(f"🚀 {total} segment(s) à traiter : {pipeline.network_workers} téléchargement(s) et "
+              f"{pipeline.cpu_workers} découpe(s) simultanés")
+    else:
+        print(f"🚀 {total} segment(s) à traiter avec {args.workers} worker(s)")
+    started = time.monotonic()
+
+    def report(result):
+        job = result.job
+        label = f"[{job.index}/{total}] {job.url} ({job.start_time} -> {job.end_time})"
+        if result.success:
+            print(f"✅ {label} -> {job.output_file} ({result.elapsed:.1f}s)", flush=True)
+        else:
+            print(f"❌ {label} : {result.error}", flush=True)
+
     try:
-        success = download_segment(url, start_time, end_time, output_file)
-        sys.exit(0 if success else 1)
-    except Exception as e:
+        download = _job_store().download if args.resumable else None
+        results = run_batch(jobs, workers=args.workers, on_result=report, download=download, pipeline=pipeline,
+                            **_download_options(args))
+    except ValueError as e:
         print(f"❌ Erreur: {e}")
         sys.exit(1)
+    finally:
+        if pipeline is not None:
+            pipeline.close()
+
+    failed = [r for r in results if not r.success]
+    print(f"\n📊 Résumé : {total - len(failed)} réussi(s), {len(failed)} échec(s) "
+          f"sur {total} en {time.monotonic() - started:.1f}s")
+    for result in failed:
+        print(f"   ❌ #{result.job.index} {result.job.url} : {result.error}")
+    if pipeline is not None:
+        _print_pipeline_stats(pipeline.stats())
+    sys.exit(1 if failed else 0)
+
+
+def _print_pipeline_stats(stats):
+    """Affiche l'utilisation des étages du pipeline"""
+    for name, label in (("network", "Réseau"), ("cpu", "CPU")):
+        stage = stats[name]
+        print(f"⚙️ {label:<7}: {stage['workers']} worker(s), {stage['utilisation']:.0%} d'occupation, "
+              f"{stage['jobs']} segment(s), {stage['cpu_seconds']:.1f}s CPU")
+    queue = stats["queue"]
+    print(f"⚙️ File   : pic de {queue['peak_pending']} segment(s) / "
+          f"{queue['peak_pending_bytes'] / 2 ** 20:.1f} Mo, "
+          f"{queue['waiting_seconds']:.1f}s d'attente avant découpe, "
+          f"{queue['blocked_seconds']:.1f}s de téléchargements bloqués")
+
+
+def chapters_main(argv):
+    """Sous-commande `chapters` : un fichier par chapitre en un seul téléchargement"""
+    parser = argparse.ArgumentParser(
+        prog="yt-segment chapters",
+        description="Découpe une vidéo en un fichier par chapitre (chapitres YouTube ou liste de repères)"
+    )
+    parser.add_argument("url", help="URL de la vidéo YouTube")
+    parser.add_argument("-o", "--output-dir", default=None, help="Répertoire de sortie (défaut: courant)")
+    parser.add_argument("--cues", default=None,
+                        help="Repères à utiliser à la place des chapitres YouTube (.json, .csv ou .vtt)")
+    _add_common_options(parser)
+    args = parser.parse_args(argv)
+
+    results = split_by_chapters(args.url, args.output_dir, cues=args.cues, **_download_options(args))
+    total = len(results)
+    for index, result in enumerate(results, 1):
+        if result:
+            print(f"✅ [{index}/{total}] {result.output_file} "
+                  f"({result.actual_start:.2f}s -> {result.actual_end:.2f}s)")
+        elif result.output_file:
+            print(f"❌ [{index}/{total}] {result.output_file} : {result.error}")
+        else:
+            print(f"❌ Erreur: {result.error}")
+    sys.exit(0 if all(results) else 1)
+
+
+def resume_main(argv):
+    """Sous-commande `resume` : reprend les jobs enregistrés avec --resumable"""
+    from .jobs import DEFAULT_GC_AGE
+
+    parser = argparse.ArgumentParser(
+        prog="yt-segment resume",
+        description="Reprend les téléchargements interrompus là où ils s'étaient arrêtés"
+    )
+    parser.add_argument("job_ids", nargs="*", type=int, metavar="ID",
+                        help="Jobs à reprendre (défaut: tous les jobs interrompus ou en attente)")
+    parser.add_argument("--list", action="store_true", help="Lister les jobs sans rien reprendre")
+    parser.add_argument("--gc", action="store_true",
+                        help="Supprimer les fichiers intermédiaires des jobs arrêtés depuis plus de --older-than "
+                             "heures (ils repartiront de zéro)")
+    parser.add_argument("--older-than", type=float, default=DEFAULT_GC_AGE / 3600, metavar="HEURES",
+                        help="Âge minimal pour --gc (défaut: %(default)g)")
+    args = parser.parse_args(argv)
+
+    store = _job_store()
+    if args.list or args.gc:
+        if args.gc:
+            stats = store.gc(args.older_than * 3600)
+            print(f"🧹 {stats.jobs} job(s) nettoyé(s), {stats.files} fichier(s) supprimé(s), "
+                  f"{stats.bytes / 2 ** 20:.1f} Mo libérés")
+        if args.list:
+            for job in store.jobs():
+                received = sum(stream.bytes for stream in job.streams)
+                print(f"#{job.id} {job.state:<11} {job.url} ({job.start_time} -> {job.end_time}) -> "
+                      f"{job.output_file}" + (f" [{received / 2 ** 20:.1f} Mo reçus]" if received else ""))
+        sys.exit(0)
+
+    for job_id in args.job_ids:
+        job = store.get(job_id)
+        if job is None or job.state in ("done", "running"):
+            print(f"❌ Erreur: job {job_id} " + ("inconnu" if job is None else f"déjà {job.state}"))
+            sys.exit(1)
+    results = store.resume(args.job_ids or None)
+    if not results:
+        print("✅ Aucun job à reprendre.")
+    for job, result in results:
+        if result:
+            print(f"✅ #{job.id} {job.output_file}")
+        else:
+            print(f"❌ #{job.id} {job.url} : {result.error}")
+    sys.exit(0 if all(result for _, result in results) else 1)
+
+
+def serve_main(argv):
+    """Sous-commande `serve` : API HTTP/JSON locale devant un pool de workers chauds"""
+    from .service import DEFAULT_PORT, JobService, ServiceServer
+
+    parser = argparse.ArgumentParser(
+        prog="yt-segment serve",
+        description="Service HTTP local : file de segments, progression en Server-Sent Events, "
+                    "métriques OpenMetrics sur /metrics"
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Adresse d'écoute (défaut: %(default)s)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Port d'écoute (défaut: %(default)s)")
+    parser.add_argument("-w", "--workers", type=int, default=4,
+                        help="Nombre de téléchargements simultanés (défaut: 4)")
+    parser.add_argument("-o", "--output-dir", default=None,
+                        help="Répertoire des fichiers produits, dont les sorties demandées ne peuvent pas sortir "
+                             "(défaut: courant)")
+    parser.add_argument("--max-queue", type=int, default=None, metavar="N",
+                        help="Jobs en attente au-delà desquels les soumissions sont refusées "
+                             "(503 ; défaut: illimité)")
+    parser.add_argument("--limit-rate", type=parse_rate, default=None, metavar="DÉBIT",
+                        help="Débit total maximal de tous les téléchargements (ex: 2M ; défaut: illimité)")
+    parser.add_argument("--clip-cache", action="store_true",
+                        help="Garder une copie des extraits produits dans le cache pour resservir les mêmes "
+                             "plages (défaut: désactivé)")
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers doit être au moins 1")
+
+    default_limiter().set_max_bandwidth(args.limit_rate)
+    service = JobService(workers=args.workers, output_dir=args.output_dir, max_queue=args.max_queue)
+    if args.clip_cache:
+        service.session.set_clip_cache()
+    try:
+        service.warm()
+        server = ServiceServer(service, args.host, args.port)
+    except (OSError, RuntimeError) as e:
+        print(f"❌ Erreur: {e}")
+        service.close()
+        sys.exit(1)
+    print(f"🚀 Service à l'écoute sur {server.url} ({service.workers} worker(s), "
+          f"sorties dans {service.output_dir})", flush=True)
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+    try:
+        while not stop.wait(1):
+            pass
+    except KeyboardInterrupt:
+        pass
+    print("⏹️ Arrêt du service (jobs en cours annulés)...", flush=True)
+    server.close()
+    service.close()
+
+
+def _job_store():
+    from .jobs import JobStore
+    return JobStore()
+
+
+def _positive(convert):
+    """Type argparse : nombre strictement positif"""
+    def parse(value):
+        number = convert(value)
+        if number <= 0:
+            raise argparse.ArgumentTypeError(f"valeur strictement positive attendue : {value}")
+        return number
+    parse.__name__ = convert.__name__
+    return parse
+
+
+def _add_common_options(parser):
+    """Options de téléchargement partagées par toutes les sous-commandes"""
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Ignorer le cache des métadonnées et forcer une nouvelle extraction")
+    parser.add_argument("--clip-cache", action="store_true",
+                        help="Garder une copie des extraits produits dans le cache (2 Go au plus) pour "
+                             "resservir les mêmes plages sans les retélécharger (défaut: désactivé)")
+    parser.add_argument("--cut-mode", choices=CUT_MODES, default="precise",
+                        help="precise : ré-encode tout le segment ; smart : copie l'intérieur "
+                             "et ne ré-encode que les GOP partiels aux bords ; keyframe : élargit "
+                             "aux images clés sans ré-encodage (défaut: precise)")
+    parser.add_argument("--fast", dest="cut_mode", action="store_const", const="keyframe",
+                        help="Raccourci pour --cut-mode keyframe")
+    parser.add_argument("-j", "--parallel-ranges", type=int, default=1, metavar="N",
+                        help="Connexions simultanées par flux vidéo/audio (défaut: 1)")
+    parser.add_argument("--engine", choices=ENGINES, default="ytdlp",
+                        help="ytdlp : téléchargement par yt-dlp puis fusion ; direct : un seul ffmpeg lit "
+                             "les flux distants et écrit le MP4 final (défaut: ytdlp)")
+    parser.add_argument("--limit-rate", type=parse_rate, default=None, metavar="DÉBIT",
+                        help="Débit total maximal de tous les téléchargements, en octets/s avec suffixe "
+                             "K, M ou G facultatif (ex: 2M ; défaut: illimité)")
+    quality = parser.add_argument_group("qualité", "Plafonds de qualité : les formats les moins coûteux qui les "
+                                                    "respectent remplacent la meilleure vidéo MP4")
+    quality.add_argument("--max-height", type=_positive(int), metavar="N",
+                         help="Définition maximale en lignes (ex: 480)")
+    quality.add_argument("--max-bitrate", type=_positive(int), metavar="KBITS",
+                         help="Débit maximal vidéo + audio, en kbit/s")
+    quality.add_argument("--prefer-codec", choices=VIDEO_CODECS,
+                         help="Codec vidéo préféré à définition égale")
+    quality.add_argument("--target-size", type=_positive(float), metavar="Mo",
+                         help="Taille maximale estimée de chaque téléchargement, en Mo")
+
+
+def _download_options(args):
+    # Le plafond s'applique au limiteur partagé par toutes les sessions du processus
+    default_limiter().set_max_bandwidth(args.limit_rate)
+    if args.clip_cache:
+        get_default_session().set_clip_cache()
+    quality = None
+    if args.max_height or args.max_bitrate or args.prefer_codec or args.target_size:
+        target_size = round(args.target_size * 2 ** 20) if args.target_size else None
+        quality = QualityPolicy(args.max_height, args.max_bitrate, args.prefer_codec, target_size)
+    return {"use_cache": not args.no_cache, "cut_mode": args.cut_mode, "parallel_ranges": args.parallel_ranges,
+            "engine": args.engine, "quality": quality}
+
+
+def _print_stats(stats, file=None):
+    """Affiche le détail des phases d'un téléchargement"""
+    print(f"\n⏱️ {'Phase':<13}{'Début':>8}{'Durée':>9}{'Octets':>12}{'Débit':>13}{'CPU':>8}", file=file)
+    for phase in stats["phases"]:
+        throughput = f"{phase['throughput_bps'] / 1e6:.2f} Mo/s" if phase["throughput_bps"] else "-"
+        print(f"   {phase['phase']:<13}{phase['start']:>7.2f}s{phase['elapsed']:>8.2f}s"
+              f"{phase['bytes'] or '-':>12}{throughput:>13}{phase['cpu_seconds']:>7.2f}s", file=file)
+    print(f"   Total : {stats['total_seconds']:.2f}s, {stats['downloaded_bytes']} octets téléchargés, "
+          f"{stats['cpu_seconds']:.2f}s CPU", file=file)
+
+
+def segment_main(argv):
+    """Commande par défaut : télécharge un segment, ou plusieurs avec --segment"""
+    wants_help = "-h" in argv or "--help" in argv
+    if not wants_help and "--segment" not in argv and len([a for a in argv if not a.startswith("-")]) < 3:
+        _print_usage()
+        sys.exit(1)
+
+    parser = argparse.ArgumentParser(prog="yt-segment", description="Télécharge un segment de vidéo YouTube")
+    parser.add_argument("url", help="URL de la vidéo YouTube")
+    parser.add_argument("start_time", nargs="?", help="Temps de début (MM:SS ou HH:MM:SS)")
+    parser.add_argument("end_time", nargs="?", help="Temps de fin (MM:SS ou HH:MM:SS)")
+    parser.add_argument("output_file", nargs="?", default=None,
+                        help="Fichier de sortie ; - pour écrire sur la sortie standard au fil du multiplexage")
+    parser.add_argument("--segment", action="append", nargs="+", metavar="TEMPS",
+                        help="Segment à télécharger, à la place de <début> <fin> : DÉBUT FIN [SORTIE]. "
+                             "Répétable : la vidéo n'est extraite qu'une fois et les segments proches "
+                             "sont téléchargés ensemble")
+    parser.add_argument("--stats", choices=("text", "json"),
+                        help="Affiche la durée, les octets et le temps CPU de chaque phase ; "
+                             "json : seul le résultat JSON est écrit sur la sortie standard")
+    parser.add_argument("--stream-format", choices=STREAM_CONTAINERS, default="mp4",
+                        help="Conteneur écrit sur la sortie standard avec - : mp4 (fragmenté), mpegts "
+                             "ou matroska (défaut: mp4)")
+    parser.add_argument("--resumable", action="store_true",
+                        help="Enregistrer le téléchargement comme job reprenable après une interruption "
+                             "(voir yt-segment resume)")
+    audio = parser.add_argument_group("audio seul", "Seul le flux audio est lu, sur la plage du segment : m4a "
+                                                    "et opus le copient, wav et flac le décodent (coupe à "
+                                                    "l'échantillon près)")
+    audio.add_argument("--audio-only", nargs="?", const="m4a", choices=AUDIO_CONTAINERS, metavar="FORMAT",
+                       help=f"Extraire l'audio seul ({', '.join(AUDIO_CONTAINERS)} ; défaut: m4a)")
+    audio.add_argument("--sample-rate", type=_positive(int), metavar="HZ",
+                       help="Fréquence d'échantillonnage de la sortie wav ou flac (ex: 16000)")
+    audio.add_argument("--channels", type=_positive(int), metavar="N",
+                       help="Nombre de canaux de la sortie wav ou flac (1 : mono)")
+    _add_common_options(parser)
+    args = parser.parse_args(argv)
+    audio = None
+    if args.audio_only:
+        try:
+            audio = AudioFormat(args.audio_only, args.sample_rate, args.channels)
+        except ValueError as e:
+            parser.error(str(e))
+    elif args.sample_rate or args.channels:
+        parser.error("--sample-rate et --channels s'utilisent avec --audio-only wav ou flac")
+
+    if args.segment:
+        if args.start_time or args.end_time:
+            parser.error("utilisez soit <début> <fin>, soit --segment")
+        if args.resumable:
+            parser.error("--resumable ne s'utilise pas avec --segment")
+        for segment in args.segment:
+            if len(segment) not in (2, 3):
+                parser.error(f"--segment attend DÉBUT FIN [SORTIE] : {' '.join(segment)}")
+            if segment[2:] == ["-"]:
+                parser.error("la sortie standard (-) ne peut recevoir qu'un segment")
+        multi_main(args, audio)
+        return
+    if not args.end_time:
+        _print_usage()
+        sys.exit(1)
+
+    streaming = args.output_file == "-"
+    if streaming and args.cut_mode == "smart":
+        parser.error("le mode smart ne peut pas écrire sur la sortie standard (precise ou keyframe)")
+    if streaming and args.resumable:
+        parser.error("--resumable ne s'utilise pas avec la sortie standard")
+    if streaming and audio is not None:
+        parser.error("--audio-only écrit des fichiers : pas de sortie standard")
+    # Avec -, la sortie standard ne reçoit que le média : messages sur stderr
+    messages = sys.stderr if streaming else sys.stdout
+    output = {"write_to": sys.stdout.buffer, "stream_format": args.stream_format} if streaming else {}
+    download = _job_store().download if args.resumable else download_segment
+    try:
+        result = download(args.url, args.start_time, args.end_time, None if streaming else args.output_file,
+                          verbose=args.stats != "json" and not streaming, audio=audio, **output,
+                          **_download_options(args))
+    except Exception as e:
+        if args.stats == "json":
+            print(json.dumps({"success": False, "error": str(e)}), file=messages)
+        else:
+            print(f"❌ Erreur: {e}", file=messages)
+        sys.exit(1)
+    if args.stats == "json":
+        print(json.dumps(result.to_dict(), ensure_ascii=False), file=messages)
+    else:
+        if streaming:
+            print("✅ Segment écrit sur la sortie standard" if result else f"❌ Erreur: {result.error}",
+                  file=messages)
+        if args.stats == "text" and result.stats:
+            _print_stats(result.stats, file=messages)
+    sys.exit(0 if result else 1)
+
+
+def multi_main(args, audio=None):
+    """Plusieurs segments d'une même vidéo (--segment répété)"""
+    try:
+        results = download_segments(args.url, [tuple(s) for s in args.segment],
+                                    verbose=args.stats != "json", audio=audio, **_download_options(args))
+    except Exception as e:
+        if args.stats == "json":
+            print(json.dumps({"success": False, "error": str(e)}))
+        else:
+            print(f"❌ Erreur: {e}")
+        sys.exit(1)
+    if args.stats == "json":
+        print(json.dumps([result.to_dict() for result in results], ensure_ascii=False))
+    else:
+        for segment, result in zip(args.segment, results):
+            label = f"{segment[0]} -> {segment[1]}"
+            if result:
+                print(f"✅ {label} : {result.output_file}")
+            else:
+                print(f"❌ {label} : {result.error}")
+        if args.stats == "text" and results and results[0].stats:
+            _print_stats(results[0].stats)
+    sys.exit(0 if all(results) else 1)
+
+
+COMMANDS = {
+    "batch": batch_main,
+    "chapters": chapters_main,
+    "resume": resume_main,
+    "serve": serve_main,
+}
+
+
+def main(argv=None):
+    """Fonction principale pour l'interface CLI"""
+    if argv is None:
+        argv = sys.argv[1:]
+
+    if argv and argv[0] in COMMANDS:
+        COMMANDS[argv[0]](argv[1:])
+        return
+
+    segment_main(argv)
 
 
 if __name__ == "__main__":
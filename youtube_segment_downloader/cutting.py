@@ -0,0 +1,460 @@
+"""
+Découpage local avec ffmpeg : analyse des images clés et « smart cut »
+
+Le smart cut copie tels quels tous les GOP complets compris dans le
+segment et ne ré-encode que les GOP partiels du début et de la fin.
+"""
+
+import shutil
+import tempfile
+from collections import namedtuple
+from pathlib import Path
+
+from .cancel import run_process, stream_process
+
+
+CutStats = namedtuple("CutStats", ["reencoded_seconds", "copied_seconds"])
+
+# Encodeur par codec vidéo compatible smart cut. Le démuxeur concat de
+# ffmpeg ne sait passer les paramètres (SPS/PPS) en bande que pour le H.264.
+SMART_CUT_ENCODERS = {
+    "h264": "libx264",
+}
+FALLBACK_ENCODER = "libx264"
+
+# Tolérance sur les timestamps (bien inférieure à la durée d'une image)
+EPSILON = 0.001
+
+
+def get_ffprobe_path(ffmpeg_path):
+    """
+    Retourne le chemin de ffprobe, cherché à côté du binaire ffmpeg
+
+    Args:
+        ffmpeg_path: Chemin du binaire ffmpeg
+
+    Returns:
+        str: Chemin de ffprobe ('ffprobe' si absent du même répertoire)
+    """
+    ffmpeg = Path(ffmpeg_path)
+    name = "ffprobe.exe" if ffmpeg.suffix.lower() == ".exe" else "ffprobe"
+    candidate = ffmpeg.with_name(name)
+    if ffmpeg.parent != Path(".") and candidate.exists():
+        return str(candidate)
+    return shutil.which("ffprobe") or "ffprobe"
+
+
+def _run(cmd, sink=None, on_progress=None):
+    # Avec `sink`, la sortie standard y est recopiée (voir stream_process)
+    result = run_process(cmd) if sink is None else stream_process(cmd, sink, on_progress)
+    if result.returncode != 0:
+        message = (result.stderr or "").strip().splitlines()
+        raise RuntimeError(f"{Path(cmd[0]).name} a échoué : {message[-1] if message else result.returncode}")
+    return result.stdout
+
+
+def _headers_args(headers):
+    if not headers:
+        return []
+    return ["-headers", "".join(f"{key}: {value}\r\n" for key, value in headers.items())]
+
+
+def probe_packets(ffprobe_path, source, intervals=None, headers=None):
+    """
+    Liste les paquets du premier flux vidéo, dans l'ordre de décodage
+
+    Seuls les paquets sont lus (aucun décodage). Sur une URL distante,
+    `intervals` limite la lecture aux zones utiles.
+
+    Args:
+        ffprobe_path: Chemin de ffprobe
+        source: Fichier local ou URL
+        intervals: Liste de (début, fin) en secondes à analyser (tout si None)
+        headers: En-têtes HTTP pour une source distante
+
+    Returns:
+        list[tuple]: (pts en secondes, True si image clé)
+    """
+    cmd = [ffprobe_path, "-v", "error", "-select_streams", "v:0",
+           "-show_entries", "packet=pts_time,flags", "-of", "csv=p=0"]
+    if intervals:
+        cmd += ["-read_intervals", ",".join(f"{max(a, 0):.3f}%{b:.3f}" for a, b in intervals)]
+    cmd += _headers_args(headers) + [source]
+
+    packets = []
+    for line in _run(cmd).splitlines():
+        parts = line.strip().split(",")
+        if len(parts) >= 2 and parts[0] not in ("", "N/A"):
+            packets.append((round(float(parts[0]), 6), parts[1].startswith("K")))
+    return packets
+
+
+def probe_keyframes(ffprobe_path, source, intervals=None, headers=None):
+    """
+    Liste les timestamps des images clés du premier flux vidéo
+
+    Voir probe_packets pour les arguments.
+
+    Returns:
+        list[float]: Timestamps (pts) des images clés, triés
+    """
+    return sorted({pts for pts, key in probe_packets(ffprobe_path, source, intervals, headers) if key})
+
+
+def probe_video_codec(ffprobe_path, source):
+    """
+    Retourne le codec et le format de pixels du premier flux vidéo
+
+    Returns:
+        tuple: (codec_name, pix_fmt), (None, None) si pas de vidéo
+    """
+    out = _run([ffprobe_path, "-v", "error", "-select_streams", "v:0",
+                "-show_entries", "stream=codec_name,pix_fmt", "-of", "csv=p=0", source])
+    line = out.strip().splitlines()[0] if out.strip() else ""
+    parts = line.split(",")
+    if len(parts) < 2:
+        return None, None
+    return parts[0] or None, parts[1] or None
+
+
+# Durée lue autour de chaque borne pour trouver les images clés voisines
+KEYFRAME_SEARCH_WINDOW = 15
+
+
+def snap_range(keyframes, start, end, duration=None):
+    """
+    Élargit [start, end] aux images clés qui l'encadrent
+
+    Args:
+        keyframes: Timestamps des images clés connues autour des bornes
+        start: Début demandé (secondes)
+        end: Fin demandée (secondes)
+        duration: Durée totale, utilisée s'il n'y a pas d'image clé après `end`
+
+    Returns:
+        tuple: (début, fin) alignés
+    """
+    before = [k for k in keyframes if k <= start + EPSILON]
+    after = [k for k in keyframes if k >= end - EPSILON]
+    snapped_start = before[-1] if before else start
+    if after:
+        snapped_end = after[0]
+    else:
+        snapped_end = max(end, duration) if duration else end
+    return max(snapped_start, 0), snapped_end
+
+
+def snap_to_keyframes(ffprobe_path, source, start, end, duration=None, headers=None,
+                      window=KEYFRAME_SEARCH_WINDOW):
+    """
+    Cherche les images clés qui encadrent [start, end] dans `source`
+
+    Seuls les paquets proches des deux bornes sont lus : sur une URL, cela
+    ne représente que quelques requêtes HTTP par plage.
+
+    Returns:
+        tuple: (début, fin) alignés sur des images clés
+    """
+    intervals = [(start - window, start + EPSILON), (end - EPSILON, end + window)]
+    return snap_range(probe_keyframes(ffprobe_path, source, intervals, headers), start, end, duration)
+
+
+def merge_ranges(ranges, gap=0):
+    """
+    Regroupe les plages qui se chevauchent ou qui sont séparées de moins de
+    `gap` secondes
+
+    Args:
+        ranges: Plages (début, fin) en secondes, dans un ordre quelconque
+        gap: Écart maximal entre deux plages regroupées
+
+    Returns:
+        list[tuple]: Groupes (début, fin, indices des plages couvertes),
+        triés par début
+    """
+    groups = []
+    for index in sorted(range(len(ranges)), key=lambda i: ranges[i]):
+        start, end = ranges[index]
+        if groups and start <= groups[-1][1] + gap:
+            group_start, group_end, members = groups[-1]
+            groups[-1] = (group_start, max(group_end, end), members + [index])
+        else:
+            groups.append((start, end, [index]))
+    return groups
+
+
+def plan_smart_cut(keyframes, start, end):
+    """
+    Découpe [start, end] en morceaux à copier ou à ré-encoder
+
+    Args:
+        keyframes: Timestamps des images clés de la source
+        start: Début du segment (secondes)
+        end: Fin du segment (secondes)
+
+    Returns:
+        list[tuple]: Morceaux ("encode" | "copy", début, fin) contigus
+    """
+    inner = [k for k in keyframes if start - EPSILON <= k <= end + EPSILON]
+    if not inner:
+        return [("encode", start, end)]
+
+    first, last = inner[0], inner[-1]
+    plan = []
+    if first - start > EPSILON:
+        plan.append(("encode", start, first))
+    if last - first > EPSILON:
+        plan.append(("copy", first, last))
+    if end - last > EPSILON:
+        plan.append(("encode", last, end))
+    return plan
+
+
+def _encode_part(ffmpeg_path, source, dest, start, end, encoder, pix_fmt):
+    cmd = [ffmpeg_path, "-v", "error", "-y", "-ss", f"{start:.6f}", "-i", source,
+           "-t", f"{end - start:.6f}", "-map", "0:v:0", "-an", "-sn",
+           "-c:v", encoder, "-preset", "fast", "-crf", "18"]
+    if pix_fmt:
+        cmd += ["-pix_fmt", pix_fmt]
+    _run(cmd + ["-f", "mp4", dest])
+
+
+def _packet_count(packets, start, end):
+    """Nombre de paquets, dans l'ordre de décodage, de l'image clé `start` à l'image clé `end`"""
+    def key_index(t):
+        for i, (pts, key) in enumerate(packets):
+            if key and abs(pts - t) <= EPSILON:
+                return i
+        return len(packets)
+    return key_index(end) - key_index(start)
+
+
+def _copy_part(ffmpeg_path, source, dest, start, frames):
+    # On compte les paquets plutôt que d'utiliser -t : avec la copie de flux,
+    # -t filtre sur le dts et déborde sur le GOP suivant en présence de B-frames.
+    _run([ffmpeg_path, "-v", "error", "-y", "-ss", f"{start + EPSILON:.6f}", "-i", source,
+          "-map", "0:v:0", "-an", "-sn", "-c", "copy", "-frames:v", str(frames),
+          "-avoid_negative_ts", "make_zero", "-f", "mp4", dest])
+
+
+def cut_copy(ffmpeg_path, source, output, start, end):
+    """
+    Copie [start, end] de `source` sans ré-encodage (start doit être une image clé)
+
+    Args:
+        ffmpeg_path: Chemin de ffmpeg
+        source: Fichier local
+        output: Fichier MP4 de sortie
+        start: Début (secondes)
+        end: Fin (secondes)
+    """
+    _run([ffmpeg_path, "-v", "error", "-y", "-ss", f"{start + EPSILON:.6f}", "-i", source,
+          "-t", f"{end - start:.6f}", "-map", "0:v:0?", "-map", "0:a:0?", "-c", "copy",
+          "-avoid_negative_ts", "make_zero", "-movflags", "+faststart", "-f", "mp4", str(output)])
+
+
+def cut_precise(ffmpeg_path, source, output, start, end):
+    """
+    Découpe [start, end] de `source` à l'image près en ré-encodant la vidéo
+
+    Voir cut_copy pour les arguments.
+    """
+    _run([ffmpeg_path, "-v", "error", "-y", "-ss", f"{start:.6f}", "-i", source,
+          "-t", f"{end - start:.6f}", "-map", "0:v:0?", "-map", "0:a:0?",
+          "-c:v", FALLBACK_ENCODER, "-preset", "fast", "-crf", "18", "-c:a", "copy",
+          "-movflags", "+faststart", "-f", "mp4", str(output)])
+
+
+def _remote_input(url, headers, start, end):
+    args = []
+    if url.startswith(("http://", "https://")):
+        args += ["-reconnect", "1", "-reconnect_on_network_error", "1", "-reconnect_delay_max", "5"]
+    return args + _headers_args(headers) + ["-ss", f"{start:.6f}", "-t", f"{end - start:.6f}", "-i", url]
+
+
+def _remote_command(ffmpeg_path, streams, start, end, reencode):
+    cmd = [ffmpeg_path, "-v", "error", "-y"]
+    for url, headers in streams:
+        cmd += _remote_input(url, headers, start, end)
+    cmd += ["-map", "0:v:0?", "-map", f"{len(streams) - 1}:a:0?"]
+    if reencode:
+        return cmd + ["-c:v", FALLBACK_ENCODER, "-preset", "fast", "-crf", "18", "-c:a", "copy"]
+    # Sans -avoid_negative_ts : les images avant `start` gardent un
+    # timestamp négatif et 0 reste le début demandé, comme avec yt-dlp
+    return cmd + ["-c", "copy"]
+
+
+def fetch_remote(ffmpeg_path, streams, output, start, end, reencode=False):
+    """
+    Lit [start, end] de flux distants et les multiplexe directement dans
+    `output`, en un seul processus ffmpeg et sans fichier intermédiaire
+
+    Chaque flux est ouvert avec -ss avant -i : ffmpeg se positionne par
+    requête HTTP Range au lieu de lire le début du fichier.
+
+    Args:
+        ffmpeg_path: Chemin de ffmpeg
+        streams: Liste de (URL, en-têtes HTTP ou None) : vidéo puis audio,
+            ou un seul flux combiné
+        output: Fichier MP4 de sortie
+        start: Début (secondes)
+        end: Fin (secondes)
+        reencode: Ré-encoder la vidéo pour couper à l'image près ; sinon
+            copie depuis l'image clé précédant `start`
+    """
+    # Pas de +faststart : il réécrirait tout le fichier une seconde fois
+    _run(_remote_command(ffmpeg_path, streams, start, end, reencode) + ["-f", "mp4", str(output)])
+
+
+def fetch_audio(ffmpeg_path, stream, outputs, start, end, output_args):
+    """
+    Lit [start, end] d'un flux audio distant et en écrit un ou plusieurs
+    extraits, en un seul processus ffmpeg
+
+    Le flux n'est ouvert qu'une fois, avec -ss avant -i (requêtes HTTP
+    Range) ; chaque sortie reçoit ses propres -ss/-t. Décodé, l'audio est
+    coupé à l'échantillon près ; copié, à la trame près.
+
+    Args:
+        ffmpeg_path: Chemin de ffmpeg
+        stream: (URL, en-têtes HTTP ou None) du flux audio
+        outputs: Liste de (fichier, début, fin) en secondes, compris dans
+            [start, end]
+        start: Début de la plage lue (secondes)
+        end: Fin de la plage lue (secondes)
+        output_args: Options de codec et de conteneur de chaque sortie
+            (voir audio.AudioFormat.output_args)
+    """
+    cmd = [ffmpeg_path, "-v", "error", "-y"] + _remote_input(*stream, start, end)
+    for output, output_start, output_end in outputs:
+        cmd += output_args
+        if output_start - start > EPSILON:
+            cmd += ["-ss", f"{output_start - start:.6f}"]
+        cmd += ["-t", f"{output_end - output_start:.6f}", str(output)]
+    _run(cmd)
+
+
+# Conteneurs écrits sans retour en arrière dans la sortie (tube, socket...).
+# Le MP4 est fragmenté : l'en-tête part en premier, puis un fragment à
+# chaque image clé et au moins chaque seconde (le GOP ré-encodé est long).
+STREAM_CONTAINERS = {
+    "mp4": ["-f", "mp4", "-movflags", "frag_keyframe+empty_moov+default_base_moof", "-frag_duration", "1000000"],
+    "mpegts": ["-f", "mpegts"],
+    "matroska": ["-f", "matroska"],
+}
+
+
+def stream_remote(ffmpeg_path, streams, sink, start, end, reencode=False, container="mp4", on_progress=None):
+    """
+    Comme fetch_remote, mais écrit le résultat dans un objet fichier au fur
+    et à mesure du multiplexage, sans rien poser sur le disque
+
+    Args:
+        sink: Objet fichier binaire (méthode write) : sys.stdout.buffer,
+            tube, flux d'envoi vers un stockage objet...
+        container: Conteneur diffusable (voir STREAM_CONTAINERS)
+        on_progress: Fonction appelée avec le nombre d'octets écrits
+        Autres arguments : voir fetch_remote
+
+    Returns:
+        int: Nombre d'octets écrits
+
+    Raises:
+        RuntimeError: Si ffmpeg échoue
+    """
+    cmd = _remote_command(ffmpeg_path, streams, start, end, reencode) + STREAM_CONTAINERS[container]
+    return _run(cmd + ["pipe:1"], sink, on_progress)
+
+
+def smart_cut(ffmpeg_path, ffprobe_path, source, output, start, end, workdir=None):
+    """
+    Découpe [start, end] de `source` vers `output` à l'image près en ne
+    ré-encodant que les GOP partiels aux bords. L'audio est copié.
+
+    Si le codec vidéo ne permet pas de recoller des morceaux copiés et
+    ré-encodés, tout le segment est ré-encodé.
+
+    Args:
+        ffmpeg_path: Chemin de ffmpeg
+        ffprobe_path: Chemin de ffprobe
+        source: Fichier local à découper
+        output: Fichier MP4 de sortie
+        start: Début du segment dans la source (secondes)
+        end: Fin du segment dans la source (secondes)
+        workdir: Répertoire des fichiers intermédiaires (temporaire si None)
+
+    Returns:
+        CutStats: Secondes ré-encodées et secondes copiées
+    """
+    codec, pix_fmt = probe_video_codec(ffprobe_path, source)
+    if codec in SMART_CUT_ENCODERS:
+        encoder = SMART_CUT_ENCODERS[codec]
+        packets = probe_packets(ffprobe_path, source)
+        plan = plan_smart_cut(sorted({pts for pts, key in packets if key}), start, end)
+    else:
+        encoder = FALLBACK_ENCODER
+        plan = [("encode", start, end)]
+
+    own_workdir = workdir is None
+    workdir = Path(tempfile.mkdtemp(prefix="smartcut-") if own_workdir else workdir)
+    try:
+        parts = []
+        for i, (kind, a, b) in enumerate(plan):
+            part = workdir / f"part{i}.mp4"
+            if kind == "copy":
+                _copy_part(ffmpeg_path, source, str(part), a, _packet_count(packets, a, b))
+            else:
+                _encode_part(ffmpeg_path, source, str(part), a, b, encoder, pix_fmt)
+            parts.append(part)
+
+        concat_list = workdir / "parts.txt"
+        concat_list.write_text("".join(f"file '{p.resolve().as_posix()}'\n" for p in parts), encoding="utf-8")
+        _run([ffmpeg_path, "-v", "error", "-y",
+              "-f", "concat", "-safe", "0", "-i", str(concat_list),
+              "-ss", f"{start:.6f}", "-t", f"{end - start:.6f}", "-i", source,
+              "-map", "0:v:0", "-map", "1:a?", "-c", "copy",
+              "-movflags", "+faststart", "-f", "mp4", str(output)])
+    finally:
+        if own_workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    reencoded = sum(b - a for kind, a, b in plan if kind == "encode")
+    copied = sum(b - a for kind, a, b in plan if kind == "copy")
+    return CutStats(round(reencoded, 3), round(copied, 3))
+
+
+def split_segments(ffmpeg_path, source, boundaries, directory, reencode=False):
+    """
+    Découpe `source` en morceaux consécutifs en un seul passage de ffmpeg
+    (muxeur segment)
+
+    Sans ré-encodage, chaque coupure se fait sur la première image clé à
+    partir de la borne : les bornes doivent donc être des images clés. Avec
+    ré-encodage, des images clés sont forcées aux bornes.
+
+    Args:
+        ffmpeg_path: Chemin de ffmpeg
+        source: Fichier local
+        boundaries: Bornes des coupures (secondes, timeline de `source`, triées)
+        directory: Répertoire des morceaux (part0000.mp4, part0001.mp4...)
+        reencode: Ré-encoder la vidéo pour couper à l'image près
+
+    Returns:
+        list[Path]: Morceaux, du début à la fin de `source`
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    cmd = [ffmpeg_path, "-v", "error", "-y", "-i", str(source), "-map", "0:v:0?", "-map", "0:a:0?"]
+    if reencode:
+        cmd += ["-c:v", FALLBACK_ENCODER, "-preset", "fast", "-crf", "18", "-c:a", "copy"]
+        if boundaries:
+            cmd += ["-force_key_frames", ",".join(f"{b:.6f}" for b in boundaries)]
+    else:
+        cmd += ["-c", "copy"]
+    cmd += ["-f", "segment", "-segment_format", "mp4", "-segment_format_options", "movflags=+faststart",
+            "-reset_timestamps", "1", "-avoid_negative_ts", "make_zero"]
+    if boundaries:
+        # Légèrement avant la borne : l'image clé visée ne doit pas être manquée par arrondi
+        cmd += ["-segment_times", ",".join(f"{max(b - EPSILON, 0):.6f}" for b in boundaries)]
+    _run(cmd + [str(directory / "part%04d.mp4")])
+    return sorted(directory.glob("part*.mp4"))
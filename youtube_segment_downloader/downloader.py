@@ -2,18 +2,49 @@
 Module principal pour le téléchargement de segments YouTube
 """
 
-import subprocess
+import copy
+import glob
+import importlib
 import re
+import shutil
+import tempfile
+import threading
+from collections import namedtuple
+from contextlib import contextmanager
 from pathlib import Path
-import yt_dlp
-import sys
+from urllib.parse import parse_qs, urlsplit
+from .cache import Clip, ClipCache, InfoCache
+from .chapters import chapter_filename, chapters_from_info, load_cues, plan_split, resolve_chapters
+from .cancel import cancel_scope, current_token
+from .events import ChildCpuMixin, Recorder, current_recorder, recording
+from .manifest import parse_timestamp
+from .cutting import (EPSILON, FALLBACK_ENCODER, STREAM_CONTAINERS, cut_copy, cut_precise, fetch_audio, fetch_remote,
+                      merge_ranges, probe_keyframes, smart_cut, snap_range, snap_to_keyframes, split_segments,
+                      stream_remote)
+from .ffmpeg import find_ffmpeg, probe_ffmpeg
+from .jobs import current_job
+from .singleflight import SingleFlight
+from .throttle import Backoff, default_limiter
 import os
 
 
+# yt-dlp (plusieurs centaines de ms d'import) n'est chargé qu'au premier
+# téléchargement : l'aide de la CLI, l'interface graphique et les fonctions
+# utilitaires s'en passent. Voir _load_yt_dlp.
+yt_dlp = None
+_yt_dlp_lock = threading.Lock()
+
+
+# Hôtes (sans "www.") dont les URLs portent l'ID dans ?v= ou dans le chemin
+_YOUTUBE_HOSTS = ("youtube.com", "m.youtube.com", "music.youtube.com", "youtube-nocookie.com")
+_VIDEO_ID_RE = re.compile(r"[\w-]{11}$")
+
+
 def time_to_seconds(time_str):
     """
     Convertit un format de temps en secondes
-    Formats acceptés: "MM:SS" ou "HH:MM:SS"
+    Formats acceptés: "MM:SS" ou "HH:MM:SS" (secondes entières, voir
+    manifest.parse_timestamp pour les décimales)
     
     Args:
         time_str: Chaîne de temps au format MM:SS ou HH:MM:SS
@@ -25,14 +56,9 @@ def time_to_seconds(time_str):
         ValueError: Si le format de temps est invalide
     """
     parts = time_str.strip().split(':')
-    if len(parts) == 2:  # MM:SS
-        minutes, seconds = map(int, parts)
-        return minutes * 60 + seconds
-    elif len(parts) == 3:  # HH:MM:SS
-        hours, minutes, seconds = map(int, parts)
-        return hours * 3600 + minutes * 60 + seconds
-    else:
+    if len(parts) not in (2, 3) or not all(part.strip().isdigit() for part in parts):
         raise ValueError(f"Format de temps invalide: {time_str}")
+    return int(parse_timestamp(time_str))
 
 
 def validate_url(url):
@@ -48,46 +74,1669 @@ def validate_url(url):
     Raises:
         ValueError: Si l'URL n'est pas une URL YouTube valide
     """
-    youtube_pattern = r'(https?://)?(www\.)?(youtube\.com/watch\?v=|youtu\.be/)[\w-]+'
-    if not re.match(youtube_pattern, url):
-        raise ValueError("URL YouTube invalide")
+    extract_video_id(url)
     return url
 
 
+def extract_video_id(url):
+    """
+    Extrait l'ID de la vidéo d'une URL YouTube
+
+    Toutes les formes d'URL d'une même vidéo donnent le même ID : il sert
+    de clé aux caches et au regroupement des demandes identiques.
+
+    Args:
+        url: URL YouTube : youtube.com/watch?v=... (paramètre v à n'importe
+            quelle position, sous-domaines www., m. et music.),
+            youtu.be/..., youtube.com/shorts/..., /embed/..., /live/...,
+            avec ou sans schéma
+
+    Returns:
+        str: ID de la vidéo (11 caractères)
+
+    Raises:
+        ValueError: Si l'URL ne contient pas d'ID de vidéo
+    """
+    parts = urlsplit(url.strip() if "://" in url else "https://" + url.strip())
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    candidate = ""
+    if parts.scheme in ("http", "https"):
+        if host == "youtu.be":
+            candidate = parts.path.strip("/")
+        elif host in _YOUTUBE_HOSTS:
+            if parts.path.rstrip("/") == "/watch":
+                candidate = (parse_qs(parts.query).get("v") or [""])[0]
+            else:
+                match = re.match(r"/(?:shorts|embed|live|v)/([^/]+)/?$", parts.path)
+                candidate = match.group(1) if match else ""
+    if not _VIDEO_ID_RE.match(candidate):
+        raise ValueError("URL YouTube invalide")
+    return candidate
+
+
 def get_ffmpeg_path():
     """
     Retourne le chemin vers le binaire ffmpeg.
-    Cherche d'abord dans les fichiers packagés par PyInstaller (_MEIPASS), 
-    puis dans les emplacements système courants,
-    enfin se replie sur la commande 'ffmpeg'.
-    """
-    if hasattr(sys, '_MEIPASS'):
-        # Mode PyInstaller
-        bundle_dir = sys._MEIPASS
-        for name in ['ffmpeg', 'ffmpeg.exe']:
-            p = Path(bundle_dir) / name
-            if p.exists():
-                return str(p)
-    
-    # Chemins système courants
-    common_paths = [
-        '/usr/bin/ffmpeg',
-        '/usr/local/bin/ffmpeg',
-        'C:\\ffmpeg\\bin\\ffmpeg.exe',
-        os.path.join(os.path.expanduser('~'), 'bin', 'ffmpeg')
-    ]
-    for path in common_paths:
-        if Path(path).exists():
-            return path
-            
-    # Mode normal ou si non trouvé dans le pack
-    return 'ffmpeg'
-
-
-def download_segment(url, start_time, end_time, output_file=None, verbose=True, logger=None, progress_hook=None):
+
+    Voir ffmpeg.find_ffmpeg pour l'ordre de recherche ($FFMPEG_BINARY, pack
+    PyInstaller, $PATH, emplacements courants) ; se replie sur la commande
+    'ffmpeg' si aucun binaire n'est trouvé.
+    """
+    try:
+        return find_ffmpeg()
+    except RuntimeError:
+        return 'ffmpeg'
+
+
+# Modes de découpage :
+#   precise : yt-dlp ré-encode tout le segment (force_keyframes_at_cuts)
+#   smart   : copie des GOP complets, ré-encodage des seuls GOP partiels aux bords
+#   keyframe: bornes élargies aux images clés, copie pure sans ré-encodage
+CUT_MODES = ("precise", "smart", "keyframe")
+# Le découpage par chapitres se fait en un seul passage de ffmpeg : copie
+# coupée aux images clés, ou ré-encodage unique avec images clés forcées
+SPLIT_MODES = ("precise", "keyframe")
+
+# Moteurs de téléchargement :
+#   ytdlp : download_sections de yt-dlp (fichier temporaire, post-traitements)
+#   direct: un seul ffmpeg lit les flux distants (-ss avant -i) et écrit la
+#           sortie, sans fichier intermédiaire ; repli sur ytdlp si un flux
+#           n'est pas adressable par plage (HLS, DASH...)
+ENGINES = ("ytdlp", "direct")
+
+DEFAULT_FORMAT = 'bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]/best'
+
+# Nouvelles tentatives de yt-dlp (voir throttle.Backoff)
+_BACKOFF = Backoff()
+
+# Écart (secondes) en dessous duquel deux segments d'une même vidéo sont
+# téléchargés d'un seul tenant : relire l'intervalle coûte moins qu'un
+# nouvel accès (ffmpeg, requêtes HTTP, recherche de l'image clé)
+MERGE_GAP = 10
+
+
+class SegmentResult:
+    """
+    Résultat d'un téléchargement de segment.
+
+    S'évalue comme un booléen (succès ou échec), comme l'ancien retour de
+    download_segment.
+    """
+
+    def __init__(self, success, output_file=None, error=None, cut_mode=None,
+                 reencoded_seconds=None, copied_seconds=None, actual_start=None, actual_end=None, cache=None,
+                 cancelled=False, stats=None, shared=False, format_id=None, estimated_bytes=None):
+        self.success = success
+        self.output_file = output_file
+        self.error = error
+        self.cut_mode = cut_mode
+        # Bornes réellement couvertes par le fichier (secondes)
+        self.actual_start = actual_start
+        self.actual_end = actual_end
+        # Cache d'extraits : "hit", "partial", "miss" (None si désactivé)
+        self.cache = cache
+        self.cancelled = cancelled
+        # Résultat d'un téléchargement identique simultané (voir SegmentDownloader.download)
+        self.shared = shared
+        # Secondes de vidéo ré-encodées / copiées telles quelles
+        self.reencoded_seconds = reencoded_seconds
+        self.copied_seconds = copied_seconds
+        # Résumé des phases (voir events.Recorder.summary)
+        self.stats = stats
+        # Formats retenus par la politique de qualité ("137+140") et octets
+        # estimés du téléchargement (None sans politique, voir quality)
+        self.format_id = format_id
+        self.estimated_bytes = estimated_bytes
+
+    def __bool__(self):
+        return self.success
+
+    def to_dict(self):
+        """Représentation sérialisable en JSON (utilisée par --stats json)"""
+        return dict(vars(self))
+
+    def __repr__(self):
+        fields = ", ".join(f"{k}={v!r}" for k, v in vars(self).items() if v is not None)
+        return f"SegmentResult({fields})"
+
+
+def _cancellable_popen(popen_class):
+    """Sous-classe du Popen de yt-dlp, créée au chargement de yt-dlp"""
+
+    class _CancellablePopen(ChildCpuMixin, popen_class):
+        """
+        Popen de yt-dlp qui s'inscrit auprès du CancelToken actif du thread.
+
+        yt-dlp attend ses processus ffmpeg sans point d'interruption : sans
+        cela, annuler laisserait ffmpeg tourner jusqu'au bout. Hors d'un
+        cancel_scope, le comportement est inchangé. Le temps CPU de ffmpeg
+        est imputé au Recorder actif.
+        """
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            token = current_token()
+            if token is not None:
+                token.register(self.kill)
+
+    return _CancellablePopen
+
+
+def _load_yt_dlp():
+    """
+    Importe yt-dlp au premier appel (thread-safe)
+
+    Returns:
+        module: Le module yt_dlp, avec le Popen annulable installé
+    """
+    global yt_dlp
+    with _yt_dlp_lock:
+        if yt_dlp is None:
+            module = importlib.import_module("yt_dlp")
+            popen = _cancellable_popen(module.utils.Popen)
+            # Téléchargement par plages (FFmpegFD) et post-traitements ffmpeg
+            importlib.import_module("yt_dlp.downloader.external").Popen = popen
+            importlib.import_module("yt_dlp.postprocessor.ffmpeg").Popen = popen
+            yt_dlp = module
+        return yt_dlp
+
+
+@contextmanager
+def _ffmpeg_location(ffmpeg_path):
+    """
+    Désigne ffmpeg à yt-dlp pour le thread courant
+
+    FFmpegFD.available() ignore l'option ffmpeg_location et ne regarde que
+    cette variable de contexte (positionnée par la CLI de yt-dlp) : sans
+    elle, un ffmpeg hors du PATH ferait refuser le téléchargement partiel.
+    """
+    location = importlib.import_module("yt_dlp.postprocessor.ffmpeg").FFmpegPostProcessor._ffmpeg_location
+    reset = location.set(ffmpeg_path)
+    try:
+        yield
+    finally:
+        location.reset(reset)
+
+
+def _file_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def _stream_headers(ydl, fmt):
+    """En-têtes HTTP d'un format, cookies du domaine du flux compris"""
+    headers = dict(fmt.get('http_headers') or {})
+    # yt-dlp ne transmet à ffmpeg que les cookies du domaine d'origine
+    cookies = ydl.cookiejar.get_cookies_for_url(fmt['url'])
+    if cookies:
+        headers['Cookie'] = '; '.join(f'{c.name}={c.value}' for c in cookies)
+    return headers
+
+
+def _default_output(start_time, end_time, audio=None):
+    extension = audio.extension if audio is not None else "mp4"
+    return f"segment_{start_time.replace(':', '-')}_{end_time.replace(':', '-')}.{extension}"
+
+
+def _remove_partial_files(output_file, keep_output):
+    """Supprime les fichiers temporaires de yt-dlp (.part, .ytdl) et la sortie incomplète"""
+    output = Path(output_file)
+    for path in output.parent.glob(glob.escape(output.name) + ".*"):
+        if path.name.endswith((".part", ".ytdl")) or ".part-Frag" in path.name:
+            path.unlink()
+    if not keep_output and output.exists():
+        output.unlink()
+
+
+def _copy_output(source, target):
+    """
+    Copie `source` vers `target`, remplacé d'un bloc
+
+    Pas de lien physique : ffmpeg -y et shutil.copyfile réécrivent une
+    sortie existante sur place, et un téléchargement ultérieur vers l'un
+    des deux chemins modifierait l'autre fichier.
+    """
+    if os.path.abspath(source) == os.path.abspath(target):
+        return
+    tmp = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        shutil.copyfile(source, tmp)
+        os.replace(tmp, target)
+    except OSError:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def _audio_stats(result, audio):
+    """Secondes décodées (wav, flac) ou copiées (m4a, opus) d'un extrait audio"""
+    seconds = round(result.actual_end - result.actual_start, 3)
+    result.reencoded_seconds, result.copied_seconds = (0, seconds) if audio.copy else (seconds, 0)
+
+
+def _record_selection(results, recorder):
+    """Reporte sur les résultats les formats choisis par la politique de qualité (phase "format")"""
+    selected = next((p.data for p in reversed(recorder.phases) if p.phase == "format" and p.data), None)
+    if selected is None:
+        return
+    for result in results:
+        result.format_id = selected["format_id"]
+        result.estimated_bytes = selected["estimated_bytes"]
+
+
+# Segment téléchargé par le premier étage du pipeline, en attente de découpe
+# (voir SegmentDownloader._fetch_stage) ; clip vaut None en cas d'échec
+_Staged = namedtuple("_Staged", ["result", "clip", "start", "end", "workdir", "preexisting", "video_id",
+                                 "format_spec"])
+
+
+class _PooledYoutubeDL:
+    """Instance YoutubeDL gardée au chaud, avec un hook de progression remplaçable"""
+    def __init__(self, options):
+        self.progress_hook = None
+        # Sans extracteurs : charger les ~1800 extracteurs de yt-dlp coûte
+        # plus cher que l'import lui-même, seul celui de YouTube est utile
+        self.ydl = _load_yt_dlp().YoutubeDL(options, auto_init=False)
+        self._all_extractors = False
+        # Sélecteur de la session, mis de côté pendant un select_format
+        self._session_selector = None
+        # Un seul hook permanent : yt-dlp copie la liste des hooks à chaque
+        # téléchargement, on redirige donc vers le hook de l'appel en cours.
+        self.ydl.add_progress_hook(self._dispatch_progress)
+
+    def _dispatch_progress(self, d):
+        if self.progress_hook:
+            self.progress_hook(d)
+
+    def select_format(self, format_id):
+        """Impose les formats `format_id` ("137+140") jusqu'à restore_format"""
+        if self._session_selector is None:
+            self._session_selector = self.ydl.format_selector
+        self.ydl.format_selector = self.ydl.build_format_selector(format_id)
+
+    def restore_format(self):
+        if self._session_selector is not None:
+            self.ydl.format_selector = self._session_selector
+            self._session_selector = None
+
+    def extract_info(self, url):
+        """ydl.extract_info(url, download=False) avec le seul extracteur nécessaire"""
+        if self.ydl.get_info_extractor('Youtube').suitable(url):
+            return self.ydl.extract_info(url, download=False, ie_key='Youtube')
+        if not self._all_extractors:
+            self.ydl.add_default_info_extractors()
+            self._all_extractors = True
+        return self.ydl.extract_info(url, download=False)
+
+    def close(self):
+        self.ydl.close()
+
+
+class SegmentDownloader:
+    """
+    Session de téléchargement réutilisable et thread-safe.
+
+    Garde en mémoire le chemin ffmpeg vérifié une seule fois, les options
+    communes de yt-dlp et un pool d'instances YoutubeDL (avec leurs
+    connexions HTTP et leurs cookies) réutilisées d'un appel à l'autre.
+
+    Exemple:
+        with SegmentDownloader(max_instances=4) as session:
+            session.download(url, "0:10", "0:40", "extrait.mp4")
+    """
+
+    def __init__(self, ffmpeg_path=None, max_instances=4, ydl_options=None, cache=True, clip_cache=False,
+                 rate_limiter=None, single_flight=True):
+        """
+        Args:
+            ffmpeg_path: Chemin du binaire ffmpeg (détecté automatiquement si None)
+            max_instances: Nombre maximal d'instances YoutubeDL (et donc de
+                téléchargements simultanés)
+            ydl_options: Options yt-dlp supplémentaires partagées par tous les appels
+            cache: InfoCache des métadonnées (True, par défaut : cache sur
+                disque par défaut ; False : désactivé)
+            clip_cache: ClipCache des extraits déjà téléchargés (True : cache
+                sur disque par défaut ; False, par défaut : désactivé, chaque
+                extrait n'est alors écrit qu'à sa sortie)
+            rate_limiter: throttle.RateLimiter des requêtes passant par le
+                proxy local et des extractions (None : limiteur partagé par
+                tout le processus, False : désactivé)
+            single_flight: Regrouper les demandes identiques simultanées
+                (même vidéo, mêmes bornes, même format, même mode de
+                découpage) en un seul téléchargement, voir download
+        """
+        if max_instances < 1:
+            raise ValueError("max_instances doit être au moins 1")
+        self.max_instances = max_instances
+        self.ydl_options = dict(ydl_options or {})
+        # None : la valeur par défaut de chaque cache, comme pour rate_limiter
+        self.cache = InfoCache() if cache is True or cache is None else cache or None
+        self.clip_cache = ClipCache() if clip_cache is True else clip_cache or None
+        self.rate_limiter = default_limiter() if rate_limiter is None else rate_limiter or None
+        self._ffmpeg_path = ffmpeg_path
+        self._ffmpeg = None
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._idle = []
+        self._created = 0
+        self._closed = False
+        self._proxy = None
+        self._flights = SingleFlight() if single_flight else None
+
+    @property
+    def ffmpeg(self):
+        """
+        Capacités du ffmpeg de la session (FFmpegInfo), détectées une seule
+        fois et mises en cache sur disque d'un lancement à l'autre
+
+        Raises:
+            RuntimeError: Si ffmpeg est introuvable ou inutilisable
+        """
+        with self._lock:
+            if self._ffmpeg is None:
+                self._ffmpeg = probe_ffmpeg(self._ffmpeg_path)
+            return self._ffmpeg
+
+    @property
+    def ffmpeg_path(self):
+        """Chemin absolu de ffmpeg (voir ffmpeg)"""
+        return self.ffmpeg.path
+
+    @property
+    def range_proxy(self):
+        """Proxy local de téléchargement parallèle, démarré au premier usage"""
+        from .ranges import RangeProxy
+
+        with self._lock:
+            if self._proxy is None:
+                self._proxy = RangeProxy(limiter=self.rate_limiter)
+            return self._proxy
+
+    def _proxy_connections(self, parallel_ranges):
+        """
+        Connexions par flux à ouvrir via le proxy local
+
+        Returns:
+            int: 0 si ffmpeg / yt-dlp peuvent lire les flux directement
+        """
+        if parallel_ranges > 1:
+            return parallel_ranges
+        # Le plafond de débit global et la copie des flux d'un job (reprise
+        # après interruption) ne voient que les flux qui passent par le proxy
+        if current_job() is not None:
+            return 1
+        return 1 if self.rate_limiter is not None and self.rate_limiter.max_bandwidth else 0
+
+    @staticmethod
+    def _spool(fmt):
+        """Copie locale du flux si un job reprenable est en cours (voir jobs.JobStore)"""
+        job = current_job()
+        return job.spool(fmt.get('format_id')) if job is not None else None
+
+    @staticmethod
+    def _workdir(parent):
+        """Répertoire de travail temporaire, noté par le job en cours pour le nettoyage"""
+        workdir = Path(tempfile.mkdtemp(prefix=".yt-segment-", dir=parent))
+        job = current_job()
+        if job is not None:
+            job.track(workdir)
+        return workdir
+
+    def _proxied(self, ydl, info, connections):
+        """
+        Copie de l'info dict dont les formats HTTP passent par le proxy local
+
+        Returns:
+            tuple: (info dict modifié, liste de (format_id, URL locale) à désenregistrer)
+        """
+        info = copy.deepcopy(info)
+        local_urls = []
+        for fmt in info.get('formats') or [info]:
+            if fmt.get('protocol') in ('http', 'https') and fmt.get('url'):
+                fmt['url'] = self.range_proxy.register(fmt['url'], _stream_headers(ydl, fmt), connections,
+                                                       self._spool(fmt))
+                local_urls.append((fmt.get('format_id'), fmt['url']))
+        return info, local_urls
+
+    def _release_proxied(self, local_urls):
+        """Désenregistre les URLs du proxy et note leurs statistiques dans la phase"""
+        streams = {}
+        for format_id, local_url in local_urls:
+            streams[format_id] = self.range_proxy.unregister(local_url)
+        recorder = current_recorder()
+        if recorder is not None:
+            recorder.annotate(streams=streams)
+
+    def _cut_from_clip(self, clip, status, output_file, start_seconds, end_seconds, cut_mode, result,
+                       keyframes=None):
+        """
+        Produit le segment à partir d'un extrait local, sans accès réseau
+
+        Args:
+            keyframes: Images clés de l'extrait, si déjà connues
+        """
+        if status == "hit":
+            shutil.copyfile(clip.path, output_file)
+            result.actual_start, result.actual_end = clip.actual_start, clip.actual_end
+            result.reencoded_seconds, result.copied_seconds = 0, round(clip.actual_end - clip.actual_start, 3)
+            return
+
+        # La première image clé de l'extrait correspond à clip.actual_start
+        # (son pts peut être légèrement négatif à cause des B-frames)
+        ffprobe_path = self.ffmpeg.ffprobe
+        if keyframes is None:
+            keyframes = probe_keyframes(ffprobe_path, str(clip.path))
+        offset = clip.actual_start - (keyframes[0] if keyframes else 0)
+        start, end = start_seconds - offset, end_seconds - offset
+        if cut_mode == "smart":
+            stats = smart_cut(self.ffmpeg_path, ffprobe_path, str(clip.path), output_file, start, end)
+            result.reencoded_seconds, result.copied_seconds = stats
+        elif cut_mode == "keyframe":
+            start, end = snap_range(keyframes, start, end, duration=clip.actual_end - offset)
+            cut_copy(self.ffmpeg_path, str(clip.path), output_file, start, end)
+            result.actual_start, result.actual_end = offset + start, offset + end
+            result.reencoded_seconds, result.copied_seconds = 0, round(end - start, 3)
+        else:
+            cut_precise(self.ffmpeg_path, str(clip.path), output_file, start, end)
+            result.reencoded_seconds, result.copied_seconds = end - start, 0
+
+    def _check_ffmpeg(self, cut_mode):
+        """
+        Vérifie que ffmpeg permet le mode de découpage demandé
+
+        Raises:
+            RuntimeError: Si ffmpeg est absent ou s'il lui manque l'encodeur
+                ou le muxeur nécessaire
+        """
+        ffmpeg = self.ffmpeg
+        if not ffmpeg.can_copy_to("mp4"):
+            raise RuntimeError(f"FFmpeg {ffmpeg.version} ne sait pas écrire de MP4 ({ffmpeg.path})")
+        if cut_mode == "smart" and not ffmpeg.has_encoder(FALLBACK_ENCODER):
+            raise RuntimeError(f"Le mode smart demande l'encodeur {FALLBACK_ENCODER}, absent de "
+                               f"FFmpeg {ffmpeg.version} : utilisez le mode keyframe ou precise")
+
+    def _check_audio(self, audio):
+        """
+        Vérifie que ffmpeg sait écrire la sortie audio demandée
+
+        Raises:
+            RuntimeError: Si le muxeur ou l'encodeur nécessaire manque
+        """
+        ffmpeg = self.ffmpeg
+        if not ffmpeg.can_copy_to(audio.muxer):
+            raise RuntimeError(f"FFmpeg {ffmpeg.version} n'a pas de muxeur {audio.muxer} ({ffmpeg.path})")
+        if audio.encoder and not ffmpeg.has_encoder(audio.encoder):
+            raise RuntimeError(f"La sortie {audio.container} demande l'encodeur {audio.encoder}, absent de "
+                               f"FFmpeg {ffmpeg.version}")
+
+    def _format_spec(self, quality, audio=None):
+        """Sélecteur de format d'un appel (clé du cache d'extraits et des demandes identiques)"""
+        if audio is not None:
+            return audio.key if quality is None else f"{audio.key};{quality.key}"
+        return quality.key if quality is not None else self.ydl_options.get('format', DEFAULT_FORMAT)
+
+    def _base_options(self):
+        options = {
+            'format': DEFAULT_FORMAT,
+            'merge_output_format': 'mp4',
+            'ffmpeg_location': self.ffmpeg_path,
+            'outtmpl': 'segment.mp4',
+            'retries': 10,
+            'fragment_retries': 10,
+            # Délais exponentiels avec gigue : des tentatives immédiates
+            # aggravent un 429 ou un flux bridé
+            'retry_sleep_functions': {'http': _BACKOFF, 'fragment': _BACKOFF, 'extractor': _BACKOFF},
+        }
+        options.update(self.ydl_options)
+        return options
+
+    @contextmanager
+    def _checkout(self):
+        """Emprunte une instance YoutubeDL au pool (en crée une si nécessaire)"""
+        with self._available:
+            while True:
+                if self._closed:
+                    raise RuntimeError("La session de téléchargement est fermée")
+                if self._idle:
+                    pooled = self._idle.pop()
+                    break
+                if self._created < self.max_instances:
+                    self._created += 1
+                    pooled = None
+                    break
+                self._available.wait()
+
+        if pooled is None:
+            try:
+                pooled = _PooledYoutubeDL(self._base_options())
+            except BaseException:
+                with self._available:
+                    self._created -= 1
+                    self._available.notify()
+                raise
+
+        try:
+            yield pooled
+        finally:
+            pooled.progress_hook = None
+            pooled.ydl.params['logger'] = None
+            pooled.restore_format()
+            with self._available:
+                if self._closed:
+                    pooled.close()
+                else:
+                    self._idle.append(pooled)
+                self._available.notify()
+
+    def _extract_info(self, pooled, url, use_cache):
+        """
+        Retourne l'info dict de la vidéo, depuis le cache si possible.
+
+        Returns:
+            tuple: (info dict nettoyé, True si servi par le cache)
+        """
+        video_id = extract_video_id(url) if use_cache and self.cache else None
+        if video_id:
+            info = self.cache.get(video_id)
+            if info is not None:
+                return info, True
+        info = pooled.ydl.sanitize_info(self._limited_extract(pooled, url), remove_private_keys=True)
+        if video_id:
+            self.cache.put(video_id, info)
+        return info, False
+
+    def _limited_extract(self, pooled, url):
+        """Extraction cadencée par le limiteur de requêtes (429 compris)"""
+        if self.rate_limiter is None:
+            return pooled.extract_info(url)
+        with self.rate_limiter.request(url) as attempt:
+            try:
+                info = pooled.extract_info(url)
+            except yt_dlp.utils.DownloadError as e:
+                match = re.search(r"HTTP Error (\d{3})", str(e))
+                attempt.status = int(match.group(1)) if match else None
+                raise
+            attempt.status = 200
+            return info
+
+    @staticmethod
+    def _select_formats(ydl, info):
+        """
+        Résout une fois les flux choisis par le sélecteur de format
+
+        Returns:
+            list[dict]: Formats sélectionnés, flux vidéo en premier
+        """
+        selected = ydl.process_ie_result(copy.deepcopy(info), download=False)
+        formats = selected.get('requested_formats') or [selected]
+        return sorted(formats, key=lambda f: f.get('vcodec') == 'none')
+
+    def _addressable(self, fmt):
+        """Indique si ffmpeg peut lire le flux par requêtes HTTP Range"""
+        return fmt.get('protocol') in ('http', 'https') and bool(fmt.get('url')) and self.ffmpeg.can_read(fmt['url'])
+
+    def _snap_to_keyframes(self, formats, info, start_seconds, end_seconds, logger):
+        """
+        Élargit [start_seconds, end_seconds] aux images clés du flux vidéo
+        sélectionné, en ne lisant que les alentours des deux bornes.
+
+        Args:
+            formats: Formats sélectionnés (voir _select_formats)
+
+        Returns:
+            tuple: (début, fin) alignés sur des images clés
+        """
+        video = next((f for f in formats if f.get('vcodec') != 'none'), None)
+        if video is None:
+            return start_seconds, end_seconds
+        if not self._addressable(video):
+            if logger:
+                logger.warning("Format non adressable par plage : bornes conservées telles quelles")
+            return start_seconds, end_seconds
+        return snap_to_keyframes(self.ffmpeg.ffprobe, video['url'],
+                                 start_seconds, end_seconds,
+                                 duration=info.get('duration'), headers=video.get('http_headers'))
+
+    def _process(self, ydl, info, parallel_ranges):
+        """Lance le téléchargement d'un info dict, via le proxy si nécessaire"""
+        connections = self._proxy_connections(parallel_ranges)
+        if not connections:
+            ydl.process_ie_result(info, download=True)
+            return
+        info, local_urls = self._proxied(ydl, info, connections)
+        try:
+            ydl.process_ie_result(info, download=True)
+        finally:
+            self._release_proxied(local_urls)
+
+    def _process_direct(self, ydl, formats, target, section, reencode, parallel_ranges, progress_hook,
+                        stream_format=None, audio=None):
+        """
+        Télécharge la section en un seul ffmpeg qui lit directement les flux
+        sélectionnés (voir cutting.fetch_remote), sans fichier intermédiaire
+
+        Args:
+            target: Fichier de sortie, objet fichier binaire si
+                stream_format est donné, ou liste de (fichier, début, fin)
+                si audio est donné
+            stream_format: Conteneur écrit dans `target` au fil du
+                multiplexage (voir cutting.STREAM_CONTAINERS)
+            audio: audio.AudioFormat des extraits d'un flux audio seul
+                (voir cutting.fetch_audio)
+
+        Returns:
+            int: Octets écrits
+
+        Raises:
+            yt_dlp.utils.DownloadError: Si ffmpeg échoue avant d'avoir écrit
+                quoi que ce soit (URL expirée...)
+        """
+        streams = [(f['url'], _stream_headers(ydl, f)) for f in formats]
+        local_urls = []
+        connections = self._proxy_connections(parallel_ranges)
+        if connections:
+            streams = [(self.range_proxy.register(url, headers, connections, self._spool(f)), None)
+                       for f, (url, headers) in zip(formats, streams)]
+            local_urls = [(f.get('format_id'), url) for f, (url, _) in zip(formats, streams)]
+        written = [0]
+
+        def progress(size):
+            written[0] = size
+            if progress_hook:
+                progress_hook({'status': 'downloading', 'downloaded_bytes': size})
+
+        try:
+            if audio is not None:
+                fetch_audio(self.ffmpeg_path, streams[0], target, *section, audio.output_args())
+                written[0] = sum(_file_size(output) for output, _, _ in target)
+            elif stream_format is None:
+                fetch_remote(self.ffmpeg_path, streams, target, *section, reencode=reencode)
+                written[0] = _file_size(target)
+            else:
+                stream_remote(self.ffmpeg_path, streams, target, *section, reencode=reencode,
+                              container=stream_format, on_progress=progress)
+        except RuntimeError as e:
+            if written[0]:
+                # Le début du flux est déjà livré : impossible de recommencer
+                raise
+            raise yt_dlp.utils.DownloadError(str(e))
+        finally:
+            if local_urls:
+                self._release_proxied(local_urls)
+        if progress_hook:
+            filename = str(target[0][0]) if audio is not None else '-' if stream_format else str(target)
+            progress_hook({'status': 'finished', 'filename': filename,
+                           'downloaded_bytes': written[0], 'total_bytes': written[0]})
+        return written[0]
+
+    def _prepare(self, pooled, verbose, logger, progress_hook):
+        """Applique à une instance empruntée les options propres à l'appel"""
+        pooled.ydl.params.update({
+            'logger': logger,
+            'quiet': not verbose and logger is None,
+            'no_warnings': not verbose and logger is None,
+            'noprogress': not verbose and logger is None,
+        })
+        token = current_token()
+        recorder = current_recorder()
+
+        def hook(d):
+            if token is not None:
+                token.raise_if_cancelled()
+            recorder.progress(d)
+            if progress_hook:
+                progress_hook(d)
+        pooled.progress_hook = hook
+
+    def _extract(self, url, verbose, logger, progress_hook, use_cache):
+        """
+        Extrait l'info dict une fois pour plusieurs téléchargements (phase "extract")
+
+        Returns:
+            list: [info dict, True si servi par le cache], à passer à _fetch
+        """
+        recorder = current_recorder()
+        with self._checkout() as pooled:
+            self._prepare(pooled, verbose, logger, progress_hook)
+            with recorder.phase("extract"):
+                extracted = list(self._extract_info(pooled, url, use_cache))
+                recorder.annotate(cached=extracted[1])
+        return extracted
+
+    def _fetch(self, url, target, start_seconds, end_seconds, force_keyframes,
+               verbose, logger, progress_hook, use_cache, parallel_ranges, engine, quality=None, snap=False,
+               extracted=None, stream_format=None):
+        """
+        Télécharge [start_seconds, end_seconds] de la vidéo vers `target`
+
+        Avec parallel_ranges > 1, les flux HTTP sont lus par le proxy local
+        sur autant de connexions simultanées (sur une seule si un plafond de
+        débit global est fixé, voir throttle.RateLimiter).
+
+        Args:
+            engine: "ytdlp" (download_sections de yt-dlp) ou "direct" (un seul
+                ffmpeg sur les flux distants, voir ENGINES)
+            quality: quality.QualityPolicy qui choisit les formats à la place
+                du sélecteur de la session (optionnelle)
+            extracted: Liste [info dict, servi par le cache] déjà extraite
+                (optionnelle, mise à jour si l'info doit être ré-extraite)
+            stream_format: Si donné, `target` est un objet fichier binaire
+                qui reçoit ce conteneur au fil de l'eau (moteur direct imposé)
+
+        Returns:
+            tuple: (début, fin) réellement téléchargés
+        """
+        if stream_format is not None:
+            engine = "direct"
+        with self._checkout() as pooled:
+            ydl = pooled.ydl
+            if stream_format is None:
+                ydl.params['outtmpl']['default'] = str(target)
+            ydl.params['force_keyframes_at_cuts'] = force_keyframes
+            self._prepare(pooled, verbose, logger, progress_hook)
+            recorder = current_recorder()
+
+            if extracted is None:
+                with recorder.phase("extract"):
+                    info, cached = self._extract_info(pooled, url, use_cache)
+                    recorder.annotate(cached=cached)
+            else:
+                info, cached = extracted
+            if quality is not None:
+                with recorder.phase("format"):
+                    selection = quality.select(info.get('formats') or [], end_seconds - start_seconds,
+                                               info.get('duration'))
+                    recorder.annotate(format_id=selection.format_id, estimated_bytes=selection.estimated_bytes,
+                                      height=selection.height)
+                    pooled.select_format(selection.format_id)
+                if verbose and logger is None:
+                    estimate = f", ~{selection.estimated_bytes / 2 ** 20:.1f} Mo" if selection.estimated_bytes else ""
+                    print(f"🎚️ Formats {selection.format_id} ({selection.height or '?'}p{estimate})")
+            formats = self._select_formats(ydl, info) if snap or engine == "direct" else None
+            if engine == "direct" and not all(self._addressable(f) for f in formats):
+                if stream_format is not None:
+                    raise RuntimeError("Format non adressable par plage : diffusion en flux impossible")
+                if logger:
+                    logger.warning("Format non adressable par plage : téléchargement via yt-dlp")
+                engine = "ytdlp"
+            if snap:
+                with recorder.phase("keyframes"):
+                    start_seconds, end_seconds = self._snap_to_keyframes(formats, info, start_seconds, end_seconds,
+                                                                         logger)
+                # Légèrement après l'image clé : ffmpeg cherche l'image clé <= -ss
+                section = (start_seconds + EPSILON, end_seconds)
+            else:
+                section = (start_seconds, end_seconds)
+            ydl.params['download_ranges'] = yt_dlp.utils.download_range_func(None, [section])
+
+            def process(info, formats):
+                if engine == "direct":
+                    return self._process_direct(ydl, formats, target, section, force_keyframes, parallel_ranges,
+                                                pooled.progress_hook, stream_format)
+                self._process(ydl, info, parallel_ranges)
+                return _file_size(target)
+
+            with recorder.phase("download") as phase, _ffmpeg_location(self.ffmpeg_path):
+                recorder.annotate(engine=engine)
+                try:
+                    phase.bytes = process(info, formats)
+                except yt_dlp.utils.DownloadError:
+                    if not cached:
+                        raise
+                    # URLs signées révoquées avant leur expiration : on ré-extrait
+                    self.cache.invalidate(extract_video_id(url))
+                    recorder.annotate(retried=True)
+                    info, _ = self._extract_info(pooled, url, use_cache)
+                    if extracted is not None:
+                        extracted[:] = info, False
+                    phase.bytes = process(info, self._select_formats(ydl, info) if engine == "direct" else None)
+
+        return start_seconds, end_seconds
+
+    def _fetch_audio(self, url, outputs, start_seconds, end_seconds, audio, verbose, logger, progress_hook, use_cache,
+                     parallel_ranges, quality=None, extracted=None):
+        """
+        Écrit les extraits `outputs` du seul flux audio de la vidéo, lu une
+        fois sur [start_seconds, end_seconds] (voir cutting.fetch_audio)
+
+        Args:
+            outputs: Liste de (fichier, début, fin) en secondes
+            audio: audio.AudioFormat de la sortie
+            quality: quality.QualityPolicy dont le débit et la taille
+                plafonds s'appliquent au flux audio (optionnelle)
+            Autres arguments : voir _fetch
+
+        Raises:
+            ValueError: Si la vidéo n'a pas de flux audio seul qui convienne
+            RuntimeError: Si ce flux n'est pas lisible par requêtes HTTP Range
+        """
+        with self._checkout() as pooled:
+            ydl = pooled.ydl
+            self._prepare(pooled, verbose, logger, progress_hook)
+            recorder = current_recorder()
+
+            if extracted is None:
+                with recorder.phase("extract"):
+                    info, cached = self._extract_info(pooled, url, use_cache)
+                    recorder.annotate(cached=cached)
+            else:
+                info, cached = extracted
+
+            def select(info):
+                selection = audio.select(info.get('formats') or [], end_seconds - start_seconds,
+                                         info.get('duration'), quality)
+                if not self._addressable(selection.formats[0]):
+                    raise RuntimeError(f"Flux audio {selection.format_id} non adressable par plage (HLS, DASH...) : "
+                                       f"extraction audio seule impossible")
+                return selection
+
+            with recorder.phase("format"):
+                selection = select(info)
+                recorder.annotate(format_id=selection.format_id, estimated_bytes=selection.estimated_bytes)
+            if verbose and logger is None:
+                estimate = f", ~{selection.estimated_bytes / 2 ** 20:.1f} Mo" if selection.estimated_bytes else ""
+                print(f"🎧 Flux audio {selection.format_id} ({selection.formats[0].get('acodec')}{estimate}) "
+                      f"-> {audio.container}")
+
+            section = (start_seconds, end_seconds)
+            with recorder.phase("download") as phase:
+                recorder.annotate(engine="direct")
+                try:
+                    phase.bytes = self._process_direct(ydl, selection.formats, outputs, section, False,
+                                                       parallel_ranges, pooled.progress_hook, audio=audio)
+                except yt_dlp.utils.DownloadError:
+                    if not cached:
+                        raise
+                    # URLs signées révoquées avant leur expiration : on ré-extrait
+                    self.cache.invalidate(extract_video_id(url))
+                    recorder.annotate(retried=True)
+                    info, _ = self._extract_info(pooled, url, use_cache)
+                    if extracted is not None:
+                        extracted[:] = info, False
+                    phase.bytes = self._process_direct(ydl, select(info).formats, outputs, section, False,
+                                                       parallel_ranges, pooled.progress_hook, audio=audio)
+
+    def download(self, url, start_time, end_time, output_file=None, verbose=True, logger=None, progress_hook=None,
+                 use_cache=True, cut_mode="precise", parallel_ranges=1, cancel=None, on_event=None, engine="ytdlp",
+                 write_to=None, stream_format="mp4", quality=None, audio=None):
+        """
+        Télécharge un segment en réutilisant les ressources de la session.
+
+        Peut être appelée plusieurs fois et depuis plusieurs threads.
+        Voir download_segment pour la description des arguments.
+
+        Une demande identique à un téléchargement en cours de la session
+        (même vidéo, quelle que soit la forme de l'URL, mêmes bornes, même
+        format et même sortie audio, même mode de découpage) s'y rattache au lieu d'en lancer un
+        autre : elle reçoit ses événements et sa progression, puis un
+        résultat dont le fichier est une copie du fichier produit, ou ce
+        fichier même si la sortie est la même
+        (SegmentResult.shared vaut True). Les sorties en flux (write_to) ne
+        sont pas regroupées.
+
+        Returns:
+            SegmentResult: Résultat (évalué à True en cas de succès)
+        """
+        key = (self._flight_key(url, start_time, end_time, use_cache, cut_mode, quality, audio)
+               if write_to is None else None)
+        while key is not None:
+            flight, waiter = self._flights.join(key, output_file, on_event, progress_hook)
+            if waiter is None:
+                result = None
+                try:
+                    result = self._download_recorded(url, start_time, end_time, output_file, verbose, logger,
+                                                     flight.progress, use_cache, cut_mode, parallel_ranges, cancel,
+                                                     flight.emit, engine, None, stream_format, quality, audio)
+                finally:
+                    self._flights.complete(flight, lambda w: self._shared_result(result, w.output_file,
+                                                                                 start_time, end_time, audio))
+                return result
+            if verbose and logger is None:
+                print(f"♻️ Segment identique déjà en cours de téléchargement ({start_time} -> {end_time}), "
+                      f"en attente de son résultat")
+            result = self._flights.wait(flight, waiter, cancel)
+            if result is not None:
+                return result
+            if cancel is not None and cancel.cancelled:
+                return SegmentResult(False, output_file, error="Téléchargement annulé", cut_mode=cut_mode,
+                                     cancelled=True)
+            # Le téléchargement partagé a été annulé par son meneur : on recommence
+        return self._download_recorded(url, start_time, end_time, output_file, verbose, logger, progress_hook,
+                                       use_cache, cut_mode, parallel_ranges, cancel, on_event, engine, write_to,
+                                       stream_format, quality, audio)
+
+    def _flight_key(self, url, start_time, end_time, use_cache, cut_mode, quality, audio):
+        """Clé des demandes identiques (None sans regroupement, ou si la demande est invalide)"""
+        if self._flights is None:
+            return None
+        try:
+            return (extract_video_id(url), time_to_seconds(start_time), time_to_seconds(end_time),
+                    self._format_spec(quality, audio), cut_mode, use_cache)
+        except (AttributeError, TypeError, ValueError):
+            # La demande échouera seule, avec son propre message d'erreur
+            return None
+
+    @staticmethod
+    def _shared_result(result, output_file, start_time, end_time, audio=None):
+        """
+        Résultat d'une demande rattachée au téléchargement qui a produit `result`
+
+        Returns:
+            SegmentResult: Copie de `result` pour `output_file` (None si le
+            téléchargement a été annulé et doit être recommencé)
+        """
+        if result is None or result.cancelled:
+            return None
+        shared = copy.copy(result)
+        shared.output_file = output_file if output_file is not None else _default_output(start_time, end_time, audio)
+        shared.shared = True
+        if result.success:
+            try:
+                _copy_output(result.output_file, shared.output_file)
+            except OSError as e:
+                return SegmentResult(False, shared.output_file, error=str(e), cut_mode=result.cut_mode, shared=True)
+        return shared
+
+    def _download_recorded(self, url, start_time, end_time, output_file, verbose, logger, progress_hook, use_cache,
+                           cut_mode, parallel_ranges, cancel, on_event, engine, write_to, stream_format, quality,
+                           audio):
+        recorder = Recorder(on_event)
+        with cancel_scope(cancel), recording(recorder):
+            result = self._download(url, start_time, end_time, output_file, verbose, logger, progress_hook,
+                                    use_cache, cut_mode, parallel_ranges, engine, write_to, stream_format, quality,
+                                    audio, recorder)
+        recorder.finish()
+        result.stats = recorder.summary()
+        _record_selection([result], recorder)
+        if result.reencoded_seconds and result.success:
+            cpu = sum(p.cpu_seconds for p in recorder.phases if p.phase in ("download", "cut"))
+            if cpu > 0:
+                if write_to is None:
+                    size = _file_size(result.output_file)
+                else:
+                    size = sum(p.bytes or 0 for p in recorder.phases if p.phase == "download")
+                result.stats["reencode_bytes_per_cpu_second"] = round(size / cpu)
+        return result
+
+    def _download(self, url, start_time, end_time, output_file, verbose, logger, progress_hook,
+                  use_cache, cut_mode, parallel_ranges, engine, write_to, stream_format, quality, audio, recorder):
+        token = current_token()
+        preexisting = True
+        try:
+            with recorder.phase("validate"):
+                if cut_mode not in CUT_MODES:
+                    raise ValueError(f"Mode de découpage inconnu : {cut_mode} (choix : {', '.join(CUT_MODES)})")
+                if parallel_ranges < 1:
+                    raise ValueError("parallel_ranges doit être au moins 1")
+                if engine not in ENGINES:
+                    raise ValueError(f"Moteur inconnu : {engine} (choix : {', '.join(ENGINES)})")
+                url = validate_url(url)
+                start_seconds = time_to_seconds(start_time)
+                end_seconds = time_to_seconds(end_time)
+                duration = end_seconds - start_seconds
+
+                if duration <= 0:
+                    raise ValueError("Le temps de fin doit être après le temps de début")
+
+                if write_to is not None:
+                    if output_file is not None:
+                        raise ValueError("output_file et write_to sont incompatibles")
+                    if audio is not None:
+                        raise ValueError("L'extraction audio seule écrit des fichiers : diffusion en flux impossible")
+                    if cut_mode == "smart":
+                        raise ValueError("Le mode smart assemble le segment sur disque : diffusion en flux "
+                                         "possible en mode precise ou keyframe")
+                    if stream_format not in STREAM_CONTAINERS:
+                        raise ValueError(f"Conteneur de diffusion inconnu : {stream_format} "
+                                         f"(choix : {', '.join(STREAM_CONTAINERS)})")
+                    preexisting = False
+                else:
+                    if output_file is None:
+                        output_file = _default_output(start_time, end_time, audio)
+                    preexisting = Path(output_file).exists()
+
+            # Vérification ffmpeg (indispensable pour le découpage)
+            with recorder.phase("ffmpeg_probe"):
+                try:
+                    if audio is not None:
+                        self._check_audio(audio)
+                    else:
+                        self._check_ffmpeg(cut_mode)
+                    if write_to is not None and not self.ffmpeg.can_copy_to(stream_format):
+                        raise RuntimeError(f"FFmpeg {self.ffmpeg.version} n'a pas de muxeur {stream_format} "
+                                           f"({self.ffmpeg.path})")
+                except RuntimeError as e:
+                    if logger: logger.error(str(e))
+                    raise
+
+            if verbose and logger is None:
+                print(f"🚀 Démarrage du téléchargement optimisé ({start_time} -> {end_time})")
+
+            result = SegmentResult(False, output_file, cut_mode=cut_mode,
+                                   actual_start=start_seconds, actual_end=end_seconds)
+            fetch_args = (verbose, logger, progress_hook, use_cache, parallel_ranges, engine, quality)
+
+            clip = None
+            # En flux, rien ne passe par le disque : le cache d'extraits est
+            # ignoré, comme pour l'audio seul (il ne contient que des vidéos)
+            if use_cache and self.clip_cache and write_to is None and audio is None:
+                with recorder.phase("cache"):
+                    video_id = extract_video_id(url)
+                    format_spec = self._format_spec(quality)
+                    clip, result.cache = self.clip_cache.find(video_id, format_spec, start_seconds, end_seconds,
+                                                              cut_mode)
+                    recorder.annotate(status=result.cache)
+
+            if audio is not None:
+                self._fetch_audio(url, [(output_file, start_seconds, end_seconds)], start_seconds, end_seconds,
+                                  audio, verbose, logger, progress_hook, use_cache, parallel_ranges, quality)
+                _audio_stats(result, audio)
+            elif clip is not None:
+                try:
+                    with recorder.phase("cut") as phase:
+                        self._cut_from_clip(clip, result.cache, output_file, start_seconds, end_seconds, cut_mode,
+                                            result)
+                        phase.bytes = _file_size(output_file)
+                finally:
+                    self.clip_cache.release(clip)
+                if verbose and logger is None:
+                    print("♻️ Extrait servi depuis le cache local" if result.cache == "hit" else
+                          f"♻️ Découpe locale d'un extrait en cache ({clip.actual_start:.2f}s -> {clip.actual_end:.2f}s)")
+            elif write_to is not None:
+                keyframe = cut_mode == "keyframe"
+                actual_start, actual_end = self._fetch(url, write_to, start_seconds, end_seconds, not keyframe,
+                                                       *fetch_args, snap=keyframe, stream_format=stream_format)
+                result.actual_start, result.actual_end = actual_start, actual_end
+                if keyframe:
+                    result.reencoded_seconds, result.copied_seconds = 0, round(actual_end - actual_start, 3)
+                else:
+                    result.reencoded_seconds, result.copied_seconds = duration, 0
+            elif cut_mode == "smart":
+                # Copie brute du segment (timeline locale : 0 = début demandé),
+                # puis découpe locale qui ne ré-encode que les bords.
+                workdir = self._workdir(Path(output_file).parent)
+                try:
+                    source = workdir / "source.mp4"
+                    self._fetch(url, source, start_seconds, end_seconds, False, *fetch_args)
+                    with recorder.phase("cut") as phase:
+                        stats = smart_cut(self.ffmpeg_path, self.ffmpeg.ffprobe,
+                                          str(source), output_file, 0, duration, workdir=workdir)
+                        phase.bytes = _file_size(output_file)
+                finally:
+                    shutil.rmtree(workdir, ignore_errors=True)
+                result.reencoded_seconds, result.copied_seconds = stats
+                if verbose and logger is None:
+                    print(f"✂️ Smart cut : {stats.reencoded_seconds}s ré-encodées, {stats.copied_seconds}s copiées")
+            elif cut_mode == "keyframe":
+                actual_start, actual_end = self._fetch(url, output_file, start_seconds, end_seconds, False,
+                                                       *fetch_args, snap=True)
+                result.actual_start, result.actual_end = actual_start, actual_end
+                result.reencoded_seconds, result.copied_seconds = 0, round(actual_end - actual_start, 3)
+                if verbose and logger is None:
+                    print(f"⚡ Mode rapide : {actual_start:.2f}s -> {actual_end:.2f}s "
+                          f"(+{(start_seconds - actual_start) + (actual_end - end_seconds):.2f}s, sans ré-encodage)")
+            else:
+                self._fetch(url, output_file, start_seconds, end_seconds, True, *fetch_args)
+                result.reencoded_seconds, result.copied_seconds = duration, 0
+
+            with recorder.phase("finalize"):
+                if token is not None:
+                    token.raise_if_cancelled()
+                result.success = write_to is not None or Path(output_file).exists()
+                if result.success and result.cache in ("miss", "partial"):
+                    try:
+                        self.clip_cache.put(video_id, format_spec, start_seconds, end_seconds, cut_mode,
+                                            output_file, result.actual_start, result.actual_end)
+                    except OSError as e:
+                        if logger:
+                            logger.warning(f"Extrait non mis en cache : {e}")
+            return result
+
+        except Exception as e:
+            return self._failure(e, output_file, preexisting, cut_mode, verbose, logger)
+
+    @staticmethod
+    def _failure(error, output_file, preexisting, cut_mode, verbose, logger):
+        """Résultat d'un téléchargement interrompu par `error` ou par l'annulation"""
+        token = current_token()
+        if token is not None and token.cancelled:
+            # Quelle que soit l'erreur : yt-dlp peut masquer DownloadCancelled
+            if output_file is not None:
+                _remove_partial_files(output_file, preexisting)
+            if verbose and logger is None:
+                print("🛑 Téléchargement annulé")
+            return SegmentResult(False, output_file, error="Téléchargement annulé",
+                                 cut_mode=cut_mode, cancelled=True)
+        error_msg = str(error)
+        if logger:
+            logger.error(error_msg)
+        elif verbose:
+            print(f"❌ Erreur critique : {error_msg}")
+        return SegmentResult(False, output_file, error=error_msg, cut_mode=cut_mode)
+
+    def download_segments(self, url, segments, verbose=True, logger=None, progress_hook=None, use_cache=True,
+                          cut_mode="precise", parallel_ranges=1, cancel=None, on_event=None, merge_gap=MERGE_GAP,
+                          engine="ytdlp", quality=None, audio=None):
+        """
+        Télécharge plusieurs segments d'une même vidéo.
+
+        La vidéo n'est extraite qu'une fois. Les segments qui se chevauchent
+        ou que sépare moins de `merge_gap` secondes sont regroupés : chaque
+        groupe est téléchargé une seule fois (copie alignée sur les images
+        clés), puis découpé localement en autant de fichiers que de segments.
+        Avec `audio`, un seul ffmpeg lit le flux audio d'un groupe et en
+        écrit directement tous les extraits, sans fichier intermédiaire.
+        Voir download_segment pour les autres arguments.
+
+        Args:
+            segments: Liste de (début, fin) ou (début, fin, fichier_sortie)
+            merge_gap: Écart maximal (secondes) entre deux segments
+                téléchargés ensemble
+
+        Returns:
+            list[SegmentResult]: Un résultat par segment, dans l'ordre de
+            `segments` ; leur `stats` décrit l'ensemble de l'opération
+        """
+        recorder = Recorder(on_event)
+        with cancel_scope(cancel), recording(recorder):
+            results = self._download_many(url, list(segments), verbose, logger, progress_hook, use_cache,
+                                          cut_mode, parallel_ranges, merge_gap, engine, quality, audio, recorder)
+        recorder.finish()
+        stats = recorder.summary()
+        for result in results:
+            result.stats = stats
+        _record_selection(results, recorder)
+        return results
+
+    def _download_many(self, url, segments, verbose, logger, progress_hook, use_cache, cut_mode, parallel_ranges,
+                       merge_gap, engine, quality, audio, recorder):
+        token = current_token()
+        results = [SegmentResult(False, cut_mode=cut_mode) for _ in segments]
+        preexisting = {}
+        ranges = {}
+
+        def fail(indices, error):
+            for i in indices:
+                results[i].error = str(error)
+            if logger:
+                logger.error(str(error))
+            elif verbose:
+                print(f"❌ Erreur : {error}")
+
+        try:
+            with recorder.phase("validate"):
+                if cut_mode not in CUT_MODES:
+                    raise ValueError(f"Mode de découpage inconnu : {cut_mode} (choix : {', '.join(CUT_MODES)})")
+                if parallel_ranges < 1:
+                    raise ValueError("parallel_ranges doit être au moins 1")
+                if engine not in ENGINES:
+                    raise ValueError(f"Moteur inconnu : {engine} (choix : {', '.join(ENGINES)})")
+                url = validate_url(url)
+                for i, segment in enumerate(segments):
+                    try:
+                        if len(segment) not in (2, 3):
+                            raise ValueError(f"Segment invalide : {segment!r} (attendu : début, fin[, sortie])")
+                        start_time, end_time = segment[:2]
+                        output_file = segment[2] if len(segment) == 3 else None
+                        start_seconds = time_to_seconds(start_time)
+                        end_seconds = time_to_seconds(end_time)
+                        if end_seconds <= start_seconds:
+                            raise ValueError(f"Le temps de fin doit être après le temps de début "
+                                             f"({start_time} -> {end_time})")
+                        output_file = str(output_file or _default_output(start_time, end_time, audio))
+                        if any(r.output_file == output_file for r in results):
+                            raise ValueError(f"Fichier de sortie utilisé par deux segments : {output_file}")
+                    except (TypeError, ValueError) as e:
+                        fail([i], e)
+                        continue
+                    results[i] = SegmentResult(False, output_file, cut_mode=cut_mode,
+                                               actual_start=start_seconds, actual_end=end_seconds)
+                    preexisting[i] = Path(output_file).exists()
+                    ranges[i] = (start_seconds, end_seconds)
+
+            with recorder.phase("ffmpeg_probe"):
+                if audio is not None:
+                    self._check_audio(audio)
+                else:
+                    self._check_ffmpeg(cut_mode)
+
+            video_id = format_spec = None
+            if use_cache and self.clip_cache and ranges and audio is None:
+                video_id = extract_video_id(url)
+                format_spec = self._format_spec(quality)
+                for i in list(ranges):
+                    result = results[i]
+                    with recorder.phase("cache"):
+                        clip, result.cache = self.clip_cache.find(video_id, format_spec, *ranges[i], cut_mode)
+                        recorder.annotate(status=result.cache)
+                    if clip is None:
+                        continue
+                    try:
+                        with recorder.phase("cut") as phase:
+                            self._cut_from_clip(clip, result.cache, result.output_file, *ranges[i], cut_mode, result)
+                            phase.bytes = _file_size(result.output_file)
+                        result.success = Path(result.output_file).exists()
+                    except Exception as e:
+                        if token is not None and token.cancelled:
+                            raise
+                        fail([i], e)
+                    finally:
+                        self.clip_cache.release(clip)
+                    del ranges[i]
+
+            if ranges:
+                extracted = self._extract(url, verbose, logger, progress_hook, use_cache)
+                duration = extracted[0].get('duration')
+                for i in [i for i in ranges if duration and ranges[i][0] >= duration]:
+                    fail([i], f"Le segment commence après la fin de la vidéo ({duration}s)")
+                    del ranges[i]
+
+                pending = list(ranges)
+                groups = [(start, end, [pending[m] for m in members])
+                          for start, end, members in merge_ranges([ranges[i] for i in pending], merge_gap)]
+                if verbose and logger is None and pending:
+                    print(f"🚀 {len(pending)} segment(s) à télécharger en {len(groups)} plage(s)")
+                fetch_args = (verbose, logger, progress_hook, use_cache, parallel_ranges, engine, quality)
+                for start, end, members in groups:
+                    if audio is not None:
+                        try:
+                            self._fetch_audio(url, [(results[i].output_file, *ranges[i]) for i in members], start,
+                                              end, audio, verbose, logger, progress_hook, use_cache, parallel_ranges,
+                                              quality, extracted)
+                        except Exception as e:
+                            if token is not None and token.cancelled:
+                                raise
+                            fail(members, e)
+                            continue
+                        for i in members:
+                            _audio_stats(results[i], audio)
+                            results[i].success = Path(results[i].output_file).exists()
+                        continue
+                    workdir = self._workdir(Path(results[members[0]].output_file).parent)
+                    try:
+                        clip = self._fetch_clip(url, workdir / "source.mp4", start, end, extracted, fetch_args,
+                                                video_id, format_spec)
+                        keyframes = None
+                        for i in members:
+                            result = results[i]
+                            try:
+                                with recorder.phase("cut") as phase:
+                                    if len(members) == 1 and cut_mode == "keyframe":
+                                        # La plage téléchargée est déjà le segment demandé
+                                        shutil.move(str(clip.path), result.output_file)
+                                        result.actual_start, result.actual_end = clip.actual_start, clip.actual_end
+                                        result.reencoded_seconds = 0
+                                        result.copied_seconds = round(clip.actual_end - clip.actual_start, 3)
+                                    else:
+                                        if keyframes is None:
+                                            keyframes = probe_keyframes(self.ffmpeg.ffprobe, str(clip.path))
+                                        self._cut_from_clip(clip, "partial", result.output_file, *ranges[i],
+                                                            cut_mode, result, keyframes=keyframes)
+                                    phase.bytes = _file_size(result.output_file)
+                                result.success = Path(result.output_file).exists()
+                            except Exception as e:
+                                if token is not None and token.cancelled:
+                                    raise
+                                fail([i], e)
+                    except Exception as e:
+                        if token is not None and token.cancelled:
+                            raise
+                        fail([i for i in members if not results[i].success and results[i].error is None], e)
+                    finally:
+                        shutil.rmtree(workdir, ignore_errors=True)
+
+            with recorder.phase("finalize"):
+                if token is not None:
+                    token.raise_if_cancelled()
+            return results
+
+        except Exception as e:
+            unfinished = [i for i, result in enumerate(results) if not result.success and result.error is None]
+            if token is not None and token.cancelled:
+                for i in unfinished:
+                    _remove_partial_files(results[i].output_file, preexisting[i])
+                    results[i].error, results[i].cancelled = "Téléchargement annulé", True
+                if verbose and logger is None:
+                    print("🛑 Téléchargement annulé")
+                return results
+            fail(unfinished, e)
+            return results
+
+    def _fetch_clip(self, url, source, start_seconds, end_seconds, extracted, fetch_args, video_id, format_spec):
+        """
+        Télécharge une plage en copie alignée sur les images clés et la met en cache
+
+        Returns:
+            Clip: Extrait local couvrant la plage
+        """
+        actual_start, actual_end = self._fetch(url, source, start_seconds, end_seconds, False, *fetch_args,
+                                               snap=True, extracted=extracted)
+        if video_id:
+            try:
+                self.clip_cache.put(video_id, format_spec, start_seconds, end_seconds, "keyframe",
+                                    source, actual_start, actual_end)
+            except OSError as e:
+                logger = fetch_args[1]
+                if logger:
+                    logger.warning(f"Extrait non mis en cache : {e}")
+        return Clip(source, "keyframe", start_seconds, end_seconds, actual_start, actual_end)
+
+    def _fetch_stage(self, url, start_time, end_time, output_file, verbose, logger, progress_hook, use_cache,
+                     cut_mode, parallel_ranges, engine, quality, recorder):
+        """
+        Étage réseau du pipeline (voir pipeline.Pipeline) : validation, cache
+        d'extraits puis téléchargement d'une copie alignée sur les images
+        clés, sans ré-encodage. La découpe est laissée à _cut_stage.
+
+        Returns:
+            _Staged: Extrait à découper ; clip vaut None si le segment a
+            échoué ou a été annulé (voir result)
+        """
+        preexisting = True
+        workdir = None
+        try:
+            with recorder.phase("validate"):
+                if cut_mode not in CUT_MODES:
+                    raise ValueError(f"Mode de découpage inconnu : {cut_mode} (choix : {', '.join(CUT_MODES)})")
+                if parallel_ranges < 1:
+                    raise ValueError("parallel_ranges doit être au moins 1")
+                if engine not in ENGINES:
+                    raise ValueError(f"Moteur inconnu : {engine} (choix : {', '.join(ENGINES)})")
+                url = validate_url(url)
+                start_seconds = time_to_seconds(start_time)
+                end_seconds = time_to_seconds(end_time)
+                if end_seconds <= start_seconds:
+                    raise ValueError("Le temps de fin doit être après le temps de début")
+                if output_file is None:
+                    output_file = _default_output(start_time, end_time)
+                preexisting = Path(output_file).exists()
+
+            with recorder.phase("ffmpeg_probe"):
+                self._check_ffmpeg(cut_mode)
+
+            result = SegmentResult(False, output_file, cut_mode=cut_mode,
+                                   actual_start=start_seconds, actual_end=end_seconds)
+            clip = video_id = format_spec = None
+            if use_cache and self.clip_cache:
+                with recorder.phase("cache"):
+                    video_id = extract_video_id(url)
+                    format_spec = self._format_spec(quality)
+                    clip, result.cache = self.clip_cache.find(video_id, format_spec, start_seconds, end_seconds,
+                                                              cut_mode)
+                    recorder.annotate(status=result.cache)
+            if clip is None:
+                workdir = self._workdir(Path(output_file).parent)
+                fetch_args = (verbose, logger, progress_hook, use_cache, parallel_ranges, engine, quality)
+                clip = self._fetch_clip(url, workdir / "source.mp4", start_seconds, end_seconds, None, fetch_args,
+                                        video_id, format_spec)
+            return _Staged(result, clip, start_seconds, end_seconds, workdir, preexisting, video_id, format_spec)
+
+        except Exception as e:
+            if workdir is not None:
+                shutil.rmtree(workdir, ignore_errors=True)
+            result = self._failure(e, output_file, preexisting, cut_mode, verbose, logger)
+            return _Staged(result, None, None, None, None, preexisting, None, None)
+
+    def _cut_stage(self, staged, verbose, logger, recorder):
+        """
+        Étage CPU du pipeline : découpe l'extrait téléchargé par _fetch_stage
+        (ré-encodage, smart cut ou simple déplacement) puis supprime son
+        répertoire de travail
+
+        Returns:
+            SegmentResult: Résultat du segment
+        """
+        token = current_token()
+        result, clip = staged.result, staged.clip
+        try:
+            with recorder.phase("cut") as phase:
+                if staged.workdir is not None and result.cut_mode == "keyframe":
+                    # La copie téléchargée est déjà le segment demandé
+                    shutil.move(str(clip.path), result.output_file)
+                    result.actual_start, result.actual_end = clip.actual_start, clip.actual_end
+                    result.reencoded_seconds = 0
+                    result.copied_seconds = round(clip.actual_end - clip.actual_start, 3)
+                else:
+                    status = result.cache if staged.workdir is None else "partial"
+                    self._cut_from_clip(clip, status, result.output_file, staged.start, staged.end,
+                                        result.cut_mode, result)
+                phase.bytes = _file_size(result.output_file)
+
+            with recorder.phase("finalize"):
+                if token is not None:
+                    token.raise_if_cancelled()
+                result.success = Path(result.output_file).exists()
+                # La copie aux images clés est déjà en cache (voir _fetch_clip)
+                if result.success and staged.video_id and result.cut_mode != "keyframe" and result.cache != "hit":
+                    try:
+                        self.clip_cache.put(staged.video_id, staged.format_spec, staged.start, staged.end,
+                                            result.cut_mode, result.output_file, result.actual_start,
+                                            result.actual_end)
+                    except OSError as e:
+                        if logger:
+                            logger.warning(f"Extrait non mis en cache : {e}")
+            return result
+
+        except Exception as e:
+            return self._failure(e, result.output_file, staged.preexisting, result.cut_mode, verbose, logger)
+        finally:
+            if staged.workdir is not None:
+                shutil.rmtree(staged.workdir, ignore_errors=True)
+            else:
+                self.clip_cache.release(clip)
+
+    def split_by_chapters(self, url, output_dir=None, cues=None, verbose=True, logger=None, progress_hook=None,
+                          use_cache=True, cut_mode="precise", parallel_ranges=1, cancel=None, on_event=None,
+                          engine="ytdlp", quality=None):
+        """
+        Découpe une vidéo en un fichier par chapitre.
+
+        Le média n'est téléchargé qu'une fois (du début du premier chapitre
+        à la fin du dernier), puis un seul ffmpeg (muxeur segment) écrit tous
+        les chapitres. Voir download_segment pour les autres arguments.
+
+        Args:
+            output_dir: Répertoire des fichiers "01 - Titre.mp4" (courant par défaut)
+            cues: Repères à utiliser à la place des chapitres YouTube : chemin
+                d'un fichier JSON, CSV ou WebVTT (voir chapters.load_cues) ou
+                liste de (début, fin, titre)
+            cut_mode: "precise" (ré-encodage unique, coupes à l'image près) ou
+                "keyframe" (copie, coupes aux images clés)
+
+        Returns:
+            list[SegmentResult]: Un résultat par chapitre, dans l'ordre ; un
+            seul résultat en échec si la liste des chapitres n'a pu être établie
+        """
+        recorder = Recorder(on_event)
+        with cancel_scope(cancel), recording(recorder):
+            results = self._split(url, output_dir, cues, verbose, logger, progress_hook, use_cache, cut_mode,
+                                  parallel_ranges, engine, quality, recorder)
+        recorder.finish()
+        stats = recorder.summary()
+        for result in results:
+            result.stats = stats
+        _record_selection(results, recorder)
+        return results
+
+    def _split(self, url, output_dir, cues, verbose, logger, progress_hook, use_cache, cut_mode, parallel_ranges,
+               engine, quality, recorder):
+        token = current_token()
+        results = []
+        preexisting = []
+        workdir = clip = None
+        try:
+            with recorder.phase("validate"):
+                if cut_mode not in SPLIT_MODES:
+                    raise ValueError(f"Mode de découpage non supporté par chapitres : {cut_mode} "
+                                     f"(choix : {', '.join(SPLIT_MODES)})")
+                if parallel_ranges < 1:
+                    raise ValueError("parallel_ranges doit être au moins 1")
+                if engine not in ENGINES:
+                    raise ValueError(f"Moteur inconnu : {engine} (choix : {', '.join(ENGINES)})")
+                url = validate_url(url)
+                if isinstance(cues, (str, os.PathLike)):
+                    cues = load_cues(cues)
+
+            with recorder.phase("ffmpeg_probe"):
+                self._check_ffmpeg(cut_mode)
+                if not self.ffmpeg.can_copy_to("segment"):
+                    raise RuntimeError(f"FFmpeg {self.ffmpeg.version} n'a pas de muxeur segment ({self.ffmpeg.path})")
+
+            extracted = self._extract(url, verbose, logger, progress_hook, use_cache)
+            info = extracted[0]
+            chapters = resolve_chapters(chapters_from_info(info) if cues is None else cues, info.get('duration'))
+            if not chapters:
+                raise ValueError("La vidéo n'a pas de chapitres : fournissez une liste de repères")
+
+            output_dir = Path(output_dir or ".")
+            output_dir.mkdir(parents=True, exist_ok=True)
+            for index, chapter in enumerate(chapters, 1):
+                output_file = str(output_dir / chapter_filename(index, chapter))
+                results.append(SegmentResult(False, output_file, cut_mode=cut_mode,
+                                             actual_start=chapter.start, actual_end=chapter.end))
+                preexisting.append(Path(output_file).exists())
+            if verbose and logger is None:
+                print(f"📚 {len(chapters)} chapitre(s) : {chapters[0].start:.2f}s -> {chapters[-1].end:.2f}s")
+
+            start, end = chapters[0].start, chapters[-1].end
+            video_id = format_spec = None
+            if use_cache and self.clip_cache:
+                with recorder.phase("cache"):
+                    video_id = extract_video_id(url)
+                    format_spec = self._format_spec(quality)
+                    clip, status = self.clip_cache.find(video_id, format_spec, start, end, "keyframe")
+                    recorder.annotate(status=status)
+                for result in results:
+                    result.cache = status
+
+            workdir = self._workdir(output_dir)
+            if clip is None:
+                fetch_args = (verbose, logger, progress_hook, use_cache, parallel_ranges, engine, quality)
+                clip = self._fetch_clip(url, workdir / "source.mp4", start, end, extracted, fetch_args,
+                                        video_id, format_spec)
+
+            with recorder.phase("cut") as phase:
+                keyframes = probe_keyframes(self.ffmpeg.ffprobe, str(clip.path))
+                # Timeline de l'extrait : sa première image clé est clip.actual_start
+                offset = clip.actual_start - (keyframes[0] if keyframes else 0)
+                cuts, plan = plan_split(chapters, clip.actual_start, clip.actual_end,
+                                        [k + offset for k in keyframes] if cut_mode == "keyframe" else None)
+                parts = split_segments(self.ffmpeg_path, str(clip.path), [c - offset for c in cuts],
+                                       workdir / "parts", reencode=cut_mode == "precise")
+                for result, (chapter_start, chapter_end, piece) in zip(results, plan):
+                    if piece is None or piece >= len(parts):
+                        result.error = "Chapitre plus court qu'un intervalle entre images clés"
+                        continue
+                    shutil.move(str(parts[piece]), result.output_file)
+                    result.actual_start, result.actual_end = chapter_start, chapter_end
+                    seconds = round(chapter_end - chapter_start, 3)
+                    if cut_mode == "precise":
+                        result.reencoded_seconds, result.copied_seconds = seconds, 0
+                    else:
+                        result.reencoded_seconds, result.copied_seconds = 0, seconds
+                    result.success = True
+                phase.bytes = sum(_file_size(r.output_file) for r in results if r.success)
+
+            with recorder.phase("finalize"):
+                if token is not None:
+                    token.raise_if_cancelled()
+            return results
+
+        except Exception as e:
+            if token is not None and token.cancelled:
+                for result, keep in zip(results, preexisting):
+                    if not result.success:
+                        _remove_partial_files(result.output_file, keep)
+                        result.error, result.cancelled = "Téléchargement annulé", True
+                if verbose and logger is None:
+                    print("🛑 Téléchargement annulé")
+                return results or [SegmentResult(False, error="Téléchargement annulé", cut_mode=cut_mode,
+                                                 cancelled=True)]
+            error_msg = str(e)
+            if logger:
+                logger.error(error_msg)
+            elif verbose:
+                print(f"❌ Erreur critique : {error_msg}")
+            for result in results:
+                if not result.success and result.error is None:
+                    result.error = error_msg
+            return results or [SegmentResult(False, error=error_msg, cut_mode=cut_mode)]
+        finally:
+            if workdir is not None:
+                shutil.rmtree(workdir, ignore_errors=True)
+            if clip is not None and self.clip_cache:
+                self.clip_cache.release(clip)
+
+    def set_clip_cache(self, clip_cache=True):
+        """
+        Active ou désactive le cache d'extraits de la session
+
+        L'activation vaut pour les appels suivants, même si d'autres sont en
+        cours ; la désactivation ne doit se faire que lorsqu'aucun
+        téléchargement n'est en cours.
+
+        Args:
+            clip_cache: True (cache sur disque par défaut, gardé s'il est
+                déjà actif), un ClipCache, ou None/False pour le désactiver
+        """
+        if clip_cache is True:
+            if self.clip_cache:
+                return
+            clip_cache = ClipCache()
+        with self._lock:
+            previous, self.clip_cache = self.clip_cache, clip_cache or None
+        if previous and previous is not self.clip_cache:
+            previous.close()
+
+    def close(self):
+        """Ferme les instances YoutubeDL inactives (les autres à leur restitution)"""
+        with self._available:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._available.notify_all()
+        for pooled in idle:
+            pooled.close()
+        if self.cache:
+            self.cache.close()
+        if self.clip_cache:
+            self.clip_cache.close()
+        with self._lock:
+            proxy, self._proxy = self._proxy, None
+        if proxy is not None:
+            proxy.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+_default_session = None
+_default_session_lock = threading.Lock()
+
+
+def get_default_session():
+    """Retourne la session partagée utilisée par download_segment"""
+    global _default_session
+    with _default_session_lock:
+        if _default_session is None:
+            _default_session = SegmentDownloader()
+        return _default_session
+
+
+def download_segment(url, start_time, end_time, output_file=None, verbose=True, logger=None, progress_hook=None,
+                     use_cache=True, cut_mode="precise", parallel_ranges=1, cancel=None, on_event=None,
+                     engine="ytdlp", write_to=None, stream_format="mp4", quality=None, audio=None):
     """
     Télécharge un segment d'une vidéo YouTube avec une efficacité maximale.
     
+    Utilise la session partagée (voir SegmentDownloader) : ffmpeg n'est
+    vérifié qu'une fois et les instances yt-dlp sont réutilisées.
+    
     Args:
         url: URL de la vidéo YouTube
         start_time: Temps de début ("MM:SS" ou "HH:MM:SS")
@@ -96,67 +1745,100 @@ def download_segment(url, start_time, end_time, output_file=None, verbose=True,
         verbose: Affichage console
         logger: Logger personnalisé pour yt-dlp
         progress_hook: Fonction appelée à chaque mise à jour de progression
+        use_cache: Réutiliser les métadonnées et les extraits en cache
+            (False pour forcer une nouvelle extraction et un nouveau
+            téléchargement ; voir SegmentResult.cache)
+        cut_mode: "precise" (ré-encode tout le segment), "smart" (copie
+            l'intérieur et ne ré-encode que les GOP partiels aux bords) ou
+            "keyframe" (élargit aux images clés, copie pure ; voir
+            SegmentResult.actual_start / actual_end)
+        parallel_ranges: Nombre de connexions simultanées par flux vidéo et
+            audio (1 : une seule connexion, comme yt-dlp par défaut)
+        cancel: CancelToken permettant d'interrompre le téléchargement depuis
+            un autre thread (ffmpeg est arrêté, les fichiers partiels supprimés
+            et le résultat a cancelled=True)
+        on_event: Fonction appelée avec chaque événement typé (PhaseStarted,
+            PhaseFinished, Progress du module events) ; le résumé des phases
+            est aussi disponible dans SegmentResult.stats
+        engine: "ytdlp" (download_sections de yt-dlp) ou "direct" (un seul
+            ffmpeg lit les flux vidéo et audio distants par requêtes Range et
+            écrit directement le MP4 final, sans fichier intermédiaire)
+        write_to: Objet fichier binaire (sys.stdout.buffer, tube, envoi vers
+            un stockage objet...) qui reçoit le segment au fil du
+            multiplexage, à la place de output_file : rien n'est écrit sur
+            le disque (moteur direct, modes precise et keyframe)
+        stream_format: Conteneur écrit dans write_to : "mp4" (MP4
+            fragmenté), "mpegts" ou "matroska"
+        quality: quality.QualityPolicy (définition, débit, codec, taille
+            maximale) : les formats les moins coûteux qui la respectent
+            remplacent le sélecteur de la session ; voir
+            SegmentResult.format_id et estimated_bytes
+        audio: audio.AudioFormat ("m4a" ou "opus" copiés, "wav" ou "flac"
+            décodés) : seul le flux audio est lu, sur la plage du segment,
+            et écrit dans ce conteneur (moteur direct ; cut_mode et le
+            cache d'extraits ne s'appliquent pas)
         
     Returns:
-        bool: Succès ou échec
+        SegmentResult: Résultat, évalué à True en cas de succès
     """
-    try:
-        url = validate_url(url)
-        start_seconds = time_to_seconds(start_time)
-        end_seconds = time_to_seconds(end_time)
-        duration = end_seconds - start_seconds
-        
-        if duration <= 0:
-            raise ValueError("Le temps de fin doit être après le temps de début")
-        
-        if output_file is None:
-            output_file = f"segment_{start_time.replace(':', '-')}_{end_time.replace(':', '-')}.mp4"
-        
-        ffmpeg_path = get_ffmpeg_path()
-        
-        # Vérification ffmpeg (indispensable pour le découpage)
-        try:
-            subprocess.run([ffmpeg_path, '-version'], capture_output=True, check=True)
-        except (subprocess.CalledProcessError, FileNotFoundError):
-            error_msg = f"FFmpeg introuvable à : {ffmpeg_path}. Veuillez l'installer."
-            if logger: logger.error(error_msg)
-            raise RuntimeError(error_msg)
-
-        # Configuration optimisée de yt-dlp
-        ydl_opts = {
-            'format': 'bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]/best',
-            'merge_output_format': 'mp4',
-            'ffmpeg_location': ffmpeg_path,
-            'outtmpl': output_file,
-            'download_sections': [{
-                'start_time': start_seconds,
-                'end_time': end_seconds,
-                'title': 'segment'
-            }],
-            'force_keyframes_at_cuts': True,
-            'logger': logger,
-            'progress_hooks': [progress_hook] if progress_hook else [],
-            'quiet': not verbose and logger is None,
-            'no_warnings': not verbose and logger is None,
-            'retries': 10,
-            'fragment_retries': 10,
-        }
+    return get_default_session().download(
+        url, start_time, end_time, output_file,
+        verbose=verbose, logger=logger, progress_hook=progress_hook, use_cache=use_cache,
+        cut_mode=cut_mode, parallel_ranges=parallel_ranges, cancel=cancel, on_event=on_event, engine=engine,
+        write_to=write_to, stream_format=stream_format, quality=quality, audio=audio
+    )
 
-        if verbose and logger is None:
-            print(f"🚀 Démarrage du téléchargement optimisé ({start_time} -> {end_time})")
 
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            ydl.download([url])
-        
-        return Path(output_file).exists()
-            
-    except Exception as e:
-        error_msg = str(e)
-        if logger:
-            logger.error(error_msg)
-        elif verbose:
-            print(f"❌ Erreur critique : {error_msg}")
-        return False
 
-# Alias pour corriger une potentielle erreur de frappe si nécessaire dans le futur
-yt_dl_YoutubeDL = yt_dlp.YoutubeDL
+def download_segments(url, segments, verbose=True, logger=None, progress_hook=None, use_cache=True,
+                      cut_mode="precise", parallel_ranges=1, cancel=None, on_event=None, merge_gap=MERGE_GAP,
+                      engine="ytdlp", quality=None, audio=None):
+    """
+    Télécharge plusieurs segments d'une même vidéo YouTube.
+
+    La vidéo n'est extraite qu'une fois et les segments proches ou qui se
+    chevauchent sont téléchargés d'un seul tenant avant d'être découpés
+    (voir SegmentDownloader.download_segments).
+
+    Args:
+        url: URL de la vidéo YouTube
+        segments: Liste de (début, fin) ou (début, fin, fichier_sortie)
+        merge_gap: Écart maximal (secondes) entre deux segments téléchargés
+            ensemble
+        Autres arguments : voir download_segment
+
+    Returns:
+        list[SegmentResult]: Un résultat par segment, dans l'ordre de `segments`
+    """
+    return get_default_session().download_segments(
+        url, segments, verbose=verbose, logger=logger, progress_hook=progress_hook, use_cache=use_cache,
+        cut_mode=cut_mode, parallel_ranges=parallel_ranges, cancel=cancel, on_event=on_event, merge_gap=merge_gap,
+        engine=engine, quality=quality, audio=audio
+    )
+
+
+def split_by_chapters(url, output_dir=None, cues=None, verbose=True, logger=None, progress_hook=None,
+                      use_cache=True, cut_mode="precise", parallel_ranges=1, cancel=None, on_event=None,
+                      engine="ytdlp", quality=None):
+    """
+    Découpe une vidéo YouTube en un fichier par chapitre.
+
+    Le média n'est téléchargé qu'une fois et un seul ffmpeg écrit tous les
+    chapitres (voir SegmentDownloader.split_by_chapters).
+
+    Args:
+        url: URL de la vidéo YouTube
+        output_dir: Répertoire des fichiers "01 - Titre.mp4"
+        cues: Fichier de repères (JSON, CSV, WebVTT) ou liste de (début, fin,
+            titre) à utiliser à la place des chapitres YouTube
+        cut_mode: "precise" ou "keyframe"
+        Autres arguments : voir download_segment
+
+    Returns:
+        list[SegmentResult]: Un résultat par chapitre
+    """
+    return get_default_session().split_by_chapters(
+        url, output_dir, cues=cues, verbose=verbose, logger=logger, progress_hook=progress_hook,
+        use_cache=use_cache, cut_mode=cut_mode, parallel_ranges=parallel_ranges, cancel=cancel, on_event=on_event,
+        engine=engine, quality=quality
+    )
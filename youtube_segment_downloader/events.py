@@ -0,0 +1,170 @@
+"""
+Instrumentation des téléchargements : phases chronométrées et événements typés
+
+Chaque téléchargement est découpé en phases (validate, ffmpeg_probe, cache,
+extract, keyframes, download, cut, finalize). Pour chacune on mesure la
+durée (horloge monotone), les octets transférés et le temps CPU consommé
+par les processus ffmpeg/ffprobe lancés pendant la phase.
+"""
+
+import os
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+
+PhaseStarted = namedtuple("PhaseStarted", ["phase", "time"])
+PhaseFinished = namedtuple("PhaseFinished", ["phase", "time", "elapsed", "bytes", "cpu_seconds", "data"])
+Progress = namedtuple("Progress", ["phase", "time", "downloaded_bytes", "total_bytes", "speed"])
+
+
+def _throughput(nbytes, elapsed):
+    return round(nbytes / elapsed) if nbytes and elapsed > 0 else None
+
+
+class _Phase:
+    def __init__(self, name):
+        self.name = name
+        self.start = time.monotonic()
+        self.bytes = 0
+        self.cpu_seconds = 0.0
+        self.data = {}
+
+
+class Recorder:
+    """
+    Enregistre les phases d'un téléchargement et les diffuse à `on_event`.
+
+    Les événements sont des PhaseStarted, PhaseFinished et Progress ;
+    leur champ `time` vient de time.monotonic().
+    """
+
+    def __init__(self, on_event=None):
+        """
+        Args:
+            on_event: Fonction appelée avec chaque événement (optionnelle)
+        """
+        self.on_event = on_event
+        self.started = time.monotonic()
+        self.finished = None
+        self.phases = []
+        self._current = None
+        self._lock = threading.Lock()
+
+    def emit(self, event):
+        if self.on_event:
+            self.on_event(event)
+
+    @contextmanager
+    def phase(self, name):
+        """Chronomètre le bloc comme phase `name` ; le bloc reçoit la phase en cours"""
+        current = _Phase(name)
+        with self._lock:
+            previous, self._current = self._current, current
+        self.emit(PhaseStarted(name, current.start))
+        try:
+            yield current
+        finally:
+            end = time.monotonic()
+            with self._lock:
+                self._current = previous
+            finished = PhaseFinished(name, end, end - current.start, current.bytes,
+                                     round(current.cpu_seconds, 3), current.data)
+            self.phases.append(finished)
+            self.emit(finished)
+
+    def annotate(self, **data):
+        """Ajoute des informations à la phase en cours"""
+        with self._lock:
+            if self._current is not None:
+                self._current.data.update(data)
+
+    def add_cpu(self, seconds):
+        with self._lock:
+            if self._current is not None:
+                self._current.cpu_seconds += seconds
+
+    def progress(self, d):
+        """Convertit un dictionnaire de progression yt-dlp en événement Progress"""
+        with self._lock:
+            phase = self._current.name if self._current is not None else None
+        self.emit(Progress(phase, time.monotonic(), d.get('downloaded_bytes'),
+                           d.get('total_bytes') or d.get('total_bytes_estimate'), d.get('speed')))
+
+    def finish(self):
+        self.finished = time.monotonic()
+
+    def summary(self):
+        """
+        Résumé sérialisable en JSON
+
+        Returns:
+            dict: Durée totale, octets téléchargés, débit, temps CPU et détail
+            des phases (début relatif, durée, octets, débit, CPU)
+        """
+        end = self.finished or time.monotonic()
+        phases = []
+        for p in self.phases:
+            entry = {
+                "phase": p.phase,
+                "start": round(p.time - p.elapsed - self.started, 3),
+                "elapsed": round(p.elapsed, 3),
+                "bytes": p.bytes,
+                "throughput_bps": _throughput(p.bytes, p.elapsed),
+                "cpu_seconds": p.cpu_seconds,
+            }
+            entry.update(p.data)
+            phases.append(entry)
+        download = [p for p in self.phases if p.phase == "download"]
+        downloaded = sum(p.bytes for p in download)
+        return {
+            "total_seconds": round(end - self.started, 3),
+            "downloaded_bytes": downloaded,
+            "download_throughput_bps": _throughput(downloaded, sum(p.elapsed for p in download)),
+            "cpu_seconds": round(sum(p.cpu_seconds for p in self.phases), 3),
+            "phases": phases,
+        }
+
+
+_local = threading.local()
+
+
+def current_recorder():
+    """Retourne le Recorder actif dans ce thread (None hors de recording)"""
+    return getattr(_local, "recorder", None)
+
+
+@contextmanager
+def recording(recorder):
+    """Rend `recorder` actif dans le thread courant pendant le bloc"""
+    previous = current_recorder()
+    _local.recorder = recorder
+    try:
+        yield recorder
+    finally:
+        _local.recorder = previous
+
+
+class ChildCpuMixin:
+    """
+    Mixin pour Popen : impute le temps CPU du processus fils au Recorder
+    actif lors de sa création (POSIX uniquement, via os.wait4).
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._recorder = current_recorder()
+        super().__init__(*args, **kwargs)
+
+    if hasattr(os, "wait4"):
+        def _try_wait(self, wait_flags):
+            recorder = getattr(self, "_recorder", None)
+            if recorder is None:
+                return super()._try_wait(wait_flags)
+            try:
+                pid, status, usage = os.wait4(self.pid, wait_flags)
+            except ChildProcessError:
+                return self.pid, 0
+            if pid == self.pid:
+                recorder.add_cpu(usage.ru_utime + usage.ru_stime)
+            return pid, status
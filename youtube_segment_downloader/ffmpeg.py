@@ -0,0 +1,252 @@
+"""
+Découverte de ffmpeg et de ses capacités
+
+Le binaire est cherché une fois ($FFMPEG_BINARY, pack PyInstaller, $PATH,
+emplacements courants) puis interrogé (version, encodeurs logiciels,
+muxeurs, protocoles). Le résultat est gardé en mémoire pour le processus
+et sur disque, indexé par le chemin du binaire, sa date de modification
+et sa taille : les appels suivants de la CLI ne relancent pas ffmpeg.
+"""
+
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import threading
+from collections import namedtuple
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from .cutting import get_ffprobe_path
+
+
+FFMPEG_ENV = "FFMPEG_BINARY"
+
+COMMON_PATHS = [
+    '/usr/bin/ffmpeg',
+    '/usr/local/bin/ffmpeg',
+    '/opt/homebrew/bin/ffmpeg',
+    'C:\\ffmpeg\\bin\\ffmpeg.exe',
+    os.path.join(os.path.expanduser('~'), 'bin', 'ffmpeg'),
+]
+
+# Encodeurs matériels : dépendent du GPU présent, pas seulement du binaire
+_HARDWARE_ENCODER_RE = re.compile(
+    r"_(nvenc|qsv|vaapi|videotoolbox|amf|v4l2m2m|mf|omx|vulkan|mediacodec|rkmpp|d3d12va|cuda)$"
+)
+_SCHEMA = 1
+
+
+class FFmpegInfo(namedtuple("FFmpegInfo", ["path", "ffprobe", "version", "encoders", "muxers", "protocols"])):
+    """
+    Capacités d'un binaire ffmpeg
+
+    Attributs:
+        path: Chemin absolu de ffmpeg
+        ffprobe: Chemin de ffprobe associé
+        version: Version annoncée ("6.0", "n7.1"...)
+        encoders: dict encodeur logiciel -> codec ("libx264" -> "h264")
+        muxers: Formats de sortie disponibles
+        protocols: Protocoles disponibles en lecture
+    """
+    __slots__ = ()
+
+    def has_encoder(self, name):
+        return name in self.encoders
+
+    def can_encode(self, codec):
+        """Indique si un encodeur logiciel existe pour `codec`"""
+        return codec in self.encoders.values()
+
+    def can_copy_to(self, container="mp4"):
+        """Indique si des flux peuvent être copiés (-c copy) dans ce conteneur"""
+        return container in self.muxers
+
+    def can_read(self, url):
+        """Indique si ffmpeg/ffprobe sait ouvrir `url` directement"""
+        return (urlsplit(url).scheme or "file") in self.protocols
+
+
+def _bundled_candidates():
+    if hasattr(sys, '_MEIPASS'):
+        for name in ['ffmpeg', 'ffmpeg.exe']:
+            yield str(Path(sys._MEIPASS) / name)
+
+
+def find_ffmpeg(path=None):
+    """
+    Retourne le chemin absolu du binaire ffmpeg
+
+    Ordre de recherche : `path`, $FFMPEG_BINARY, le pack PyInstaller
+    (_MEIPASS), le $PATH, puis les emplacements système courants.
+
+    Args:
+        path: Chemin ou nom de commande imposé (optionnel)
+
+    Returns:
+        str: Chemin absolu de ffmpeg
+
+    Raises:
+        RuntimeError: Si ffmpeg est introuvable
+    """
+    explicit = path or os.environ.get(FFMPEG_ENV)
+    if explicit:
+        candidates = [explicit]
+    else:
+        candidates = [*_bundled_candidates(), 'ffmpeg', *COMMON_PATHS]
+    for candidate in candidates:
+        found = shutil.which(candidate)
+        if found:
+            return os.path.abspath(found)
+    raise RuntimeError(f"FFmpeg introuvable à : {explicit or 'ffmpeg'}. Veuillez l'installer.")
+
+
+def _list(ffmpeg_path, option):
+    result = subprocess.run([ffmpeg_path, "-hide_banner", option], stdout=subprocess.PIPE,
+                            stderr=subprocess.DEVNULL, text=True, errors="replace")
+    if result.returncode != 0:
+        raise RuntimeError(f"FFmpeg inutilisable : {ffmpeg_path} {option} a échoué")
+    return result.stdout
+
+
+def _table(output):
+    """Lignes qui suivent le séparateur ' ---' des listes de ffmpeg"""
+    lines = output.splitlines()
+    for i, line in enumerate(lines):
+        if line.strip().startswith("--"):
+            return [l for l in lines[i + 1:] if l.strip()]
+    return []
+
+
+def parse_encoders(output):
+    """
+    Analyse la sortie de `ffmpeg -encoders`
+
+    Returns:
+        dict: Encodeur logiciel -> codec
+    """
+    encoders = {}
+    for line in _table(output):
+        parts = line.split(None, 2)
+        if len(parts) < 2 or _HARDWARE_ENCODER_RE.search(parts[1]):
+            continue
+        match = re.search(r"\(codec (\w+)\)", line)
+        encoders[parts[1]] = match.group(1) if match else parts[1]
+    return encoders
+
+
+def parse_muxers(output):
+    """Analyse la sortie de `ffmpeg -muxers` (liste des noms de formats)"""
+    muxers = []
+    for line in _table(output):
+        parts = line.split(None, 2)
+        if len(parts) >= 2 and "E" in parts[0]:
+            muxers.extend(parts[1].split(","))
+    return muxers
+
+
+def parse_protocols(output):
+    """Analyse la sortie de `ffmpeg -protocols` (protocoles en lecture)"""
+    protocols = []
+    reading = False
+    for line in output.splitlines():
+        name = line.strip()
+        if name.endswith(":"):
+            reading = name == "Input:"
+        elif reading and name:
+            protocols.append(name)
+    return protocols
+
+
+def _probe(ffmpeg_path):
+    first = _list(ffmpeg_path, "-version").splitlines()
+    match = re.match(r"\S+ version (\S+)", first[0]) if first else None
+    return FFmpegInfo(
+        path=ffmpeg_path,
+        ffprobe=get_ffprobe_path(ffmpeg_path),
+        version=match.group(1) if match else None,
+        encoders=parse_encoders(_list(ffmpeg_path, "-encoders")),
+        muxers=parse_muxers(_list(ffmpeg_path, "-muxers")),
+        protocols=parse_protocols(_list(ffmpeg_path, "-protocols")),
+    )
+
+
+def _signature(path):
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def _default_cache_file():
+    from .cache import default_cache_dir
+    return default_cache_dir() / "ffmpeg.json"
+
+
+def _read_cache(cache_file):
+    try:
+        data = json.loads(Path(cache_file).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) and data.get("schema") == _SCHEMA else {}
+
+
+def _write_cache(cache_file, data):
+    cache_file = Path(cache_file)
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = cache_file.with_name(f".{cache_file.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(data), encoding="utf-8")
+        os.replace(tmp, cache_file)
+    except OSError:
+        # Cache en lecture seule : on refera la détection au prochain lancement
+        pass
+
+
+_probed = {}
+_probe_lock = threading.Lock()
+
+
+def probe_ffmpeg(path=None, cache_file=None):
+    """
+    Trouve ffmpeg et retourne ses capacités, sans relancer ffmpeg si elles
+    sont déjà connues (en mémoire ou sur disque) pour ce binaire
+
+    Args:
+        path: Chemin ou nom de commande imposé (voir find_ffmpeg)
+        cache_file: Fichier JSON du cache disque (défaut : ffmpeg.json dans
+            le répertoire de cache ; False : pas de cache disque)
+
+    Returns:
+        FFmpegInfo: Capacités du binaire
+
+    Raises:
+        RuntimeError: Si ffmpeg est introuvable ou inutilisable
+    """
+    ffmpeg_path = find_ffmpeg(path)
+    real_path = os.path.realpath(ffmpeg_path)
+    signature = _signature(real_path)
+    with _probe_lock:
+        known = _probed.get(ffmpeg_path)
+        if known is not None and known[0] == signature:
+            return known[1]
+
+        if cache_file is None:
+            cache_file = _default_cache_file()
+        data = _read_cache(cache_file) if cache_file else {}
+        entry = data.get("binaries", {}).get(real_path)
+        if entry and entry.get("signature") == signature and entry.get("path") == ffmpeg_path:
+            info = FFmpegInfo(**entry["info"])
+        else:
+            try:
+                info = _probe(ffmpeg_path)
+            except OSError as e:
+                raise RuntimeError(f"FFmpeg inutilisable : {ffmpeg_path} ({e})")
+            if cache_file:
+                data = _read_cache(cache_file) or {"schema": _SCHEMA}
+                data.setdefault("binaries", {})[real_path] = {
+                    "path": ffmpeg_path, "signature": signature, "info": info._asdict(),
+                }
+                _write_cache(cache_file, data)
+        _probed[ffmpeg_path] = (signature, info)
+        return info
@@ -0,0 +1,481 @@
+"""
+File de jobs persistante : reprise des téléchargements interrompus
+
+Chaque job (URL, bornes, sortie, options) est enregistré dans une base
+SQLite (mode WAL) avant de démarrer. Pendant son exécution, les flux passent
+par le proxy local et les octets reçus de chacun sont copiés sur disque
+(ranges.Spool) au fil des morceaux ; la base garde l'état du job, les
+formats choisis, les intervalles reçus de chaque flux et les fichiers
+intermédiaires. Si le processus meurt, `resume` relance le job : les octets
+déjà reçus sont relus localement et seul le reste est téléchargé. Un
+passage de `gc` supprime les fichiers intermédiaires périmés.
+"""
+
+import json
+import os
+import re
+import shutil
+import socket
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from pathlib import Path
+
+from .audio import AudioFormat
+from .cache import default_cache_dir
+from .quality import QualityPolicy
+from .ranges import Spool
+
+
+JOB_STATES = ("pending", "running", "done", "failed", "cancelled", "interrupted")
+# Options de download enregistrées avec le job
+JOB_OPTIONS = ("use_cache", "cut_mode", "parallel_ranges", "engine", "quality", "audio")
+# Âge au-delà duquel gc supprime les fichiers intermédiaires d'un job arrêté
+DEFAULT_GC_AGE = 24 * 3600
+
+Job = namedtuple("Job", ["id", "url", "start_time", "end_time", "output_file", "options", "state", "error",
+                         "attempts", "streams", "partials", "created", "updated"])
+# Un flux d'un job : format choisi, taille totale et octets déjà reçus
+JobStream = namedtuple("JobStream", ["format_id", "total", "bytes"])
+GcStats = namedtuple("GcStats", ["jobs", "files", "bytes"])
+
+_HOST = socket.gethostname()
+_local = threading.local()
+# (base, job) exécutés par ce processus : un PID peut être réattribué, et
+# plusieurs JobStore du processus peuvent partager une base
+_running = set()
+_running_lock = threading.Lock()
+
+
+def current_job():
+    """Retourne le job en cours d'exécution dans ce thread (None hors de JobStore.run)"""
+    return getattr(_local, "job", None)
+
+
+@contextmanager
+def _job_scope(job):
+    previous = current_job()
+    _local.job = job
+    try:
+        yield job
+    finally:
+        _local.job = previous
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        # PermissionError : le processus existe mais appartient à un autre utilisateur
+        return True
+    return True
+
+
+def _path_size(path):
+    if path.is_dir():
+        return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+    return path.stat().st_size
+
+
+def _remove(path):
+    """Supprime un fichier ou un répertoire ; retourne les octets libérés"""
+    path = Path(path)
+    try:
+        size = _path_size(path)
+        if path.is_dir():
+            shutil.rmtree(path)
+        else:
+            path.unlink()
+    except OSError:
+        return 0
+    return size
+
+
+class _ActiveJob:
+    """Job en cours : fournit les Spool de ses flux et note ses fichiers intermédiaires"""
+
+    def __init__(self, store, job_id):
+        self.store = store
+        self.job_id = job_id
+        self._spools = {}
+        self._lock = threading.Lock()
+
+    def spool(self, format_id):
+        """Spool du flux `format_id`, rechargé depuis la base s'il a déjà reçu des octets"""
+        format_id = format_id or "default"
+        with self._lock:
+            spool = self._spools.get(format_id)
+            if spool is None:
+                intervals, total = self.store._stream_state(self.job_id, format_id)
+                path = self.store.spool_dir(self.job_id) / (re.sub(r"[^\w.-]", "_", format_id) + ".spool")
+                spool = Spool(path, intervals, total,
+                              on_write=lambda s: self.store._save_stream(self.job_id, format_id, s))
+                self._spools[format_id] = spool
+            return spool
+
+    def track(self, path):
+        """Note un fichier ou répertoire intermédiaire à supprimer si le job est abandonné"""
+        self.store._add_partial(self.job_id, path)
+
+
+class JobStore:
+    """
+    Jobs de téléchargement persistants, repris après une interruption.
+
+    Exemple:
+        store = JobStore()
+        job_id = store.submit(url, "1:00:00", "3:00:00", "long.mp4", cut_mode="keyframe")
+        result = store.run(job_id)
+        # Après un arrêt brutal, dans un autre processus :
+        for job, result in JobStore().resume():
+            print(job.id, bool(result))
+
+    L'objet peut être partagé entre threads ; plusieurs processus peuvent
+    utiliser la même base.
+    """
+
+    def __init__(self, directory=None):
+        """
+        Args:
+            directory: Répertoire de la base et des copies des flux
+                (default_cache_dir()/jobs par défaut)
+        """
+        self.directory = Path(directory) if directory else default_cache_dir() / "jobs"
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.directory / "jobs.sqlite3"), timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " url TEXT NOT NULL,"
+                " start_time TEXT NOT NULL,"
+                " end_time TEXT NOT NULL,"
+                " output_file TEXT NOT NULL,"
+                " options TEXT NOT NULL,"
+                " state TEXT NOT NULL,"
+                " error TEXT,"
+                " attempts INTEGER NOT NULL DEFAULT 0,"
+                " host TEXT,"
+                " pid INTEGER,"
+                " created REAL NOT NULL,"
+                " updated REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS streams ("
+                " job_id INTEGER NOT NULL,"
+                " format_id TEXT NOT NULL,"
+                " total INTEGER,"
+                " intervals TEXT NOT NULL,"
+                " bytes INTEGER NOT NULL,"
+                " PRIMARY KEY (job_id, format_id))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS partials ("
+                " job_id INTEGER NOT NULL,"
+                " path TEXT NOT NULL,"
+                " PRIMARY KEY (job_id, path))"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def spool_dir(self, job_id):
+        """Répertoire des copies des flux d'un job"""
+        return self.directory / str(job_id)
+
+    def submit(self, url, start_time, end_time, output_file=None, **options):
+        """
+        Enregistre un job sans le lancer
+
+        Args:
+            url: URL de la vidéo YouTube
+            start_time: Temps de début ("MM:SS" ou "HH:MM:SS")
+            end_time: Temps de fin ("MM:SS" ou "HH:MM:SS")
+            output_file: Fichier de sortie (chemin absolu enregistré : la
+                reprise peut se faire depuis un autre répertoire)
+            **options: Options de download (use_cache, cut_mode,
+                parallel_ranges, engine, quality, audio)
+
+        Returns:
+            int: Identifiant du job
+
+        Raises:
+            ValueError: Si une option n'est pas enregistrable
+        """
+        from .downloader import _default_output
+
+        unknown = set(options) - set(JOB_OPTIONS)
+        if unknown:
+            raise ValueError(f"Option non prise en charge par les jobs : {', '.join(sorted(unknown))}")
+        if options.get("quality") is not None:
+            # La politique de qualité est enregistrée champ par champ
+            options["quality"] = options["quality"]._asdict()
+        audio = options.get("audio")
+        if audio is not None:
+            options["audio"] = audio._asdict()
+        output_file = os.path.abspath(output_file or _default_output(start_time, end_time, audio))
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            cursor = conn.execute(
+                "INSERT INTO jobs (url, start_time, end_time, output_file, options, state, created, updated)"
+                " VALUES (?, ?, ?, ?, ?, 'pending', ?, ?)",
+                (url, start_time, end_time, output_file, json.dumps(options), now, now)
+            )
+            conn.commit()
+            return cursor.lastrowid
+
+    def _job(self, conn, row):
+        job_id = row[0]
+        streams = [JobStream(*r) for r in conn.execute(
+            "SELECT format_id, total, bytes FROM streams WHERE job_id = ? ORDER BY format_id", (job_id,))]
+        partials = [r[0] for r in conn.execute("SELECT path FROM partials WHERE job_id = ? ORDER BY path",
+                                               (job_id,))]
+        return Job(job_id, row[1], row[2], row[3], row[4], json.loads(row[5]), row[6], row[7], row[8],
+                   streams, partials, row[9], row[10])
+
+    _COLUMNS = "id, url, start_time, end_time, output_file, options, state, error, attempts, created, updated"
+
+    def get(self, job_id):
+        """
+        Returns:
+            Job: Job enregistré, ou None s'il n'existe pas
+        """
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(f"SELECT {self._COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            return self._job(conn, row) if row else None
+
+    def jobs(self, states=None):
+        """
+        Liste les jobs, après avoir marqué "interrupted" ceux dont le processus est mort
+
+        Args:
+            states: États à retenir (tous par défaut, voir JOB_STATES)
+
+        Returns:
+            list[Job]: Jobs par identifiant croissant
+        """
+        self._detect_interrupted()
+        with self._lock:
+            conn = self._connect()
+            rows = conn.execute(f"SELECT {self._COLUMNS} FROM jobs ORDER BY id").fetchall()
+            return [self._job(conn, row) for row in rows if states is None or row[6] in states]
+
+    def _detect_interrupted(self):
+        """Passe en "interrupted" les jobs "running" de cette machine dont le processus a disparu"""
+        with self._lock:
+            conn = self._connect()
+            for job_id, pid in conn.execute(
+                    "SELECT id, pid FROM jobs WHERE state = 'running' AND host = ?", (_HOST,)).fetchall():
+                if pid == os.getpid() and self._is_running(job_id):
+                    continue
+                if pid != os.getpid() and _pid_alive(pid):
+                    continue
+                conn.execute("UPDATE jobs SET state = 'interrupted', updated = ? WHERE id = ?",
+                             (time.time(), job_id))
+            conn.commit()
+
+    def _claim(self, job_id):
+        """Passe le job en "running" pour ce processus, s'il n'est ni terminé ni déjà en cours"""
+        self._detect_interrupted()
+        with self._lock:
+            conn = self._connect()
+            cursor = conn.execute(
+                "UPDATE jobs SET state = 'running', host = ?, pid = ?, attempts = attempts + 1, error = NULL,"
+                " updated = ? WHERE id = ? AND state IN ('pending', 'interrupted', 'failed', 'cancelled')",
+                (_HOST, os.getpid(), time.time(), job_id)
+            )
+            conn.commit()
+        if cursor.rowcount:
+            with _running_lock:
+                _running.add((str(self.directory), job_id))
+        return bool(cursor.rowcount)
+
+    def _is_running(self, job_id):
+        with _running_lock:
+            return (str(self.directory), job_id) in _running
+
+    def _finish(self, job_id, state, error=None):
+        with self._lock:
+            conn = self._connect()
+            conn.execute("UPDATE jobs SET state = ?, error = ?, pid = NULL, updated = ? WHERE id = ?",
+                         (state, error, time.time(), job_id))
+            if state == "done":
+                # Plus rien à reprendre : les copies des flux sont inutiles
+                conn.execute("DELETE FROM streams WHERE job_id = ?", (job_id,))
+                conn.execute("DELETE FROM partials WHERE job_id = ?", (job_id,))
+            conn.commit()
+        with _running_lock:
+            _running.discard((str(self.directory), job_id))
+        if state == "done":
+            _remove(self.spool_dir(job_id))
+
+    def _stream_state(self, job_id, format_id):
+        with self._lock:
+            row = self._connect().execute("SELECT intervals, total FROM streams WHERE job_id = ? AND format_id = ?",
+                                          (job_id, format_id)).fetchone()
+        return (json.loads(row[0]), row[1]) if row else ([], None)
+
+    def _save_stream(self, job_id, format_id, spool):
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO streams (job_id, format_id, total, intervals, bytes) VALUES (?, ?, ?, ?, ?)",
+                (job_id, format_id, spool.total, json.dumps(spool.intervals),
+                 sum(end - start + 1 for start, end in spool.intervals))
+            )
+            conn.execute("UPDATE jobs SET updated = ? WHERE id = ?", (time.time(), job_id))
+            conn.commit()
+
+    def _add_partial(self, job_id, path):
+        with self._lock:
+            conn = self._connect()
+            conn.execute("INSERT OR IGNORE INTO partials (job_id, path) VALUES (?, ?)",
+                         (job_id, os.path.abspath(path)))
+            conn.commit()
+
+    def run(self, job_id, session=None, verbose=True, logger=None, progress_hook=None, cancel=None, on_event=None):
+        """
+        Exécute (ou reprend) un job
+
+        Les octets déjà reçus lors d'une exécution précédente sont relus
+        depuis la copie locale de chaque flux.
+
+        Args:
+            job_id: Identifiant du job
+            session: SegmentDownloader à utiliser (session partagée par défaut)
+            verbose, logger, progress_hook, cancel, on_event: Voir download_segment
+
+        Returns:
+            SegmentResult: Résultat (évalué à True en cas de succès)
+
+        Raises:
+            ValueError: Si le job n'existe pas, est terminé ou déjà en cours
+        """
+        from .downloader import _remove_partial_files, get_default_session
+
+        job = self.get(job_id)
+        if job is None:
+            raise ValueError(f"Job inconnu : {job_id}")
+        if not self._claim(job_id):
+            raise ValueError(f"Job {job_id} déjà terminé ou en cours ({job.state})")
+        if job.attempts:
+            # Fichiers temporaires laissés par yt-dlp lors de l'exécution précédente
+            _remove_partial_files(job.output_file, keep_output=True)
+        session = session or get_default_session()
+        options = dict(job.options)
+        if options.get("quality") is not None:
+            options["quality"] = QualityPolicy(**options["quality"])
+        if options.get("audio") is not None:
+            options["audio"] = AudioFormat(**options["audio"])
+        state, error = "interrupted", None
+        try:
+            with _job_scope(_ActiveJob(self, job_id)):
+                result = session.download(job.url, job.start_time, job.end_time, job.output_file, verbose=verbose,
+                                          logger=logger, progress_hook=progress_hook, cancel=cancel,
+                                          on_event=on_event, **options)
+            state = "done" if result else "cancelled" if result.cancelled else "failed"
+            error = result.error
+        finally:
+            # Une exception (KeyboardInterrupt...) laisse le job reprenable
+            self._finish(job_id, state, error)
+        return result
+
+    def download(self, url, start_time, end_time, output_file=None, verbose=True, logger=None, progress_hook=None,
+                 cancel=None, on_event=None, session=None, **options):
+        """
+        Enregistre puis exécute un job (même signature que download_segment,
+        utilisable comme fonction de téléchargement de batch.run_batch)
+
+        Returns:
+            SegmentResult: Résultat (évalué à True en cas de succès)
+        """
+        job_id = self.submit(url, start_time, end_time, output_file, **options)
+        return self.run(job_id, session, verbose, logger, progress_hook, cancel, on_event)
+
+    def resume(self, job_ids=None, session=None, verbose=True, logger=None, progress_hook=None, cancel=None,
+               on_event=None):
+        """
+        Reprend des jobs l'un après l'autre
+
+        Args:
+            job_ids: Jobs à reprendre (par défaut tous les jobs "pending" et
+                "interrupted" ; les jobs "failed" et "cancelled" ne sont
+                repris que s'ils sont désignés)
+            session, verbose, logger, progress_hook, cancel, on_event: Voir run
+
+        Returns:
+            list: (Job, SegmentResult) par job repris
+        """
+        if job_ids is None:
+            job_ids = [job.id for job in self.jobs(("pending", "interrupted"))]
+        results = []
+        for job_id in job_ids:
+            if cancel is not None and cancel.cancelled:
+                break
+            job = self.get(job_id)
+            results.append((job, self.run(job_id, session, verbose, logger, progress_hook, cancel, on_event)))
+        return results
+
+    def gc(self, max_age=DEFAULT_GC_AGE):
+        """
+        Supprime les fichiers intermédiaires périmés
+
+        Sont supprimés : les copies des flux et les fichiers intermédiaires
+        (dont les .part de yt-dlp à côté de la sortie) des jobs arrêtés
+        depuis plus de `max_age` secondes, qui repartiront de zéro s'ils
+        sont repris ; les répertoires de copies sans job ; les jobs
+        terminés depuis plus de `max_age` secondes.
+
+        Args:
+            max_age: Âge minimal (secondes depuis la dernière activité)
+
+        Returns:
+            GcStats: Jobs nettoyés, fichiers supprimés et octets libérés
+        """
+        self._detect_interrupted()
+        limit = time.time() - max_age
+        jobs = files = freed = 0
+        with self._lock:
+            conn = self._connect()
+            stale = conn.execute(
+                "SELECT id, output_file, state FROM jobs WHERE state != 'running' AND updated < ?", (limit,)
+            ).fetchall()
+            for job_id, output_file, state in stale:
+                paths = [Path(r[0]) for r in conn.execute("SELECT path FROM partials WHERE job_id = ?", (job_id,))]
+                output = Path(output_file)
+                paths += [p for p in output.parent.glob(output.name + ".*")
+                          if p.name.endswith((".part", ".ytdl")) or ".part-Frag" in p.name]
+                paths.append(self.spool_dir(job_id))
+                for path in paths:
+                    if path.exists():
+                        freed += _remove(path)
+                        files += 1
+                conn.execute("DELETE FROM streams WHERE job_id = ?", (job_id,))
+                conn.execute("DELETE FROM partials WHERE job_id = ?", (job_id,))
+                if state == "done":
+                    conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+                jobs += 1
+            known = {str(r[0]) for r in conn.execute("SELECT id FROM jobs")}
+            conn.commit()
+        for path in self.directory.iterdir():
+            if path.is_dir() and path.name not in known:
+                freed += _remove(path)
+                files += 1
+        return GcStats(jobs, files, freed)
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
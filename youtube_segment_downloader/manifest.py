@@ -0,0 +1,84 @@
+"""
+Lecture des manifestes (lots de segments, listes de repères) : noms de
+champs acceptés, lignes CSV et horodatages
+"""
+
+import csv
+
+
+# Noms de colonnes / clés acceptés pour chaque champ
+FIELD_ALIASES = {
+    "url": ("url",),
+    "start": ("start", "start_time", "debut", "début"),
+    "end": ("end", "end_time", "fin"),
+    "output": ("output", "output_file", "sortie"),
+    "title": ("title", "titre", "name", "nom"),
+}
+
+
+def pick_field(row, field):
+    """
+    Valeur d'un champ d'une ligne, sous l'un de ses noms acceptés
+
+    Args:
+        row: Ligne du manifeste (dictionnaire)
+        field: Champ cherché (clé de FIELD_ALIASES)
+
+    Returns:
+        Première valeur non vide (les chaînes sans leurs espaces), ou None
+    """
+    for name in FIELD_ALIASES[field]:
+        value = row.get(name)
+        if value not in (None, ""):
+            return value.strip() if isinstance(value, str) else value
+    return None
+
+
+def read_csv_rows(path, columns):
+    """
+    Lit les lignes d'un CSV sous forme de dictionnaires
+
+    Les lignes vides ou commençant par # sont ignorées. Une première ligne
+    qui nomme la première colonne attendue (sous l'un de ses noms acceptés)
+    sert d'en-tête ; sinon les colonnes sont lues dans l'ordre de `columns`.
+
+    Args:
+        path: Chemin du fichier CSV
+        columns: Champs des colonnes d'un CSV sans en-tête
+
+    Returns:
+        list[dict]: Lignes de données
+    """
+    with open(path, encoding="utf-8", newline="") as f:
+        rows = [r for r in csv.reader(f) if r and not r[0].lstrip().startswith("#")]
+    header = [c.strip().lower() for c in rows[0]] if rows else []
+    if set(header) & set(FIELD_ALIASES[columns[0]]):
+        return [dict(zip(header, r)) for r in rows[1:]]
+    return [dict(zip(columns, r)) for r in rows]
+
+
+def parse_timestamp(value):
+    """
+    Convertit un horodatage en secondes
+
+    Formats acceptés : nombre de secondes, "SS.mmm", "MM:SS(.mmm)" ou
+    "HH:MM:SS(.mmm)" (la virgule décimale est tolérée)
+
+    Returns:
+        float: Secondes
+
+    Raises:
+        ValueError: Si l'horodatage est invalide
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    parts = str(value).strip().replace(",", ".").split(":")
+    try:
+        if len(parts) > 3 or any(p == "" for p in parts):
+            raise ValueError
+        seconds = float(parts[-1])
+        for i, part in enumerate(reversed(parts[:-1])):
+            seconds += int(part) * 60 ** (i + 1)
+    except ValueError:
+        raise ValueError(f"Horodatage invalide : {value}")
+    return seconds
@@ -0,0 +1,278 @@
+"""
+Pipeline à deux étages : téléchargements (limités par le réseau) et découpes
+(limitées par le CPU) sur deux pools de threads séparés
+
+Chaque segment est d'abord téléchargé en copie alignée sur les images clés,
+sans ré-encodage, puis découpé localement (ré-encodage, smart cut ou simple
+déplacement). Un ré-encodage n'occupe ainsi jamais un worker réseau, et le
+CPU travaille pendant que d'autres téléchargements attendent le réseau.
+
+Les extraits en attente de découpe occupent le disque : la file entre les
+deux étages est bornée en nombre d'extraits et en octets, et un worker
+réseau ne commence pas de nouveau téléchargement tant qu'elle est pleine.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from .cancel import cancel_scope
+from .downloader import SegmentDownloader, _record_selection
+from .events import Recorder, recording
+
+
+# Octets d'extraits téléchargés mais pas encore découpés, au-delà desquels
+# les workers réseau attendent
+DEFAULT_MAX_PENDING_BYTES = 2 * 1024 * 1024 * 1024
+
+
+def physical_cores():
+    """
+    Nombre de cœurs physiques utilisables (hyperthreading exclu)
+
+    Lu dans /proc/cpuinfo sous Linux, borné par l'affinité du processus ;
+    os.cpu_count() ailleurs.
+
+    Returns:
+        int: Nombre de cœurs (au moins 1)
+    """
+    logical = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+    cores = set()
+    try:
+        with open("/proc/cpuinfo", encoding="utf-8") as f:
+            physical = core = None
+            for line in list(f) + [""]:
+                key, _, value = line.partition(":")
+                key = key.strip()
+                if key == "physical id":
+                    physical = value.strip()
+                elif key == "core id":
+                    core = value.strip()
+                elif not key and core is not None:
+                    cores.add((physical, core))
+                    physical = core = None
+    except OSError:
+        pass
+    return max(1, min(len(cores), logical) if cores else logical)
+
+
+def _clip_size(staged):
+    # Un extrait servi par le cache n'occupe pas de place supplémentaire
+    if staged.clip is None or staged.workdir is None:
+        return 0
+    try:
+        return os.path.getsize(staged.clip.path)
+    except OSError:
+        return 0
+
+
+class Pipeline:
+    """
+    Téléchargements de segments en deux étages (réseau puis CPU).
+
+    Exemple:
+        with Pipeline(network_workers=8) as pipeline:
+            futures = [pipeline.submit(url, début, fin, sortie) for url, début, fin, sortie in segments]
+            results = [f.result() for f in futures]
+            print(pipeline.stats())
+    """
+
+    def __init__(self, session=None, network_workers=4, cpu_workers=None, max_pending=None,
+                 max_pending_bytes=DEFAULT_MAX_PENDING_BYTES):
+        """
+        Args:
+            session: SegmentDownloader à utiliser (par défaut une session
+                dédiée de network_workers instances, fermée avec le pipeline)
+            network_workers: Nombre de téléchargements simultanés
+            cpu_workers: Nombre de découpes simultanées (cœurs physiques par
+                défaut, voir physical_cores)
+            max_pending: Nombre maximal de segments entre le début de leur
+                téléchargement et la fin de leur découpe (par défaut
+                network_workers + cpu_workers)
+            max_pending_bytes: Taille cumulée des extraits en attente de
+                découpe au-delà de laquelle aucun téléchargement ne démarre
+                (la taille d'un extrait n'étant connue qu'une fois
+                téléchargé, elle peut être dépassée d'au plus
+                network_workers extraits)
+        """
+        cpu_workers = physical_cores() if cpu_workers is None else cpu_workers
+        if network_workers < 1 or cpu_workers < 1:
+            raise ValueError("Chaque étage doit avoir au moins 1 worker")
+        max_pending = network_workers + cpu_workers if max_pending is None else max_pending
+        if max_pending < 1:
+            raise ValueError("max_pending doit être au moins 1")
+        if max_pending_bytes <= 0:
+            raise ValueError("max_pending_bytes doit être positif")
+        self.network_workers = network_workers
+        self.cpu_workers = cpu_workers
+        self.max_pending = max_pending
+        self.max_pending_bytes = max_pending_bytes
+        self._own_session = session is None
+        self.session = SegmentDownloader(max_instances=network_workers) if session is None else session
+        self._network = ThreadPoolExecutor(network_workers, thread_name_prefix="yt-segment-network")
+        self._cpu = ThreadPoolExecutor(cpu_workers, thread_name_prefix="yt-segment-cpu")
+        self._space = threading.Condition()
+        self._closed = False
+        self._pending = 0
+        self._pending_bytes = 0
+        self._in_flight = 0
+        self._started = None
+        self._last_done = None
+        self._stages = {name: {"jobs": 0, "busy_seconds": 0.0, "cpu_seconds": 0.0} for name in ("network", "cpu")}
+        self._queue = {"peak_pending": 0, "peak_pending_bytes": 0, "blocked_seconds": 0.0, "waiting_seconds": 0.0}
+
+    def submit(self, url, start_time, end_time, output_file=None, verbose=False, logger=None, progress_hook=None,
+               use_cache=True, cut_mode="precise", parallel_ranges=1, cancel=None, on_event=None, engine="ytdlp",
+               quality=None):
+        """
+        Ajoute un segment au pipeline
+
+        Voir download_segment pour la description des arguments (la sortie
+        en flux n'est pas disponible : les découpes se font sur disque).
+
+        Returns:
+            concurrent.futures.Future: Futur du SegmentResult, résolu à la
+            fin de la découpe
+
+        Raises:
+            RuntimeError: Si le pipeline est fermé
+        """
+        with self._space:
+            if self._closed:
+                raise RuntimeError("Le pipeline est fermé")
+            if self._started is None:
+                self._started = time.monotonic()
+            self._in_flight += 1
+        future = Future()
+        args = (url, start_time, end_time, output_file, verbose, logger, progress_hook, use_cache, cut_mode,
+                parallel_ranges, engine, quality)
+        self._network.submit(self._fetch, future, args, cancel, on_event)
+        return future
+
+    def _reserve(self):
+        """Attend une place dans la file entre les étages (contre-pression)"""
+        with self._space:
+            started = time.monotonic()
+            # Tant qu'un extrait occupe la file, une découpe finira par la libérer
+            while self._pending >= self.max_pending or self._pending_bytes >= self.max_pending_bytes:
+                self._space.wait()
+            self._queue["blocked_seconds"] += time.monotonic() - started
+            self._pending += 1
+            self._queue["peak_pending"] = max(self._queue["peak_pending"], self._pending)
+
+    def _release(self, size):
+        with self._space:
+            self._pending -= 1
+            self._pending_bytes -= size
+            self._space.notify_all()
+
+    def _account(self, stage, started, recorder, first_phase):
+        with self._space:
+            stats = self._stages[stage]
+            stats["jobs"] += 1
+            stats["busy_seconds"] += time.monotonic() - started
+            stats["cpu_seconds"] += sum(p.cpu_seconds for p in recorder.phases[first_phase:])
+
+    def _finish(self, future, result, recorder):
+        recorder.finish()
+        result.stats = recorder.summary()
+        _record_selection([result], recorder)
+        with self._space:
+            self._in_flight -= 1
+            self._last_done = time.monotonic()
+        future.set_result(result)
+
+    def _fail(self, future, error):
+        with self._space:
+            self._in_flight -= 1
+            self._last_done = time.monotonic()
+        future.set_exception(error)
+
+    def _fetch(self, future, args, cancel, on_event):
+        verbose, logger = args[4], args[5]
+        self._reserve()
+        size = 0
+        try:
+            recorder = Recorder(on_event)
+            started = time.monotonic()
+            with cancel_scope(cancel), recording(recorder):
+                staged = self.session._fetch_stage(*args, recorder)
+            self._account("network", started, recorder, 0)
+            if staged.clip is None:
+                self._release(0)
+                self._finish(future, staged.result, recorder)
+                return
+            size = _clip_size(staged)
+            with self._space:
+                self._pending_bytes += size
+                self._queue["peak_pending_bytes"] = max(self._queue["peak_pending_bytes"], self._pending_bytes)
+            self._cpu.submit(self._cut, future, staged, size, time.monotonic(), verbose, logger, cancel, recorder)
+        except BaseException as e:
+            self._release(size)
+            self._fail(future, e)
+
+    def _cut(self, future, staged, size, queued, verbose, logger, cancel, recorder):
+        started = time.monotonic()
+        first_phase = len(recorder.phases)
+        try:
+            with cancel_scope(cancel), recording(recorder):
+                result = self.session._cut_stage(staged, verbose, logger, recorder)
+        except BaseException as e:
+            self._release(size)
+            self._fail(future, e)
+            return
+        with self._space:
+            self._queue["waiting_seconds"] += started - queued
+        self._account("cpu", started, recorder, first_phase)
+        self._release(size)
+        self._finish(future, result, recorder)
+
+    def stats(self):
+        """
+        Utilisation des deux étages depuis le premier segment soumis
+
+        Returns:
+            dict: "elapsed_seconds" ; pour chaque étage ("network", "cpu") :
+            workers, segments traités, secondes occupées, taux d'occupation
+            (secondes occupées / (workers × durée)) et temps CPU des
+            processus ffmpeg ; pour la file ("queue") : bornes, pics,
+            attente cumulée des extraits avant découpe et temps passé par
+            les workers réseau à attendre de la place
+        """
+        with self._space:
+            if self._started is None:
+                elapsed = 0.0
+            else:
+                end = time.monotonic() if self._in_flight or self._last_done is None else self._last_done
+                elapsed = end - self._started
+            stats = {"elapsed_seconds": round(elapsed, 3)}
+            for name, workers in (("network", self.network_workers), ("cpu", self.cpu_workers)):
+                stage = self._stages[name]
+                stats[name] = {
+                    "workers": workers,
+                    "jobs": stage["jobs"],
+                    "busy_seconds": round(stage["busy_seconds"], 3),
+                    "utilisation": round(stage["busy_seconds"] / (workers * elapsed), 3) if elapsed > 0 else 0.0,
+                    "cpu_seconds": round(stage["cpu_seconds"], 3),
+                }
+            stats["queue"] = dict({key: round(value, 3) if isinstance(value, float) else value
+                                   for key, value in self._queue.items()},
+                                  max_pending=self.max_pending, max_pending_bytes=self.max_pending_bytes)
+        return stats
+
+    def close(self):
+        """Attend la fin des segments soumis puis libère les pools (et la session dédiée)"""
+        with self._space:
+            self._closed = True
+        # Les workers réseau soumettent aux workers CPU : ils s'arrêtent en premier
+        self._network.shutdown(wait=True)
+        self._cpu.shutdown(wait=True)
+        if self._own_session:
+            self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
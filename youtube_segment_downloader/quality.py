@@ -0,0 +1,162 @@
+"""
+Politique de qualité : choix des formats d'après des plafonds
+
+Sans politique, le sélecteur DEFAULT_FORMAT prend la meilleure vidéo MP4,
+même en 4K pour un aperçu en 480p. Une QualityPolicy fixe des plafonds
+(définition, débit total, taille estimée du segment) et un codec préféré ;
+parmi les combinaisons vidéo + audio (ou flux muxés) qui les respectent,
+on retient la meilleure définition, puis :
+
+- le codec préféré ;
+- les flux lisibles par requêtes HTTP Range (les manifestes HLS/DASH
+  coûtent une requête par fragment) ;
+- les flux copiables tels quels dans un MP4 (H.264/H.265/AV1 et AAC) ;
+- enfin la combinaison la moins chère en octets.
+
+La taille d'un segment est estimée d'après le débit annoncé du format
+(tbr, en kbit/s), ou d'après sa taille totale rapportée à la durée de la
+vidéo.
+"""
+
+from collections import namedtuple
+
+
+# Familles de codecs (préfixe du codec annoncé par yt-dlp -> nom canonique)
+CODEC_FAMILIES = (
+    ("avc", "h264"), ("h264", "h264"),
+    ("hev", "h265"), ("hvc", "h265"), ("h265", "h265"),
+    ("av01", "av1"), ("av1", "av1"),
+    ("vp09", "vp9"), ("vp9", "vp9"),
+    ("vp8", "vp8"),
+    ("mp4a", "aac"), ("aac", "aac"),
+    ("opus", "opus"),
+)
+# Codecs vidéo acceptés par --prefer-codec
+VIDEO_CODECS = ("h264", "h265", "av1", "vp9")
+# Codecs copiés tels quels dans un MP4 (comme DEFAULT_FORMAT : mp4 + m4a)
+MP4_CODECS = ("h264", "h265", "av1", "aac")
+
+
+def codec_family(codec):
+    """
+    Nom canonique d'un codec ("avc1.640028" -> "h264")
+
+    Returns:
+        str: Famille du codec, None si le flux n'existe pas ("none")
+    """
+    if not codec or codec == "none":
+        return None
+    codec = codec.lower()
+    for prefix, family in CODEC_FAMILIES:
+        if codec.startswith(prefix):
+            return family
+    return codec.split(".")[0]
+
+
+def _has_video(fmt):
+    # Les planches d'aperçu (storyboards) ont une hauteur mais vcodec "none"
+    return fmt.get('vcodec') != 'none' and bool(fmt.get('vcodec') or fmt.get('height'))
+
+
+def _has_audio(fmt):
+    return fmt.get('acodec') not in (None, 'none')
+
+
+def _bitrate(fmt, duration):
+    """Débit du format en kbit/s (None si inconnu)"""
+    rate = fmt.get('tbr') or (fmt.get('vbr') or 0) + (fmt.get('abr') or 0)
+    if rate:
+        return rate
+    size = fmt.get('filesize') or fmt.get('filesize_approx')
+    if size and duration:
+        return size * 8 / 1000 / duration
+    return None
+
+
+# Formats retenus pour un segment : identifiant yt-dlp ("137+140"), formats
+# (vidéo en premier), définition et estimation des octets du segment
+Selection = namedtuple("Selection", ["format_id", "formats", "height", "bitrate", "estimated_bytes"])
+
+
+class QualityPolicy(namedtuple("QualityPolicy", ["max_height", "max_bitrate", "prefer_codec", "target_size"])):
+    """
+    Plafonds de qualité d'un téléchargement
+
+    Attributs:
+        max_height: Définition maximale en lignes (480 pour du 480p)
+        max_bitrate: Débit total maximal, vidéo + audio, en kbit/s
+        prefer_codec: Codec vidéo préféré à définition égale (voir VIDEO_CODECS)
+        target_size: Taille maximale estimée du segment téléchargé, en octets
+    """
+    __slots__ = ()
+
+    def __new__(cls, max_height=None, max_bitrate=None, prefer_codec=None, target_size=None):
+        if prefer_codec is not None:
+            family = codec_family(prefer_codec)
+            if family not in VIDEO_CODECS:
+                raise ValueError(f"Codec inconnu : {prefer_codec} (choix : {', '.join(VIDEO_CODECS)})")
+            prefer_codec = family
+        for name, value in (("max_height", max_height), ("max_bitrate", max_bitrate), ("target_size", target_size)):
+            if value is not None and value <= 0:
+                raise ValueError(f"{name} doit être positif")
+        return super().__new__(cls, max_height, max_bitrate, prefer_codec, target_size)
+
+    def __str__(self):
+        return ",".join(f"{name}={value}" for name, value in self._asdict().items() if value is not None)
+
+    @property
+    def key(self):
+        """Identifiant stable de la politique (clé du cache d'extraits et des demandes identiques)"""
+        return f"quality:{self}"
+
+    def _combinations(self, formats):
+        videos = [f for f in formats if _has_video(f) and f.get('format_id')]
+        audios = [f for f in formats if not _has_video(f) and _has_audio(f) and f.get('format_id')]
+        combos = [(v,) for v in videos if _has_audio(v)]
+        combos += [(v, a) for v in videos if not _has_audio(v) for a in audios]
+        # Vidéo sans aucune piste audio séparée, ou piste audio seule
+        return combos or [(f,) for f in videos or audios]
+
+    def select(self, formats, seconds, duration=None):
+        """
+        Choisit les formats d'un segment
+
+        Args:
+            formats: Formats de l'info dict yt-dlp (info['formats'])
+            seconds: Durée du segment à télécharger
+            duration: Durée de la vidéo (pour les formats sans débit annoncé)
+
+        Returns:
+            Selection: Formats retenus et estimation des octets du segment
+
+        Raises:
+            ValueError: Si aucun format ne respecte les plafonds
+        """
+        best = None
+        for combo in self._combinations(formats):
+            rates = [_bitrate(f, duration) for f in combo]
+            bitrate = sum(rates) if None not in rates else None
+            estimated = bitrate * 125 * seconds if bitrate is not None else None
+            height = max(f.get('height') or 0 for f in combo)
+            if self.max_height and not 0 < height <= self.max_height:
+                continue
+            if self.max_bitrate and (bitrate is None or bitrate > self.max_bitrate):
+                continue
+            if self.target_size and (estimated is None or estimated > self.target_size):
+                continue
+            families = [codec_family(f.get(key)) for f in combo for key in ('vcodec', 'acodec')]
+            families = [family for family in families if family]
+            video_family = codec_family(combo[0].get('vcodec'))
+            rank = (
+                -height,
+                bool(self.prefer_codec) and video_family != self.prefer_codec,
+                not all(f.get('protocol') in ('http', 'https') for f in combo),
+                not all(family in MP4_CODECS for family in families),
+                estimated if estimated is not None else float('inf'),
+            )
+            if best is None or rank < best[0]:
+                best = (rank, Selection("+".join(f['format_id'] for f in combo), list(combo), height or None,
+                                        bitrate, round(estimated) if estimated is not None else None))
+        if best is None:
+            raise ValueError(f"Aucun format ne respecte la politique de qualité ({self})")
+        return best[1]
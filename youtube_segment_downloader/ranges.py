@@ -0,0 +1,467 @@
+"""
+Téléchargement HTTP par plages d'octets sur plusieurs connexions
+
+YouTube limite le débit de chaque connexion bien en dessous de la bande
+passante disponible. Un petit proxy local s'intercale entre ffmpeg et le
+serveur d'origine : chaque lecture de ffmpeg est découpée en morceaux
+récupérés en parallèle (requêtes Range), puis renvoyés dans l'ordre.
+
+Un Spool peut garder sur disque les octets reçus d'une URL : après une
+interruption, ils sont relus localement au lieu d'être retéléchargés.
+"""
+
+import http.client
+import os
+import re
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from .throttle import Attempt, Backoff, parse_retry_after
+
+
+CHUNK_SIZE = 1024 * 1024
+DEFAULT_RETRIES = 10
+TIMEOUT = 30
+
+_backoff = Backoff()
+
+_RANGE_RE = re.compile(r"bytes=(\d+)-(\d*)")
+_CONTENT_RANGE_RE = re.compile(r"bytes (\d+)-(\d+)/(\d+|\*)")
+
+
+class RangeNotSupported(Exception):
+    """Le serveur d'origine ignore l'en-tête Range"""
+
+
+def _retryable(error):
+    if isinstance(error, urllib.error.HTTPError):
+        return error.code >= 500 or error.code == 429
+    return isinstance(error, (OSError, http.client.HTTPException))
+
+
+def fetch_range(url, start, end, headers=None, retries=DEFAULT_RETRIES, timeout=TIMEOUT, limiter=None):
+    """
+    Télécharge les octets [start, end] d'une URL, en reprenant là où la
+    connexion s'est arrêtée en cas d'erreur.
+
+    Les nouvelles tentatives attendent un délai exponentiel avec gigue (au
+    moins le Retry-After du serveur).
+
+    Args:
+        url: URL d'origine
+        start: Premier octet
+        end: Dernier octet (inclus)
+        headers: En-têtes HTTP à transmettre
+        retries: Nombre de nouvelles tentatives pour ce morceau
+        timeout: Délai d'inactivité d'une connexion (secondes)
+        limiter: throttle.RateLimiter qui cadence les requêtes et le débit
+            (None : aucune limite)
+
+    Returns:
+        tuple: (octets reçus, taille totale de la ressource ou None)
+
+    Raises:
+        RangeNotSupported: Si le serveur ne répond pas en 206
+        urllib.error.HTTPError: Erreur HTTP définitive (403, 416...)
+    """
+    data = bytearray()
+    total = None
+    attempt = 0
+    while True:
+        request = urllib.request.Request(url, headers=dict(headers or {}))
+        request.add_header("Range", f"bytes={start + len(data)}-{end}")
+        with limiter.request(url) if limiter is not None else _unlimited() as outcome:
+            try:
+                with urllib.request.urlopen(request, timeout=timeout) as response:
+                    outcome.status = response.status
+                    if response.status != 206:
+                        raise RangeNotSupported(f"Le serveur ne gère pas les requêtes Range (HTTP {response.status})")
+                    match = _CONTENT_RANGE_RE.match(response.headers.get("Content-Range") or "")
+                    if match and match.group(3) != "*":
+                        total = int(match.group(3))
+                    while True:
+                        block = response.read(64 * 1024)
+                        if not block:
+                            break
+                        data += block
+                        outcome.received(len(block))
+                expected = end - start + 1 if total is None else min(end + 1, total) - start
+                if len(data) >= expected:
+                    return bytes(data[:expected]), total
+                error = http.client.IncompleteRead(bytes(data), expected - len(data))
+            except Exception as e:
+                if isinstance(e, urllib.error.HTTPError):
+                    outcome.status = e.code
+                    outcome.retry_after = parse_retry_after(e.headers.get("Retry-After"))
+                if not _retryable(e):
+                    raise
+                error = e
+        attempt += 1
+        if attempt > retries:
+            raise error
+        time.sleep(_backoff.delay(attempt - 1, outcome.retry_after))
+
+
+@contextmanager
+def _unlimited():
+    yield Attempt()
+
+
+def merge_intervals(intervals):
+    """
+    Fusionne des intervalles d'octets inclusifs qui se chevauchent ou se touchent
+
+    Returns:
+        list: Intervalles [début, fin] triés et disjoints
+    """
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+class Spool:
+    """
+    Copie sur disque des octets reçus d'une URL, relue au lieu du réseau.
+
+    Le fichier est creux : chaque morceau est écrit à sa position et les
+    intervalles complets sont tenus dans `intervals`. Les données sont
+    synchronisées sur disque avant l'appel de `on_write`, qui peut donc
+    enregistrer les intervalles sans risquer d'annoncer des octets perdus
+    par un arrêt brutal. L'objet peut être partagé entre threads.
+    """
+
+    def __init__(self, path, intervals=(), total=None, on_write=None):
+        """
+        Args:
+            path: Fichier de la copie (créé à la première écriture)
+            intervals: Intervalles [début, fin] déjà présents dans le fichier
+            total: Taille de la ressource, si connue
+            on_write: Fonction appelée avec le Spool après chaque écriture
+        """
+        self.path = Path(path)
+        self.intervals = merge_intervals(intervals)
+        self.total = total
+        self._on_write = on_write
+        self._lock = threading.Lock()
+        # Intervalles (début, fin) en cours de téléchargement -> Event levé à
+        # leur arrivée : un lecteur qui en chevauche un l'attend puis relit
+        # la copie, au lieu de télécharger ces octets une seconde fois
+        self._fetching = {}
+
+    @property
+    def bytes(self):
+        """Octets présents dans la copie"""
+        with self._lock:
+            return sum(end - start + 1 for start, end in self.intervals)
+
+    def plan(self, start, end):
+        """
+        Découpe [start, end] (tronqué à la fin de la ressource) en morceaux
+        présents ou absents de la copie
+
+        Returns:
+            list: (début, fin, présent) dans l'ordre
+        """
+        with self._lock:
+            if self.total is not None:
+                end = min(end, self.total - 1)
+            pieces = []
+            offset = start
+            for first, last in self.intervals:
+                if offset > end or first > end:
+                    break
+                if last < offset:
+                    continue
+                if first > offset:
+                    pieces.append((offset, first - 1, False))
+                    offset = first
+                stop = min(last, end)
+                pieces.append((offset, stop, True))
+                offset = stop + 1
+            if offset <= end:
+                pieces.append((offset, end, False))
+        return pieces
+
+    def read(self, start, end):
+        """
+        Octets [start, end] (tronqués à la fin de la ressource)
+
+        Returns:
+            bytes: Données, ou None si elles ne sont pas toutes dans la copie
+        """
+        with self._lock:
+            if self.total is not None:
+                end = min(end, self.total - 1)
+            if start > end or not any(s <= start and end <= e for s, e in self.intervals):
+                return None
+            try:
+                with open(self.path, "rb") as f:
+                    f.seek(start)
+                    data = f.read(end - start + 1)
+            except OSError:
+                return None
+        return data if len(data) == end - start + 1 else None
+
+    def claim(self, start, end):
+        """
+        Réserve [start, end] pour un lecteur qui va le chercher à l'origine
+
+        Returns:
+            threading.Event: None si l'appelant a réservé la plage (à libérer
+            avec release) ; sinon l'événement à attendre avant de redécouper
+            la plage (déjà levé si une partie en est arrivée entre-temps)
+        """
+        with self._lock:
+            for (first, last), done in self._fetching.items():
+                if first <= end and start <= last:
+                    return done
+            if any(first <= end and start <= last for first, last in self.intervals):
+                done = threading.Event()
+                done.set()
+                return done
+            self._fetching[(start, end)] = threading.Event()
+        return None
+
+    def release(self, start, end):
+        """Libère une plage réservée par claim, écrite ou non"""
+        with self._lock:
+            done = self._fetching.pop((start, end))
+        done.set()
+
+    def write(self, start, data, total=None):
+        """Ajoute les octets reçus à partir de `start`"""
+        if not data:
+            return
+        with self._lock:
+            if total is not None and self.total is not None and total != self.total:
+                # La ressource a changé de taille : ce n'est plus la même, la copie est périmée
+                self.intervals = []
+            if total is not None:
+                self.total = total
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "r+b" if self.path.exists() else "w+b") as f:
+                f.seek(start)
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            self.intervals = merge_intervals(self.intervals + [[start, start + len(data) - 1]])
+            if self._on_write:
+                self._on_write(self)
+
+
+class _Source:
+    def __init__(self, url, headers, connections, spool=None):
+        self.url = url
+        self.headers = dict(headers or {})
+        self.connections = connections
+        self.spool = spool
+        self.closed = False
+        # Octets renvoyés au client (ffmpeg)
+        self.sent_bytes = 0
+
+
+class _ProxyHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.proxy._serve(self)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class RangeProxy:
+    """
+    Proxy HTTP local qui sert chaque URL enregistrée en la récupérant par
+    morceaux sur plusieurs connexions en parallèle.
+
+    Les morceaux sont lus en avance sur le client (ffmpeg), au plus
+    `connections` à la fois, et la fenêtre ne s'élargit qu'au fil des
+    lectures séquentielles : un saut (lecture de l'index, seek) ne coûte
+    qu'un morceau.
+    """
+
+    def __init__(self, chunk_size=CHUNK_SIZE, retries=DEFAULT_RETRIES, limiter=None):
+        """
+        Args:
+            chunk_size: Taille des morceaux demandés au serveur d'origine
+            retries: Nombre de nouvelles tentatives par morceau
+            limiter: throttle.RateLimiter partagé qui cadence les requêtes
+                vers l'origine et plafonne le débit (None : aucune limite)
+        """
+        self.chunk_size = chunk_size
+        self.retries = retries
+        self.limiter = limiter
+        self._sources = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _ProxyHandler)
+        self._server.daemon_threads = True
+        self._server.proxy = self
+        self._thread = threading.Thread(target=self._server.serve_forever, name="range-proxy", daemon=True)
+        self._thread.start()
+
+    def register(self, url, headers=None, connections=4, spool=None):
+        """
+        Enregistre une URL d'origine
+
+        Args:
+            url: URL d'origine
+            headers: En-têtes HTTP à utiliser vers l'origine
+            connections: Nombre de connexions simultanées pour cette URL
+            spool: Spool où garder les octets reçus et où relire ceux déjà
+                reçus (None : aucune copie)
+
+        Returns:
+            str: URL locale à donner à ffmpeg
+        """
+        token = uuid.uuid4().hex
+        with self._lock:
+            self._sources[token] = _Source(url, headers, max(1, connections), spool)
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/{token}"
+
+    def unregister(self, local_url):
+        """
+        Retire une URL locale et coupe les lectures encore en cours
+
+        Returns:
+            int: Octets servis pour cette URL (0 si elle est inconnue)
+        """
+        with self._lock:
+            source = self._sources.pop(local_url.rsplit("/", 1)[-1], None)
+        if source is None:
+            return 0
+        source.closed = True
+        return source.sent_bytes
+
+    def _serve(self, handler):
+        with self._lock:
+            source = self._sources.get(handler.path.lstrip("/"))
+        if source is None:
+            handler.send_error(404)
+            return
+
+        match = _RANGE_RE.match(handler.headers.get("Range") or "")
+        start = int(match.group(1)) if match else 0
+        end = int(match.group(2)) if match and match.group(2) else None
+
+        # Premier morceau en direct : il donne la taille totale
+        first_end = start + self.chunk_size - 1
+        if end is not None:
+            first_end = min(first_end, end)
+        try:
+            first, total = self._fetch(source, start, first_end)
+        except urllib.error.HTTPError as e:
+            handler.send_error(e.code)
+            return
+        except Exception:
+            handler.send_error(502)
+            return
+        if source.closed:
+            handler.send_error(404)
+            return
+
+        last = start + len(first) - 1
+        if total is not None:
+            last = total - 1 if end is None else min(end, total - 1)
+        handler.send_response(206 if match else 200)
+        handler.send_header("Content-Type", "application/octet-stream")
+        handler.send_header("Accept-Ranges", "bytes")
+        handler.send_header("Content-Length", str(last - start + 1))
+        if match:
+            handler.send_header("Content-Range", f"bytes {start}-{last}/{total if total is not None else '*'}")
+        handler.end_headers()
+
+        try:
+            handler.wfile.write(first)
+            source.sent_bytes += len(first)
+            self._stream(source, handler.wfile, start + len(first), last)
+        except (BrokenPipeError, ConnectionResetError):
+            # ffmpeg a fermé la connexion (seek ou fin du segment)
+            pass
+        except Exception:
+            # Morceau perdu malgré les nouvelles tentatives : la connexion est
+            # fermée, ffmpeg voit une réponse tronquée et signale l'échec
+            handler.close_connection = True
+
+    def _fetch(self, source, start, end):
+        """
+        Morceau [start, end] : ce qui est dans la copie locale y est relu, le reste vient de l'origine
+
+        Chaque trou est réservé (Spool.claim) le temps de son téléchargement :
+        des trous disjoints arrivent en parallèle, et un lecteur dont la
+        plage chevauche un trou déjà demandé attend son arrivée puis
+        redécoupe la plage pour relire la copie.
+        """
+        spool = source.spool
+        pieces = spool.plan(start, end) if spool is not None else []
+        if not pieces:
+            return fetch_range(source.url, start, end, source.headers, self.retries, limiter=self.limiter)
+        data = bytearray()
+        total = spool.total
+        for first, last, local in pieces:
+            block = spool.read(first, last) if local else None
+            if block is None and not local:
+                busy = spool.claim(first, last)
+                if busy is not None:
+                    busy.wait()
+                    block, total = self._fetch(source, first, last)
+                else:
+                    try:
+                        block, total = fetch_range(source.url, first, last, source.headers, self.retries,
+                                                   limiter=self.limiter)
+                        spool.write(first, block, total)
+                    finally:
+                        spool.release(first, last)
+            elif block is None:
+                # Copie illisible : ces octets sont redemandés sans réservation
+                block, total = fetch_range(source.url, first, last, source.headers, self.retries,
+                                           limiter=self.limiter)
+                spool.write(first, block, total)
+            data += block
+            if len(block) < last - first + 1:
+                # Fin de la ressource atteinte
+                break
+        return bytes(data), total
+
+    def _stream(self, source, out, offset, last):
+        """Envoie [offset, last] dans l'ordre, `source.connections` morceaux en vol au plus"""
+        pool = ThreadPoolExecutor(max_workers=source.connections)
+        pending = deque()
+        sent = 0
+        try:
+            while (offset <= last or pending) and not source.closed:
+                window = min(source.connections, sent + 1)
+                while offset <= last and len(pending) < window:
+                    chunk_end = min(offset + self.chunk_size - 1, last)
+                    pending.append(pool.submit(self._fetch, source, offset, chunk_end))
+                    offset = chunk_end + 1
+                future = pending.popleft()
+                while True:
+                    try:
+                        data, _ = future.result(timeout=0.2)
+                        break
+                    except TimeoutError:
+                        if source.closed:
+                            return
+                out.write(data)
+                source.sent_bytes += len(data)
+                sent += 1
+        finally:
+            for future in pending:
+                future.cancel()
+            pool.shutdown(wait=False)
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
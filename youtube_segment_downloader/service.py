@@ -0,0 +1,686 @@
+"""
+Mode service : API HTTP/JSON locale devant un pool de workers chauds
+
+Les segments soumis sont placés dans une file et exécutés par un pool de
+threads qui partagent une même session (ffmpeg vérifié, yt-dlp chargé et
+instances YoutubeDL réutilisées) : aucune requête ne paie le démarrage
+d'un processus. La progression de chaque job est diffusée en Server-Sent
+Events et les métriques du service sont exposées au format OpenMetrics.
+
+Routes :
+    POST   /jobs              soumet un segment (objet JSON, mêmes clés que
+                              les manifestes batch, plus les options
+                              cut_mode, engine, parallel_ranges, use_cache
+                              et quality)
+    GET    /jobs              liste des jobs
+    GET    /jobs/<id>         état et résultat d'un job
+    DELETE /jobs/<id>         annule un job en attente ou en cours
+    GET    /jobs/<id>/events  progression en Server-Sent Events
+    GET    /metrics           métriques OpenMetrics
+    GET    /health            état du service
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .batch import _ErrorCollector, _make_job
+from .cancel import CancelToken
+from .downloader import CUT_MODES, ENGINES, SegmentDownloader, _load_yt_dlp, time_to_seconds, validate_url
+from .events import PhaseFinished, PhaseStarted, Progress
+from .quality import QualityPolicy
+
+
+DEFAULT_PORT = 8787
+# États d'un job du service
+SERVICE_STATES = ("queued", "running", "done", "failed", "cancelled")
+# Bornes (secondes) des histogrammes de durée
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+# Fenêtre (secondes) du débit instantané
+THROUGHPUT_WINDOW = 10.0
+# Intervalle des commentaires de maintien de connexion des flux SSE
+KEEPALIVE_SECONDS = 15.0
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+_EVENT_NAMES = {PhaseStarted: "phase_started", PhaseFinished: "phase_finished", Progress: "progress"}
+_MAX_BODY = 64 * 1024
+
+
+class _Histogram:
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+        self.counts[index] += 1
+        self.sum += value
+
+    def samples(self, name, labels=""):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            cumulative += count
+            le = bound if bound == "+Inf" else float(bound)
+            lines.append(f'{name}_bucket{{{labels}{"," if labels else ""}le="{le}"}} {cumulative}')
+        suffix = f"{{{labels}}}" if labels else ""
+        lines.append(f"{name}_count{suffix} {cumulative}")
+        lines.append(f"{name}_sum{suffix} {round(self.sum, 6)}")
+        return lines
+
+
+class ServiceMetrics:
+    """
+    Compteurs et histogrammes du service, rendus au format OpenMetrics.
+
+    L'objet peut être partagé entre threads.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS, window=THROUGHPUT_WINDOW, clock=time.monotonic):
+        """
+        Args:
+            buckets: Bornes des histogrammes de durée (secondes)
+            window: Fenêtre du débit instantané (secondes)
+            clock: Horloge monotone (remplaçable pour les tests)
+        """
+        self.buckets = tuple(buckets)
+        self.window = window
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._submitted = 0
+        self._finished = {state: 0 for state in SERVICE_STATES[2:]}
+        self._bytes = 0
+        self._recent = deque()
+        self._phases = {}
+        self._jobs = _Histogram(self.buckets)
+        self._waits = _Histogram(self.buckets)
+
+    def submitted(self):
+        with self._lock:
+            self._submitted += 1
+
+    def add_bytes(self, nbytes):
+        """Compte des octets reçus de l'origine"""
+        if nbytes <= 0:
+            return
+        with self._lock:
+            self._bytes += nbytes
+            self._recent.append((self._clock(), nbytes))
+
+    def throughput(self):
+        """
+        Returns:
+            float: Débit moyen (octets/s) sur la fenêtre écoulée
+        """
+        with self._lock:
+            return self._throughput()
+
+    def _throughput(self):
+        limit = self._clock() - self.window
+        while self._recent and self._recent[0][0] < limit:
+            self._recent.popleft()
+        return sum(n for _, n in self._recent) / self.window
+
+    def observe_phase(self, phase, seconds):
+        with self._lock:
+            histogram = self._phases.get(phase)
+            if histogram is None:
+                histogram = self._phases[phase] = _Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    def observe_wait(self, seconds):
+        """Temps passé par un job dans la file"""
+        with self._lock:
+            self._waits.observe(seconds)
+
+    def observe_job(self, state, seconds):
+        """Job terminé dans l'état `state` après `seconds` secondes d'exécution"""
+        with self._lock:
+            self._finished[state] += 1
+            self._jobs.observe(seconds)
+
+    def render(self, queue_depth, active_jobs, workers):
+        """
+        Texte OpenMetrics (terminé par "# EOF")
+
+        Args:
+            queue_depth: Jobs en attente d'un worker
+            active_jobs: Jobs en cours d'exécution
+            workers: Taille du pool
+        """
+        with self._lock:
+            lines = [
+                "# TYPE yt_segment_queue_depth gauge",
+                "# HELP yt_segment_queue_depth Jobs en attente d'un worker",
+                f"yt_segment_queue_depth {queue_depth}",
+                "# TYPE yt_segment_active_jobs gauge",
+                "# HELP yt_segment_active_jobs Jobs en cours d'exécution",
+                f"yt_segment_active_jobs {active_jobs}",
+                "# TYPE yt_segment_workers gauge",
+                "# HELP yt_segment_workers Taille du pool de workers",
+                f"yt_segment_workers {workers}",
+                "# TYPE yt_segment_jobs_submitted counter",
+                "# HELP yt_segment_jobs_submitted Jobs acceptés",
+                f"yt_segment_jobs_submitted_total {self._submitted}",
+                "# TYPE yt_segment_jobs_finished counter",
+                "# HELP yt_segment_jobs_finished Jobs terminés, par état final",
+            ]
+            lines += [f'yt_segment_jobs_finished_total{{state="{state}"}} {count}'
+                      for state, count in self._finished.items()]
+            lines += [
+                "# TYPE yt_segment_downloaded_bytes counter",
+                "# HELP yt_segment_downloaded_bytes Octets reçus des serveurs d'origine",
+                f"yt_segment_downloaded_bytes_total {self._bytes}",
+                "# TYPE yt_segment_download_throughput_bytes_per_second gauge",
+                f"# HELP yt_segment_download_throughput_bytes_per_second Débit moyen sur {self.window:g} s",
+                f"yt_segment_download_throughput_bytes_per_second {round(self._throughput(), 1)}",
+                "# TYPE yt_segment_phase_duration_seconds histogram",
+                "# UNIT yt_segment_phase_duration_seconds seconds",
+                "# HELP yt_segment_phase_duration_seconds Durée de chaque phase des téléchargements",
+            ]
+            for phase in sorted(self._phases):
+                lines += self._phases[phase].samples("yt_segment_phase_duration_seconds", f'phase="{phase}"')
+            lines += [
+                "# TYPE yt_segment_job_duration_seconds histogram",
+                "# UNIT yt_segment_job_duration_seconds seconds",
+                "# HELP yt_segment_job_duration_seconds Durée d'exécution des jobs (file exclue)",
+            ]
+            lines += self._jobs.samples("yt_segment_job_duration_seconds")
+            lines += [
+                "# TYPE yt_segment_queue_wait_seconds histogram",
+                "# UNIT yt_segment_queue_wait_seconds seconds",
+                "# HELP yt_segment_queue_wait_seconds Attente des jobs dans la file",
+            ]
+            lines += self._waits.samples("yt_segment_queue_wait_seconds")
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+class ServiceJob:
+    """Job du service : segment demandé, état, résultat et journal d'événements"""
+
+    def __init__(self, job_id, url, start_time, end_time, output_file, options):
+        self.id = job_id
+        self.url = url
+        self.start_time = start_time
+        self.end_time = end_time
+        self.output_file = output_file
+        self.options = options
+        self.state = "queued"
+        self.error = None
+        self.result = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.cancel_token = CancelToken()
+        self._monotonic = time.monotonic()
+        self._events = []
+        self._sequence = 0
+        self._changed = threading.Condition()
+        # Octets déjà comptés pour la phase download en cours (voir JobService._on_event)
+        self._counted = 0
+        self._last_downloaded = 0
+
+    @property
+    def terminal(self):
+        return self.state in SERVICE_STATES[2:]
+
+    def emit(self, name, data):
+        """
+        Ajoute un événement au journal du job
+
+        Une progression remplace la précédente si rien ne s'est passé
+        entre-temps : le journal reste court et un client qui arrive en
+        retard ne rejoue que le dernier état.
+        """
+        with self._changed:
+            self._sequence += 1
+            event = (self._sequence, name, dict(data, t=round(time.monotonic() - self._monotonic, 3)))
+            if name == "progress" and self._events and self._events[-1][1] == "progress":
+                self._events[-1] = event
+            else:
+                self._events.append(event)
+            self._changed.notify_all()
+
+    def events(self, after=0, timeout=None):
+        """
+        Événements postérieurs au numéro `after`, en attendant au plus
+        `timeout` secondes qu'il y en ait
+
+        Returns:
+            tuple: (liste de (numéro, nom, données), job terminé)
+        """
+        with self._changed:
+            self._changed.wait_for(lambda: self._sequence > after or self.terminal, timeout)
+            return [e for e in self._events if e[0] > after], self.terminal
+
+    def to_dict(self):
+        """Représentation sérialisable en JSON"""
+        return {
+            "id": self.id,
+            "url": self.url,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "output_file": self.output_file,
+            "options": {name: value._asdict() if isinstance(value, QualityPolicy) else value
+                        for name, value in self.options.items()},
+            "state": self.state,
+            "error": self.error,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+            "result": self.result.to_dict() if self.result is not None else None,
+        }
+
+
+class JobService:
+    """
+    File de segments exécutée par un pool de workers chauds.
+
+    Exemple:
+        with JobService(workers=4, output_dir="clips") as service:
+            job = service.submit({"url": url, "start": "1:00", "end": "1:30", "cut_mode": "keyframe"})
+            ...
+            print(service.get(job.id).state)
+    """
+
+    def __init__(self, session=None, workers=4, output_dir=None, max_queue=None, history=1000):
+        """
+        Args:
+            session: SegmentDownloader à utiliser (par défaut une session
+                dédiée de `workers` instances, fermée avec le service)
+            workers: Nombre de téléchargements simultanés
+            output_dir: Répertoire des fichiers produits ; les sorties
+                demandées sont relatives à ce répertoire et ne peuvent pas
+                en sortir (répertoire courant par défaut)
+            max_queue: Nombre maximal de jobs en attente (None : illimité)
+            history: Nombre de jobs terminés gardés en mémoire
+        """
+        if workers < 1:
+            raise ValueError("Le nombre de workers doit être au moins 1")
+        self.workers = workers
+        self.output_dir = os.path.abspath(output_dir or os.getcwd())
+        self.max_queue = max_queue
+        self.history = history
+        self.metrics = ServiceMetrics()
+        self._own_session = session is None
+        self.session = SegmentDownloader(max_instances=workers) if session is None else session
+        self._pool = ThreadPoolExecutor(workers, thread_name_prefix="yt-segment-service")
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict()
+        self._next_id = 1
+        self._queued = 0
+        self._active = 0
+        self._closed = False
+
+    def warm(self):
+        """
+        Charge yt-dlp et vérifie ffmpeg avant la première requête
+
+        Raises:
+            RuntimeError: Si ffmpeg est introuvable ou inutilisable
+        """
+        _load_yt_dlp()
+        return self.session.ffmpeg
+
+    def _output_path(self, output_file):
+        path = os.path.abspath(os.path.join(self.output_dir, output_file))
+        if os.path.commonpath([path, self.output_dir]) != self.output_dir:
+            raise ValueError(f"Sortie hors du répertoire du service : {output_file}")
+        return path
+
+    def _options(self, request):
+        options = {}
+        cut_mode = request.get("cut_mode", "precise")
+        if cut_mode not in CUT_MODES:
+            raise ValueError(f"cut_mode invalide : {cut_mode} (attendu {', '.join(CUT_MODES)})")
+        options["cut_mode"] = cut_mode
+        engine = request.get("engine", "ytdlp")
+        if engine not in ENGINES:
+            raise ValueError(f"engine invalide : {engine} (attendu {', '.join(ENGINES)})")
+        options["engine"] = engine
+        parallel_ranges = request.get("parallel_ranges", 1)
+        if not isinstance(parallel_ranges, int) or isinstance(parallel_ranges, bool) or parallel_ranges < 1:
+            raise ValueError("parallel_ranges doit être un entier supérieur ou égal à 1")
+        options["parallel_ranges"] = parallel_ranges
+        options["use_cache"] = bool(request.get("use_cache", True))
+        quality = request.get("quality")
+        if quality is not None:
+            if not isinstance(quality, dict):
+                raise ValueError("quality doit être un objet (max_height, max_bitrate, prefer_codec, target_size)")
+            try:
+                options["quality"] = QualityPolicy(**quality)
+            except TypeError:
+                raise ValueError(f"quality invalide : {json.dumps(quality)}") from None
+        return options
+
+    def submit(self, request):
+        """
+        Valide et met en file un segment
+
+        Args:
+            request: dict avec url, start, end, output (facultatif, relatif
+                à output_dir ; mêmes noms de clés que les manifestes batch)
+                et les options cut_mode, engine, parallel_ranges, use_cache,
+                quality (objet max_height, max_bitrate, prefer_codec,
+                target_size, voir quality.QualityPolicy)
+
+        Returns:
+            ServiceJob: Job créé, dans l'état "queued"
+
+        Raises:
+            ValueError: Si la demande est invalide
+            RuntimeError: Si le service est fermé ou la file pleine
+        """
+        if not isinstance(request, dict):
+            raise ValueError("Un objet JSON est attendu")
+        options = self._options(request)
+        with self._lock:
+            # Numéro réservé dès maintenant : il préfixe la sortie par défaut
+            job_id = self._next_id
+            self._next_id += 1
+        batch_job = _make_job(job_id, request, "requête")
+        validate_url(batch_job.url)
+        if time_to_seconds(batch_job.end_time) <= time_to_seconds(batch_job.start_time):
+            raise ValueError("La fin du segment doit être après son début")
+        output_file = self._output_path(batch_job.output_file)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Le service est arrêté")
+            if self.max_queue is not None and self._queued >= self.max_queue:
+                raise RuntimeError(f"File pleine ({self._queued} jobs en attente)")
+            job = ServiceJob(job_id, batch_job.url, batch_job.start_time, batch_job.end_time, output_file, options)
+            self._jobs[job_id] = job
+            self._queued += 1
+            self._forget_old()
+        self.metrics.submitted()
+        job.emit("state", {"state": job.state})
+        self._pool.submit(self._run, job)
+        return job
+
+    def _forget_old(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.terminal]
+        for job_id in finished[:max(0, len(finished) - self.history)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        """
+        Returns:
+            ServiceJob: Job, ou None s'il est inconnu (ou oublié)
+        """
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self):
+        """
+        Returns:
+            list[ServiceJob]: Jobs connus, par identifiant croissant
+        """
+        with self._lock:
+            return list(self._jobs.values())
+
+    def cancel(self, job_id):
+        """
+        Annule un job en attente ou en cours
+
+        Returns:
+            ServiceJob: Job, ou None s'il est inconnu
+        """
+        job = self.get(job_id)
+        if job is None:
+            return None
+        with self._lock:
+            queued = job.state == "queued"
+            if queued:
+                self._set_state(job, "cancelled")
+                self._queued -= 1
+        job.cancel_token.cancel()
+        if queued:
+            self.metrics.observe_job("cancelled", 0.0)
+            job.emit("state", {"state": job.state})
+        return job
+
+    @staticmethod
+    def _set_state(job, state):
+        with job._changed:
+            job.state = state
+            if state in SERVICE_STATES[2:]:
+                job.finished = time.time()
+            job._changed.notify_all()
+
+    def depth(self):
+        """
+        Returns:
+            tuple: (jobs en attente, jobs en cours)
+        """
+        with self._lock:
+            return self._queued, self._active
+
+    def render_metrics(self):
+        """Métriques du service au format OpenMetrics"""
+        queued, active = self.depth()
+        return self.metrics.render(queued, active, self.workers)
+
+    def _on_event(self, job, event):
+        if isinstance(event, PhaseStarted) and event.phase == "download":
+            job._counted = 0
+            job._last_downloaded = 0
+        elif isinstance(event, Progress) and event.downloaded_bytes is not None:
+            # Les compteurs repartent de zéro à chaque fichier (vidéo puis audio)
+            delta = event.downloaded_bytes - job._last_downloaded
+            delta = delta if delta >= 0 else event.downloaded_bytes
+            job._last_downloaded = event.downloaded_bytes
+            job._counted += delta
+            self.metrics.add_bytes(delta)
+        elif isinstance(event, PhaseFinished):
+            self.metrics.observe_phase(event.phase, event.elapsed)
+            if event.phase == "download":
+                # Octets mesurés par la phase mais absents de la progression
+                self.metrics.add_bytes(event.bytes - job._counted)
+        data = {key: value for key, value in event._asdict().items() if key != "time"}
+        job.emit(_EVENT_NAMES[type(event)], data)
+
+    def _run(self, job):
+        with self._lock:
+            if job.state != "queued":
+                return
+            self._queued -= 1
+            self._active += 1
+            self._set_state(job, "running")
+            job.started = time.time()
+        self.metrics.observe_wait(job.started - job.created)
+        job.emit("state", {"state": job.state})
+        collector = _ErrorCollector()
+        started = time.monotonic()
+        result = None
+        try:
+            os.makedirs(os.path.dirname(job.output_file), exist_ok=True)
+            result = self.session.download(job.url, job.start_time, job.end_time, job.output_file, verbose=False,
+                                           logger=collector, cancel=job.cancel_token,
+                                           on_event=lambda event: self._on_event(job, event), **job.options)
+            state = "done" if result else "cancelled" if result.cancelled else "failed"
+            error = None if result else result.error or collector.last_error or "échec du téléchargement"
+        except Exception as e:
+            state, error = "failed", str(e)
+        job.result = result
+        job.error = error
+        with self._lock:
+            self._active -= 1
+            self._set_state(job, state)
+        self.metrics.observe_job(state, time.monotonic() - started)
+        job.emit("state", {"state": state, "error": error})
+
+    def close(self):
+        """Annule les jobs en attente et en cours, attend les workers puis ferme la session dédiée"""
+        with self._lock:
+            self._closed = True
+            jobs = list(self._jobs.values())
+        for job in jobs:
+            if not job.terminal:
+                self.cancel(job.id)
+        self._pool.shutdown(wait=True)
+        if self._own_session:
+            self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "yt-segment"
+
+    def do_GET(self):
+        self.server.service_server._route(self, "GET")
+
+    def do_POST(self):
+        self.server.service_server._route(self, "POST")
+
+    def do_DELETE(self):
+        self.server.service_server._route(self, "DELETE")
+
+    def log_message(self, format, *args):
+        pass
+
+
+_JOB_PATH_RE = re.compile(r"/jobs/(\d+)(/events)?$")
+
+
+class ServiceServer:
+    """
+    Serveur HTTP de l'API d'un JobService, démarré dans un thread.
+
+    Exemple:
+        with JobService(workers=4) as service, ServiceServer(service, port=8787) as server:
+            print(server.url)
+            ...
+    """
+
+    def __init__(self, service, host="127.0.0.1", port=DEFAULT_PORT, keepalive=KEEPALIVE_SECONDS):
+        """
+        Args:
+            service: JobService exposé
+            host: Adresse d'écoute
+            port: Port d'écoute (0 : port libre choisi par le système)
+            keepalive: Intervalle des commentaires envoyés sur un flux SSE
+                inactif (secondes)
+        """
+        self.service = service
+        self.keepalive = keepalive
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.service_server = self
+        self._thread = threading.Thread(target=self._server.serve_forever, name="yt-segment-service", daemon=True)
+        self._thread.start()
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @staticmethod
+    def _send(handler, status, body, content_type="application/json; charset=utf-8"):
+        if not isinstance(body, bytes):
+            body = (json.dumps(body, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+        handler.send_response(status)
+        handler.send_header("Content-Type", content_type)
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def _route(self, handler, method):
+        path = handler.path.split("?", 1)[0].rstrip("/") or "/"
+        match = _JOB_PATH_RE.match(path)
+        try:
+            if path == "/jobs" and method == "POST":
+                self._submit(handler)
+            elif path == "/jobs" and method == "GET":
+                self._send(handler, 200, {"jobs": [job.to_dict() for job in self.service.jobs()]})
+            elif match and not match.group(2) and method in ("GET", "DELETE"):
+                job_id = int(match.group(1))
+                job = self.service.get(job_id) if method == "GET" else self.service.cancel(job_id)
+                if job is None:
+                    self._send(handler, 404, {"error": f"Job inconnu : {job_id}"})
+                else:
+                    self._send(handler, 200, job.to_dict())
+            elif match and method == "GET":
+                self._events(handler, int(match.group(1)))
+            elif path == "/metrics" and method == "GET":
+                self._send(handler, 200, self.service.render_metrics().encode("utf-8"), OPENMETRICS_CONTENT_TYPE)
+            elif path == "/health" and method == "GET":
+                queued, active = self.service.depth()
+                self._send(handler, 200, {"status": "ok", "queued": queued, "active": active,
+                                          "workers": self.service.workers})
+            else:
+                self._send(handler, 404 if method == "GET" else 405, {"error": f"{method} {path} non pris en charge"})
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _submit(self, handler):
+        length = int(handler.headers.get("Content-Length") or 0)
+        if length > _MAX_BODY:
+            self._send(handler, 413, {"error": "Requête trop volumineuse"})
+            return
+        try:
+            request = json.loads(handler.rfile.read(length) or b"null")
+            job = self.service.submit(request)
+        except (ValueError, UnicodeDecodeError) as e:
+            self._send(handler, 400, {"error": str(e)})
+            return
+        except RuntimeError as e:
+            self._send(handler, 503, {"error": str(e)})
+            return
+        handler.send_response(202)
+        body = (json.dumps(job.to_dict(), ensure_ascii=False) + "\n").encode("utf-8")
+        handler.send_header("Location", f"/jobs/{job.id}")
+        handler.send_header("Content-Type", "application/json; charset=utf-8")
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def _events(self, handler, job_id):
+        """Flux SSE : rejoue le journal du job (après Last-Event-ID) puis suit ses événements"""
+        job = self.service.get(job_id)
+        if job is None:
+            self._send(handler, 404, {"error": f"Job inconnu : {job_id}"})
+            return
+        try:
+            after = int(handler.headers.get("Last-Event-ID") or 0)
+        except ValueError:
+            after = 0
+        handler.send_response(200)
+        handler.send_header("Content-Type", "text/event-stream; charset=utf-8")
+        handler.send_header("Cache-Control", "no-cache")
+        handler.end_headers()
+        while True:
+            events, terminal = job.events(after, self.keepalive)
+            if not events and not terminal:
+                handler.wfile.write(b": keepalive\n\n")
+            for sequence, name, data in events:
+                payload = json.dumps(data, ensure_ascii=False, default=str)
+                handler.wfile.write(f"id: {sequence}\nevent: {name}\ndata: {payload}\n\n".encode("utf-8"))
+                after = sequence
+            handler.wfile.flush()
+            if terminal and not events:
+                break
+        payload = json.dumps(job.to_dict(), ensure_ascii=False, default=str)
+        handler.wfile.write(f"event: result\ndata: {payload}\n\n".encode("utf-8"))
+        handler.wfile.flush()
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,165 @@
+"""
+Regroupement des demandes identiques simultanées (single-flight)
+
+Quand plusieurs appelants demandent le même travail pendant qu'il est en
+cours, un seul l'exécute (le meneur) ; les autres s'y rattachent, reçoivent
+ses événements au fil de l'eau, puis leur propre version de son résultat,
+préparée par le meneur avant qu'il ne rende la main.
+"""
+
+import threading
+
+
+class _Waiter:
+    """Appelant rattaché à un travail en cours"""
+
+    def __init__(self, output_file, on_event, progress_hook):
+        self.output_file = output_file
+        self.on_event = on_event
+        self.progress_hook = progress_hook
+        self.done = threading.Event()
+        self.result = None
+
+
+class Flight:
+    """Travail en cours et appelants qui l'attendent"""
+
+    def __init__(self, key, on_event=None, progress_hook=None):
+        self.key = key
+        self._leader = _Waiter(None, on_event, progress_hook)
+        self._lock = threading.Lock()
+        self._waiters = []
+        self._closed = False
+
+    @property
+    def waiters(self):
+        """Nombre d'appelants rattachés (meneur exclu)"""
+        with self._lock:
+            return len(self._waiters)
+
+    def _subscribers(self):
+        with self._lock:
+            return [self._leader] + self._waiters
+
+    def emit(self, event):
+        """Diffuse un événement (voir events.Recorder) au meneur et aux appelants rattachés"""
+        for waiter in self._subscribers():
+            if waiter.on_event:
+                waiter.on_event(event)
+
+    def progress(self, d):
+        """Diffuse un dictionnaire de progression yt-dlp à tous les progress_hook"""
+        for waiter in self._subscribers():
+            if waiter.progress_hook:
+                waiter.progress_hook(d)
+
+    def _attach(self, waiter):
+        with self._lock:
+            if self._closed:
+                return False
+            self._waiters.append(waiter)
+            return True
+
+    def _detach(self, waiter):
+        with self._lock:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def _close(self):
+        with self._lock:
+            self._closed = True
+            waiters, self._waiters = self._waiters, []
+        return waiters
+
+
+class SingleFlight:
+    """
+    Table des travaux en cours, indexés par clé.
+
+    Exemple:
+        flight, waiter = flights.join(key, sortie, on_event, progress_hook)
+        if waiter is None:
+            résultat = travail(on_event=flight.emit, progress_hook=flight.progress)
+            flights.complete(flight, lambda waiter: copie(résultat, waiter.output_file))
+        else:
+            résultat = flights.wait(flight, waiter)
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+
+    def join(self, key, output_file=None, on_event=None, progress_hook=None):
+        """
+        Se rattache au travail en cours pour `key`, ou en devient le meneur
+
+        Args:
+            key: Clé hachable identifiant le travail
+            output_file: Destination propre à l'appelant (transmise à la
+                fonction de partage de complete)
+            on_event: Fonction appelée avec chaque événement du travail
+            progress_hook: Fonction appelée avec chaque progression yt-dlp
+
+        Returns:
+            tuple: (Flight, waiter) ; waiter vaut None si l'appelant est le
+            meneur et doit exécuter le travail
+        """
+        waiter = _Waiter(output_file, on_event, progress_hook)
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None and flight._attach(waiter):
+                return flight, waiter
+            flight = self._flights[key] = Flight(key, on_event, progress_hook)
+            return flight, None
+
+    def complete(self, flight, share):
+        """
+        Termine le travail du meneur et donne leur résultat aux appelants rattachés
+
+        Les demandes suivantes pour la même clé démarrent un nouveau travail.
+
+        Args:
+            flight: Flight retourné par join au meneur
+            share: Fonction appelée avec chaque waiter (son `output_file`) et
+                qui retourne son résultat ; None pour qu'il recommence (le
+                travail du meneur a été annulé)
+        """
+        with self._lock:
+            if self._flights.get(flight.key) is flight:
+                del self._flights[flight.key]
+        for waiter in flight._close():
+            try:
+                waiter.result = share(waiter)
+            except Exception:
+                # L'appelant recommencera de son côté
+                waiter.result = None
+            finally:
+                waiter.done.set()
+
+    def wait(self, flight, waiter, cancel=None):
+        """
+        Attend le résultat d'un appelant rattaché
+
+        Args:
+            flight: Flight retourné par join
+            waiter: Waiter retourné par join
+            cancel: CancelToken de l'appelant : l'annuler le détache du
+                travail, qui continue pour les autres
+
+        Returns:
+            Résultat préparé par la fonction de partage (None si l'appelant
+            doit recommencer ou a été annulé)
+        """
+        unregister = cancel.register(waiter.done.set) if cancel is not None else None
+        try:
+            waiter.done.wait()
+        finally:
+            if unregister:
+                unregister()
+        if waiter.result is None and cancel is not None and cancel.cancelled:
+            flight._detach(waiter)
+        return waiter.result
+
+    def __len__(self):
+        with self._lock:
+            return len(self._flights)
@@ -0,0 +1,366 @@
+"""
+Limitation adaptative des requêtes HTTP vers les serveurs de médias
+
+Un RateLimiter est partagé par tous les téléchargements du processus (voir
+default_limiter). Pour chaque hôte, il combine :
+  - un seau à jetons qui espace les requêtes ;
+  - une fenêtre de requêtes simultanées ajustée en AIMD : elle grandit
+    d'environ une requête par fenêtre réussie et est divisée par deux sur
+    un 429, une erreur 5xx ou une réponse anormalement lente (flux bridé) ;
+  - une pause jusqu'à l'échéance d'un en-tête Retry-After.
+Les nouvelles tentatives attendent un délai exponentiel avec gigue (voir
+Backoff) et un plafond de débit global peut s'appliquer à tous les flux.
+"""
+
+import email.utils
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+
+DEFAULT_REQUESTS_PER_SECOND = 20
+DEFAULT_CONCURRENCY = 4
+MAX_CONCURRENCY = 16
+MIN_REQUESTS_PER_SECOND = 0.5
+# Deux réductions d'un même hôte sont espacées d'au moins cette durée : les
+# 429 des requêtes déjà parties ne divisent la fenêtre qu'une fois
+DECREASE_COOLDOWN = 1.0
+# Une réponse d'au moins SLOW_SAMPLE_BYTES dont le débit tombe sous
+# SLOW_RATIO fois la moyenne de l'hôte compte comme un flux bridé
+SLOW_SAMPLE_BYTES = 256 * 1024
+SLOW_RATIO = 0.2
+
+
+def parse_rate(value):
+    """
+    Convertit un débit en octets par seconde
+
+    Args:
+        value: Nombre d'octets/s, éventuellement suffixé par K, M ou G
+            ("500K", "8M") ; None ou "0" pour un débit illimité
+
+    Returns:
+        float: Octets par seconde (None si illimité)
+
+    Raises:
+        ValueError: Si la valeur est invalide
+    """
+    if value is None:
+        return None
+    match = re.match(r"^(\d+(?:\.\d+)?)([KMG]?)$", str(value).strip().upper())
+    if not match:
+        raise ValueError(f"Débit invalide : {value}")
+    rate = float(match.group(1)) * {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}[match.group(2)]
+    return rate or None
+
+
+def parse_retry_after(value, now=None):
+    """
+    Délai imposé par un en-tête Retry-After
+
+    Args:
+        value: Nombre de secondes ou date HTTP
+        now: Horodatage Unix de référence (maintenant par défaut)
+
+    Returns:
+        float: Secondes à attendre (None si l'en-tête est absent ou invalide)
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        date = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if date is None:
+        return None
+    return max(0.0, date.timestamp() - (time.time() if now is None else now))
+
+
+class TokenBucket:
+    """
+    Seau à jetons thread-safe : `rate` jetons par seconde, au plus `burst`
+    en réserve. Une demande plus grosse que la réserve est servie à crédit
+    et les suivantes attendent d'autant : le débit moyen reste exact.
+    """
+
+    def __init__(self, rate, burst=None, clock=time.monotonic, sleep=time.sleep):
+        """
+        Args:
+            rate: Jetons par seconde
+            burst: Réserve maximale (`rate` par défaut : une seconde)
+            clock: Horloge monotone (remplaçable pour les tests)
+            sleep: Fonction d'attente (remplaçable pour les tests)
+        """
+        if rate <= 0:
+            raise ValueError("Le débit doit être positif")
+        self.rate = rate
+        self.burst = rate if burst is None else burst
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = self.burst
+        self._updated = clock()
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def set_rate(self, rate):
+        """Change le débit ; les jetons déjà accumulés sont conservés"""
+        if rate <= 0:
+            raise ValueError("Le débit doit être positif")
+        with self._lock:
+            self._refill(self._clock())
+            self.rate = rate
+
+    def reserve(self, amount=1):
+        """
+        Prélève `amount` jetons sans attendre
+
+        Returns:
+            float: Secondes à attendre avant de pouvoir s'en servir
+        """
+        with self._lock:
+            self._refill(self._clock())
+            self._tokens -= amount
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def acquire(self, amount=1):
+        """
+        Prélève `amount` jetons, en attendant si la réserve est à découvert
+
+        Returns:
+            float: Secondes attendues
+        """
+        delay = self.reserve(amount)
+        if delay > 0:
+            self._sleep(delay)
+        return delay
+
+
+class Backoff:
+    """
+    Délais exponentiels à gigue complète : tirés uniformément entre 0 et
+    min(cap, base × 2^n), pour que des clients bridés ensemble ne
+    reviennent pas ensemble.
+
+    Utilisable tel quel dans l'option retry_sleep_functions de yt-dlp.
+    """
+
+    def __init__(self, base=0.5, cap=30.0, rng=None):
+        """
+        Args:
+            base: Borne du premier délai (secondes)
+            cap: Borne maximale d'un délai (secondes)
+            rng: Générateur aléatoire (random.Random ; remplaçable pour les tests)
+        """
+        self.base = base
+        self.cap = cap
+        self._rng = rng or random.Random()
+
+    def delay(self, attempt, retry_after=None):
+        """
+        Args:
+            attempt: Numéro de la nouvelle tentative (0 pour la première)
+            retry_after: Délai imposé par le serveur, respecté au minimum
+
+        Returns:
+            float: Secondes à attendre
+        """
+        delay = self._rng.uniform(0, min(self.cap, self.base * 2 ** attempt))
+        return max(delay, retry_after or 0.0)
+
+    def __call__(self, n):
+        return self.delay(n)
+
+
+class Attempt:
+    """
+    Issue d'une requête, renseignée par l'appelant pendant le bloc
+    RateLimiter.request (status, octets reçus, Retry-After)
+    """
+
+    def __init__(self, bandwidth=None):
+        self.status = None
+        self.retry_after = None
+        self.nbytes = 0
+        # Temps passé à attendre le plafond de débit, exclu de la mesure du débit
+        self.throttled_seconds = 0.0
+        self._bandwidth = bandwidth
+
+    def received(self, nbytes):
+        """Compte `nbytes` reçus et applique le plafond de débit global"""
+        self.nbytes += nbytes
+        if self._bandwidth is not None:
+            self.throttled_seconds += self._bandwidth.acquire(nbytes)
+
+
+class _Host:
+    def __init__(self, rate, concurrency, clock):
+        self.bucket = TokenBucket(rate, clock=clock)
+        self.window = float(concurrency)
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self.last_decrease = None
+        # Débit moyen d'une réponse (moyenne mobile exponentielle, octets/s)
+        self.throughput = None
+        self.samples = 0
+        self.requests = 0
+        self.throttled = 0
+        self.slow = 0
+
+
+class RateLimiter:
+    """
+    Limiteur de requêtes partagé par tous les téléchargements d'un processus.
+
+    Exemple:
+        limiter = RateLimiter(max_bandwidth=parse_rate("5M"))
+        with limiter.request(url) as attempt:
+            response = urllib.request.urlopen(url)
+            attempt.status = response.status
+            for block in iter(lambda: response.read(65536), b""):
+                attempt.received(len(block))
+    """
+
+    def __init__(self, requests_per_second=DEFAULT_REQUESTS_PER_SECOND, concurrency=DEFAULT_CONCURRENCY,
+                 max_concurrency=MAX_CONCURRENCY, max_bandwidth=None, clock=time.monotonic):
+        """
+        Args:
+            requests_per_second: Débit de requêtes initial et maximal par hôte
+            concurrency: Requêtes simultanées initiales par hôte
+            max_concurrency: Requêtes simultanées maximales par hôte
+            max_bandwidth: Débit global maximal en octets/s (None : illimité)
+            clock: Horloge monotone (remplaçable pour les tests)
+        """
+        if requests_per_second <= 0 or concurrency < 1 or max_concurrency < concurrency:
+            raise ValueError("Limites de requêtes invalides")
+        self.requests_per_second = requests_per_second
+        self.concurrency = concurrency
+        self.max_concurrency = max_concurrency
+        self._clock = clock
+        self._cond = threading.Condition()
+        self._hosts = {}
+        self._bandwidth = None
+        self.set_max_bandwidth(max_bandwidth)
+
+    @property
+    def max_bandwidth(self):
+        """Débit global maximal en octets/s (None : illimité)"""
+        bandwidth = self._bandwidth
+        return bandwidth.rate if bandwidth is not None else None
+
+    def set_max_bandwidth(self, max_bandwidth):
+        """Fixe le plafond de débit global (None pour le retirer)"""
+        if max_bandwidth:
+            # Réserve d'un quart de seconde : pas de rafale au démarrage
+            self._bandwidth = TokenBucket(max_bandwidth, max(max_bandwidth / 4, 64 * 1024))
+        else:
+            self._bandwidth = None
+
+    def _host(self, url):
+        name = urlsplit(url).hostname or ""
+        with self._cond:
+            host = self._hosts.get(name)
+            if host is None:
+                host = self._hosts[name] = _Host(self.requests_per_second, self.concurrency, self._clock)
+            return host
+
+    @contextmanager
+    def request(self, url):
+        """
+        Attend le droit d'envoyer une requête vers l'hôte de `url` : fin
+        d'un éventuel Retry-After, place dans la fenêtre, puis jeton
+
+        Le bloc renseigne l'Attempt reçu ; son issue ajuste les limites de
+        l'hôte à la sortie du bloc.
+
+        Yields:
+            Attempt: Issue de la requête
+        """
+        host = self._host(url)
+        with self._cond:
+            while True:
+                wait = host.blocked_until - self._clock()
+                if wait <= 0 and host.in_flight < int(host.window):
+                    break
+                self._cond.wait(wait if wait > 0 else None)
+            host.in_flight += 1
+            host.requests += 1
+        attempt = Attempt(self._bandwidth)
+        started = self._clock()
+        try:
+            started += host.bucket.acquire()
+            yield attempt
+        finally:
+            with self._cond:
+                host.in_flight -= 1
+                self._record(host, attempt, self._clock() - started - attempt.throttled_seconds)
+                self._cond.notify_all()
+
+    def _record(self, host, attempt, elapsed):
+        status = attempt.status
+        if status is None:
+            # Erreur réseau sans réponse : aucune information sur la charge
+            return
+        if status == 429 or status >= 500:
+            host.throttled += 1
+            if attempt.retry_after:
+                host.blocked_until = max(host.blocked_until, self._clock() + attempt.retry_after)
+            self._decrease(host, rate=True)
+            return
+        if attempt.nbytes >= SLOW_SAMPLE_BYTES and elapsed > 0:
+            throughput = attempt.nbytes / elapsed
+            if host.samples >= 3 and throughput < SLOW_RATIO * host.throughput:
+                host.slow += 1
+                self._decrease(host, rate=False)
+                return
+            host.throughput = throughput if host.throughput is None else 0.8 * host.throughput + 0.2 * throughput
+            host.samples += 1
+        # Augmentation additive : +1 par fenêtre (et +1 requête/s par seconde) réussie
+        host.window = min(self.max_concurrency, host.window + 1 / host.window)
+        rate = host.bucket.rate
+        if rate < self.requests_per_second:
+            host.bucket.set_rate(min(self.requests_per_second, rate + 1 / rate))
+
+    def _decrease(self, host, rate):
+        now = self._clock()
+        if host.last_decrease is not None and now - host.last_decrease < DECREASE_COOLDOWN:
+            return
+        host.last_decrease = now
+        host.window = max(1.0, host.window / 2)
+        if rate:
+            host.bucket.set_rate(max(MIN_REQUESTS_PER_SECOND, host.bucket.rate / 2))
+
+    def stats(self):
+        """
+        État des hôtes contactés
+
+        Returns:
+            dict: Par hôte : requêtes, réponses 429/5xx, réponses bridées,
+            fenêtre de requêtes simultanées et débit de requêtes courants
+        """
+        with self._cond:
+            return {name: {"requests": host.requests, "throttled": host.throttled, "slow": host.slow,
+                           "concurrency": round(host.window, 2),
+                           "requests_per_second": round(host.bucket.rate, 2)}
+                    for name, host in self._hosts.items()}
+
+
+_default_limiter = None
+_default_limiter_lock = threading.Lock()
+
+
+def default_limiter():
+    """Retourne le RateLimiter partagé par les sessions du processus"""
+    global _default_limiter
+    with _default_limiter_lock:
+        if _default_limiter is None:
+            _default_limiter = RateLimiter()
+        return _default_limiter
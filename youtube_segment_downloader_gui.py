@@ -12,57 +12,424 @@ from pathlib import Path
 import sys
 import queue
 import time
+from collections import deque
+from itertools import groupby
 
 # Import du module de téléchargement
 try:
-    from youtube_segment_downloader import download_segment, validate_url, time_to_seconds
+    from youtube_segment_downloader import CancelToken, download_segment, validate_url, time_to_seconds
+    from youtube_segment_downloader.cache import default_cache_dir
+    from youtube_segment_downloader.downloader import get_default_session
 except ImportError:
     sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-    from youtube_segment_downloader import download_segment, validate_url, time_to_seconds
+    from youtube_segment_downloader import CancelToken, download_segment, validate_url, time_to_seconds
+    from youtube_segment_downloader.cache import default_cache_dir
+    from youtube_segment_downloader.downloader import get_default_session
+
+
+# Libellés des états d'un clip dans la file
+STATE_LABELS = {
+    'queued': "En attente",
+    'running': "En cours",
+    'done': "Terminé",
+    'failed': "Échec",
+    'cancelled': "Annulé",
+}
+FINISHED_STATES = ('done', 'failed', 'cancelled')
+
+# Couleurs des niveaux de log (un tag Tk par niveau, configuré une fois)
+LOG_COLORS = {'info': '#d4d4d4', 'success': '#4ec9b0', 'error': '#f44747', 'warning': '#d7ba7d'}
+# Lignes gardées dans le terminal de contrôle
+DEFAULT_LOG_LINES = 2000
+# Période de rafraîchissement de l'interface (ms)
+TICK_MS = 50
+# Messages lus au plus par tick : une rafale ne bloque pas la boucle Tk
+MAX_MESSAGES_PER_TICK = 5000
+
+
+def format_bytes(n):
+    """Taille lisible (o, Ko, Mo, Go)"""
+    for unit in ("o", "Ko", "Mo"):
+        if n < 1024:
+            return f"{n:.0f} {unit}" if unit == "o" else f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.2f} Go"
+
+
+def format_duration(seconds):
+    """Durée lisible (1 h 02 min, 3 min 05 s, 42 s)"""
+    seconds = int(round(seconds))
+    if seconds >= 3600:
+        return f"{seconds // 3600} h {seconds % 3600 // 60:02d} min"
+    if seconds >= 60:
+        return f"{seconds // 60} min {seconds % 60:02d} s"
+    return f"{seconds} s"
 
 
 class YtdlpLogger:
     """Interface de logging pour yt-dlp qui renvoie les messages à la GUI"""
-    def __init__(self, gui):
+    def __init__(self, gui, prefix=""):
         self.gui = gui
+        self.prefix = prefix
 
     def debug(self, msg):
         # On ne logue pas les messages de progression bruts s'ils sont gérés par le hook
         if not msg.startswith('[download]'):
-            self.gui.queue_log(f"DEBUG: {msg}", 'info')
+            self.gui.queue_log(f"{self.prefix}DEBUG: {msg}", 'info')
 
     def info(self, msg):
-        self.gui.queue_log(msg, 'info')
+        self.gui.queue_log(f"{self.prefix}{msg}", 'info')
 
     def warning(self, msg):
-        self.gui.queue_log(f"⚠️ {msg}", 'warning')
+        self.gui.queue_log(f"{self.prefix}⚠️ {msg}", 'warning')
 
     def error(self, msg):
-        self.gui.queue_log(f"❌ {msg}", 'error')
+        self.gui.queue_log(f"{self.prefix}❌ {msg}", 'error')
+
+
+class LogBuffer:
+    """
+    Journal borné du terminal de contrôle
+
+    Les lignes s'accumulent entre deux ticks et sont rendues en un seul
+    insert. Au-delà de `max_lines`, les plus anciennes quittent le widget
+    et sont écrites dans `spill_path` (réécrit à chaque session).
+    """
+
+    def __init__(self, max_lines=DEFAULT_LOG_LINES, spill_path=None):
+        """
+        Args:
+            max_lines: Nombre de lignes affichées au plus
+            spill_path: Fichier recevant les lignes sorties du widget
+                (None : elles sont perdues)
+        """
+        self.max_lines = max(1, max_lines)
+        self.spill_path = Path(spill_path) if spill_path else None
+        self.lines = deque()
+        self.pending = []
+        self.spilled = 0
+        self._spill = None
+
+    def append(self, message, level='info'):
+        # Une entrée par ligne de texte : trim compte alors des lignes du widget
+        prefix = f"[{time.strftime('%H:%M:%S')}] "
+        for i, line in enumerate(str(message).splitlines() or [""]):
+            self.pending.append((f"{prefix if i == 0 else ' ' * len(prefix)}{line}\n", level))
+
+    def flush(self):
+        """
+        Intègre les lignes en attente au journal
+
+        Returns:
+            tuple: (trim, lines) — nombre de lignes à retirer en tête du
+            widget, puis lignes (texte, niveau) à ajouter à la fin
+        """
+        pending, self.pending = self.pending, []
+        self.lines.extend(pending)
+        evicted = [self.lines.popleft() for _ in range(len(self.lines) - self.max_lines)]
+        self._write_spill(evicted)
+        # Les lignes d'une rafale plus longue que le journal ne sont jamais affichées
+        skipped = max(0, len(pending) - self.max_lines)
+        return len(evicted) - skipped, pending[skipped:]
+
+    def _write_spill(self, lines):
+        if not lines or self.spill_path is None:
+            return
+        try:
+            if self._spill is None:
+                self.spill_path.parent.mkdir(parents=True, exist_ok=True)
+                self._spill = open(self.spill_path, 'w', encoding='utf-8')
+            self._spill.writelines(text for text, _ in lines)
+            self._spill.flush()
+            self.spilled += len(lines)
+        except OSError:
+            # Disque plein ou fichier inaccessible : on perd ces lignes, pas l'interface
+            self.spill_path = None
+
+    def close(self):
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+
+
+class ClipJob:
+    """Clip de la file : segment demandé, état et progression"""
+
+    def __init__(self, job_id, url, start_time, end_time, output_file=None):
+        self.id = job_id
+        self.url = url
+        self.start_time = start_time
+        self.end_time = end_time
+        self.output_file = output_file
+        self.state = 'queued'
+        self.error = None
+        self.cancel_token = CancelToken()
+        # Octets reçus et attendus, cumulés sur les fichiers du clip (vidéo puis audio)
+        self.downloaded = 0
+        self.total = None
+        self.speed = None
+        self.started = None
+        self.finished = None
+        self._previous_files = 0
+
+    @property
+    def percent(self):
+        if self.state == 'done':
+            return 100.0
+        return min(100.0, 100.0 * self.downloaded / self.total) if self.total else 0.0
+
+    @property
+    def remaining_bytes(self):
+        return max(0, self.total - self.downloaded) if self.total else None
+
+    def on_progress(self, d):
+        """Met à jour la progression à partir d'un dictionnaire de progression yt-dlp"""
+        file_total = d.get('total_bytes') or d.get('total_bytes_estimate')
+        file_done = d.get('downloaded_bytes') or 0
+        if d.get('status') == 'finished':
+            self._previous_files += file_total or file_done
+            self.downloaded = self._previous_files
+            self.total = max(self.total or 0, self.downloaded)
+            self.speed = None
+            return
+        self.downloaded = self._previous_files + file_done
+        if file_total:
+            self.total = self._previous_files + file_total
+        self.speed = d.get('speed')
+
+
+class DownloadQueue:
+    """
+    File de clips exécutée par au plus `max_concurrent` threads.
+
+    Indépendante de Tk : chaque changement d'un clip est signalé en
+    déposant ('job', id) dans `post` (la msg_queue de la GUI), et
+    ('idle',) quand plus rien n'est en cours ni en attente. Tant que le
+    lecteur n'a pas appelé acknowledge(id), les changements suivants du
+    même clip ne redéposent rien : il lira l'état le plus récent.
+    """
+
+    def __init__(self, post, max_concurrent=3, download=None, logger_factory=None):
+        """
+        Args:
+            post: Fonction appelée avec chaque message (thread-safe)
+            max_concurrent: Nombre de téléchargements simultanés
+            download: Fonction de téléchargement (download_segment par défaut)
+            logger_factory: Fonction (clip) -> logger yt-dlp (optionnelle)
+        """
+        self.post = post
+        self.max_concurrent = max_concurrent
+        self.download = download or download_segment
+        self.logger_factory = logger_factory
+        self.jobs = []
+        self._next_id = 1
+        self._unread = set()
+        self._lock = threading.Lock()
+
+    def add(self, url, start_time, end_time, output_file=None):
+        """
+        Ajoute un clip en fin de file et le démarre si une place est libre
+
+        Sans sortie, le clip est nommé d'après son numéro dans la file et
+        ses bornes : deux vidéos coupées aux mêmes temps ne s'écrasent pas.
+        """
+        with self._lock:
+            if not output_file:
+                output_file = (f"segment_{self._next_id:04d}_{start_time.replace(':', '-')}_"
+                               f"{end_time.replace(':', '-')}.mp4")
+            job = ClipJob(self._next_id, url, start_time, end_time, output_file)
+            self._next_id += 1
+            self.jobs.append(job)
+        self._notify(job.id)
+        self._schedule()
+        return job
+
+    def acknowledge(self, job_id):
+        """Signale que le prochain changement du clip doit être redéposé"""
+        with self._lock:
+            self._unread.discard(job_id)
+
+    def _notify(self, job_id):
+        with self._lock:
+            if job_id in self._unread:
+                return
+            self._unread.add(job_id)
+        self.post(('job', job_id))
+
+    def get(self, job_id):
+        with self._lock:
+            return next((job for job in self.jobs if job.id == job_id), None)
+
+    def move(self, job_id, offset):
+        """
+        Déplace un clip dans la file (offset -1 : vers le haut)
+
+        Returns:
+            int: Nouvelle position, ou None si le clip est inconnu
+        """
+        with self._lock:
+            job = next((j for j in self.jobs if j.id == job_id), None)
+            if job is None:
+                return None
+            index = self.jobs.index(job)
+            target = max(0, min(len(self.jobs) - 1, index + offset))
+            self.jobs.insert(target, self.jobs.pop(index))
+            return target
+
+    def cancel(self, job_id):
+        """Annule un clip en attente (immédiatement) ou en cours (ffmpeg arrêté)"""
+        with self._lock:
+            job = next((j for j in self.jobs if j.id == job_id), None)
+            if job is None or job.state in FINISHED_STATES:
+                return
+            if job.state == 'queued':
+                job.state = 'cancelled'
+                job.finished = time.monotonic()
+        job.cancel_token.cancel()
+        self._notify(job.id)
+        self._schedule()
+
+    def cancel_all(self):
+        # Les clips en attente d'abord : une place libérée n'en démarre pas un
+        for job in sorted(self.jobs, key=lambda job: job.state != 'queued'):
+            self.cancel(job.id)
+
+    def remove(self, job_id):
+        """
+        Retire un clip terminé de la file
+
+        Returns:
+            bool: True si le clip a été retiré
+        """
+        with self._lock:
+            job = next((j for j in self.jobs if j.id == job_id), None)
+            if job is None or job.state not in FINISHED_STATES:
+                return False
+            self.jobs.remove(job)
+            return True
+
+    def set_concurrency(self, max_concurrent):
+        """Change le nombre de téléchargements simultanés (les clips en cours continuent)"""
+        self.max_concurrent = max(1, max_concurrent)
+        self._schedule()
+
+    def _schedule(self):
+        with self._lock:
+            running = sum(1 for job in self.jobs if job.state == 'running')
+            starting = []
+            for job in self.jobs:
+                if running >= self.max_concurrent:
+                    break
+                if job.state == 'queued':
+                    job.state = 'running'
+                    job.started = time.monotonic()
+                    starting.append(job)
+                    running += 1
+            idle = running == 0 and not any(job.state == 'queued' for job in self.jobs)
+        for job in starting:
+            self._notify(job.id)
+            threading.Thread(target=self._run, args=(job,), daemon=True).start()
+        if idle:
+            self.post(('idle',))
+
+    def _run(self, job):
+        def progress_hook(d):
+            job.on_progress(d)
+            self._notify(job.id)
+
+        try:
+            result = self.download(
+                url=job.url,
+                start_time=job.start_time,
+                end_time=job.end_time,
+                output_file=job.output_file,
+                verbose=True,
+                logger=self.logger_factory(job) if self.logger_factory else None,
+                progress_hook=progress_hook,
+                cancel=job.cancel_token
+            )
+            if result:
+                state, job.output_file = 'done', result.output_file or job.output_file
+            else:
+                state, job.error = ('cancelled' if result.cancelled else 'failed'), result.error
+        except Exception as e:
+            state, job.error = 'failed', str(e)
+        with self._lock:
+            job.state = state
+            job.speed = None
+            job.finished = time.monotonic()
+        self._notify(job.id)
+        self._schedule()
+
+    def totals(self):
+        """
+        Vue d'ensemble de la file
+
+        Le reste à télécharger des clips en attente est estimé d'après la
+        taille moyenne des clips dont la taille est connue.
+
+        Returns:
+            dict: Nombre de clips par état, débit total (octets/s) et
+            temps restant estimé (secondes, None si inconnu)
+        """
+        with self._lock:
+            jobs = list(self.jobs)
+        counts = {state: sum(1 for job in jobs if job.state == state) for state in STATE_LABELS}
+        running = [job for job in jobs if job.state == 'running']
+        bandwidth = sum(job.speed or 0 for job in running)
+        sizes = [job.total for job in jobs if job.total and job.state in ('running', 'done')]
+        remaining = sum(job.remaining_bytes or 0 for job in running)
+        if sizes:
+            remaining += counts['queued'] * sum(sizes) / len(sizes)
+        eta = remaining / bandwidth if bandwidth and remaining else None
+        return {"counts": counts, "bandwidth": bandwidth, "eta": eta}
 
 
 class YouTubeSegmentDownloaderGUI:
-    def __init__(self, root):
+    COLUMNS = (
+        ('segment', "Segment", 130),
+        ('output', "Sortie", 200),
+        ('state', "État", 90),
+        ('progress', "Progression", 150),
+        ('speed', "Débit", 90),
+        ('eta', "Reste", 80),
+    )
+
+    def __init__(self, root, log_lines=DEFAULT_LOG_LINES, log_file=None):
+        """
+        Args:
+            root: Fenêtre Tk
+            log_lines: Lignes gardées dans le terminal de contrôle
+            log_file: Fichier des lignes plus anciennes
+                (default_cache_dir()/gui.log par défaut)
+        """
         self.root = root
         self.root.title("YouTube Segment Downloader Pro")
-        self.root.geometry("650x650")
+        self.root.geometry("860x720")
         self.root.resizable(True, True)
         
         # File d'attente pour les messages (thread-safety)
         self.msg_queue = queue.Queue()
+        self.log = LogBuffer(log_lines, log_file or default_cache_dir() / "gui.log")
         
         # Variables
         self.url_var = tk.StringVar()
         self.start_time_var = tk.StringVar(value="0:00")
         self.end_time_var = tk.StringVar(value="1:00")
         self.output_file_var = tk.StringVar()
-        self.is_downloading = False
-        self.stop_requested = False
+        self.concurrency_var = tk.IntVar(value=3)
+        self.clip_cache_var = tk.BooleanVar(value=False)
+
+        # Clips dont l'issue a déjà été écrite dans le log
+        self.reported = set()
+        self.downloads = DownloadQueue(self.msg_queue.put, self.concurrency_var.get(),
+                                       logger_factory=lambda job: YtdlpLogger(self, f"#{job.id} "))
         
         self.create_widgets()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         
         # Démarrer la vérification de la queue
-        self.root.after(100, self.process_queue)
+        self.root.after(TICK_MS, self.process_queue)
         
     def create_widgets(self):
         # Configuration des colonnes
@@ -119,56 +486,84 @@ class YouTubeSegmentDownloaderGUI:
         browse_btn = ttk.Button(main_frame, text="📂 Parcourir", command=self.browse_output)
         browse_btn.grid(row=4, column=2, sticky=tk.W, padx=(5, 0), pady=5)
         
-        # Zone de progression et boutons d'action
+        # Ajout à la file et nombre de téléchargements simultanés
         action_frame = ttk.Frame(main_frame)
-        action_frame.grid(row=5, column=0, columnspan=3, sticky="we", pady=20)
+        action_frame.grid(row=5, column=0, columnspan=3, sticky="we", pady=(15, 10))
         action_frame.columnconfigure(0, weight=1)
-        action_frame.columnconfigure(1, weight=1)
 
         self.download_btn = ttk.Button(
             action_frame,
-            text="📥 Télécharger",
+            text="➕ Ajouter à la file",
             command=self.start_download,
             style="Large.TButton"
         )
         self.download_btn.grid(row=0, column=0, padx=5, sticky="we", ipady=5)
 
-        self.cancel_btn = ttk.Button(
-            action_frame,
-            text="🛑 Annuler",
-            command=self.cancel_download,
-            state="disabled"
-        )
-        self.cancel_btn.grid(row=0, column=1, padx=5, sticky="we", ipady=5)
+        ttk.Label(action_frame, text="Simultanés:", font=('Arial', 10)).grid(row=0, column=1, padx=(15, 5))
+        ttk.Spinbox(
+            action_frame, from_=1, to=8, width=4, textvariable=self.concurrency_var,
+            command=self.update_concurrency
+        ).grid(row=0, column=2)
+        ttk.Checkbutton(
+            action_frame, text="💾 Garder les extraits en cache", variable=self.clip_cache_var,
+            command=self.update_clip_cache
+        ).grid(row=0, column=3, padx=(15, 0))
 
-        # Barre de progression
-        self.progress_var = tk.DoubleVar()
-        self.progress_bar = ttk.Progressbar(
-            main_frame, 
-            variable=self.progress_var, 
-            maximum=100
+        # Table des clips
+        table_frame = ttk.Frame(main_frame)
+        table_frame.grid(row=6, column=0, columnspan=3, sticky="nsew")
+        table_frame.columnconfigure(0, weight=1)
+        table_frame.rowconfigure(0, weight=1)
+        main_frame.rowconfigure(6, weight=2)
+
+        self.job_table = ttk.Treeview(
+            table_frame,
+            columns=[name for name, _, _ in self.COLUMNS],
+            height=8,
+            selectmode='extended'
         )
-        self.progress_bar.grid(row=6, column=0, columnspan=3, sticky="we", pady=(0, 10))
+        self.job_table.heading('#0', text="#")
+        self.job_table.column('#0', width=40, stretch=False)
+        for name, label, width in self.COLUMNS:
+            self.job_table.heading(name, text=label)
+            self.job_table.column(name, width=width, stretch=name == 'output')
+        self.job_table.grid(row=0, column=0, sticky="nsew")
+        table_scroll = ttk.Scrollbar(table_frame, orient=tk.VERTICAL, command=self.job_table.yview)
+        table_scroll.grid(row=0, column=1, sticky="ns")
+        self.job_table['yscrollcommand'] = table_scroll.set
+        for state, color in (('done', '#2e7d32'), ('failed', '#c62828'), ('cancelled', '#ef6c00'),
+                             ('running', '#1565c0')):
+            self.job_table.tag_configure(state, foreground=color)
+
+        # Actions sur la sélection
+        table_actions = ttk.Frame(main_frame)
+        table_actions.grid(row=7, column=0, columnspan=3, sticky="we", pady=5)
+        for column, (label, command) in enumerate((
+                ("⬆️ Monter", lambda: self.move_selected(-1)),
+                ("⬇️ Descendre", lambda: self.move_selected(1)),
+                ("🛑 Annuler", self.cancel_download),
+                ("🧹 Retirer les terminés", self.remove_finished))):
+            ttk.Button(table_actions, text=label, command=command).grid(row=0, column=column, padx=5)
 
-        # Label de statut
+        # Pied : débit total et temps restant
         self.status_label = ttk.Label(
             main_frame, 
             text="Prêt",
             font=('Arial', 10, 'italic'),
             foreground='gray'
         )
-        self.status_label.grid(row=7, column=0, columnspan=3, pady=5)
+        self.status_label.grid(row=8, column=0, columnspan=3, pady=5)
         
         # Zone de log
         log_frame = ttk.LabelFrame(main_frame, text="Terminal de contrôle", padding="10")
-        log_frame.grid(row=8, column=0, columnspan=3, sticky="nsew", pady=10)
+        log_frame.grid(row=9, column=0, columnspan=3, sticky="nsew", pady=10)
         log_frame.columnconfigure(0, weight=1)
         log_frame.rowconfigure(0, weight=1)
-        main_frame.rowconfigure(8, weight=1)
+        main_frame.rowconfigure(9, weight=1)
         
         self.log_text = tk.Text(
             log_frame, 
-            height=12, 
+            height=8,
             width=70, 
             wrap=tk.WORD, 
             state='disabled', 
@@ -178,6 +573,8 @@ class YouTubeSegmentDownloaderGUI:
             insertbackground="white"
         )
         self.log_text.grid(row=0, column=0, sticky="nsew")
+        for level, color in LOG_COLORS.items():
+            self.log_text.tag_config(f'tag_{level}', foreground=color)
         
         scrollbar = ttk.Scrollbar(log_frame, orient=tk.VERTICAL, command=self.log_text.yview)
         scrollbar.grid(row=0, column=1, sticky="ns")
@@ -198,123 +595,187 @@ class YouTubeSegmentDownloaderGUI:
     def update_status(self, message, color='black'):
         self.msg_queue.put(('status', message, color))
 
-    def update_progress(self, percent):
-        self.msg_queue.put(('progress', percent))
-
     def process_queue(self):
+        # Une rafale de progressions d'un même clip ne met sa ligne à jour qu'une fois,
+        # une rafale de logs est rendue en un seul insert
+        changed = set()
+        status = None
+        idle = False
+        backlog = False
         try:
-            while True:
+            for _ in range(MAX_MESSAGES_PER_TICK):
                 task = self.msg_queue.get_nowait()
                 if task[0] == 'log':
-                    self._real_log(task[1], task[2])
+                    self.log.append(task[1], task[2])
                 elif task[0] == 'status':
-                    self._real_update_status(task[1], task[2])
-                elif task[0] == 'progress':
-                    self.progress_var.set(task[1])
+                    status = task[1:]
+                elif task[0] == 'job':
+                    changed.add(task[1])
+                elif task[0] == 'idle':
+                    idle = True
                 self.msg_queue.task_done()
+            backlog = True
         except queue.Empty:
             pass
         finally:
-            self.root.after(50, self.process_queue)
+            for job_id in changed:
+                # Avant la lecture : un changement ultérieur sera redéposé
+                self.downloads.acknowledge(job_id)
+                self._refresh_job(job_id)
+            if status:
+                self._real_update_status(*status)
+            if changed or idle:
+                self._refresh_footer(idle)
+            if idle:
+                self.update_clip_cache()
+            self._render_log()
+            # Reste des messages au prochain tour, après les événements Tk en attente
+            self.root.after(1 if backlog else TICK_MS, self.process_queue)
 
-    def _real_log(self, message, level='info'):
+    def _render_log(self):
+        trim, lines = self.log.flush()
+        if not trim and not lines:
+            return
+        # On ne suit la fin que si l'utilisateur n'a pas remonté le journal
+        follow = self.log_text.yview()[1] >= 1.0
         self.log_text.config(state='normal')
-        colors = {'info': '#d4d4d4', 'success': '#4ec9b0', 'error': '#f44747', 'warning': '#d7ba7d'}
-        tag = f'tag_{level}'
-        self.log_text.tag_config(tag, foreground=colors.get(level, '#d4d4d4'))
-        self.log_text.insert(tk.END, f"[{time.strftime('%H:%M:%S')}] {message}\n", tag)
-        self.log_text.see(tk.END)
+        if trim:
+            self.log_text.delete('1.0', f'{trim + 1}.0')
+        if lines:
+            chunks = []
+            for level, group in groupby(lines, key=lambda line: line[1]):
+                chunks += [''.join(text for text, _ in group), f'tag_{level}']
+            self.log_text.insert(tk.END, *chunks)
         self.log_text.config(state='disabled')
+        if follow:
+            self.log_text.see(tk.END)
         
     def _real_update_status(self, message, color='black'):
         self.status_label.config(text=message, foreground=color)
         
+    def _refresh_job(self, job_id):
+        """Met à jour la ligne d'un clip (créée au premier message)"""
+        job = self.downloads.get(job_id)
+        iid = str(job_id)
+        if job is None:
+            return
+        filled = int(job.percent / 10)
+        eta = job.remaining_bytes / job.speed if job.speed and job.remaining_bytes else None
+        values = (
+            f"{job.start_time} → {job.end_time}",
+            os.path.basename(job.output_file),
+            STATE_LABELS[job.state],
+            f"{'█' * filled}{'░' * (10 - filled)} {job.percent:.0f}%",
+            f"{format_bytes(job.speed)}/s" if job.speed else "",
+            format_duration(eta) if eta is not None else "",
+        )
+        if not self.job_table.exists(iid):
+            self.job_table.insert('', tk.END, iid=iid, text=str(job_id), values=values)
+        self.job_table.item(iid, values=values, tags=(job.state,))
+        if job.state in FINISHED_STATES and job_id not in self.reported:
+            self.reported.add(job_id)
+            if job.state == 'done':
+                self.log.append(f"#{job.id} ✅ Succès : {job.output_file}", 'success')
+            elif job.state == 'cancelled':
+                self.log.append(f"#{job.id} ℹ️ Téléchargement annulé.", 'warning')
+            else:
+                self.log.append(f"#{job.id} ❌ Échec : {job.error}", 'error')
+
+    def _refresh_footer(self, idle=False):
+        totals = self.downloads.totals()
+        counts = totals['counts']
+        parts = [f"{counts['running']} en cours", f"{counts['queued']} en attente",
+                 f"{counts['done']} terminé(s)"]
+        if counts['failed'] or counts['cancelled']:
+            parts.append(f"{counts['failed']} échec(s), {counts['cancelled']} annulé(s)")
+        if totals['bandwidth']:
+            parts.append(f"{format_bytes(totals['bandwidth'])}/s")
+        if totals['eta'] is not None:
+            parts.append(f"reste ~{format_duration(totals['eta'])}")
+        if idle and not counts['running'] and not counts['queued']:
+            self._real_update_status("File terminée — " + ", ".join(parts), 'green')
+        else:
+            self._real_update_status(" · ".join(parts), 'blue' if counts['running'] else 'gray')
+
     def validate_inputs(self):
-        if not self.url_var.get().strip():
+        url = self.url_var.get().strip()
+        if not url:
             messagebox.showerror("Erreur", "URL manquante")
             return False
+        try:
+            validate_url(url)
+            start, end = self.start_time_var.get().strip(), self.end_time_var.get().strip()
+            if time_to_seconds(end) <= time_to_seconds(start):
+                raise ValueError("Le temps de fin doit être après le temps de début")
+        except ValueError as e:
+            messagebox.showerror("Erreur", str(e))
+            return False
         return True
     
+    def _selected_ids(self):
+        return [int(iid) for iid in self.job_table.selection()]
+
+    def move_selected(self, offset):
+        """Monte ou descend les clips sélectionnés dans la file"""
+        ids = self._selected_ids()
+        for job_id in (ids if offset < 0 else reversed(ids)):
+            position = self.downloads.move(job_id, offset)
+            if position is not None:
+                self.job_table.move(str(job_id), '', position)
+
     def cancel_download(self):
-        if self.is_downloading:
-            self.stop_requested = True
-            self.queue_log("🛑 Demande d'annulation envoyée...", 'warning')
-            self.cancel_btn.config(state='disabled')
-
-    def progress_hook(self, d):
-        """Hook appelé par yt-dlp pour mettre à jour la progression"""
-        if self.stop_requested:
-            raise Exception("Téléchargement annulé par l'utilisateur")
-            
-        if d['status'] == 'downloading':
-            p = d.get('_percent_str', '0%').replace('%','')
-            try:
-                percent = float(p)
-                self.update_progress(percent)
-                self.update_status(f"Téléchargement : {percent}%", "blue")
-            except:
-                pass
-        elif d['status'] == 'finished':
-            self.update_progress(100)
-            self.update_status("Fusion et finalisation...", "purple")
+        ids = self._selected_ids()
+        if not ids:
+            messagebox.showinfo("Annuler", "Sélectionnez les clips à annuler dans la liste.")
+            return
+        for job_id in ids:
+            # Arrête ffmpeg immédiatement et supprime les fichiers partiels
+            self.downloads.cancel(job_id)
+        self.queue_log(f"🛑 Annulation demandée pour {len(ids)} clip(s)...", 'warning')
+
+    def remove_finished(self):
+        for job in list(self.downloads.jobs):
+            if self.downloads.remove(job.id):
+                self.job_table.delete(str(job.id))
+        self._refresh_footer()
+
+    def update_concurrency(self):
+        try:
+            self.downloads.set_concurrency(int(self.concurrency_var.get()))
+        except (tk.TclError, ValueError):
+            pass
+
+    def update_clip_cache(self):
+        # Activé tout de suite ; désactivé seulement quand plus aucun clip ne tourne
+        enabled = self.clip_cache_var.get()
+        counts = self.downloads.totals()['counts']
+        if enabled or not (counts['running'] or counts['queued']):
+            get_default_session().set_clip_cache(enabled)
 
     def start_download(self):
-        if self.is_downloading or not self.validate_inputs():
+        if not self.validate_inputs():
             return
+        self.update_concurrency()
+        start_time = self.start_time_var.get().strip()
+        end_time = self.end_time_var.get().strip()
+        job = self.downloads.add(
+            self.url_var.get().strip(),
+            start_time,
+            end_time,
+            self.output_file_var.get().strip() or None
+        )
+        self.queue_log(f"🚀 Clip #{job.id} ajouté (Segment: {start_time} - {end_time})", 'info')
+        # Le nom de sortie est propre à chaque clip
+        self.output_file_var.set("")
         
-        self.is_downloading = True
-        self.stop_requested = False
-        self.download_btn.config(state='disabled')
-        self.cancel_btn.config(state='normal')
-        self.progress_var.set(0)
-        
-        # Nettoyage logs
-        self.log_text.config(state='normal')
-        self.log_text.delete('1.0', tk.END)
-        self.log_text.config(state='disabled')
-        
-        threading.Thread(target=self.download_thread, daemon=True).start()
-    
-    def download_thread(self):
-        try:
-            url = self.url_var.get().strip()
-            start_time = self.start_time_var.get().strip()
-            end_time = self.end_time_var.get().strip()
-            output_file = self.output_file_var.get().strip() or None
-            
-            self.queue_log(f"🚀 Initialisation (Segment: {start_time} - {end_time})", 'info')
-            
-            success = download_segment(
-                url=url,
-                start_time=start_time,
-                end_time=end_time,
-                output_file=output_file,
-                verbose=True,
-                logger=YtdlpLogger(self),
-                progress_hook=self.progress_hook
-            )
-            
-            if success:
-                self.queue_log(f"✅ Succès ! Fichier prêt.", 'success')
-                self.update_status("Terminé", "green")
-                messagebox.showinfo("Terminé", "Le téléchargement est réussi.")
-            else:
-                if not self.stop_requested:
-                    self.queue_log("❌ Échec du téléchargement.", "error")
-                    self.update_status("Erreur", "red")
-                
-        except Exception as e:
-            if "annulé" in str(e):
-                self.queue_log("ℹ️ Téléchargement annulé.", "warning")
-                self.update_status("Annulé", "orange")
-            else:
-                self.queue_log(f"🔥 Erreur : {str(e)}", 'error')
-                self.update_status("Échec critique", 'red')
-        
-        finally:
-            self.is_downloading = False
-            self.root.after(0, lambda: self.download_btn.config(state='normal'))
-            self.root.after(0, lambda: self.cancel_btn.config(state='disabled'))
+    def on_close(self):
+        counts = self.downloads.totals()['counts']
+        if counts['running'] or counts['queued']:
+            if not messagebox.askyesno("Quitter", "Des téléchargements sont en cours. Les annuler et quitter ?"):
+                return
+            self.downloads.cancel_all()
+        self.log.close()
+        self.root.destroy()
 
 
 def main():